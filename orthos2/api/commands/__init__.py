@@ -27,6 +27,7 @@ from orthos2.api.commands.add import (
     AddVMCommandGet,
     AddVMCommandPost,
 )
+from orthos2.api.commands.bulkimport import ImportCommand
 from orthos2.api.commands.dailytask import (
     ExecuteDailyTaskCommand,
     SwitchDailyTaskCommand,
@@ -77,8 +78,10 @@ from orthos2.api.commands.edit import (
     EditSingleTaskCommand,
     EditSystemCommand,
 )
+from orthos2.api.commands.export import ExportCommand
 from orthos2.api.commands.info import (
     ArchitectureInfoCommand,
+    BulkInfoCommand,
     DailyTaskInfoCommand,
     DeviceTypeInfoCommand,
     DomainArchitectureInfoCommand,
@@ -116,7 +119,10 @@ __all__ = [
     "DomainArchitectureInfoCommand",
     "DomainInfoCommand",
     "InfoCommand",
+    "BulkInfoCommand",
+    "ImportCommand",
     "QueryCommand",
+    "ExportCommand",
     "ReserveCommandGet",
     "ReserveCommandPost",
     "ReleaseCommand",
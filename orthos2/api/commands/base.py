@@ -1,7 +1,8 @@
 import linecache
 import sys
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
 
+from django.db.models import Model, Q, QuerySet
 from django.shortcuts import redirect  # type: ignore
 from django.urls import URLPattern
 from rest_framework.views import APIView
@@ -10,6 +11,8 @@ from orthos2.api.serializers.misc import SelectSerializer
 from orthos2.data.models import Machine, RemotePowerDevice
 from orthos2.data.models.enclosure import Enclosure
 
+M = TypeVar("M", bound=Model)
+
 
 def getException() -> str:
     """
@@ -35,46 +38,127 @@ def getException() -> str:
     )
 
 
-def get_machine(
-    fqdn: str,
-    redirect_to: str,
-    data: Optional[Any] = None,
-    redirect_key_replace: str = "fqdn",
-) -> Machine:
+def resolve_names(
+    queryset: "QuerySet[M]",
+    names: Iterable[str],
+    field: str = "fqdn",
+    hostname_field: Optional[str] = None,
+) -> Dict[str, List[M]]:
     """
-    Look up FQDN in the database and return one machine object if found or raise corresponding
-    exception if something went wrong.
+    Resolve one or more names to the matching objects of `queryset`.
 
-    The hostname is often sufficient for the lookup, so try the hostname (hostname + '.') first.
+    Exact matches on `field` and (if given) on the indexed `hostname_field` are looked up with
+    one query for all names. Only names which are still unresolved after that fall back to a
+    prefix match on `field`; a prefix ending at a dot (hostname + '.') wins over a plain prefix.
+
+    Return a dictionary which maps every name to its candidates: an empty list means that the
+    name does not exist, more than one candidate means that the name is ambiguous.
     """
-    if not fqdn:
-        raise ValueError("Requires <fqdn> argument!")
+    names = list(dict.fromkeys(name for name in names if name))
+    result: Dict[str, List[M]] = {name: [] for name in names}
+
+    if not names:
+        return result
+
+    query = Q(**{"{}__in".format(field): names})
+    if hostname_field:
+        query |= Q(**{"{}__in".format(hostname_field): names})
+    candidates = list(queryset.filter(query))
+
+    for name in names:
+        matches = [obj for obj in candidates if getattr(obj, field) == name]
+        if not matches and hostname_field:
+            matches = [
+                obj for obj in candidates if getattr(obj, hostname_field) == name
+            ]
+        result[name] = matches
+
+    unresolved = [name for name in names if not result[name]]
+    if not unresolved:
+        return result
+
+    query = Q()
+    for name in unresolved:
+        query |= Q(**{"{}__startswith".format(field): name})
+    candidates = list(queryset.filter(query))
+
+    for name in unresolved:
+        prefix = name.lower()
+        matches = [
+            obj for obj in candidates if getattr(obj, field).lower().startswith(prefix)
+        ]
+        dotted = [
+            obj
+            for obj in matches
+            if getattr(obj, field).lower().startswith(prefix + ".")
+        ]
+        result[name] = dotted if len(dotted) == 1 else matches
+
+    return result
 
-    try:
-        machines = [Machine.api.get(fqdn__startswith=fqdn + ".")]
-    except Exception:
-        machines = list(Machine.api.filter(fqdn__startswith=fqdn))
 
-    if len(machines) == 1:
-        machine = machines[0]
-    elif machines:
-        selection = SelectSerializer(machines, "Please specify:")
+def resolve_machines(names: Iterable[str]) -> Dict[str, List[Machine]]:
+    """Resolve FQDNs or hostnames of (active) machines, see `resolve_names()`."""
+    return resolve_names(
+        Machine.api.all(), names, field="fqdn", hostname_field="fqdn_hostname"
+    )
+
+
+def _select_one(
+    name: str,
+    matches: List[M],
+    field: str,
+    label: str,
+    redirect_to: str,
+    data: Optional[Any],
+    redirect_key_replace: str,
+) -> M:
+    """
+    Return the one object of `matches`, a selection if `name` is ambiguous or a redirect if
+    `name` was not the complete name of the object.
+    """
+    if len(matches) == 1:
+        obj = matches[0]
+    elif matches:
+        selection = SelectSerializer(matches, "Please specify:")
         return selection  # type: ignore
     else:
-        raise Exception("Machine '{}' does not exist!".format(fqdn))
+        raise Exception("{} '{}' does not exist!".format(label, name))
 
-    if fqdn != machine.fqdn:
+    if name != getattr(obj, field):
         response = redirect(redirect_to)
 
         if data:
             if redirect_key_replace is not None:  # type: ignore
                 data = data.copy()
-                data.__setitem__(redirect_key_replace, machine.fqdn)  # type: ignore
+                data.__setitem__(redirect_key_replace, getattr(obj, field))  # type: ignore
             response["Location"] += "?{}".format(data.urlencode())  # type: ignore
 
         return response  # type: ignore
 
-    return machine
+    return obj
+
+
+def get_machine(
+    fqdn: str,
+    redirect_to: str,
+    data: Optional[Any] = None,
+    redirect_key_replace: str = "fqdn",
+) -> Machine:
+    """
+    Look up FQDN in the database and return one machine object if found or raise corresponding
+    exception if something went wrong.
+
+    The hostname is often sufficient for the lookup, see `resolve_machines()`.
+    """
+    if not fqdn:
+        raise ValueError("Requires <fqdn> argument!")
+
+    machines = resolve_machines([fqdn])[fqdn]
+
+    return _select_one(
+        fqdn, machines, "fqdn", "Machine", redirect_to, data, redirect_key_replace
+    )
 
 
 def get_enclosure(
@@ -90,31 +174,11 @@ def get_enclosure(
     if not name:
         raise ValueError("Requires <name> argument!")
 
-    try:
-        enclosures = [Enclosure.api.get(name__startswith=name + ".")]
-    except Exception:
-        enclosures = list(Enclosure.api.filter(name__startswith=name))
-
-    if len(enclosures) == 1:
-        enclosure = enclosures[0]
-    elif enclosures:
-        selection = SelectSerializer(enclosures, "Please specify:")
-        return selection  # type: ignore
-    else:
-        raise Exception("Enclosure '{}' does not exist!".format(name))
-
-    if name != enclosure.name:
-        response = redirect(redirect_to)
-
-        if data:
-            if redirect_key_replace is not None:  # type: ignore
-                data = data.copy()
-                data.__setitem__(redirect_key_replace, enclosure.name)  # type: ignore
-            response["Location"] += "?{}".format(data.urlencode())  # type: ignore
+    enclosures = resolve_names(Enclosure.api.all(), [name], field="name")[name]
 
-        return response  # type: ignore
-
-    return enclosure
+    return _select_one(
+        name, enclosures, "name", "Enclosure", redirect_to, data, redirect_key_replace
+    )
 
 
 def get_remotepowerdevice(
@@ -130,35 +194,17 @@ def get_remotepowerdevice(
     if not fqdn:
         raise ValueError("Requires <name> argument!")
 
-    try:
-        remotepowerdevices = [
-            RemotePowerDevice.objects.get(fqdn__startswith=fqdn + ".")
-        ]
-    except Exception:
-        remotepowerdevices = list(
-            RemotePowerDevice.objects.filter(fqdn__startswith=fqdn)
-        )
-
-    if len(remotepowerdevices) == 1:
-        remotepowerdevice = remotepowerdevices[0]
-    elif remotepowerdevices:
-        selection = SelectSerializer(remotepowerdevices, "Please specify:")
-        return selection  # type: ignore
-    else:
-        raise Exception("Enclosure '{}' does not exist!".format(fqdn))
-
-    if fqdn != remotepowerdevice.fqdn:
-        response = redirect(redirect_to)
-
-        if data:
-            if redirect_key_replace is not None:  # type: ignore
-                data = data.copy()
-                data.__setitem__(redirect_key_replace, remotepowerdevice.fqdn)  # type: ignore
-            response["Location"] += "?{}".format(data.urlencode())  # type: ignore
-
-        return response  # type: ignore
+    remotepowerdevices = resolve_names(RemotePowerDevice.objects.all(), [fqdn])[fqdn]
 
-    return remotepowerdevice
+    return _select_one(
+        fqdn,
+        remotepowerdevices,
+        "fqdn",
+        "Remote power device",
+        redirect_to,
+        data,
+        redirect_key_replace,
+    )
 
 
 class BaseAPIView(APIView):
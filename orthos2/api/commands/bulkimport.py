@@ -0,0 +1,443 @@
+import csv
+import io
+import json
+import logging
+import re
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.urls import URLPattern, re_path
+from netaddr import IPAddress
+from rest_framework.request import Request
+
+from orthos2.api.commands.base import BaseAPIView
+from orthos2.api.forms import (
+    BMCAPIForm,
+    MachineAPIForm,
+    NetworkInterfaceAPIForm,
+    RemotePowerAPIForm,
+    SerialConsoleAPIForm,
+)
+from orthos2.api.serializers.misc import AuthRequiredSerializer, ErrorMessage, Message
+from orthos2.data.models import (
+    BMC,
+    Domain,
+    Enclosure,
+    Machine,
+    MachineSearchIndex,
+    NetworkInterface,
+    RemotePower,
+    SerialConsole,
+    System,
+)
+from orthos2.data.signals import (
+    signal_cobbler_regenerate,
+    signal_serialconsole_regenerate,
+)
+from orthos2.utils.misc import (
+    format_cli_form_errors,
+    get_domain,
+    get_hostname,
+    get_used_host_ips,
+    suggest_host_ip,
+)
+
+logger = logging.getLogger("api")
+
+
+class ManifestEntry:
+    """Validated but unsaved objects of one machine in an import manifest."""
+
+    def __init__(self, machine: Machine) -> None:
+        self.machine = machine
+        self.networkinterfaces: List[NetworkInterface] = []
+        self.bmc: Optional[BMC] = None
+        self.serialconsole: Optional[SerialConsole] = None
+        self.remotepower: Optional[RemotePower] = None
+
+
+class ImportCommand(BaseAPIView):
+
+    METHOD = "POST"
+    URL = "/import"
+    ARGUMENTS = (["manifest"],)
+
+    HELP_SHORT = "Add many machines including their sub-objects at once."
+    HELP = """Command to add machines together with their network interfaces, BMC, serial
+console and remote power with one request. Only superusers are allowed to import machines.
+
+The manifest is either JSON or CSV:
+
+  JSON: A list of machines. Each machine takes the fields of ADD MACHINE and optionally
+        'networkinterfaces' (list of ADD NETWORKINTERFACE forms), 'bmc', 'serialconsole' and
+        'remotepower' (the forms of the respective ADD commands).
+  CSV:  One machine per row. Sub-object columns are prefixed by the sub-object, e.g.
+        'bmc.fqdn' or 'serialconsole.stype'; 'networkinterfaces' holds additional MAC
+        addresses separated by spaces.
+
+Usage:
+    IMPORT <manifest>
+
+Example:
+    IMPORT rack42.json
+    IMPORT rack42.csv
+
+All machines are validated first; if one of them is invalid, nothing gets added.
+"""
+
+    SUBOBJECTS = ("networkinterfaces", "bmc", "serialconsole", "remotepower")
+
+    @staticmethod
+    def get_urls() -> List[URLPattern]:
+        return [
+            re_path(r"^import$", ImportCommand.as_view(), name="import"),
+        ]
+
+    @classmethod
+    def parse_manifest(cls, body: str, content_type: str) -> List[Dict[str, Any]]:
+        """Return the machine entries of a JSON or CSV manifest."""
+        if content_type.startswith("text/csv"):
+            manifest: List[Dict[str, Any]] = []
+            for row in csv.DictReader(io.StringIO(body)):
+                entry: Dict[str, Any] = {}
+                for key, value in row.items():
+                    # Surplus values of a row are collected under the key `None`
+                    if key is None or not isinstance(value, str) or not value.strip():
+                        continue
+                    key, value = key.strip(), value.strip()
+                    if key == "networkinterfaces":
+                        entry[key] = [{"mac_address": mac} for mac in value.split()]
+                    elif "." in key:
+                        subobject, field = key.split(".", 1)
+                        entry.setdefault(subobject, {})[field] = value
+                    else:
+                        entry[key] = value
+                manifest.append(entry)
+            return manifest
+
+        data = json.loads(body)
+        if isinstance(data, dict):
+            data = data.get("machines")
+        if not isinstance(data, list) or not all(
+            isinstance(entry, dict) for entry in data  # type: ignore
+        ):
+            raise ValueError("Expected a list of machines!")
+        return data  # type: ignore
+
+    def validate_entry(
+        self,
+        data: Dict[str, Any],
+        domains: Dict[str, Domain],
+        systems: Dict[int, System],
+        hypervisors: Dict[str, Machine],
+    ) -> Tuple[Optional[ManifestEntry], List[str]]:
+        """Validate one manifest entry and build its (unsaved) objects."""
+        form = MachineAPIForm(
+            {key: value for key, value in data.items() if key not in self.SUBOBJECTS}
+        )
+        if not form.is_valid():
+            return None, [format_cli_form_errors(form)]
+
+        cleaned_data = dict(form.cleaned_data)
+        mac_address = cleaned_data.pop("mac_address")
+        hypervisor_fqdn = cleaned_data.pop("hypervisor_fqdn")
+
+        # The same steps `Machine.save()` takes, which `bulk_create()` bypasses
+        machine = Machine(**cleaned_data)
+        machine.fqdn = machine.fqdn.lower()
+        machine.fqdn_hostname = get_hostname(machine.fqdn)
+        machine.system = systems[int(machine.system_id)]  # type: ignore
+
+        domain = domains.get(get_domain(machine.fqdn))
+        if domain is None:
+            return None, [
+                "* Domain '{}' does not exist!".format(get_domain(machine.fqdn))
+            ]
+        machine.fqdn_domain = domain
+
+        if hypervisor_fqdn:
+            if hypervisor_fqdn not in hypervisors:
+                return None, [
+                    "* Hypervisor [{}] does not exist".format(hypervisor_fqdn)
+                ]
+            machine.hypervisor = hypervisors[hypervisor_fqdn]
+
+        try:
+            machine.clean()
+        except ValidationError as e:
+            return None, ["* {}".format(message) for message in e.messages]
+
+        entry = ManifestEntry(machine)
+        errors: List[str] = []
+
+        if mac_address:
+            entry.networkinterfaces.append(
+                NetworkInterface(
+                    machine=machine, primary=True, mac_address=mac_address.upper()
+                )
+            )
+        for networkinterface_data in data.get("networkinterfaces", []):
+            networkinterface_form = NetworkInterfaceAPIForm(networkinterface_data)
+            if not networkinterface_form.is_valid():
+                errors.append(format_cli_form_errors(networkinterface_form))
+                continue
+            networkinterface = networkinterface_form.instance
+            networkinterface.machine = machine
+            networkinterface.primary = False
+            entry.networkinterfaces.append(networkinterface)
+
+        if "bmc" in data:
+            bmc_form = BMCAPIForm(data["bmc"], machine=machine)
+            if bmc_form.is_valid():
+                entry.bmc = BMC(machine=machine, **bmc_form.cleaned_data)
+            else:
+                errors.append(format_cli_form_errors(bmc_form))
+
+        if "serialconsole" in data:
+            serialconsole_form = SerialConsoleAPIForm(
+                data["serialconsole"], machine=machine
+            )
+            if serialconsole_form.is_valid():
+                serialconsole = SerialConsole(**serialconsole_form.cleaned_data)
+                try:
+                    serialconsole.rendered_command = serialconsole.get_command_record()
+                    entry.serialconsole = serialconsole
+                except ValueError as e:
+                    errors.append("* {}".format(e))
+            else:
+                errors.append(format_cli_form_errors(serialconsole_form))
+
+        remotepower = None
+        if "remotepower" in data:
+            remotepower_form = RemotePowerAPIForm(data["remotepower"], machine=machine)
+            if remotepower_form.is_valid():
+                remotepower = RemotePower(**remotepower_form.cleaned_data)
+            else:
+                errors.append(format_cli_form_errors(remotepower_form))
+        elif entry.bmc is not None and machine.bmc_allowed():
+            # Mirror `BMC.save()`, which adds a remote power using the BMC
+            remotepower = RemotePower(machine=machine)
+        if remotepower is not None:
+            try:
+                remotepower.normalize()
+                if remotepower.fence_agent is None:  # type: ignore
+                    raise ValidationError("No remote power type set!")
+                entry.remotepower = remotepower
+            except ValidationError as e:
+                errors.extend("* {}".format(message) for message in e.messages)
+            except (ObjectDoesNotExist, ValueError) as e:
+                errors.append("* {}".format(e))
+
+        return entry, errors
+
+    def validate(
+        self, manifest: List[Dict[str, Any]]
+    ) -> Tuple[List[ManifestEntry], List[str]]:
+        """
+        Validate all manifest entries.
+
+        Lookups shared by all entries are done once up front. Returns the entries and the
+        error messages per machine.
+        """
+        fqdns = [str(data.get("fqdn", "")).lower() for data in manifest]
+        domains = {
+            domain.name: domain
+            for domain in Domain.objects.select_related("cscreen_server").filter(
+                name__in={get_domain(fqdn) for fqdn in fqdns}
+            )
+        }
+        systems = System.objects.in_bulk()
+        hypervisors = {
+            machine.fqdn: machine
+            for machine in Machine.objects.filter(
+                fqdn__in={
+                    data["hypervisor_fqdn"]
+                    for data in manifest
+                    if data.get("hypervisor_fqdn")
+                }
+            )
+        }
+
+        entries: List[ManifestEntry] = []
+        errors: List[str] = []
+        seen_fqdns: Set[str] = set()
+        seen_macs: Set[str] = set()
+
+        for index, data in enumerate(manifest, start=1):
+            label = data.get("fqdn") or "#{}".format(index)
+            entry, entry_errors = self.validate_entry(
+                data, domains, systems, hypervisors
+            )
+
+            if entry is not None:
+                if entry.machine.fqdn in seen_fqdns:
+                    entry_errors.append("* FQDN is used more than once!")
+                seen_fqdns.add(entry.machine.fqdn)
+
+                macs = [
+                    networkinterface.mac_address
+                    for networkinterface in entry.networkinterfaces
+                ]
+                if entry.bmc is not None:
+                    macs.append(entry.bmc.mac.upper())
+                for mac in macs:
+                    if mac in seen_macs:
+                        entry_errors.append(
+                            "* MAC address '{}' is used more than once!".format(mac)
+                        )
+                    seen_macs.add(mac)
+
+            if entry_errors:
+                errors.append("{}:\n{}".format(label, "\n".join(entry_errors)))
+            elif entry is not None:
+                entries.append(entry)
+
+        return entries, errors
+
+    @staticmethod
+    def assign_enclosures(entries: List[ManifestEntry]) -> None:
+        """
+        Assign enclosures according to the naming convention if no enclosure is given.
+
+        See `Machine.save()`.
+        """
+        names = {
+            entry.machine.fqdn: re.split(r"-(\d|sp)+$", entry.machine.hostname)[0]
+            for entry in entries
+            if not hasattr(entry.machine, "enclosure")
+        }
+        if not names:
+            return
+
+        enclosures = {
+            enclosure.name: enclosure
+            for enclosure in Enclosure.objects.filter(name__in=set(names.values()))
+        }
+        missing = set(names.values()) - set(enclosures)
+        for enclosure in Enclosure.objects.bulk_create(
+            [Enclosure(name=name) for name in sorted(missing)]
+        ):
+            enclosures[enclosure.name] = enclosure
+
+        for entry in entries:
+            if entry.machine.fqdn in names:
+                entry.machine.enclosure = enclosures[names[entry.machine.fqdn]]
+
+    @staticmethod
+    def assign_ip_addresses(entries: List[ManifestEntry]) -> None:
+        """Suggest IP addresses for all primary network interfaces (like ADD MACHINE)."""
+        used_ips: Dict[int, Set[IPAddress]] = {}
+
+        def suggest(protocol: Literal[4, 6], domain: Domain) -> Optional[str]:
+            if protocol not in used_ips:
+                used_ips[protocol] = get_used_host_ips(protocol)
+                # Addresses given in the manifest are taken as well
+                for entry in entries:
+                    objects: List[Any] = [*entry.networkinterfaces, entry.bmc]
+                    for obj in objects:
+                        ip = getattr(obj, "ip_address_v{}".format(protocol), None)
+                        if ip:
+                            used_ips[protocol].add(IPAddress(ip, protocol))
+            count = len(used_ips[protocol])
+            ip = suggest_host_ip(protocol, domain, used_ips=used_ips[protocol])
+            # Nothing gets added if the network is exhausted; don't hand out the fallback twice
+            return ip if len(used_ips[protocol]) > count else None
+
+        for entry in entries:
+            domain = entry.machine.fqdn_domain
+            for networkinterface in entry.networkinterfaces:
+                if not networkinterface.primary:
+                    continue
+                if domain.enable_v4 and not networkinterface.ip_address_v4:
+                    networkinterface.ip_address_v4 = suggest(4, domain)
+                if domain.enable_v6 and not networkinterface.ip_address_v6:
+                    networkinterface.ip_address_v6 = suggest(6, domain)
+
+    def create(self, entries: List[ManifestEntry]) -> None:
+        """Write all entries with one bulk insert per model."""
+        self.assign_enclosures(entries)
+        self.assign_ip_addresses(entries)
+
+        Machine.objects.bulk_create([entry.machine for entry in entries])
+        NetworkInterface.objects.bulk_create(
+            [
+                networkinterface
+                for entry in entries
+                for networkinterface in entry.networkinterfaces
+            ]
+        )
+        BMC.objects.bulk_create(
+            [entry.bmc for entry in entries if entry.bmc is not None]
+        )
+        SerialConsole.objects.bulk_create(
+            [
+                entry.serialconsole
+                for entry in entries
+                if entry.serialconsole is not None
+            ]
+        )
+        RemotePower.objects.bulk_create(
+            [entry.remotepower for entry in entries if entry.remotepower is not None]
+        )
+        MachineSearchIndex.update(entry.machine.pk for entry in entries)
+
+    @classmethod
+    def regenerate(cls, entries: List[ManifestEntry]) -> None:
+        """Regenerate Cobbler once per domain and cscreen once per console server."""
+        domain_ids: Set[int] = set()
+        cscreen_server_fqdns: Set[str] = set()
+        for entry in entries:
+            domain = entry.machine.fqdn_domain
+            domain_ids.add(domain.pk)
+            if domain.cscreen_server is not None and (
+                entry.serialconsole is not None or entry.bmc is not None
+            ):
+                cscreen_server_fqdns.add(domain.cscreen_server.fqdn)
+
+        for domain_id in sorted(domain_ids):
+            signal_cobbler_regenerate.send(  # type: ignore
+                sender=cls, domain_id=domain_id
+            )
+        for cscreen_server_fqdn in sorted(cscreen_server_fqdns):
+            signal_serialconsole_regenerate.send(  # type: ignore
+                sender=cls, cscreen_server_fqdn=cscreen_server_fqdn
+            )
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> JsonResponse:
+        """Add all machines of a manifest."""
+        if isinstance(request.user, AnonymousUser) or not request.auth:
+            return AuthRequiredSerializer().as_json
+
+        if not request.user.is_superuser:  # type: ignore
+            return ErrorMessage(
+                "Only superusers are allowed to perform this action!"
+            ).as_json
+
+        try:
+            manifest = self.parse_manifest(
+                request.body.decode("utf-8"), request.content_type or ""
+            )
+        except (ValueError, csv.Error) as e:
+            return ErrorMessage("Manifest is invalid: {}".format(e)).as_json
+
+        if not manifest:
+            return ErrorMessage("Manifest contains no machines!").as_json
+
+        try:
+            with transaction.atomic():
+                entries, errors = self.validate(manifest)
+                if errors:
+                    # Validation only builds unsaved objects (enclosures are created in
+                    # create()), the rollback merely guards against that changing
+                    transaction.set_rollback(True)
+                    return ErrorMessage("\n{}".format("\n".join(errors))).as_json
+                self.create(entries)
+                transaction.on_commit(lambda: self.regenerate(entries))
+        except IntegrityError as e:
+            logger.exception(e)
+            return ErrorMessage("Import failed: {}".format(e)).as_json
+
+        return Message("Added {} machine(s).".format(len(entries))).as_json
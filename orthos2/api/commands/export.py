@@ -0,0 +1,274 @@
+import csv
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import URLPattern, re_path
+from rest_framework.request import Request
+
+from orthos2.api.commands.base import BaseAPIView
+from orthos2.api.models import APIQuery, QueryField
+from orthos2.api.serializers.misc import ErrorMessage
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class StreamBuffer:
+    """
+    Write-only file object which hands out everything written to it so far.
+
+    The CSV writer and the Arrow/Parquet writers write into this buffer, the written bytes
+    get yielded to the client after each chunk of rows.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data: Union[str, bytes]) -> int:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        """Return and forget everything written so far."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ExportCommand(BaseAPIView):
+
+    METHOD = "POST"
+    URL = "/export"
+    ARGUMENTS = (["data*"],)
+
+    HELP_SHORT = "Export machine fields for reporting tools."
+    HELP = """Command to export fields of all matching machines as file. Takes the same
+arguments as QUERY; non-database fields (ipv4, ipv6, status_ping) can't be exported.
+
+Usage:
+    EXPORT [csv|arrow|parquet] <fields> [WHERE <conditions>]
+
+Example:
+    EXPORT fqdn, architecture, domain, inst_dist WHERE inst_active
+    EXPORT parquet fqdn, cpu_model, ram WHERE cpu_model =~ Intel
+
+The rows are streamed directly from the database. The formats 'arrow' (Arrow IPC stream) and
+'parquet' require pyarrow to be installed on the server; repeating values like architecture,
+domain or distribution are stored dictionary-encoded.
+"""
+
+    FORMATS = {
+        "csv": ("text/csv", "csv"),
+        "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+        "parquet": ("application/vnd.apache.parquet", "parquet"),
+    }
+
+    # Number of rows fetched from the database cursor and written as one record batch.
+    CHUNK_SIZE = 2000
+
+    @staticmethod
+    def get_urls() -> List[URLPattern]:
+        return [
+            re_path(r"^export$", ExportCommand.as_view(), name="export"),
+        ]
+
+    @staticmethod
+    def get_tabcompletion() -> List[str]:
+        return (
+            list(ExportCommand.FORMATS.keys()) + APIQuery.get_tab_completion_options()
+        )
+
+    @staticmethod
+    def get_function(field: QueryField) -> Optional[Callable[[Any], Any]]:
+        """
+        Return the function converting the DB values of `field` for the export, if any.
+
+        Foreign keys without post-function are exported by the name of the referenced object
+        instead of its ID.
+        """
+        if field.has_post_function:
+            return field.post_function  # type: ignore
+        if field.is_ForeignKey():
+            model = field.related_model
+            return lambda pk: str(model.objects.get(pk=pk))
+        return None
+
+    @classmethod
+    def get_arrow_type(cls, field: QueryField) -> "pyarrow.DataType":
+        """Return the Arrow type of the column for `field`."""
+        if cls.get_function(field) is not None:
+            data_type = pyarrow.string()
+        elif field.is_BooleanField():
+            return pyarrow.bool_()
+        elif field.type in {
+            "AutoField",
+            "BigAutoField",
+            "BigIntegerField",
+            "IntegerField",
+            "PositiveIntegerField",
+            "PositiveSmallIntegerField",
+            "SmallIntegerField",
+        }:
+            return pyarrow.int64()
+        elif field.type == "FloatField":
+            return pyarrow.float64()
+        elif field.is_DateTimeField():
+            return pyarrow.timestamp("us", tz="UTC")
+        elif field.is_DateField():
+            return pyarrow.date32()
+        else:
+            data_type = pyarrow.string()
+
+        if field.is_dictionary:
+            return pyarrow.dictionary(pyarrow.int32(), data_type)
+        return data_type
+
+    @classmethod
+    def get_rows(
+        cls, fields: List[QueryField], rows: Iterable[Any]
+    ) -> Iterator[List[Any]]:
+        """
+        Convert the values of `rows` with the functions of `fields` (see `get_function()`).
+
+        The functions look up e.g. usernames by ID; their results get cached per value because
+        the same values repeat across many rows.
+        """
+        functions = [cls.get_function(field) for field in fields]
+        caches: List[Optional[Dict[Any, Any]]] = [
+            None if function is None else {} for function in functions
+        ]
+
+        for row in rows:
+            values = list(row)
+            for i, cache in enumerate(caches):
+                if cache is None or values[i] is None:
+                    continue
+                if values[i] not in cache:
+                    cache[values[i]] = functions[i](values[i])  # type: ignore
+                values[i] = cache[values[i]]
+            yield values
+
+    @classmethod
+    def chunks(
+        cls, fields: List[QueryField], rows: Iterable[Any]
+    ) -> Iterator[List[List[Any]]]:
+        """Yield the rows in lists of `CHUNK_SIZE` rows."""
+        chunk: List[List[Any]] = []
+        for row in cls.get_rows(fields, rows):
+            chunk.append(row)
+            if len(chunk) == cls.CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @classmethod
+    def stream_csv(
+        cls, names: List[str], fields: List[QueryField], rows: Iterable[Any]
+    ) -> Iterator[bytes]:
+        """Yield the rows as CSV document."""
+        buffer = StreamBuffer()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for chunk in cls.chunks(fields, rows):
+            writer.writerows(chunk)
+            yield buffer.pop()
+        yield buffer.pop()
+
+    @classmethod
+    def stream_arrow(
+        cls,
+        names: List[str],
+        fields: List[QueryField],
+        rows: Iterable[Any],
+        parquet: bool = False,
+    ) -> Iterator[bytes]:
+        """Yield the rows as Arrow IPC stream or Parquet file, one record batch per chunk."""
+        schema = pyarrow.schema(
+            [
+                pyarrow.field(name, cls.get_arrow_type(field))
+                for name, field in zip(names, fields)
+            ]
+        )
+        buffer = StreamBuffer()
+        if parquet:
+            writer = pyarrow.parquet.ParquetWriter(buffer, schema)
+        else:
+            writer = pyarrow.ipc.new_stream(buffer, schema)
+
+        for chunk in cls.chunks(fields, rows):
+            columns = []
+            for i, column in enumerate(schema):
+                if pyarrow.types.is_dictionary(column.type):
+                    array = pyarrow.array(
+                        [row[i] for row in chunk], column.type.value_type
+                    ).dictionary_encode()
+                else:
+                    array = pyarrow.array([row[i] for row in chunk], column.type)
+                columns.append(array)
+            writer.write_batch(pyarrow.record_batch(columns, schema=schema))
+            yield buffer.pop()
+
+        writer.close()
+        yield buffer.pop()
+
+    def post(
+        self, request: Request, *args: Any, **kwargs: Any
+    ) -> Union[JsonResponse, StreamingHttpResponse]:
+        """Stream the requested fields of all matching machines."""
+        try:
+            query_str = json.loads(request.body.decode("utf-8"))["data"].strip()
+        except (AttributeError, KeyError, ValueError):
+            return ErrorMessage("Data format is invalid!").as_json
+
+        file_format = "csv"
+        tokens = query_str.split(None, 1)
+        if tokens and tokens[0].lower() in self.FORMATS:
+            file_format = tokens[0].lower()
+            query_str = tokens[1] if len(tokens) > 1 else ""
+
+        if file_format != "csv" and pyarrow is None:
+            return ErrorMessage(
+                "Format '{}' is not available (pyarrow is not installed)!".format(
+                    file_format
+                )
+            ).as_json
+
+        try:
+            query = APIQuery(query_str)
+            queryset = query.get_queryset(user=request.user)
+            fields = [QueryField(name) for name in query.fields]
+        except Exception as e:
+            return ErrorMessage(str(e)).as_json
+
+        if any(field.is_dynamic for field in fields):
+            return ErrorMessage(
+                "Non-database (dynamic) fields can't be exported!"
+            ).as_json
+
+        # `iterator()` uses a server-side cursor, so the result never needs to fit in memory
+        rows = queryset.values_list(*query.fields).iterator(chunk_size=self.CHUNK_SIZE)
+
+        if file_format == "csv":
+            content = self.stream_csv(query.field_names, fields, rows)
+        else:
+            content = self.stream_arrow(
+                query.field_names, fields, rows, parquet=file_format == "parquet"
+            )
+
+        content_type, extension = self.FORMATS[file_format]
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = 'attachment; filename="machines.{}"'.format(
+            extension
+        )
+        return response
@@ -1,7 +1,10 @@
-from typing import Any, List, Union
+import json
+from typing import Any, Dict, Iterator, List, Union
 
 from django.contrib.auth.models import AnonymousUser
-from django.http import HttpResponseRedirect, JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.urls import URLPattern, re_path
 from rest_framework.request import Request
 
@@ -11,7 +14,9 @@ from orthos2.api.commands.base import (
     get_machine,
     get_remotepowerdevice,
     getException,
+    resolve_machines,
 )
+from orthos2.api.models import APIQuery
 from orthos2.api.serializers.architecture import ArchitectureSerializer
 from orthos2.api.serializers.dailytask import DailyTaskSerializer
 from orthos2.api.serializers.devicetype import DeviceTypeSerializer
@@ -45,6 +50,86 @@ from orthos2.data.models import (
 from orthos2.data.models.enclosure import Enclosure
 from orthos2.taskmanager.models import DailyTask, SingleTask
 
+MACHINE_INFO_ORDER: List[Any] = [
+    "fqdn",
+    "id",
+    "architecture",
+    "ipv4",
+    "ipv6",
+    "serial_number",
+    "product_code",
+    "comment",
+    "nda",
+    None,
+    "system",
+    "enclosure",
+    "group",
+    None,
+    "location_room",
+    "location_rack",
+    "location_rack_position",
+    None,
+    "reserved_by",
+    "reserved_reason",
+    "reserved_at",
+    "reserved_until",
+    None,
+    "status_ipv4",
+    "status_ipv6",
+    "status_ssh",
+    "status_login",
+    None,
+    "cpu_model",
+    "cpu_id",
+    "cpu_physical",
+    "cpu_cores",
+    "cpu_threads",
+    "cpu_flags",
+    "ram_amount",
+    None,
+    "serial_type",
+    "serial_cscreen_server",
+    "serial_console_server",
+    "serial_port",
+    "serial_command",
+    "serial_comment",
+    "serial_baud_rate",
+    "serial_kernel_device",
+    "serial_kernel_device_num",
+    None,
+    "power_type",
+    "power_host",
+    "power_port",
+    "power_device",
+    "power_comment",
+    None,
+    "bmc_fqdn",
+    "bmc_mac",
+    "bmc_username",
+    "bmc_password",
+    [
+        "installations",
+        [
+            "distribution",
+            "active",
+            "partition",
+            "architecture",
+            "kernelversion",
+        ],
+    ],
+    [
+        "networkinterfaces",
+        [
+            "mac_address",
+            "name",
+            "ethernet_type",
+            "driver_module",
+            "primary",
+        ],
+    ],
+    ["annotations", ["text", "reporter", "created"]],
+]
+
 
 class InfoCommand(BaseAPIView):
 
@@ -92,87 +177,7 @@ Example:
 
             serialzed_machine = MachineSerializer(machine)
 
-            order = [
-                "fqdn",
-                "id",
-                "architecture",
-                "ipv4",
-                "ipv6",
-                "serial_number",
-                "product_code",
-                "comment",
-                "nda",
-                None,
-                "system",
-                "enclosure",
-                "group",
-                None,
-                "location_room",
-                "location_rack",
-                "location_rack_position",
-                None,
-                "reserved_by",
-                "reserved_reason",
-                "reserved_at",
-                "reserved_until",
-                None,
-                "status_ipv4",
-                "status_ipv6",
-                "status_ssh",
-                "status_login",
-                None,
-                "cpu_model",
-                "cpu_id",
-                "cpu_physical",
-                "cpu_cores",
-                "cpu_threads",
-                "cpu_flags",
-                "ram_amount",
-                None,
-                "serial_type",
-                "serial_cscreen_server",
-                "serial_console_server",
-                "serial_port",
-                "serial_command",
-                "serial_comment",
-                "serial_baud_rate",
-                "serial_kernel_device",
-                "serial_kernel_device_num",
-                None,
-                "power_type",
-                "power_host",
-                "power_port",
-                "power_device",
-                "power_comment",
-                None,
-                "bmc_fqdn",
-                "bmc_mac",
-                "bmc_username",
-                "bmc_password",
-                [
-                    "installations",
-                    [
-                        "distribution",
-                        "active",
-                        "partition",
-                        "architecture",
-                        "kernelversion",
-                    ],
-                ],
-                [
-                    "networkinterfaces",
-                    [
-                        "mac_address",
-                        "name",
-                        "ethernet_type",
-                        "driver_module",
-                        "primary",
-                    ],
-                ],
-                ["annotations", ["text", "reporter", "created"]],
-            ]
-
-            response["header"] = {"type": "INFO", "order": order}
+            response["header"] = {"type": "INFO", "order": MACHINE_INFO_ORDER}
             response["data"] = serialzed_machine.data_info  # type: ignore
         except Exception:
             return ErrorMessage(getException()).as_json
@@ -180,6 +185,100 @@ Example:
         return JsonResponse(response)
 
 
+class BulkInfoCommand(BaseAPIView):
+
+    METHOD = "POST"
+    URL = "/machines"
+    ARGUMENTS = (["data*"],)
+
+    HELP_SHORT = "Retrieve information about many machines at once."
+    HELP = """Command to get information about many machines with one request. The request is a
+POST to /machines whose JSON body holds either a list of FQDNs/hostnames or the conditions of
+a QUERY (everything after 'where').
+
+Usage:
+    POST /machines {"fqdns": ["<fqdn>", "<fqdn>", ...]}
+    POST /machines {"query": "<conditions>"}
+
+Example:
+    POST /machines {"fqdns": ["foo.domain.tld", "bar"]}
+    POST /machines {"query": "cpu_model =~ Intel AND ram > 16000"}
+
+The result is streamed; machines which could not be resolved or are ambiguous are listed in
+the header.
+"""
+
+    # Number of machines serialized per database round trip.
+    CHUNK_SIZE = 100
+
+    @staticmethod
+    def get_urls() -> List[URLPattern]:
+        return [
+            re_path(r"^machines$", BulkInfoCommand.as_view(), name="machines"),
+        ]
+
+    @classmethod
+    def stream(
+        cls, queryset: "QuerySet[Machine]", header: Dict[str, Any]
+    ) -> Iterator[str]:
+        """Yield the JSON document for all machines of `queryset` piece by piece."""
+        yield '{{"header": {}, "data": ['.format(
+            json.dumps(header, cls=DjangoJSONEncoder)
+        )
+        queryset = MachineSerializer.prefetch(queryset)
+        for i, machine in enumerate(queryset.iterator(chunk_size=cls.CHUNK_SIZE)):
+            data = MachineSerializer(machine).data_info
+            yield "{}{}".format(
+                "," if i else "", json.dumps(data, cls=DjangoJSONEncoder)
+            )
+        yield "]}"
+
+    def post(
+        self, request: Request, *args: Any, **kwargs: Any
+    ) -> Union[JsonResponse, StreamingHttpResponse]:
+        """Return machine information for all requested machines."""
+        try:
+            data = json.loads(request.body.decode("utf-8"))
+            fqdns = data.get("fqdns", [])
+            query = data.get("query", "")
+        except (AttributeError, ValueError):
+            return ErrorMessage("Data format is invalid!").as_json
+
+        if not isinstance(fqdns, list) or not (fqdns or query):
+            return ErrorMessage("Requires a list of <fqdns> or a <query>!").as_json
+
+        header: Dict[str, Any] = {"type": "INFOLIST", "order": MACHINE_INFO_ORDER}
+
+        try:
+            if query:
+                queryset = APIQuery("fqdn where {}".format(query)).get_queryset(
+                    user=request.user
+                )
+            else:
+                resolved = resolve_machines(fqdns)
+                header["unknown"] = [
+                    name for name, machines in resolved.items() if not machines
+                ]
+                header["ambiguous"] = {
+                    name: [machine.fqdn for machine in machines]
+                    for name, machines in resolved.items()
+                    if len(machines) > 1
+                }
+                queryset = Machine.api.filter(
+                    pk__in=[
+                        machines[0].pk
+                        for machines in resolved.values()
+                        if len(machines) == 1
+                    ]
+                )
+        except Exception as e:
+            return ErrorMessage(str(e)).as_json
+
+        return StreamingHttpResponse(
+            self.stream(queryset, header), content_type="application/json"
+        )
+
+
 class EnclosureInfoCommand(BaseAPIView):
     @staticmethod
     def get_urls() -> List[URLPattern]:
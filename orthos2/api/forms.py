@@ -38,6 +38,8 @@ from orthos2.frontend.forms.reservemachine import ReserveMachineForm
 from orthos2.frontend.forms.task import DailyTaskForm, SingleTaskForm
 from orthos2.frontend.forms.virtualmachine import VirtualMachineForm
 from orthos2.taskmanager.models import DailyTask, SingleTask
+from orthos2.utils.cache import cached_choices
+from orthos2.utils.choices import get_architectures, get_systems
 from orthos2.utils.misc import get_domain, is_unique_mac_address
 
 logger = logging.getLogger("api")
@@ -199,24 +201,6 @@ class VirtualMachineAPIForm(VirtualMachineForm, BaseAPIForm):
         ]
 
 
-def get_architectures() -> List[Tuple[int, str]]:
-    """Return architectures choice tuple."""
-    architectures: List[Tuple[int, str]] = []
-    for architecture in (
-        Architecture.objects.all().values("id", "name").order_by("name")
-    ):
-        architectures.append((architecture["id"], architecture["name"]))
-    return architectures
-
-
-def get_systems() -> List[Tuple[int, str]]:
-    """Return systems choice tuple."""
-    systems: List[Tuple[int, str]] = []
-    for system in System.objects.all().values("id", "name").order_by("name"):
-        systems.append((system["id"], system["name"]))
-    return systems
-
-
 class MachineAPIForm(forms.Form, BaseAPIForm):
     def clean_fqdn(self) -> str:
         """Check whether `fqdn` already exists."""
@@ -406,6 +390,7 @@ class DeleteMachineAPIForm(forms.Form, BaseAPIForm):
 
 class SerialConsoleAPIForm(forms.Form, BaseAPIForm):
     @staticmethod
+    @cached_choices("serialconsoletypes")
     def get_serial_type_choices() -> List[Tuple[int, str]]:
         """Return serial console type  choice tuple."""
         serial_types: List[Tuple[int, str]] = []
@@ -5,7 +5,7 @@ from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from django.contrib.auth.models import AbstractBaseUser, AnonymousUser, User
 from django.core.exceptions import FieldDoesNotExist, MultipleObjectsReturned
-from django.db.models import Field, Q
+from django.db.models import Field, Q, QuerySet
 from django.db.models.functions import Length
 
 from orthos2.api.lookups import NotEqual
@@ -32,24 +32,22 @@ Field.register_lookup(NotEqual)
 
 class HelperFunctions:
     @staticmethod
-    def get_ipv4(machine_id: int) -> Optional[str]:
+    def get_ipv4(machine: Machine) -> Optional[str]:
         """
         Return the IPv4 address of a machine.
 
         This value gets set after initialising a machine.
         """
-        machine = Machine.objects.get(pk=machine_id)
         value = getattr(machine, "ip_address_v4", None)
         return value
 
     @staticmethod
-    def get_ipv6(machine_id: int) -> Optional[str]:
+    def get_ipv6(machine: Machine) -> Optional[str]:
         """
         Return the IPv6 address of a machine.
 
         This value gets set after initialising a machine.
         """
-        machine = Machine.objects.get(pk=machine_id)
         value = getattr(machine, "ip_address_v6", None)
         return value
 
@@ -62,9 +60,8 @@ class HelperFunctions:
             raise MultipleObjectsReturned("Found more than one user!")
 
     @staticmethod
-    def get_status_ping(machine_id: int) -> Optional[bool]:
+    def get_status_ping(machine: Machine) -> Optional[bool]:
         """Return the ping status of a machine."""
-        machine = Machine.objects.get(pk=machine_id)
         value = getattr(machine, "status_ping", None)
         return value
 
@@ -80,6 +77,9 @@ class QueryFieldMappingItem:
     verbose_name: str = ""
     pre: Optional[Callable[[Any], Any]] = None
     post: Optional[Callable[[Any], Any]] = None
+    # The values repeat across many machines (e.g. architecture names), exports store them
+    # dictionary-encoded.
+    dictionary: bool = False
 
 
 @dataclass
@@ -89,7 +89,7 @@ class QueryFieldDynamicMappingItem:
     """
 
     verbose_name: str
-    function: Callable[[int], Union[bool, str, None]]
+    function: Callable[[Machine], Union[bool, str, None]]
 
 
 class QueryField:
@@ -115,6 +115,7 @@ class QueryField:
             field=Architecture._meta.get_field("name"),  # type: ignore
             related_name="architecture",
             verbose_name="Architecture",
+            dictionary=True,
         ),
         "name": QueryFieldMappingItem(
             field=Machine._meta.get_field("fqdn"),  # type: ignore
@@ -123,6 +124,7 @@ class QueryField:
             field=Domain._meta.get_field("name"),  # type: ignore
             related_name="fqdn_domain",
             verbose_name="Domain",
+            dictionary=True,
         ),
         "enclosure": QueryFieldMappingItem(
             field=Machine._meta.get_field("enclosure"),  # type: ignore
@@ -130,6 +132,7 @@ class QueryField:
                 Enclosure.objects.get(name__iexact=x) if isinstance(x, str) else x
             ),
             post=lambda x: Enclosure.objects.get(pk=x).name,
+            dictionary=True,
         ),
         "system": QueryFieldMappingItem(
             field=System._meta.get_field("name"),  # type: ignore
@@ -137,6 +140,7 @@ class QueryField:
             verbose_name="System",
             pre=lambda x: x,
             post=lambda x: x,
+            dictionary=True,
         ),
         "ram": QueryFieldMappingItem(
             field=Machine._meta.get_field("ram_amount"),  # type: ignore
@@ -149,6 +153,7 @@ class QueryField:
                 Machine.objects.get(fqdn__iexact=x) if isinstance(x, str) else x
             ),
             post=lambda x: Machine.objects.get(pk=x).fqdn,
+            dictionary=True,
         ),
         "reserved_by": QueryFieldMappingItem(
             field=Machine._meta.get_field("reserved_by"),  # type: ignore
@@ -156,6 +161,7 @@ class QueryField:
                 HelperFunctions.username_to_id(x) if isinstance(x, str) else x
             ),
             post=lambda x: User.objects.get(pk=x).username,  # type: ignore
+            dictionary=True,
         ),
         "res_by": QueryFieldMappingItem(
             field=Machine._meta.get_field("reserved_by"),  # type: ignore
@@ -163,6 +169,7 @@ class QueryField:
                 HelperFunctions.username_to_id(x) if isinstance(x, str) else x
             ),
             post=lambda x: User.objects.get(pk=x).username,  # type: ignore
+            dictionary=True,
         ),
         "reserved_by_email": QueryFieldMappingItem(
             field=User._meta.get_field("email"),  # type: ignore
@@ -179,6 +186,7 @@ class QueryField:
                 else x
             ),
             post=lambda x: dict(Machine.StatusIP.CHOICE).get(x),
+            dictionary=True,
         ),
         "status_ipv6": QueryFieldMappingItem(
             field=Machine._meta.get_field("status_ipv6"),  # type: ignore
@@ -190,6 +198,7 @@ class QueryField:
                 else x
             ),
             post=lambda x: dict(Machine.StatusIP.CHOICE).get(x),
+            dictionary=True,
         ),
         # SerialConsole
         "serial_console_server": QueryFieldMappingItem(
@@ -207,6 +216,7 @@ class QueryField:
             verbose_name="Serial console",
             pre=lambda x: SerialConsoleType.Type.to_int(x) if isinstance(x, str) else x,
             post=lambda x: SerialConsoleType.Type.to_str(x),
+            dictionary=True,
         ),
         "sconsole": QueryFieldMappingItem(
             field=SerialConsole._meta.get_field("stype"),  # type: ignore
@@ -214,6 +224,7 @@ class QueryField:
             verbose_name="Serial console",
             pre=lambda x: SerialConsoleType.Type.to_int(x) if isinstance(x, str) else x,
             post=lambda x: SerialConsoleType.Type.to_str(x),
+            dictionary=True,
         ),
         "serial_baud": QueryFieldMappingItem(
             field=SerialConsole._meta.get_field("baud_rate"),  # type: ignore
@@ -264,6 +275,7 @@ class QueryField:
             field=RemotePower._meta.get_field("fence_agent"),  # type: ignore
             related_name="remotepower",
             verbose_name="Remotepower type",
+            dictionary=True,
         ),
         # Installation
         "inst_active": QueryFieldMappingItem(
@@ -275,16 +287,19 @@ class QueryField:
             field=Installation._meta.get_field("architecture"),  # type: ignore
             related_name="installations",
             verbose_name="Inst. architecture",
+            dictionary=True,
         ),
         "inst_dist": QueryFieldMappingItem(
             field=Installation._meta.get_field("distribution"),  # type: ignore
             related_name="installations",
             verbose_name="Distribution",
+            dictionary=True,
         ),
         "inst_kernel": QueryFieldMappingItem(
             field=Installation._meta.get_field("kernelversion"),  # type: ignore
             related_name="installations",
             verbose_name="Kernel version",
+            dictionary=True,
         ),
         "inst_partition": QueryFieldMappingItem(
             field=Installation._meta.get_field("partition"),  # type: ignore
@@ -296,6 +311,7 @@ class QueryField:
             field=NetworkInterface._meta.get_field("driver_module"),  # type: ignore
             related_name="networkinterfaces",
             verbose_name="IF driver module",
+            dictionary=True,
         ),
         "iface_ethernet_type": QueryFieldMappingItem(
             field=NetworkInterface._meta.get_field("ethernet_type"),  # type: ignore
@@ -322,11 +338,13 @@ class QueryField:
             field=DeviceType._meta.get_field("name"),  # type: ignore
             related_name="device_type",
             verbose_name="Device Type",
+            dictionary=True,
         ),
         "device_type_manufacturer": QueryFieldMappingItem(
             field=Manufacturer._meta.get_field("name"),  # type: ignore
             related_name="device_type__manufacturer",
             verbose_name="Manufacturer",
+            dictionary=True,
         ),
         "device_type_description": QueryFieldMappingItem(
             field=DeviceType._meta.get_field("description"),  # type: ignore
@@ -347,6 +365,7 @@ class QueryField:
                 HelperFunctions.username_to_id(x) if isinstance(x, str) else x
             ),
             post=lambda x: User.objects.get(pk=x).username,  # type: ignore
+            dictionary=True,
         ),
         "annotation_created": QueryFieldMappingItem(
             field=Annotation._meta.get_field("created"),  # type: ignore
@@ -374,6 +393,7 @@ class QueryField:
         self._dynamic = False
         self._pre_function = None
         self._post_function = None
+        self._dictionary = False
 
         if self.LENGTH_SUFFIX in token:
             token = token.replace(self.LENGTH_SUFFIX, "")
@@ -391,6 +411,7 @@ class QueryField:
             self._related_name = self.MAPPING[token].related_name
             self._pre_function = self.MAPPING[token].pre
             self._post_function = self.MAPPING[token].post
+            self._dictionary = self.MAPPING[token].dictionary
         except KeyError:
             pass
 
@@ -420,6 +441,7 @@ class QueryField:
                             self._verbose_name = self.MAPPING[token].verbose_name
                             self._pre_function = self.MAPPING[token].pre
                             self._post_function = self.MAPPING[token].post
+                            self._dictionary = self.MAPPING[token].dictionary
 
         if not field:
             raise ValueError("Unknown field '{}'!".format(token))
@@ -476,6 +498,11 @@ class QueryField:
         """Return if a `QueryField` object can be `NULL` in the DB."""
         return self._field.null  # type: ignore
 
+    @property
+    def is_dictionary(self) -> bool:
+        """Return if the values of a `QueryField` object repeat across many machines."""
+        return self._dictionary
+
     @property
     def is_dynamic(self) -> bool:
         """Return if a `QueryField` object is dynamic (non-database value) or not."""
@@ -497,6 +524,11 @@ class QueryField:
         """Check if a `QueryField` object is a foreign key."""
         return "ForeignKey" in self._field.get_internal_type()  # type: ignore
 
+    @property
+    def related_model(self) -> Any:
+        """Return the model a foreign key `QueryField` object references."""
+        return self._field.related_model  # type: ignore
+
     def is_DateField(self) -> bool:
         """Check if a `QueryField` object is a date field."""
         return "DateField" in self._field.get_internal_type()  # type: ignore
@@ -526,8 +558,8 @@ class QueryField:
         """
         Return a optional function for processing dynamic fields (non-database fields).
 
-        If no dynamic function is defined, a simple lambda function is returned which simply
-        returns the input value.
+        The function gets the machine of the result row. If no dynamic function is defined, a
+        simple lambda function is returned which simply returns the input value.
         """
         if self._dynamic_field_function:  # type: ignore
             return self._dynamic_field_function
@@ -545,6 +577,11 @@ class QueryField:
             return self._pre_function
         return lambda x: x  # type: ignore
 
+    @property
+    def has_post_function(self) -> bool:
+        """Return if a `QueryField` object converts its DB values with a post-function."""
+        return self._post_function is not None
+
     @property
     def post_function(self):  # type: ignore
         """
@@ -605,6 +642,7 @@ class APIQuery:
         self._query = None
         self._data: Optional[List[Dict[str, Any]]] = None
         self._fields: List[str] = []
+        self._field_names: List[str] = []
         self._conditions: List[Tuple[QueryField, str, Union[bool, int]]] = []
         self._conjunctions: List[str] = []
         self._annotations: List[Dict[str, Length]] = []
@@ -623,6 +661,7 @@ class APIQuery:
         """
         query = re.split(self.WHERE, self._query_str)
 
+        self._field_names = [token.strip() for token in query[0].split(",")]
         self._fields = self._prepare_fields(query[0])
 
         if len(query) == 2:
@@ -823,14 +862,10 @@ class APIQuery:
         else:
             return Q()
 
-    def execute(
+    def get_queryset(
         self, user: Optional[Union[AbstractBaseUser, AnonymousUser]] = None
-    ) -> None:
-        """
-        Execute requested query and stores the result.
-
-        This method is responsible for preparing, executing and revising data from the DB.
-        """
+    ) -> "QuerySet[Machine]":
+        """Prepare the requested query and return the queryset of all matching machines."""
         self._prepare_query()
         self._apply_pre_functions()
 
@@ -844,7 +879,17 @@ class APIQuery:
         for annotation in self._annotations:
             queryset = queryset.annotate(**annotation)
 
-        queryset = queryset.filter(query).distinct()
+        return queryset.filter(query).distinct()
+
+    def execute(
+        self, user: Optional[Union[AbstractBaseUser, AnonymousUser]] = None
+    ) -> None:
+        """
+        Execute requested query and stores the result.
+
+        This method is responsible for preparing, executing and revising data from the DB.
+        """
+        queryset = self.get_queryset(user=user)
 
         if queryset:
             result = list(
@@ -865,14 +910,22 @@ class APIQuery:
     def _add_dynamic_fields(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Fields which are non-database fields needs to be queried and added separately using
-        the primary key. If the primary key wasn't requested, remove it.
+        the primary key. The machines of all rows are loaded at once, with their network
+        interfaces. If the primary key wasn't requested, remove it.
         """
-        for machine in rows:
-            for dynamic_field, _values in QueryField.DYNAMIC_FIELDS.items():
-                field = QueryField(dynamic_field)
-                if field.db_field_name in self._fields:
-                    machine[field.db_field_name] = field.dynamic_field_function(  # type: ignore
-                        machine["pk"]
+        fields = [
+            QueryField(dynamic_field)
+            for dynamic_field in QueryField.DYNAMIC_FIELDS
+            if dynamic_field in self._fields
+        ]
+        if fields:
+            machines = Machine.objects.prefetch_related("networkinterfaces").in_bulk(
+                [row["pk"] for row in rows]
+            )
+            for row in rows:
+                for field in fields:
+                    row[field.db_field_name] = field.dynamic_field_function(  # type: ignore
+                        machines[row["pk"]]
                     )
 
         # removal needs to be done here due to multiple pk lookups above
@@ -904,16 +957,35 @@ class APIQuery:
             )
 
     def _apply_post_functions(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Apply post-functions on each result row."""
+        """
+        Apply post-functions on each result row.
+
+        Post-functions mostly look up the name of a related object, so each value is converted
+        only once.
+        """
+        qfields = {field: QueryField(field) for field in (rows[0] if rows else {})}
+        converted: Dict[Tuple[str, Any], Any] = {}
         for row in rows:
             for field, value in row.items():
-                if value is None:
+                qfield = qfields[field]
+                if value is None or not qfield.has_post_function:
                     continue
-                qfield = QueryField(field)
-                row[qfield.db_field_name] = qfield.post_function(value)  # type: ignore
+                if (field, value) not in converted:
+                    converted[(field, value)] = qfield.post_function(value)  # type: ignore
+                row[qfield.db_field_name] = converted[(field, value)]
 
         return rows
 
+    @property
+    def fields(self) -> List[str]:
+        """Return the DB field names of the requested fields (available after preparing)."""
+        return self._fields
+
+    @property
+    def field_names(self) -> List[str]:
+        """Return the names of the requested fields as given in the query (available after preparing)."""
+        return self._field_names
+
     @property
     def has_conditions(self) -> bool:
         return bool(self._conditions)
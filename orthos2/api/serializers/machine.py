@@ -1,15 +1,15 @@
 from typing import TYPE_CHECKING, Any, Dict, List
 
+from django.db.models import Prefetch, QuerySet
 from rest_framework import serializers
 
 from orthos2.api.serializers.annotation import AnnotationSerializer
 from orthos2.api.serializers.bmc import BMCSerializer
 from orthos2.api.serializers.installation import InstallationSerializer
 from orthos2.api.serializers.networkinterface import NetworkInterfaceSerializer
-from orthos2.data.models import Machine
+from orthos2.data.models import Annotation, Machine
 
 if TYPE_CHECKING:
-    from orthos2.data.models.annotation import Annotation
     from orthos2.data.models.bmc import BMC
     from orthos2.data.models.installation import Installation
     from orthos2.data.models.networkinterface import NetworkInterface
@@ -190,6 +190,29 @@ class MachineSerializer(serializers.ModelSerializer[Machine]):
         if not hasattr(machine, "group") or not machine.group:
             self.fields.pop("group")  # type: ignore
 
+    @staticmethod
+    def prefetch(queryset: "QuerySet[Machine]") -> "QuerySet[Machine]":
+        """
+        Return `queryset` with all relations which are needed for serialization loaded in
+        advance, so that serializing many machines takes a fixed number of queries.
+        """
+        return queryset.select_related(
+            "enclosure",
+            "system",
+            "architecture",
+            "reserved_by",
+            "bmc__fence_agent",
+            "serialconsole__stype",
+            "remotepower__fence_agent",
+            "remotepower__remote_power_device__fence_agent",
+        ).prefetch_related(
+            "networkinterfaces",
+            "installations",
+            Prefetch(
+                "annotations", queryset=Annotation.objects.select_related("reporter")
+            ),
+        )
+
     @property
     def data_info(self) -> Dict[str, Dict[str, str]]:
         result: Dict[str, Dict[str, str]] = {}
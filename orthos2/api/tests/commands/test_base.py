@@ -0,0 +1,55 @@
+from django.test import TestCase
+
+from orthos2.api.commands.base import resolve_machines
+from orthos2.data.models import Machine
+
+
+class ResolveMachinesTest(TestCase):
+    """Test the hostname/FQDN resolver used by the API commands."""
+
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        # Fixtures are loaded raw, so populate the hostname column like `save()` does.
+        for machine in Machine.objects.all():
+            Machine.objects.filter(pk=machine.pk).update(
+                fqdn_hostname=machine.fqdn.split(".")[0]
+            )
+
+    def test_resolve_fqdn(self) -> None:
+        result = resolve_machines(["test.testing.suse.de"])
+
+        self.assertEqual(
+            [m.fqdn for m in result["test.testing.suse.de"]], ["test.testing.suse.de"]
+        )
+
+    def test_resolve_hostname(self) -> None:
+        result = resolve_machines(["test", "test-sp"])
+
+        self.assertEqual([m.fqdn for m in result["test"]], ["test.testing.suse.de"])
+        self.assertEqual(
+            [m.fqdn for m in result["test-sp"]], ["test-sp.testing.suse.de"]
+        )
+
+    def test_resolve_prefix(self) -> None:
+        result = resolve_machines(["test.testing", "tes", "unknown"])
+
+        self.assertEqual(
+            [m.fqdn for m in result["test.testing"]], ["test.testing.suse.de"]
+        )
+        self.assertEqual(len(result["tes"]), 2)
+        self.assertEqual(result["unknown"], [])
+
+    def test_resolve_without_hostname_column(self) -> None:
+        Machine.objects.all().update(fqdn_hostname="")
+
+        result = resolve_machines(["test"])
+
+        self.assertEqual([m.fqdn for m in result["test"]], ["test.testing.suse.de"])
+
+    def test_resolve_batch_query_count(self) -> None:
+        with self.assertNumQueries(1):
+            resolve_machines(["test", "test-sp.testing.suse.de"])
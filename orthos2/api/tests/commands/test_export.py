@@ -0,0 +1,142 @@
+"""
+This test module verifies the functionality of "/export".
+"""
+
+import csv
+import io
+import json
+import unittest
+from typing import Any, Dict, List
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse  # type: ignore
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from orthos2.api.tests.fleet import build_fleet
+from orthos2.data.models import Machine, RemotePower, RemotePowerType
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ExportTest(APITestCase):
+    """Test the route /export."""
+
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_superuser(
+            username="testuser", email="test@test.de", password="12345"
+        )
+        auth_token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + auth_token.key)
+        build_fleet(12, user=self.user)
+        self.url = reverse("api:export")
+
+    def export(self, query: str) -> bytes:
+        response = self.client.post(self.url, {"data": query}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)  # type: ignore
+        return b"".join(response.streaming_content)  # type: ignore
+
+    def test_export_csv(self) -> None:
+        """The selected fields of all matching machines get exported as CSV."""
+        # Act
+        content = self.export(
+            "fqdn, architecture, enclosure, reserved_by where fqdn =* fleet"
+        )
+
+        # Assert
+        rows = list(csv.reader(io.StringIO(content.decode("utf-8"))))
+        self.assertEqual(rows[0], ["fqdn", "architecture", "enclosure", "reserved_by"])
+        self.assertEqual(len(rows), 13)
+        self.assertIn(
+            ["fleet0.example.our-org.tld", "x86_64", "fleet0", "testuser"], rows
+        )
+        self.assertIn(["fleet10.example.our-org.tld", "x86_64", "fleet2", ""], rows)
+
+    def test_export_post_function_queries(self) -> None:
+        """Post-functions run once per distinct value, not once per row."""
+        # Act
+        with CaptureQueriesContext(connection) as context:
+            self.export("fqdn, enclosure, reserved_by")
+
+        # Assert
+        self.assertLess(len(context), Machine.objects.count())
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_export_arrow(self) -> None:
+        """Arrow exports keep column types and dictionary-encode repeating values."""
+        # Act
+        content = self.export(
+            "arrow fqdn, architecture, ram, inst_dist where fqdn =* fleet and inst_active"
+        )
+
+        # Assert
+        table = pyarrow.ipc.open_stream(content).read_all()
+        self.assertEqual(table.num_rows, 12)
+        self.assertEqual(
+            table.schema.names, ["fqdn", "architecture", "ram", "inst_dist"]
+        )
+        self.assertTrue(
+            pyarrow.types.is_dictionary(table.schema.field("architecture").type)
+        )
+        self.assertTrue(
+            pyarrow.types.is_dictionary(table.schema.field("inst_dist").type)
+        )
+        self.assertEqual(table.schema.field("fqdn").type, pyarrow.string())
+        self.assertEqual(table.schema.field("ram").type, pyarrow.int64())
+        self.assertEqual(set(table.column("architecture").to_pylist()), {"x86_64"})
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_export_arrow_foreign_key(self) -> None:
+        """Foreign keys are exported by the name of the referenced object, not its ID."""
+        # Arrange
+        fence_agent = RemotePowerType.objects.get(name="fleet-ipmi")
+        RemotePower.objects.bulk_create(
+            [
+                RemotePower(machine=machine, fence_agent=fence_agent)
+                for machine in Machine.objects.filter(fqdn__startswith="fleet")
+            ]
+        )
+
+        # Act
+        content = self.export("arrow fqdn, rpower_type where fqdn =* fleet")
+
+        # Assert
+        table = pyarrow.ipc.open_stream(content).read_all()
+        column = table.schema.field("rpower_type")
+        self.assertTrue(pyarrow.types.is_dictionary(column.type))
+        self.assertEqual(column.type.value_type, pyarrow.string())
+        self.assertEqual(set(table.column("rpower_type").to_pylist()), {"fleet-ipmi"})
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_export_parquet(self) -> None:
+        """Parquet exports can be read back."""
+        # Act
+        content = self.export("parquet fqdn, domain where fqdn =* fleet")
+
+        # Assert
+        table = pyarrow.parquet.read_table(io.BytesIO(content))
+        rows: List[Dict[str, Any]] = table.to_pylist()
+        self.assertEqual(len(rows), 12)
+        self.assertEqual({row["domain"] for row in rows}, {"example.our-org.tld"})
+
+    def test_export_dynamic_fields(self) -> None:
+        """Non-database fields can't be exported."""
+        # Act
+        response = self.client.post(self.url, {"data": "fqdn, ipv4"}, format="json")
+
+        # Assert
+        result = json.loads(response.content)
+        self.assertEqual(result["data"]["type"], "ERROR")
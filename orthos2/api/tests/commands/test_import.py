@@ -0,0 +1,209 @@
+"""
+This test module verifies the functionality of "/import".
+"""
+
+import json
+from typing import Any, Dict, List
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse  # type: ignore
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from orthos2.data.models import (
+    BMC,
+    Enclosure,
+    Machine,
+    NetworkInterface,
+    RemotePower,
+    SerialConsole,
+    ServerConfig,
+    System,
+)
+from orthos2.data.models.remotepowertype import RemotePowerType
+from orthos2.taskmanager.models import SingleTask
+
+
+class ImportTest(APITestCase):
+    """Test the route /import."""
+
+    fixtures = [
+        "orthos2/api/fixtures/commands/add_bmc_post.json",
+        "orthos2/data/fixtures/serialconsoletypes.json",
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_superuser(
+            username="testuser", email="test@test.de", password="12345"
+        )
+        auth_token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + auth_token.key)
+        ServerConfig.objects.update_or_create(
+            key="domain.validendings", defaults={"value": "our-org.tld"}
+        )
+        System.objects.filter(pk=1).update(allowBMC=True)
+        self.url = reverse("api:import")
+
+    @staticmethod
+    def machine(hostname: str, mac: str, **kwargs: Any) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "fqdn": "{}.example.our-org.tld".format(hostname),
+            "mac_address": mac,
+            "architecture_id": 1,
+            "system_id": 1,
+            "check_connectivity": 0,
+            "collect_system_information": False,
+        }
+        data.update(kwargs)
+        return data
+
+    def post(self, machines: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"machines": machines}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_import(self) -> None:
+        """Machines get added with all their sub-objects."""
+        # Arrange
+        agent = RemotePowerType.objects.get(name="ipmilanplus")
+        machines = [
+            self.machine(
+                "rack42-1",
+                "aa:bb:cc:dd:ee:01",
+                networkinterfaces=[{"mac_address": "aa:bb:cc:dd:ee:11"}],
+                bmc={
+                    "fqdn": "rack42-1-sp.example.our-org.tld",
+                    "mac": "aa:bb:cc:dd:ee:21",
+                    "fence_agent": agent.pk,
+                },
+                serialconsole={
+                    "stype": 4,
+                    "baud_rate": 57600,
+                    "kernel_device": "ttyS",
+                    "kernel_device_num": 0,
+                },
+            ),
+            self.machine("rack42-2", "aa:bb:cc:dd:ee:02"),
+        ]
+
+        # Act
+        response = self.post(machines)
+
+        # Assert
+        self.assertIsNone(response["data"]["type"], response["data"]["message"])
+        machine = Machine.objects.get(fqdn="rack42-1.example.our-org.tld")
+        self.assertEqual(machine.fqdn_hostname, "rack42-1")
+        self.assertEqual(machine.fqdn_domain.name, "example.our-org.tld")
+        self.assertEqual(machine.enclosure.name, "rack42")
+        self.assertEqual(machine.networkinterfaces.count(), 2)
+        primary = machine.networkinterfaces.get(primary=True)
+        self.assertEqual(primary.mac_address, "AA:BB:CC:DD:EE:01")
+        self.assertEqual(machine.bmc.fence_agent, agent)
+        self.assertEqual(machine.remotepower.fence_agent, agent)
+        rendered_command = machine.serialconsole.rendered_command
+        assert rendered_command is not None
+        self.assertIn("rack42-1-sp", rendered_command)
+        self.assertEqual(Enclosure.objects.filter(name="rack42").count(), 1)
+        self.assertEqual(
+            Machine.objects.get(fqdn="rack42-2.example.our-org.tld").enclosure,
+            machine.enclosure,
+        )
+        self.assertEqual(SingleTask.objects.filter(name="RegenerateCobbler").count(), 1)
+        self.assertFalse(SingleTask.objects.filter(name="SyncCobblerDHCP").exists())
+
+    def test_import_csv(self) -> None:
+        """CSV manifests take sub-object fields as prefixed columns."""
+        # Arrange
+        manifest = (
+            "fqdn,mac_address,architecture_id,system_id,check_connectivity,"
+            "collect_system_information,networkinterfaces,serialconsole.stype,"
+            "serialconsole.baud_rate,serialconsole.kernel_device,"
+            "serialconsole.kernel_device_num,serialconsole.command\n"
+            "csv-1.example.our-org.tld,aa:bb:cc:dd:ee:01,1,1,0,False,"
+            "aa:bb:cc:dd:ee:11 aa:bb:cc:dd:ee:12,3,57600,ttyS,0,console csv-1\n"
+        )
+
+        # Act
+        response = self.client.post(
+            self.url, manifest, content_type="text/csv"  # type: ignore
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        machine = Machine.objects.get(fqdn="csv-1.example.our-org.tld")
+        self.assertEqual(machine.networkinterfaces.count(), 3)
+        self.assertEqual(machine.serialconsole.command, "console csv-1")
+
+    def test_import_invalid(self) -> None:
+        """Nothing gets added if a single machine is invalid."""
+        # Arrange
+        machines = [
+            self.machine("valid-1", "aa:bb:cc:dd:ee:01", enclosure="new-enclosure"),
+            self.machine("invalid-1", "aa:bb:cc:dd:ee:01"),
+            self.machine("invalid-2", "aa:bb:cc:dd:ee:03", system_id=2, bmc={}),
+        ]
+
+        # Act
+        response = self.post(machines)
+
+        # Assert
+        self.assertEqual(response["data"]["type"], "ERROR")
+        self.assertIn("used more than once", response["data"]["message"])
+        self.assertIn("invalid-2", response["data"]["message"])
+        self.assertNotIn("\nvalid-1.example", response["data"]["message"])
+        self.assertEqual(Machine.objects.count(), 2)
+        self.assertFalse(Enclosure.objects.filter(name="new-enclosure").exists())
+        self.assertEqual(NetworkInterface.objects.count(), 3)
+        self.assertEqual(BMC.objects.count(), 0)
+        self.assertEqual(RemotePower.objects.count(), 0)
+        self.assertEqual(SerialConsole.objects.count(), 0)
+        self.assertFalse(SingleTask.objects.exists())
+
+    def test_import_bulk_inserts(self) -> None:
+        """The number of queries for writing doesn't grow with the number of machines."""
+
+        # Arrange
+        def manifest(rack: int, count: int) -> List[Dict[str, Any]]:
+            return [
+                self.machine(
+                    "rack{}-{}".format(rack, i),
+                    "aa:bb:cc:dd:{:02x}:{:02x}".format(rack, i),
+                )
+                for i in range(count)
+            ]
+
+        # Act
+        with CaptureQueriesContext(connection) as few:
+            self.post(manifest(1, 2))
+        with CaptureQueriesContext(connection) as many:
+            self.post(manifest(2, 6))
+
+        # Assert
+        inserts = [
+            [
+                query
+                for query in context
+                if query["sql"].startswith('INSERT INTO "data_')
+            ]
+            for context in (few, many)
+        ]
+        self.assertEqual(len(inserts[0]), len(inserts[1]))
+        self.assertEqual(Machine.objects.filter(fqdn__startswith="rack").count(), 8)
+
+    def test_import_superuser_only(self) -> None:
+        """Only superusers are allowed to import machines."""
+        # Arrange
+        User.objects.filter(pk=self.user.pk).update(is_superuser=False)
+
+        # Act
+        response = self.post([self.machine("denied-1", "aa:bb:cc:dd:ee:01")])
+
+        # Assert
+        self.assertEqual(response["data"]["type"], "ERROR")
+        self.assertFalse(Machine.objects.filter(fqdn__startswith="denied").exists())
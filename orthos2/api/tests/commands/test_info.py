@@ -1,3 +1,6 @@
+import json
+from typing import Any, Dict
+
 from django.contrib.auth.models import User
 from django.urls import reverse  # type: ignore
 from rest_framework import status
@@ -94,3 +97,94 @@ class InfoTest(APITestCase):
         self.assertEqual(
             json_response["data"]["url"], "http://pdu01.example.our-org.tld"
         )
+
+
+class BulkInfoTest(APITestCase):
+    """
+    Test the endpoint which returns information about many machines at once.
+    """
+
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/api/fixtures/serializers/machines.json",
+        "orthos2/api/fixtures/serializers/remotepowerdevice.json",
+    ]
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_superuser(
+            username="testuser", email="test@test.de", password="12345"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.client.post(reverse("api:machines"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(b"".join(response.streaming_content))  # type: ignore
+
+    def test_bulk_info_fqdns(self) -> None:
+        """
+        Verify that machines can be requested by FQDN or hostname and unknown names are reported.
+        """
+        # Act
+        json_response = self.post(
+            {"fqdns": ["test.testing.suse.de", "testsys", "doesnotexist"]}
+        )
+
+        # Assert
+        self.assertEqual(json_response["header"]["type"], "INFOLIST")
+        self.assertEqual(json_response["header"]["unknown"], ["doesnotexist"])
+        self.assertEqual(
+            sorted(machine["fqdn"]["value"] for machine in json_response["data"]),
+            ["test.testing.suse.de", "testsys.orthos2.test"],
+        )
+
+    def test_bulk_info_matches_single_info(self) -> None:
+        """
+        Verify that the bulk result of a machine equals the single INFO result.
+        """
+        # Arrange
+        single = self.client.get(
+            reverse("api:machine") + "?fqdn=testsys.orthos2.test", format="json"
+        ).json()
+
+        # Act
+        json_response = self.post({"fqdns": ["testsys.orthos2.test"]})
+
+        # Assert
+        self.assertEqual(json_response["data"], [single["data"]])
+
+    def test_bulk_info_query(self) -> None:
+        """
+        Verify that machines can be selected by query conditions.
+        """
+        # Act
+        json_response = self.post({"query": "fqdn =* test"})
+
+        # Assert
+        self.assertEqual(
+            [machine["fqdn"]["value"] for machine in json_response["data"]],
+            ["test.testing.suse.de", "testsys.orthos2.test"],
+        )
+
+    def test_bulk_info_query_count(self) -> None:
+        """
+        Verify that the number of queries does not depend on the number of machines.
+        """
+        # Arrange
+        url = reverse("api:machines")
+
+        # Act & Assert
+        # One query for the machines and one per prefetched relation.
+        with self.assertNumQueries(4):
+            response = self.client.post(url, {"query": "fqdn =* test"}, format="json")
+            b"".join(response.streaming_content)  # type: ignore
+
+    def test_bulk_info_invalid(self) -> None:
+        """
+        Verify that a request without machines is rejected.
+        """
+        # Act
+        response = self.client.post(reverse("api:machines"), {}, format="json")
+
+        # Assert
+        self.assertEqual(response.json()["data"]["type"], "ERROR")
@@ -0,0 +1,183 @@
+"""
+Synthetic fleet for query-count and latency measurements.
+
+The fleet is written with bulk inserts, so building thousands of machines takes a few seconds
+only. It expects the fixtures "orthos2/data/fixtures/systems.json" and
+"orthos2/data/fixtures/tests/test_machines.json" to be loaded.
+"""
+
+import datetime
+from typing import List, Optional
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from orthos2.data.models import (
+    BMC,
+    Annotation,
+    Architecture,
+    Distribution,
+    Domain,
+    Enclosure,
+    Installation,
+    Machine,
+    MachineSearchIndex,
+    NetworkInterface,
+    RemotePowerDevice,
+    RemotePowerType,
+    ReservationHistory,
+    System,
+)
+
+FLEET_SIZE = 2000
+FLEET_PREFIX = "fleet"
+MACHINES_PER_ENCLOSURE = 4
+
+CPU_MODELS = [
+    "Intel(R) Xeon(R) Gold 6248 CPU @ 2.50GHz",
+    "AMD EPYC 7763 64-Core Processor",
+    "Ampere(R) Altra(R) Processor",
+]
+DISTRIBUTIONS = ["SLES 15 SP5", "SLES 15 SP6", "openSUSE Tumbleweed"]
+
+
+def get_fqdn(index: int, domain: Domain) -> str:
+    """Return the FQDN of the fleet machine with index `index`."""
+    return "{}{}.{}".format(FLEET_PREFIX, index, domain.name)
+
+
+def get_mac(index: int, interface: int) -> str:
+    """Return a unique MAC address per machine index and interface number."""
+    return "02:{:02X}:{:02X}:{:02X}:{:02X}:00".format(
+        interface, (index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF
+    )
+
+
+def build_fleet(size: int = FLEET_SIZE, user: Optional[User] = None) -> List[Machine]:
+    """
+    Add `size` machines to the database.
+
+    Every machine has two network interfaces, two installations (one active), an annotation
+    and two reservation history entries. Every second machine has a BMC, every third machine
+    is reserved by `user`. A remote power device is added as well.
+    """
+    if user is None:
+        user = User.objects.create_user(username="fleet", email="fleet@our-org.tld")
+
+    domain = Domain.objects.get(name="example.our-org.tld")
+    architecture = Architecture.objects.get(name="x86_64")
+    system = System.objects.get(name="BareMetal")
+    fence_agent, _created = RemotePowerType.objects.get_or_create(
+        name="fleet-ipmi", defaults={"device": "bmc"}
+    )
+    pdu_fence_agent, _created = RemotePowerType.objects.get_or_create(
+        name="fleet-pdu", defaults={"device": "rpowerdevice"}
+    )
+    now = timezone.now()
+
+    RemotePowerDevice.objects.bulk_create(
+        [
+            RemotePowerDevice(
+                fqdn="{}-pdu.{}".format(FLEET_PREFIX, domain.name),
+                mac=get_mac(0, 0xFE),
+                fence_agent=pdu_fence_agent,
+                architecture=architecture,
+                domain=domain,
+            )
+        ]
+    )
+
+    enclosures = Enclosure.objects.bulk_create(
+        [
+            Enclosure(name="{}{}".format(FLEET_PREFIX, i))
+            for i in range(
+                (size + MACHINES_PER_ENCLOSURE - 1) // MACHINES_PER_ENCLOSURE
+            )
+        ]
+    )
+
+    machines: List[Machine] = []
+    for i in range(size):
+        fqdn = get_fqdn(i, domain)
+        reserved = i % 3 == 0
+        machines.append(
+            Machine(
+                fqdn=fqdn,
+                fqdn_hostname=fqdn.split(".")[0],
+                fqdn_domain=domain,
+                enclosure=enclosures[i // MACHINES_PER_ENCLOSURE],
+                architecture=architecture,
+                system=system,
+                cpu_model=CPU_MODELS[i % len(CPU_MODELS)],
+                cpu_cores=8 << (i % 4),
+                ram_amount=16384 << (i % 5),
+                reserved_by=user if reserved else None,
+                reserved_at=now if reserved else None,
+                reserved_until=now + datetime.timedelta(days=7) if reserved else None,
+                reserved_reason="Fleet benchmark" if reserved else None,
+            )
+        )
+    machines = Machine.objects.bulk_create(machines)
+
+    NetworkInterface.objects.bulk_create(
+        [
+            NetworkInterface(
+                machine=machine,
+                primary=interface == 0,
+                mac_address=get_mac(i, interface),
+                name="eth{}".format(interface),
+            )
+            for i, machine in enumerate(machines)
+            for interface in range(2)
+        ]
+    )
+    Installation.objects.bulk_create(
+        [
+            Installation(
+                machine=machine,
+                active=active,
+                architecture=architecture.name,
+                distribution=DISTRIBUTIONS[(i + active) % len(DISTRIBUTIONS)],
+                kernelversion="6.4.0-{}-default".format(i % 50),
+                partition="/dev/sda{}".format(2 + active),
+            )
+            for i, machine in enumerate(machines)
+            for active in (False, True)
+        ]
+    )
+    Annotation.objects.bulk_create(
+        [
+            Annotation(
+                machine=machine, text="Fleet machine {}".format(i), reporter=user
+            )
+            for i, machine in enumerate(machines)
+        ]
+    )
+    BMC.objects.bulk_create(
+        [
+            BMC(
+                machine=machine,
+                fqdn="{}-sp.{}".format(machine.fqdn_hostname, domain.name),
+                mac=get_mac(i, 0xFF),
+                fence_agent=fence_agent,
+            )
+            for i, machine in enumerate(machines)
+            if i % 2 == 0
+        ]
+    )
+    ReservationHistory.objects.bulk_create(
+        [
+            ReservationHistory(
+                machine=machine,
+                reserved_at=now - datetime.timedelta(days=week * 7 + 7),
+                reserved_until=now - datetime.timedelta(days=week * 7),
+                reserved_reason="Fleet benchmark, week {}".format(week),
+            )
+            for machine in machines
+            for week in range(2)
+        ]
+    )
+    MachineSearchIndex.update(machine.pk for machine in machines)
+    Distribution.rebuild()
+
+    return machines
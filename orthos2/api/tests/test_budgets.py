@@ -0,0 +1,190 @@
+"""
+This test module guards the read-only API commands against query-count regressions.
+
+Every command runs against a synthetic fleet (see `fleet.py`) and must stay within its query
+budget from "budgets.json". After an intended change, rewrite the budgets from the measured values:
+
+    ORTHOS2_RECORD_BUDGETS=1 pytest orthos2/api/tests/test_budgets.py
+
+Wall times depend on the machine running the tests and are not checked. To compare them before
+and after a change, run the opt-in benchmark, which prints the warm wall time of every command:
+
+    ORTHOS2_BENCHMARK=1 pytest -s orthos2/api/tests/test_budgets.py -k benchmark
+"""
+
+import json
+import os
+import time
+import unittest
+from typing import Any, Dict, NamedTuple, Tuple
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse  # type: ignore
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from orthos2.api.tests.fleet import FLEET_SIZE, build_fleet
+
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), "budgets.json")
+RECORD_BUDGETS = os.environ.get("ORTHOS2_RECORD_BUDGETS", "") == "1"
+BENCHMARK = os.environ.get("ORTHOS2_BENCHMARK", "") == "1"
+
+# warm runs of every command in the benchmark, the fastest one is reported
+BENCHMARK_RUNS = 5
+
+
+class Measurement(NamedTuple):
+    queries: int
+    seconds: float
+
+
+class CommandBudgetTest(APITestCase):
+    """Run every read command and compare its query count to the budget."""
+
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    # name -> (HTTP method, URL name, request data)
+    COMMANDS: Dict[str, Tuple[str, str, Dict[str, Any]]] = {
+        "info": ("get", "api:machine", {"fqdn": "fleet1.example.our-org.tld"}),
+        "bulkinfo": (
+            "post",
+            "api:machines",
+            {"fqdns": ["fleet{}".format(i) for i in range(100)]},
+        ),
+        "bulkinfo_query": ("post", "api:machines", {"query": "cpu_model =~ AMD"}),
+        "query": (
+            "post",
+            "api:query",
+            {"data": "fqdn, architecture, cpu_model, ram, reserved_by where ram > 0"},
+        ),
+        "query_installations": (
+            "post",
+            "api:query",
+            {"data": "fqdn, inst_dist, iface_mac_address where inst_active"},
+        ),
+        "query_dynamic_fields": (
+            "post",
+            "api:query",
+            {"data": "fqdn, ipv4, ipv6 where fqdn =* fleet19"},
+        ),
+        "reservationhistory": (
+            "get",
+            "api:history",
+            {"fqdn": "fleet1.example.our-org.tld"},
+        ),
+        "enclosure": ("get", "api:enclosure", {"name": "fleet1"}),
+        "remotepowerdevice": (
+            "get",
+            "api:remotepowerdevice",
+            {"fqdn": "fleet-pdu.example.our-org.tld"},
+        ),
+        "manufacturer": ("get", "api:manufacturer", {}),
+        "devicetype": ("get", "api:devicetype", {}),
+        "serialconsoletype": ("get", "api:serialconsoletype", {}),
+        "system": ("get", "api:system", {}),
+        "remotepowertype": ("get", "api:remotepowertype", {}),
+        "architecture": ("get", "api:architecture", {}),
+        "singletask": ("get", "api:singletask", {}),
+        "dailytask": ("get", "api:dailytask", {}),
+        "domainarchitecture": ("get", "api:domainarchitecture", {}),
+        "domain": ("get", "api:domain", {}),
+    }
+
+    measurements: Dict[str, Measurement] = {}
+    user: User
+    token: Token
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_superuser(
+            username="testuser", email="test@test.de", password="12345"
+        )
+        cls.token, _ = Token.objects.get_or_create(user=cls.user)
+        build_fleet(FLEET_SIZE, user=cls.user)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if RECORD_BUDGETS and cls.measurements:
+            budgets = {
+                name: {"queries": measurement.queries}
+                for name, measurement in sorted(cls.measurements.items())
+            }
+            with open(BUDGETS_FILE, "w") as budgets_file:
+                json.dump(budgets, budgets_file, indent=4)
+                budgets_file.write("\n")
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        with open(BUDGETS_FILE) as budgets_file:
+            self.budgets: Dict[str, Dict[str, Any]] = json.load(budgets_file)
+
+    def run_command(self, method: str, url_name: str, data: Dict[str, Any]) -> bytes:
+        url = reverse(url_name)
+        if method == "get":
+            response = self.client.get(url, data)
+        else:
+            response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        if response.streaming:  # type: ignore
+            return b"".join(response.streaming_content)  # type: ignore
+        return response.content
+
+    def measure(self, method: str, url_name: str, data: Dict[str, Any]) -> Measurement:
+        """Run a command twice and measure the second (warm) run."""
+        self.run_command(method, url_name, data)
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            content = self.run_command(method, url_name, data)
+            seconds = time.perf_counter() - start
+
+        result = json.loads(content)
+        self.assertNotEqual(result["header"]["type"], "AUTHREQUIRED")
+        if isinstance(result.get("data"), dict):
+            self.assertNotEqual(result["data"].get("type"), "ERROR", result["data"])
+        return Measurement(len(context), seconds)
+
+    def test_every_command_has_a_budget(self) -> None:
+        """Every measured command has a budget and vice versa."""
+        if RECORD_BUDGETS:
+            self.skipTest("Budgets are being recorded.")
+
+        # Assert
+        self.assertEqual(set(self.budgets), set(self.COMMANDS))
+
+    def test_budgets(self) -> None:
+        """No read command exceeds its query-count budget."""
+        for name, (method, url_name, data) in self.COMMANDS.items():
+            with self.subTest(command=name):
+                # Act
+                measurement = self.measure(method, url_name, data)
+                self.measurements[name] = measurement
+
+                # Assert
+                if RECORD_BUDGETS:
+                    continue
+                budget = self.budgets.get(name)
+                self.assertIsNotNone(budget, "No budget for '{}'".format(name))
+                self.assertLessEqual(
+                    measurement.queries,
+                    budget["queries"],  # type: ignore
+                    "'{}' ran {} queries, budget is {}".format(
+                        name, measurement.queries, budget["queries"]  # type: ignore
+                    ),
+                )
+
+    @unittest.skipUnless(BENCHMARK, "Set ORTHOS2_BENCHMARK=1 to run the benchmark.")
+    def test_benchmark(self) -> None:
+        """Print the warm wall time of every read command."""
+        for name, (method, url_name, data) in self.COMMANDS.items():
+            seconds = min(
+                self.measure(method, url_name, data).seconds
+                for _ in range(BENCHMARK_RUNS)
+            )
+            print("{:<24} {:8.3f}s".format(name, seconds))
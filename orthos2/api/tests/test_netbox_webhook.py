@@ -0,0 +1,127 @@
+"""
+This test module verifies the functionality of "/netbox/webhook".
+"""
+
+import hashlib
+import hmac
+import json
+from typing import Any, Dict
+
+from django.test import TestCase, override_settings
+from django.urls import reverse  # type: ignore
+
+from orthos2.api.tests.fleet import build_fleet
+from orthos2.data.models import DeviceType, Enclosure, Machine, Manufacturer
+from orthos2.taskmanager.models import SingleTask
+
+SECRET = "webhook-secret"
+
+
+@override_settings(NETBOX_WEBHOOK_SECRET=SECRET)
+class NetboxWebhookTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        self.machines = build_fleet(5)
+        for i, machine in enumerate(self.machines):
+            Machine.objects.filter(pk=machine.pk).update(netbox_id=101 + i)
+        # the enclosure of the last machine is a device of its own
+        Enclosure.objects.filter(pk=self.machines[4].enclosure_id).update(netbox_id=300)
+        manufacturer = Manufacturer.objects.create(name="Acme", netbox_id=5)
+        self.device_type = DeviceType.objects.create(
+            name="Acme 1000", manufacturer=manufacturer, netbox_id=7
+        )
+        SingleTask.objects.all().delete()
+
+    def post(self, payload: Dict[str, Any], secret: str = SECRET) -> Any:
+        body = json.dumps(payload).encode("utf-8")
+        return self.client.post(
+            reverse("api:netbox_webhook"),
+            body,
+            content_type="application/json",
+            HTTP_X_HOOK_SIGNATURE=hmac.new(
+                secret.encode("utf-8"), body, hashlib.sha512
+            ).hexdigest(),
+        )
+
+    def get_tasks(self) -> Dict[str, int]:
+        return {
+            task.name: json.loads(task.arguments)[0][0]
+            for task in SingleTask.objects.all()
+        }
+
+    def test_device(self) -> None:
+        """A changed device queues fetching its machine, with its enclosure and subobjects."""
+        response = self.post(
+            {"event": "updated", "model": "device", "data": {"id": 101}}
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"queued": 1})
+        self.assertEqual(
+            self.get_tasks(), {"NetboxFetchFullMachine": self.machines[0].pk}
+        )
+
+    def test_ip_address(self) -> None:
+        """Changed IP addresses queue fetching the machine of their interface."""
+        payload = {
+            "event": "created",
+            "model": "ipaddress",
+            "data": {
+                "id": 1,
+                "assigned_object_type": "dcim.interface",
+                "assigned_object": {"id": 4, "device": {"id": 102}},
+            },
+        }
+        self.post(payload)
+        self.post(payload)
+
+        # the second webhook is coalesced with the waiting task
+        self.assertEqual(SingleTask.objects.count(), 1)
+        self.assertEqual(
+            self.get_tasks(), {"NetboxFetchFullMachine": self.machines[1].pk}
+        )
+
+    def test_enclosure_and_device_type(self) -> None:
+        self.post({"event": "updated", "model": "device", "data": {"id": 300}})
+        self.post({"event": "deleted", "model": "devicetype", "data": {"id": 7}})
+
+        self.assertEqual(
+            self.get_tasks(),
+            {
+                "NetboxFetchFullEnclosure": self.machines[4].enclosure_id,
+                "NetboxFetchFullDeviceType": self.device_type.pk,
+            },
+        )
+
+    def test_ignored(self) -> None:
+        """Webhooks of other models or unknown objects don't queue anything."""
+        response = self.post({"event": "updated", "model": "site", "data": {"id": 1}})
+        self.assertEqual(response.json(), {"queued": 0})
+        response = self.post({"event": "updated", "model": "device", "data": {"id": 1}})
+        self.assertEqual(response.json(), {"queued": 0})
+        self.assertFalse(SingleTask.objects.exists())
+
+    def test_invalid_signature(self) -> None:
+        response = self.post(
+            {"event": "updated", "model": "device", "data": {"id": 101}}, "wrong"
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(SingleTask.objects.exists())
+
+    def test_invalid_payload(self) -> None:
+        response = self.post({"event": "updated", "model": "interface", "data": {}})
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(NETBOX_WEBHOOK_SECRET="")
+    def test_disabled(self) -> None:
+        response = self.post(
+            {"event": "updated", "model": "device", "data": {"id": 101}}, ""
+        )
+
+        self.assertEqual(response.status_code, 404)
@@ -8,6 +8,7 @@ from rest_framework.schemas import get_schema_view
 from orthos2.api import views
 from orthos2.api.commands import *  # noqa: F403
 from orthos2.api.schema import CustomSchemaGenerator
+from orthos2.utils.cache import cache_response
 
 app_name = "api"
 urlpatterns = [
@@ -21,19 +22,24 @@ urlpatterns = [
     ),
     path(
         "schema",
-        get_schema_view(
-            title="Orthos2",
-            description="API for Orthos2",
-            version="1.10",
-            generator_class=CustomSchemaGenerator,
+        # the schema only changes with the code, but lists the endpoints by user class
+        cache_response()(
+            get_schema_view(
+                title="Orthos2",
+                description="API for Orthos2",
+                version="1.10",
+                generator_class=CustomSchemaGenerator,
+            )
         ),
         name="openapi-schema",
     ),
     re_path(r"^$", views.root, name="root"),
     re_path(r"^login", authtoken_views.obtain_auth_token),
+    path("netbox/webhook", views.netbox_webhook, name="netbox_webhook"),
 ]
 
 urlpatterns += InfoCommand.get_urls()  # noqa: F405
+urlpatterns += BulkInfoCommand.get_urls()  # noqa: F405
 urlpatterns += EnclosureInfoCommand.get_urls()  # noqa: F405
 urlpatterns += RemotePowerDeviceInfoCommand.get_urls()  # noqa: F405
 urlpatterns += ManufacturerInfoCommand.get_urls()  # noqa: F405
@@ -47,6 +53,7 @@ urlpatterns += ArchitectureInfoCommand.get_urls()  # noqa: F405
 urlpatterns += DomainArchitectureInfoCommand.get_urls()  # noqa: F405
 urlpatterns += DomainInfoCommand.get_urls()  # noqa: F405
 urlpatterns += QueryCommand.get_urls()  # noqa: F405
+urlpatterns += ExportCommand.get_urls()  # noqa: F405
 urlpatterns += ReserveCommandGet.get_urls()  # noqa: F405
 urlpatterns += ReserveCommandPost.get_urls()  # noqa: F405
 urlpatterns += ReleaseCommand.get_urls()  # noqa: F405
@@ -60,6 +67,7 @@ urlpatterns += AddCommand.get_urls()  # noqa: F405
 urlpatterns += AddVMCommandGet.get_urls()  # noqa: F405
 urlpatterns += AddVMCommandPost.get_urls()  # noqa: F405
 urlpatterns += AddMachineCommand.get_urls()  # noqa: F405
+urlpatterns += ImportCommand.get_urls()  # noqa: F405
 urlpatterns += AddSerialConsoleCommandGet.get_urls()  # noqa: F405
 urlpatterns += AddSerialConsoleCommandPost.get_urls()  # noqa: F405
 urlpatterns += AddAnnotationCommandGet.get_urls()  # noqa: F405
@@ -1,43 +1,96 @@
+import json
+import logging
 from typing import Any, Dict
 
 from django.conf import settings
 from django.http import HttpRequest, JsonResponse
 from django.urls import reverse  # type: ignore
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework.decorators import api_view
 
 from orthos2.api.serializers.misc import RootSerializer
 from orthos2.data.models import ServerConfig
+from orthos2.taskmanager.tasks.netbox import enqueue_changed
+from orthos2.utils.cache import get_or_set
+from orthos2.utils.netbox import check_webhook_signature, get_webhook_change
+
+logger = logging.getLogger("api")
+
+
+def get_commands() -> Dict[str, Any]:
+    """
+    Return the descriptions of the commands.
+
+    The tab completion of INFO lists all machine FQDNs, so the descriptions are cached in the
+    "machines" namespace.
+    """
+    import orthos2.api.commands as commands
+
+    return {
+        "info": commands.InfoCommand.description(),
+        "bulkinfo": commands.BulkInfoCommand.description(),
+        "query": commands.QueryCommand.description(),
+        "export": commands.ExportCommand.description(),
+        "reserve": commands.ReserveCommandGet.description(),
+        "release": commands.ReleaseCommand.description(),
+        "reservationhistory": commands.ReservationHistoryCommand.description(),
+        "rescan": commands.RescanCommand.description(),
+        "regenerate": commands.RegenerateCommand.description(),
+        "serverconfig": commands.ServerConfigCommand.description(),
+        "setup": commands.SetupCommand.description(),
+        "power": commands.PowerCommand.description(),
+        "add": commands.AddCommand.description(),
+        "import": commands.ImportCommand.description(),
+        "delete": commands.DeleteCommand.description(),
+    }
 
 
 @api_view(["GET"])
 def root(request: HttpRequest) -> JsonResponse:
     """API root."""
-    import orthos2.api.commands as commands
-
     data: Dict[str, Any] = {
         "version": settings.VERSION,
         "contact": settings.CONTACT,
         "user": request.user.username,  # type: ignore
         "api": request.build_absolute_uri(reverse("api:root")),
         "web": request.build_absolute_uri(reverse("frontend:root")),
-        "message": ServerConfig.get_server_config_manager().by_key(
+        "message": ServerConfig.get_server_config_manager().cached_by_key(
             "orthos.api.welcomemessage", "Come in, reserve and play..."
         ),
-        "commands": {
-            "info": commands.InfoCommand.description(),
-            "query": commands.QueryCommand.description(),
-            "reserve": commands.ReserveCommandGet.description(),
-            "release": commands.ReleaseCommand.description(),
-            "reservationhistory": commands.ReservationHistoryCommand.description(),
-            "rescan": commands.RescanCommand.description(),
-            "regenerate": commands.RegenerateCommand.description(),
-            "serverconfig": commands.ServerConfigCommand.description(),
-            "setup": commands.SetupCommand.description(),
-            "power": commands.PowerCommand.description(),
-            "add": commands.AddCommand.description(),
-            "delete": commands.DeleteCommand.description(),
-        },
+        "commands": get_or_set(["machines"], "api-commands", get_commands),
     }
     root = RootSerializer(data)
 
     return root.as_json
+
+
+@csrf_exempt
+@require_POST
+def netbox_webhook(request: HttpRequest) -> JsonResponse:
+    """
+    Receive a webhook of NetBox and queue fetching the objects linked to the changed NetBox object.
+
+    The webhook must be signed with `NETBOX_WEBHOOK_SECRET` (header "X-Hook-Signature").
+    """
+    if not settings.NETBOX_WEBHOOK_SECRET:
+        return JsonResponse({"error": "NetBox webhooks are disabled."}, status=404)
+    if not check_webhook_signature(
+        request.body,
+        request.headers.get("X-Hook-Signature", ""),
+        settings.NETBOX_WEBHOOK_SECRET,
+    ):
+        logger.warning("NetBox webhook with invalid signature refused.")
+        return JsonResponse({"error": "Invalid signature."}, status=403)
+
+    try:
+        change = get_webhook_change(json.loads(request.body))
+    except ValueError as err:
+        return JsonResponse({"error": str(err)}, status=400)
+    if change is None:
+        return JsonResponse({"queued": 0})
+    queued = enqueue_changed({change[0]: {change[1]}})
+    logger.info(
+        "NetBox webhook for %s %d queued %d fetch tasks.", change[0], change[1], queued
+    )
+    return JsonResponse({"queued": queued}, status=202)
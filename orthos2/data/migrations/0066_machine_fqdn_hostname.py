@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def populate_fqdn_hostname(apps, schema_editor):
+    """
+    Store the hostname part of every FQDN in batches.
+
+    The value is split exactly like `Machine.save()` does it (case preserved), so that the backfilled rows match the
+    same case-sensitive `fqdn_hostname` lookups as rows saved later.
+    """
+    Machine = apps.get_model("data", "Machine")
+
+    batch = []
+    for machine in Machine.objects.only("pk", "fqdn").iterator(chunk_size=BATCH_SIZE):
+        machine.fqdn_hostname = machine.fqdn.split(".")[0]
+        batch.append(machine)
+        if len(batch) == BATCH_SIZE:
+            Machine.objects.bulk_update(batch, ["fqdn_hostname"])
+            batch = []
+    if batch:
+        Machine.objects.bulk_update(batch, ["fqdn_hostname"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0065_alter_remotepower_fence_agent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="machine",
+            name="fqdn_hostname",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="The hostname part of the FQDN, kept for indexed hostname lookups",
+                max_length=200,
+                verbose_name="Hostname",
+            ),
+        ),
+        migrations.RunPython(
+            populate_fqdn_hostname,
+            migrations.RunPython.noop,
+        ),
+    ]
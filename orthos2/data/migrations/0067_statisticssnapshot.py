@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0066_machine_fqdn_hostname"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatisticsSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "date",
+                    models.DateField(
+                        default=django.utils.timezone.localdate, unique=True
+                    ),
+                ),
+                ("total", models.IntegerField(default=0)),
+                ("free", models.IntegerField(default=0)),
+                ("reserved", models.IntegerField(default=0)),
+                ("reserved_permanently", models.IntegerField(default=0)),
+                ("status_ping", models.IntegerField(default=0)),
+                ("status_ssh", models.IntegerField(default=0)),
+                ("status_login", models.IntegerField(default=0)),
+                ("check_ping", models.IntegerField(default=0)),
+                ("check_ssh", models.IntegerField(default=0)),
+                ("check_login", models.IntegerField(default=0)),
+                ("architectures", models.JSONField(default=list)),
+                ("domains", models.JSONField(default=list)),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated at"),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+            },
+        ),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:13
+# The search indexes are database specific: a trigram GIN index on PostgreSQL, an FTS5 table
+# kept in sync by triggers on SQLite. Other databases fall back to scanning the documents.
+
+from collections import defaultdict
+from typing import Dict, List
+
+import django.db.models.deletion
+from django.apps.registry import Apps
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.utils import OperationalError
+
+POSTGRES_FORWARDS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX data_machinesearchindex_document_trgm ON data_machinesearchindex "
+    "USING gin (document gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS data_machinesearchindex_document_trgm",
+]
+
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE data_machinesearchindex_fts USING fts5("
+    "document, content='data_machinesearchindex', content_rowid='machine_id', "
+    "tokenize='trigram')",
+    "CREATE TRIGGER data_machinesearchindex_ai AFTER INSERT ON data_machinesearchindex BEGIN "
+    "INSERT INTO data_machinesearchindex_fts(rowid, document) "
+    "VALUES (new.machine_id, new.document); END",
+    "CREATE TRIGGER data_machinesearchindex_ad AFTER DELETE ON data_machinesearchindex BEGIN "
+    "INSERT INTO data_machinesearchindex_fts(data_machinesearchindex_fts, rowid, document) "
+    "VALUES ('delete', old.machine_id, old.document); END",
+    "CREATE TRIGGER data_machinesearchindex_au AFTER UPDATE ON data_machinesearchindex BEGIN "
+    "INSERT INTO data_machinesearchindex_fts(data_machinesearchindex_fts, rowid, document) "
+    "VALUES ('delete', old.machine_id, old.document); "
+    "INSERT INTO data_machinesearchindex_fts(rowid, document) "
+    "VALUES (new.machine_id, new.document); END",
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS data_machinesearchindex_au",
+    "DROP TRIGGER IF EXISTS data_machinesearchindex_ad",
+    "DROP TRIGGER IF EXISTS data_machinesearchindex_ai",
+    "DROP TABLE IF EXISTS data_machinesearchindex_fts",
+]
+
+
+def create_search_index(
+    app_registry: Apps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for statement in POSTGRES_FORWARDS:
+            schema_editor.execute(statement)
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(SQLITE_FORWARDS[0])
+        except OperationalError:
+            # SQLite without FTS5 or without the trigram tokenizer (< 3.34)
+            return
+        for statement in SQLITE_FORWARDS[1:]:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(
+    app_registry: Apps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for statement in POSTGRES_BACKWARDS:
+            schema_editor.execute(statement)
+    elif vendor == "sqlite":
+        for statement in SQLITE_BACKWARDS:
+            schema_editor.execute(statement)
+
+
+def populate_search_index(
+    app_registry: Apps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    db_alias = schema_editor.connection.alias
+    Machine = app_registry.get_model("data", "Machine")
+    Installation = app_registry.get_model("data", "Installation")
+    NetworkInterface = app_registry.get_model("data", "NetworkInterface")
+    Annotation = app_registry.get_model("data", "Annotation")
+    MachineSearchIndex = app_registry.get_model("data", "MachineSearchIndex")
+
+    parts: Dict[int, List[str]] = defaultdict(list)
+    for pk, *values in (
+        Machine.objects.using(db_alias)
+        .values_list(
+            "pk", "fqdn", "comment", "serial_number", "product_code", "cpu_model"
+        )
+        .iterator()
+    ):
+        parts[pk].extend(values)
+
+    related = [
+        (Installation.objects.using(db_alias).filter(active=True), "distribution"),
+        (NetworkInterface.objects.using(db_alias).all(), "mac_address"),
+        (Annotation.objects.using(db_alias).all(), "text"),
+    ]
+    for queryset, field in related:
+        for machine_id, value in queryset.values_list("machine_id", field).iterator():
+            parts[machine_id].append(value)
+
+    MachineSearchIndex.objects.using(db_alias).bulk_create(
+        [
+            MachineSearchIndex(
+                machine_id=pk,
+                document=" ".join(value for value in values if value).lower(),
+            )
+            for pk, values in parts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0067_statisticssnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MachineSearchIndex",
+            fields=[
+                (
+                    "machine",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="searchindex",
+                        serialize=False,
+                        to="data.machine",
+                    ),
+                ),
+                ("document", models.TextField(blank=True)),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated at"),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:27
+
+from django.apps.registry import Apps
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+
+def populate_distributions(
+    app_registry: Apps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    db_alias = schema_editor.connection.alias
+    Installation = app_registry.get_model("data", "Installation")
+    Distribution = app_registry.get_model("data", "Distribution")
+
+    names = (
+        Installation.objects.using(db_alias)
+        .exclude(distribution="")
+        .values_list("distribution", flat=True)
+        .distinct()
+    )
+    Distribution.objects.using(db_alias).bulk_create(
+        [Distribution(name=name) for name in names], ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0068_machinesearchindex"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Distribution",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200, unique=True)),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.RunPython(populate_distributions, migrations.RunPython.noop),
+    ]
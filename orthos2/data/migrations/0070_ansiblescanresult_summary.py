@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:31
+
+import json
+
+from django.apps.registry import Apps
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+
+def summarize_scan_results(
+    app_registry: Apps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """Extract the summary of existing scans (same as `AnsibleScanResult.update_summary()`)."""
+    db_alias = schema_editor.connection.alias
+    AnsibleScanResult = app_registry.get_model("data", "AnsibleScanResult")
+
+    fields = ["facts_size", "distribution", "kernel", "architecture", "memtotal_mb"]
+    batch = []
+    for result in AnsibleScanResult.objects.using(db_alias).iterator(chunk_size=100):
+        facts = result.facts_raw if isinstance(result.facts_raw, dict) else {}
+        result.facts_size = len(json.dumps(result.facts_raw).encode("utf-8"))
+        result.distribution = " ".join(
+            str(value)
+            for value in (
+                facts.get("ansible_distribution"),
+                facts.get("ansible_distribution_version"),
+            )
+            if value
+        )[:200]
+        result.kernel = str(facts.get("ansible_kernel", ""))[:200]
+        result.architecture = str(facts.get("ansible_architecture", ""))[:50]
+        memtotal_mb = facts.get("ansible_memtotal_mb")
+        result.memtotal_mb = memtotal_mb if isinstance(memtotal_mb, int) else None
+        batch.append(result)
+
+        if len(batch) == 100:
+            AnsibleScanResult.objects.using(db_alias).bulk_update(batch, fields)
+            batch = []
+    AnsibleScanResult.objects.using(db_alias).bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0069_distribution"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ansiblescanresult",
+            name="architecture",
+            field=models.CharField(
+                blank=True, help_text="Machine architecture", max_length=50
+            ),
+        ),
+        migrations.AddField(
+            model_name="ansiblescanresult",
+            name="distribution",
+            field=models.CharField(
+                blank=True, help_text="Distribution name and version", max_length=200
+            ),
+        ),
+        migrations.AddField(
+            model_name="ansiblescanresult",
+            name="facts_size",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Size of facts_raw as JSON in bytes"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ansiblescanresult",
+            name="kernel",
+            field=models.CharField(
+                blank=True, help_text="Kernel release", max_length=200
+            ),
+        ),
+        migrations.AddField(
+            model_name="ansiblescanresult",
+            name="memtotal_mb",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Total memory in MB", null=True
+            ),
+        ),
+        migrations.RunPython(summarize_scan_results, migrations.RunPython.noop),
+    ]
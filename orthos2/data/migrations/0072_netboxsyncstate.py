@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0071_machineevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NetboxSyncState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "object_type",
+                    models.CharField(
+                        choices=[
+                            ("enclosure", "Enclosure"),
+                            ("manufacturer", "Manufacturer"),
+                            ("devicetype", "Device Type"),
+                            ("machine", "Machine"),
+                            ("networkinterface", "Network Interface"),
+                            ("bmc", "BMC"),
+                            ("remotepowerdevice", "Remote Power Device"),
+                        ],
+                        max_length=50,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "watermark",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Changes fetched until"
+                    ),
+                ),
+                (
+                    "last_full_sync",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Last full sync at"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated at"),
+                ),
+            ],
+            options={
+                "verbose_name": "NetBox Sync State",
+                "ordering": ["object_type"],
+            },
+        ),
+    ]
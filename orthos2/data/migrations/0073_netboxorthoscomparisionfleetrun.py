@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0072_netboxsyncstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NetboxOrthosComparisionFleetRun",
+            fields=[
+                (
+                    "run_id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("compare_timestamp", models.DateTimeField()),
+                (
+                    "object_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Number of objects compared"
+                    ),
+                ),
+                (
+                    "drift_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Number of properties which differ"
+                    ),
+                ),
+                (
+                    "summary",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Number of properties which differ by object type and property name",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-compare_timestamp"],
+            },
+        ),
+        migrations.AddField(
+            model_name="netboxorthoscomparisionrun",
+            name="fleet_run",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="runs",
+                to="data.netboxorthoscomparisionfleetrun",
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@ from .ansible import AnsibleScanResult
 from .architecture import Architecture
 from .bmc import BMC
 from .devicetype import DeviceType
+from .distribution import Distribution
 from .domain import Domain, DomainAdmin, validate_domain_ending
 from .enclosure import Enclosure
 from .installation import Installation
@@ -14,11 +15,16 @@ from .machine import (
     check_permission,
     validate_dns,
 )
+from .machineevent import MachineEvent
+from .machinesearchindex import MachineSearchIndex
 from .manufacturer import Manufacturer
 from .netboxorthoscomparision import (
+    NetboxOrthosComparisionBatch,
+    NetboxOrthosComparisionFleetRun,
     NetboxOrthosComparisionResult,
     NetboxOrthosComparisionRun,
 )
+from .netboxsyncstate import NetboxSyncBatch, NetboxSyncState
 from .networkinterface import NetworkInterface
 from .remotepower import RemotePower
 from .remotepowerdevice import RemotePowerDevice
@@ -27,6 +33,7 @@ from .reservationhistory import ReservationHistory
 from .serialconsole import SerialConsole
 from .serialconsoletype import SerialConsoleType
 from .serverconfig import ServerConfig, ServerConfigManager, ServerConfigSSHManager
+from .statisticssnapshot import StatisticsSnapshot
 from .system import System
 
 __all__ = [
@@ -35,6 +42,7 @@ __all__ = [
     "Architecture",
     "BMC",
     "DeviceType",
+    "Distribution",
     "Domain",
     "DomainAdmin",
     "validate_domain_ending",
@@ -46,9 +54,15 @@ __all__ = [
     "ViewManager",
     "check_permission",
     "validate_dns",
+    "MachineEvent",
+    "MachineSearchIndex",
     "Manufacturer",
+    "NetboxOrthosComparisionBatch",
+    "NetboxOrthosComparisionFleetRun",
     "NetboxOrthosComparisionRun",
     "NetboxOrthosComparisionResult",
+    "NetboxSyncBatch",
+    "NetboxSyncState",
     "NetworkInterface",
     "RemotePower",
     "RemotePowerDevice",
@@ -59,5 +73,6 @@ __all__ = [
     "ServerConfig",
     "ServerConfigManager",
     "ServerConfigSSHManager",
+    "StatisticsSnapshot",
     "System",
 ]
@@ -2,10 +2,11 @@
 Ansible scan result models.
 """
 
+import json
 import logging
 from datetime import datetime
 from decimal import Decimal
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, List
 
 from django.db import models
 from django.utils import timezone
@@ -49,6 +50,33 @@ class AnsibleScanResult(models.Model):
         max_length=50, blank=True, help_text="Ansible version used for this scan"
     )
 
+    # Summary of facts_raw, extracted when the scan is saved
+    facts_size = models.PositiveIntegerField(
+        default=0, help_text="Size of facts_raw as JSON in bytes"
+    )
+    distribution = models.CharField(
+        max_length=200, blank=True, help_text="Distribution name and version"
+    )
+    kernel = models.CharField(max_length=200, blank=True, help_text="Kernel release")
+    architecture = models.CharField(
+        max_length=50, blank=True, help_text="Machine architecture"
+    )
+    memtotal_mb = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Total memory in MB"
+    )
+
+    # Fields needed to list scans without loading facts_raw
+    SUMMARY_FIELDS: List[str] = [
+        "machine",
+        "run_date",
+        "ansible_version",
+        "facts_size",
+        "distribution",
+        "kernel",
+        "architecture",
+        "memtotal_mb",
+    ]
+
     class Meta:
         ordering = ["-run_date"]
         indexes = [
@@ -58,6 +86,30 @@ class AnsibleScanResult(models.Model):
     def __str__(self):
         return f"AnsibleScan({self.machine}, {self.run_date})"
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Update the summary if facts_raw is loaded."""
+        if "facts_raw" not in self.get_deferred_fields():
+            self.update_summary()
+        super().save(*args, **kwargs)
+
+    def update_summary(self) -> None:
+        """Extract the summary fields from facts_raw."""
+        facts = self.facts_raw if isinstance(self.facts_raw, dict) else {}
+
+        self.facts_size = len(json.dumps(self.facts_raw).encode("utf-8"))
+        self.distribution = " ".join(
+            str(value)
+            for value in (
+                facts.get("ansible_distribution"),
+                facts.get("ansible_distribution_version"),
+            )
+            if value
+        )[:200]
+        self.kernel = str(facts.get("ansible_kernel", ""))[:200]
+        self.architecture = str(facts.get("ansible_architecture", ""))[:50]
+        memtotal_mb = facts.get("ansible_memtotal_mb")
+        self.memtotal_mb = memtotal_mb if isinstance(memtotal_mb, int) else None
+
     def apply_to_machine(self):
         """
         Parse facts_raw and update the linked Machine's fields.
@@ -9,11 +9,13 @@ from django.db import models
 from django.utils import timezone
 
 from orthos2.data.models.netboxorthoscomparision import (
+    NetboxOrthosComparisionBatch,
     NetboxOrthosComparisionResult,
     NetboxOrthosComparisionRun,
+    save_comparision,
 )
 from orthos2.data.validators import validate_mac_address
-from orthos2.utils.netbox import Netbox
+from orthos2.utils.netbox import Netbox, NetboxLookup
 
 if TYPE_CHECKING:
     from django.db.models.fields.related_descriptors import RelatedManager
@@ -93,23 +95,23 @@ class BMC(models.Model):
     def __str__(self) -> str:
         return self.fqdn
 
-    def fetch_netbox_record(self) -> Dict[str, Any]:
+    def fetch_netbox_record(
+        self, lookup: Optional[NetboxLookup] = None
+    ) -> Dict[str, Any]:
         """
         Fetch the NetBox record of this NetworkInterface objects. This will attempt to search either the Virtual Machine
         or DCIM endpoint, depending on the System type of the machine.
 
+        :param lookup: Where to look the interfaces up, by default they are requested from NetBox.
         :returns: An empty dict in case no network interface could be found in NetBox that matches the MAC of this
                   interface.
         """
-        netbox_api = Netbox.get_instance()
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
         if self.machine.system.virtual:
-            netbox_interfaces = netbox_api.check_vm_interface_by_id(
-                self.machine.netbox_id
-            )
+            netbox_interfaces = lookup.get_interfaces(True, self.machine.netbox_id)
         else:
-            netbox_interfaces = netbox_api.check_interface_mgmt_by_id(
-                self.machine.netbox_id
-            )
+            netbox_interfaces = lookup.get_mgmt_interfaces(self.machine.netbox_id)
         netbox_interface = {}
         for interface in netbox_interfaces:
             if interface.get("primary_mac_address") is None:
@@ -119,19 +121,26 @@ class BMC(models.Model):
                 break
         return netbox_interface
 
-    def fetch_netbox_ips(self, interface_id: int) -> List[Dict[str, Any]]:
+    def fetch_netbox_ips(
+        self, interface_id: int, lookup: Optional[NetboxLookup] = None
+    ) -> List[Dict[str, Any]]:
         """
         Fetch the IPs that are assigned to a given network interface in NetBox.
         """
-        netbox_api = Netbox.get_instance()
-        if self.machine.system.virtual:
-            return netbox_api.check_ip_by_vm_interface(interface_id)
-        else:
-            return netbox_api.check_ip_by_interface(interface_id)
-
-    def compare_netbox(self) -> None:
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        return lookup.get_ips(self.machine.system.virtual, interface_id)
+
+    def compare_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxOrthosComparisionBatch] = None,
+    ) -> None:
         """
         Compare the current data in the database of Orthos 2 with the data from NetBox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
+        :param batch: Collects the run and its results instead of saving them, see `NetboxCompareFleet`.
         """
         if self.machine.netbox_id == 0:
             logger.debug("Skipping comparision because NetBox ID is 0.")
@@ -144,12 +153,12 @@ class BMC(models.Model):
             object_type=NetboxOrthosComparisionRun.NetboxOrthosComparisionItemTypes.BMC,
             object_bmc=self,
         )
-        run_obj.save()
+        save_comparision(run_obj, batch)
 
-        netbox_machine = self.machine.fetch_netbox_record()
+        netbox_machine = self.machine.fetch_netbox_record(lookup)
         if netbox_machine is None:
             return
-        netbox_interface = self.fetch_netbox_record()
+        netbox_interface = self.fetch_netbox_record(lookup)
         if len(netbox_interface.keys()) == 0:
             logger.warning(
                 "Interface with MAC %s could not be found in NetBox.", self.mac
@@ -157,15 +166,18 @@ class BMC(models.Model):
             return
 
         # FIXME: A single interface can have any number of IPs (both v4 and v6)
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="mac_address",
-            orthos_result=self.mac,
-            netbox_result=netbox_interface.get("primary_mac_address", {}).get(
-                "display", "None"
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="mac_address",
+                orthos_result=self.mac,
+                netbox_result=netbox_interface.get("primary_mac_address", {}).get(
+                    "display", "None"
+                ),
             ),
-        ).save()
-        ips = self.fetch_netbox_ips(netbox_interface.get("id"))  # type: ignore
+            batch,
+        )
+        ips = self.fetch_netbox_ips(netbox_interface.get("id"), lookup)  # type: ignore
         if len(ips) == 0:
             logger.debug("No IPs assigned to this interface in NetBox.")
             return
@@ -177,41 +189,55 @@ class BMC(models.Model):
         machine_primary_oob = netbox_machine.get("oob_ip", "<not set>")
         # Virtual machines don't have out-of-band IPs
         if not self.machine.system.virtual:
-            NetboxOrthosComparisionResult(
-                run_id=run_obj,
-                property_name="NetBox Out-Of-Band IP set?",
-                orthos_result="True",
-                netbox_result=str((machine_primary_oob != "")),
-            ).save()
+            save_comparision(
+                NetboxOrthosComparisionResult(
+                    run_id=run_obj,
+                    property_name="NetBox Out-Of-Band IP set?",
+                    orthos_result="True",
+                    netbox_result=str((machine_primary_oob != "")),
+                ),
+                batch,
+            )
         # IPs
         for ip in ips:
             ip_obj = ipaddress.ip_network(ip.get("display"))  # type: ignore
-            NetboxOrthosComparisionResult(
-                run_id=run_obj,
-                property_name="fqdn (IPv%s)" % ip_obj.version,
-                orthos_result=self.fqdn,
-                netbox_result=ip.get("dns_name", "<not set>"),
-            ).save()
-            if ip_obj.version == 4:
+            save_comparision(
                 NetboxOrthosComparisionResult(
                     run_id=run_obj,
-                    property_name="ip_address_v4",
-                    orthos_result=self.ip_address_v4 or "<not set>",
-                    netbox_result=str(ip_obj).split("/", 1)[0],
-                ).save()
+                    property_name="fqdn (IPv%s)" % ip_obj.version,
+                    orthos_result=self.fqdn,
+                    netbox_result=ip.get("dns_name", "<not set>"),
+                ),
+                batch,
+            )
+            if ip_obj.version == 4:
+                save_comparision(
+                    NetboxOrthosComparisionResult(
+                        run_id=run_obj,
+                        property_name="ip_address_v4",
+                        orthos_result=self.ip_address_v4 or "<not set>",
+                        netbox_result=str(ip_obj).split("/", 1)[0],
+                    ),
+                    batch,
+                )
             if ip_obj.version == 6:
-                NetboxOrthosComparisionResult(
-                    run_id=run_obj,
-                    property_name="ip_address_v6",
-                    orthos_result=self.ip_address_v6 or "<not set>",
-                    netbox_result=str(ip_obj).split("/", 1)[0],
-                ).save()
+                save_comparision(
+                    NetboxOrthosComparisionResult(
+                        run_id=run_obj,
+                        property_name="ip_address_v6",
+                        orthos_result=self.ip_address_v6 or "<not set>",
+                        netbox_result=str(ip_obj).split("/", 1)[0],
+                    ),
+                    batch,
+                )
         # TODO: Machine
         # TODO: Ethernet Type
 
-    def fetch_netbox(self) -> None:
+    def fetch_netbox(self, lookup: Optional[NetboxLookup] = None) -> None:
         """
         Fetch information from Netbox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
         """
         if self.machine.netbox_id == 0:
             logger.debug("Skipping fetching from NetBox because NetBox ID is 0.")
@@ -221,13 +247,13 @@ class BMC(models.Model):
             tz=timezone.get_current_timezone()
         )
         self.save()
-        netbox_interface = self.fetch_netbox_record()
+        netbox_interface = self.fetch_netbox_record(lookup)
         if len(netbox_interface.keys()) == 0:
             logger.warning(
                 "Interface with MAC %s could not be found in NetBox.", self.mac
             )
             return
-        ips = self.fetch_netbox_ips(netbox_interface.get("id"))  # type: ignore
+        ips = self.fetch_netbox_ips(netbox_interface.get("id"), lookup)  # type: ignore
         if len(ips) == 0:
             logger.debug("No IPs assigned to this interface in NetBox.")
             return
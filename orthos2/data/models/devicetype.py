@@ -10,10 +10,12 @@ from requests import HTTPError
 
 from orthos2.data.models.manufacturer import Manufacturer
 from orthos2.data.models.netboxorthoscomparision import (
+    NetboxOrthosComparisionBatch,
     NetboxOrthosComparisionResult,
     NetboxOrthosComparisionRun,
+    save_comparision,
 )
-from orthos2.utils.netbox import Netbox
+from orthos2.utils.netbox import Netbox, NetboxLookup, memoize
 
 if TYPE_CHECKING:
     from django.db.models.expressions import Combinable
@@ -70,6 +72,14 @@ class DeviceType(models.Model):
 
     objects = DeviceTypeManager()
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Remember the NetBox ID for comparison before `save()`."""
+        super().__init__(*args, **kwargs)
+        # not `self.netbox_id`, which would load a deferred field
+        self._original_netbox_id: Optional[int] = (
+            self.__dict__.get("netbox_id") if self.pk is not None else None
+        )
+
     def natural_key(self) -> Tuple[str]:
         return (self.name,)
 
@@ -113,7 +123,16 @@ class DeviceType(models.Model):
         """
         if not netbox_device_type_id:
             return None
+        return memoize(
+            "device_type",
+            netbox_device_type_id,
+            lambda: cls._get_or_create_from_netbox(netbox_device_type_id),
+        )
 
+    @classmethod
+    def _get_or_create_from_netbox(
+        cls, netbox_device_type_id: int
+    ) -> Optional["DeviceType"]:
         try:
             return cls.objects.get(netbox_id=netbox_device_type_id)
         except cls.DoesNotExist:
@@ -151,25 +170,30 @@ class DeviceType(models.Model):
             device_type.save()
         return device_type
 
-    def fetch_netbox_record(self) -> Optional[Dict[str, Any]]:
+    def fetch_netbox_record(
+        self, lookup: Optional[NetboxLookup] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Fetch the record of this DeviceType object from NetBox.
 
+        :param lookup: Where to look the record up, by default it is requested from NetBox.
         :returns: None in case the record cannot be retrieved. The Dict with the NetBox data otherwhise.
         :raises HTTPError: In case any HTTP code except 200 and 404 is returned.
         """
-        netbox_api = Netbox.get_instance()
-        try:
-            return netbox_api.fetch_device_type(self.netbox_id)
-        except HTTPError as e:
-            if e.response.status_code == 404:
-                logger.info("Fetching DeviceType from NetBox failed with status 404.")
-                return None
-            raise e
-
-    def compare_netbox(self) -> None:
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        return lookup.get_device_type(self.netbox_id)
+
+    def compare_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxOrthosComparisionBatch] = None,
+    ) -> None:
         """
         Compare the current data in the database of Orthos 2 with the data from NetBox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
+        :param batch: Collects the run and its results instead of saving them, see `NetboxCompareFleet`.
         """
         if self.netbox_id == 0:
             logger.debug("Skipping comparision because NetBox ID is 0.")
@@ -182,26 +206,32 @@ class DeviceType(models.Model):
             object_type=NetboxOrthosComparisionRun.NetboxOrthosComparisionItemTypes.DEVICE_TYPE,
             object_device_type=self,
         )
-        run_obj.save()
+        save_comparision(run_obj, batch)
 
-        netbox_devicetype = self.fetch_netbox_record()
+        netbox_devicetype = self.fetch_netbox_record(lookup)
         if netbox_devicetype is None:
             return
 
         # Name
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="name",
-            orthos_result=self.name or "<not set>",
-            netbox_result=netbox_devicetype.get("model", "<not set>"),
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="name",
+                orthos_result=self.name or "<not set>",
+                netbox_result=netbox_devicetype.get("model", "<not set>"),
+            ),
+            batch,
+        )
         # Description
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="description",
-            orthos_result=self.description or "<not set>",
-            netbox_result=netbox_devicetype.get("description", "<not set>"),
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="description",
+                orthos_result=self.description or "<not set>",
+                netbox_result=netbox_devicetype.get("description", "<not set>"),
+            ),
+            batch,
+        )
 
     def fetch_netbox(self) -> None:
         """
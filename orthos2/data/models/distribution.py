@@ -0,0 +1,58 @@
+from typing import Iterable
+
+from django.db import models
+
+from orthos2.data.models.installation import Installation
+from orthos2.utils.cache import invalidate
+
+
+class Distribution(models.Model):
+    """
+    Distinct distribution names of all installations.
+
+    Maintained by the `Installation` signals in `orthos2.data.signals`, so that listing the
+    known distributions doesn't need a `DISTINCT` over all installations.
+    """
+
+    class Meta:  # type: ignore
+        ordering = ["name"]
+
+    name: "models.CharField[str, str]" = models.CharField(
+        max_length=200,
+        unique=True,
+    )
+
+    def __str__(self) -> str:
+        return self.name
+
+    @classmethod
+    def add(cls, name: str) -> None:
+        """Add the distribution `name` if it's not known yet."""
+        if name:
+            cls.objects.get_or_create(name=name)
+
+    @classmethod
+    def prune(cls, names: Iterable[str]) -> None:
+        """Remove the distributions `names` which are not installed anymore."""
+        names = [name for name in names if name]
+        if not names:
+            return
+        installed = Installation.objects.filter(distribution__in=names).values(
+            "distribution"
+        )
+        cls.objects.filter(name__in=names).exclude(name__in=installed).delete()
+
+    @classmethod
+    def rebuild(cls) -> None:
+        """Synchronize the distributions with all installations."""
+        installed = set(
+            Installation.objects.exclude(distribution="")
+            .values_list("distribution", flat=True)
+            .distinct()
+        )
+        cls.objects.exclude(name__in=installed).delete()
+        cls.objects.bulk_create(
+            [cls(name=name) for name in sorted(installed)], ignore_conflicts=True
+        )
+        # `bulk_create()` sends no signals
+        invalidate("distributions")
@@ -6,14 +6,15 @@ from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 from django.db import models
 from django.db.models import QuerySet
 from django.utils import timezone
-from requests import HTTPError
 
 from orthos2.data.models.devicetype import DeviceType
 from orthos2.data.models.netboxorthoscomparision import (
+    NetboxOrthosComparisionBatch,
     NetboxOrthosComparisionResult,
     NetboxOrthosComparisionRun,
+    save_comparision,
 )
-from orthos2.utils.netbox import Netbox
+from orthos2.utils.netbox import Netbox, NetboxLookup
 
 if TYPE_CHECKING:
     from django.db.models.fields.related_descriptors import RelatedManager
@@ -104,6 +105,14 @@ class Enclosure(models.Model):
     objects = Manager()
     api = RootEnclosureManager()
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Remember the NetBox ID for comparison before `save()`."""
+        super().__init__(*args, **kwargs)
+        # not `self.netbox_id`, which would load a deferred field
+        self._original_netbox_id: Optional[int] = (
+            self.__dict__.get("netbox_id") if self.pk is not None else None
+        )
+
     def natural_key(self) -> Tuple[str]:
         return (self.name,)
 
@@ -128,41 +137,36 @@ class Enclosure(models.Model):
         machines = self.get_machines().filter(system__virtual=False)
         return machines
 
-    def fetch_netbox_record(self) -> Optional[Dict[str, Any]]:
+    def fetch_netbox_record(
+        self, lookup: Optional[NetboxLookup] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Fetch the record of this Machine object. This will attempt to search either the DCIM or Virtual Machine
         endpoint of NetBox, depending on the System type of the machine.
 
+        :param lookup: Where to look the record up, by default it is requested from NetBox.
         :returns: None in case the record cannot be retrieved. The Dict with the NetBox data otherwhise.
         :raises HTTPError: In case any HTTP code except 200 and 404 is returned.
         """
-        netbox_api = Netbox.get_instance()
         # Take any machine as they should be of the system system type
         machine = self.machine_set.first()
         if machine is None:
             logger.info("Cannot fetch record for enclosure without machines.")
             return None
-        if self.is_virtual:
-            try:
-                netbox_machine = netbox_api.fetch_vm(self.netbox_id)
-            except HTTPError as e:
-                if e.response.status_code == 404:
-                    logger.info("Fetching VM from NetBox failed with status 404.")
-                    return None
-                raise e
-        else:
-            try:
-                netbox_machine = netbox_api.fetch_device(self.netbox_id)
-            except HTTPError as e:
-                if e.response.status_code == 404:
-                    logger.info("Fetching Device from NetBox failed with status 404.")
-                    return None
-                raise e
-        return netbox_machine
-
-    def compare_netbox(self) -> None:
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        return lookup.get_record(self.is_virtual, self.netbox_id)
+
+    def compare_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxOrthosComparisionBatch] = None,
+    ) -> None:
         """
         Compare the current data in the database of Orthos 2 with the data from NetBox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
+        :param batch: Collects the run and its results instead of saving them, see `NetboxCompareFleet`.
         """
         if self.netbox_id == 0:
             logger.debug("Skipping comparision because NetBox ID is 0.")
@@ -175,50 +179,62 @@ class Enclosure(models.Model):
             object_type=NetboxOrthosComparisionRun.NetboxOrthosComparisionItemTypes.ENCLOSURE,
             object_enclosure=self,
         )
-        run_obj.save()
+        save_comparision(run_obj, batch)
 
-        netbox_device = self.fetch_netbox_record()
+        netbox_device = self.fetch_netbox_record(lookup)
         if netbox_device is None:
             return
 
         # Description
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="description",
-            orthos_result=self.description or "<not set>",
-            netbox_result=netbox_device.get("description", "<not set>"),
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="description",
+                orthos_result=self.description or "<not set>",
+                netbox_result=netbox_device.get("description", "<not set>"),
+            ),
+            batch,
+        )
         # Location Site
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="location_site",
-            orthos_result=self.location_site or "<not set>",
-            netbox_result=netbox_device.get("site", {}).get("display", "<not set>"),
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="location_site",
+                orthos_result=self.location_site or "<not set>",
+                netbox_result=netbox_device.get("site", {}).get("display", "<not set>"),
+            ),
+            batch,
+        )
         location_obj = netbox_device.get("location")
         # Location Room
         if location_obj is None:
             netbox_location_room_result = "<not set>"
         else:
             netbox_location_room_result = location_obj.get("display", "<not set>")
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="location_room",
-            orthos_result=self.location_room or "<not set>",
-            netbox_result=netbox_location_room_result,
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="location_room",
+                orthos_result=self.location_room or "<not set>",
+                netbox_result=netbox_location_room_result,
+            ),
+            batch,
+        )
         rack_obj = netbox_device.get("rack")
         # Location Rack
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="location_rack",
-            orthos_result=self.location_rack or "<not set>",
-            netbox_result=(
-                "<not set>"
-                if rack_obj is None
-                else rack_obj.get("display", "<not set>")
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="location_rack",
+                orthos_result=self.location_rack or "<not set>",
+                netbox_result=(
+                    "<not set>"
+                    if rack_obj is None
+                    else rack_obj.get("display", "<not set>")
+                ),
             ),
-        ).save()
+            batch,
+        )
         # Location Rack Position
         # TODO: What if the position is not set.
         netbox_location_rack_position_result = netbox_device.get(
@@ -227,16 +243,21 @@ class Enclosure(models.Model):
         if netbox_location_rack_position_result is None:
             # In case the location is unset in NetBox, the result is "<not set>" due to the JSON value being "null".
             netbox_location_rack_position_result = "<not set>"
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="location_rack_position",
-            orthos_result=self.location_rack_position or "<not set>",
-            netbox_result=netbox_location_rack_position_result,
-        ).save()
-
-    def fetch_netbox(self) -> None:
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="location_rack_position",
+                orthos_result=self.location_rack_position or "<not set>",
+                netbox_result=netbox_location_rack_position_result,
+            ),
+            batch,
+        )
+
+    def fetch_netbox(self, lookup: Optional[NetboxLookup] = None) -> None:
         """
         Fetch all information about a machine from NetBox if the NetBox ID is set.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
         """
         if self.netbox_id == 0:
             logger.debug("Skipping fetching from NetBox because NetBox ID is 0.")
@@ -246,7 +267,7 @@ class Enclosure(models.Model):
             tz=timezone.get_current_timezone()
         )
         self.save()
-        netbox_device = self.fetch_netbox_record()
+        netbox_device = self.fetch_netbox_record(lookup)
         if netbox_device is None:
             return
 
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Optional
 
 from django.db import models
 
@@ -42,6 +42,14 @@ class Installation(models.Model):
         blank=True,
     )
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Remember the distribution for comparison after `save()`."""
+        super(Installation, self).__init__(*args, **kwargs)
+        # not `self.distribution`, which would load a deferred field
+        self._original_distribution: Optional[str] = (
+            self.__dict__.get("distribution") if self.pk is not None else None
+        )
+
     def __str__(self) -> str:
         if self.active:
             return "{} ({})".format(self.distribution, "active")
@@ -18,6 +18,7 @@ from typing import (
     Tuple,
     TypeVar,
     Union,
+    cast,
 )
 
 from django.conf import settings
@@ -26,8 +27,8 @@ from django.core import serializers
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied, ValidationError
 from django.db import models
 from django.db.models import Q, QuerySet
+from django.db.models.fields.reverse_related import ManyToOneRel
 from django.utils import timezone
-from requests import HTTPError
 
 from orthos2.data.exceptions import ReleaseException, ReserveException
 from orthos2.data.models.architecture import Architecture
@@ -36,9 +37,12 @@ from orthos2.data.models.devicetype import DeviceType
 from orthos2.data.models.domain import Domain, DomainAdmin, validate_domain_ending
 from orthos2.data.models.enclosure import Enclosure
 from orthos2.data.models.netboxorthoscomparision import (
+    NetboxOrthosComparisionBatch,
     NetboxOrthosComparisionResult,
     NetboxOrthosComparisionRun,
+    save_comparision,
 )
+from orthos2.data.models.netboxsyncstate import NetboxSyncBatch
 from orthos2.data.models.networkinterface import NetworkInterface, validate_mac_address
 from orthos2.data.models.remotepowertype import RemotePowerType
 from orthos2.data.models.system import System
@@ -52,7 +56,7 @@ from orthos2.utils.misc import (
     ip_strip_subnet_size,
     is_dns_resolvable,
 )
-from orthos2.utils.netbox import Netbox
+from orthos2.utils.netbox import Netbox, NetboxLookup, memoize
 
 if TYPE_CHECKING:
     from django.db.models.fields.related_descriptors import RelatedManager
@@ -171,11 +175,27 @@ class ViewManager(RootManager):
 
 
 class SearchManager(ViewManager):
+    # fields in the search documents (see `MachineSearchIndex`), substring searches on them look
+    # up the candidates in the search index first
+    INDEXED_FIELDS = ("fqdn", "cpu_model", "networkinterfaces__mac_address")
+
+    # relations with several objects per machine, filtered with a subquery instead of a join so
+    # that machines don't show up once per matching object
+    MULTI_VALUED_RELATIONS = ("installations", "networkinterfaces")
+
     def form(
         self, parameters: Dict[str, Any], user: Optional["User"] = None
     ) -> QuerySet["Machine"]:
-        """Filter machine queryset by advanced search parameters."""
+        """
+        Filter machine queryset by advanced search parameters.
+
+        The free text parameter `text` is looked up in the search index; if given, the machines
+        are ordered by how well they match.
+        """
+        from .machinesearchindex import MachineSearchIndex
+
         parameters = {key: value for key, value in parameters.items() if value}
+        text = parameters.pop("text", "")
 
         queryset = super(SearchManager, self).get_queryset(user=user)
         query = None
@@ -188,17 +208,33 @@ class SearchManager(ViewManager):
                 elif value == "__False":
                     value = False
 
-                q = Q(**{"{}{}".format(key, operator): value})
+                if key in self.INDEXED_FIELDS and operator == "__icontains":
+                    queryset = MachineSearchIndex.search(queryset, value, rank=False)
+
+                relation, _sep, field = key.partition("__")
+                if relation in self.MULTI_VALUED_RELATIONS:
+                    related = cast(ManyToOneRel, Machine._meta.get_field(relation))
+                    objects = related.field.model._default_manager.filter(
+                        **{"{}{}".format(field, operator): value}
+                    )
+                    q = Q(pk__in=objects.values(related.field.attname))
+                else:
+                    q = Q(**{"{}{}".format(key, operator): value})
                 if query:
                     query = query & q
                 else:
                     query = q
 
         if query:
-            queryset = queryset.filter(query).distinct()
+            queryset = queryset.filter(query)
         else:
             queryset = queryset.all()
 
+        if text:
+            queryset = MachineSearchIndex.search(queryset, text).order_by(
+                "-search_rank", "fqdn"
+            )
+
         return queryset
 
 
@@ -262,6 +298,15 @@ class Machine(models.Model):
         help_text="The Fully Qualified Domain Name of the main network interface of the machine",
     )
 
+    fqdn_hostname: "models.CharField[str, str]" = models.CharField(
+        "Hostname",
+        max_length=200,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="The hostname part of the FQDN, kept for indexed hostname lookups",
+    )
+
     system: "MandatorySystemForeignKey" = models.ForeignKey(
         System,
         on_delete=models.CASCADE,
@@ -637,9 +682,31 @@ class Machine(models.Model):
     search = SearchManager()
     view = ViewManager()
 
+    # large inventory dumps, only needed by the detail tabs showing them
+    INVENTORY_FIELDS = [
+        "cpu_flags",
+        "lsmod",
+        "hwinfo",
+        "dmidecode",
+        "dmesg",
+        "lsscsi",
+        "lsusb",
+        "lspci",
+    ]
+
     def natural_key(self) -> Tuple[str]:
         return (self.fqdn,)
 
+    def get_inventory_version(self) -> str:
+        """
+        Return a version of the machine's inventory for cache keys.
+
+        Machine checks and Ansible scans save the machine, changes of installations and network
+        interfaces touch it (see `orthos2.data.signals`), so `updated` changes with the
+        inventory.
+        """
+        return self.updated.isoformat() if self.updated else ""
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """Deep copy object for comparison in `save()`."""
         super(Machine, self).__init__(*args, **kwargs)
@@ -683,36 +750,31 @@ class Machine(models.Model):
             return None
         return intf.mac_address
 
-    def fetch_netbox_record(self) -> Optional[Dict[str, Any]]:
+    def fetch_netbox_record(
+        self, lookup: Optional[NetboxLookup] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Fetch the record of this Machine object. This will attempt to search either the DCIM or Virtual Machine
         endpoint of NetBox, depending on the System type of the machine.
 
+        :param lookup: Where to look the record up, by default it is requested from NetBox.
         :returns: None in case the record cannot be retrieved. The Dict with the NetBox data otherwhise.
         :raises HTTPError: In case any HTTP code except 200 and 404 is returned.
         """
-        netbox_api = Netbox.get_instance()
-        if self.system.virtual:
-            try:
-                netbox_machine = netbox_api.fetch_vm(self.netbox_id)
-            except HTTPError as e:
-                if e.response.status_code == 404:
-                    logger.info("Fetching VM from NetBox failed with status 404.")
-                    return None
-                raise e
-        else:
-            try:
-                netbox_machine = netbox_api.fetch_device(self.netbox_id)
-            except HTTPError as e:
-                if e.response.status_code == 404:
-                    logger.info("Fetching Device from NetBox failed with status 404.")
-                    return None
-                raise e
-        return netbox_machine
-
-    def compare_netbox(self) -> None:
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        return lookup.get_record(self.system.virtual, self.netbox_id)
+
+    def compare_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxOrthosComparisionBatch] = None,
+    ) -> None:
         """
         Compare the current data in the database of Orthos 2 with the data from NetBox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
+        :param batch: Collects the run and its results instead of saving them, see `NetboxCompareFleet`.
         """
         if self.netbox_id == 0:
             logger.debug("Skipping comparision because NetBox ID is 0.")
@@ -724,31 +786,37 @@ class Machine(models.Model):
             object_type=NetboxOrthosComparisionRun.NetboxOrthosComparisionItemTypes.MACHINE,
             object_machine=self,
         )
-        run_obj.save()
+        save_comparision(run_obj, batch)
 
-        netbox_machine = self.fetch_netbox_record()
+        netbox_machine = self.fetch_netbox_record(lookup)
         if netbox_machine is None:
             return
         # FQDN
         # Architecture
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="architecture",
-            orthos_result=self.architecture.name or "<not set>",
-            netbox_result=netbox_machine.get("custom_fields", {}).get(
-                "arch", "<not set>"
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="architecture",
+                orthos_result=self.architecture.name or "<not set>",
+                netbox_result=netbox_machine.get("custom_fields", {}).get(
+                    "arch", "<not set>"
+                ),
             ),
-        ).save()
+            batch,
+        )
         # SystemType
         # Serial Number
         # Product Code
         # Description
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="description",
-            orthos_result=self.comment or "<not set>",
-            netbox_result=netbox_machine.get("description", "<not set>"),
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="description",
+                orthos_result=self.comment or "<not set>",
+                netbox_result=netbox_machine.get("description", "<not set>"),
+            ),
+            batch,
+        )
         # CPU Cores, Sockets, Threads
         # RAM (GB)
         # dmidecode
@@ -756,20 +824,36 @@ class Machine(models.Model):
         # lspci
         # Installation / Platform
 
-    def fetch_netbox(self) -> None:
+    def fetch_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxSyncBatch] = None,
+    ) -> None:
         """
         Fetch information from Netbox.
+
+        :param lookup: Where to look the NetBox data up; `NetboxFetchMachine` passes a
+                       `NetboxIndex` with the data of many machines fetched in bulk.
+        :param batch: Collects the changed objects instead of saving them, they get written
+                      with the other machines of the batch by `NetboxSyncBatch.write()`.
         """
         if self.netbox_id == 0:
             logger.debug("Skipping fetching from NetBox because NetBox ID is 0.")
             return
 
+        def save(obj: models.Model) -> None:
+            if batch is None:
+                obj.save()
+            else:
+                batch.save(obj)
+
         self.netbox_last_fetch_attempt = datetime.datetime.now(
             tz=timezone.get_current_timezone()
         )
-        self.save()
-        netbox_api = Netbox.get_instance()
-        netbox_machine = self.fetch_netbox_record()
+        save(self)
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        netbox_machine = self.fetch_netbox_record(lookup)
         if netbox_machine is None:
             return
         # Reset fields
@@ -796,14 +880,9 @@ class Machine(models.Model):
                 netbox_device_type_id
             )
         # Verify all NetworkInterfaces are created
-        if self.system.virtual:
-            device_network_interfaces = netbox_api.check_vm_interface_by_id(
-                self.netbox_id
-            )
-        else:
-            device_network_interfaces = netbox_api.check_interface_no_mgmt_by_id(
-                self.netbox_id
-            )
+        device_network_interfaces = lookup.get_interfaces(
+            self.system.virtual, self.netbox_id
+        )
         ignored_interface_prefixes = (
             "veth",
             "flannel",
@@ -826,20 +905,12 @@ class Machine(models.Model):
                 # This is most probably a bonded interface, and we synchronize the first interface.
                 continue
             synced_mac_addresses.add(primary_mac.get("mac_address"))
-            if self.system.virtual:
-                ipv4_addresses = netbox_api.check_ip_by_vm_interface_family(
-                    interface.get("id"), 4  # type: ignore
-                )
-                ipv6_addresses = netbox_api.check_ip_by_vm_interface_family(
-                    interface.get("id"), 6  # type: ignore
-                )
-            else:
-                ipv4_addresses = netbox_api.check_ip_by_interface_family(
-                    interface.get("id"), 4  # type: ignore
-                )
-                ipv6_addresses = netbox_api.check_ip_by_interface_family(
-                    interface.get("id"), 6  # type: ignore
-                )
+            ipv4_addresses = lookup.get_ips(
+                self.system.virtual, interface.get("id"), 4  # type: ignore
+            )
+            ipv6_addresses = lookup.get_ips(
+                self.system.virtual, interface.get("id"), 6  # type: ignore
+            )
             if len(ipv4_addresses) > 1 or len(ipv6_addresses) > 1:
                 # TODO: Handle case
                 continue
@@ -857,8 +928,10 @@ class Machine(models.Model):
                 orthos_network_interface.mac_address = primary_mac.get("mac_address")
                 orthos_network_interface.machine_id = self.id
             # Update interface information
-            if not self.system.virtual:
-                orthos_network_interface.ethernet_type = interface.get("type").get("label")  # type: ignore
+            # GraphQL lookups only know the value of the type, keep the label from REST then
+            ethernet_type = (interface.get("type") or {}).get("label")
+            if not self.system.virtual and ethernet_type:
+                orthos_network_interface.ethernet_type = ethernet_type
             orthos_network_interface.name = interface.get("name")  # type: ignore
             if len(ipv4_addresses) > 0:
                 orthos_network_interface.ip_address_v4 = ip_strip_subnet_size(
@@ -868,9 +941,9 @@ class Machine(models.Model):
                 orthos_network_interface.ip_address_v6 = ip_strip_subnet_size(
                     ipv6_addresses[0].get("display", "")
                 )
-            orthos_network_interface.save()
+            save(orthos_network_interface)
         if not self.system.virtual:
-            mgmt_interfaces = netbox_api.check_interface_mgmt_by_id(self.netbox_id)
+            mgmt_interfaces = lookup.get_mgmt_interfaces(self.netbox_id)
             if len(mgmt_interfaces) > 1:
                 # Skip multi-mgmt interfaces for now. Feature will be implemented later.
                 logger.warning(
@@ -881,11 +954,11 @@ class Machine(models.Model):
                 # Don't attempt to do things without a MAC address
                 if primary_mac is None:
                     continue
-                ipv4_addresses = netbox_api.check_ip_by_interface_family(
-                    mgmt_interface.get("id"), 4  # type: ignore
+                ipv4_addresses = lookup.get_ips(
+                    False, mgmt_interface.get("id"), 4  # type: ignore
                 )
-                ipv6_addresses = netbox_api.check_ip_by_interface_family(
-                    mgmt_interface.get("id"), 6  # type: ignore
+                ipv6_addresses = lookup.get_ips(
+                    False, mgmt_interface.get("id"), 6  # type: ignore
                 )
                 ipv4_address_count = len(ipv4_addresses)
                 ipv6_address_count = len(ipv6_addresses)
@@ -930,14 +1003,18 @@ class Machine(models.Model):
                     bmc.fqdn = ipv4_addresses[0].get("dns_name")  # type: ignore
                 else:
                     bmc.fqdn = ipv6_addresses[0].get("dns_name")  # type: ignore
-                try:
-                    bmc.fence_agent = RemotePowerType.objects.get(name=fence_name)
-                except RemotePowerType.DoesNotExist:
+                fence_agent = memoize(
+                    "remote_power_type",
+                    fence_name,
+                    lambda: RemotePowerType.objects.filter(name=fence_name).first(),
+                )
+                if fence_agent is None:
                     logger.warning(
                         'Skipped because fence agent "%s" is unknown to Orthos!',
                         fence_name,
                     )
                     continue
+                bmc.fence_agent = fence_agent
                 bmc.mac = primary_mac.get("mac_address")
                 if ipv4_address_count > 0:
                     bmc.ip_address_v4 = str(
@@ -953,8 +1030,8 @@ class Machine(models.Model):
                     )
                 # Username & Password will be pulled from Hashicorp Vault in the future but for
                 # now they have to be manually given.
-                bmc.save()
-        self.save()
+                save(bmc)
+        save(self)
 
     def bmc_allowed(self) -> bool:
         return self.system.allowBMC
@@ -999,6 +1076,7 @@ class Machine(models.Model):
         domain and enclosure correctly (create if necessary).
         """
         self.fqdn = self.fqdn.lower()
+        self.fqdn_hostname = get_hostname(self.fqdn)
 
         validate_domain_ending(self.fqdn)
 
@@ -1250,7 +1328,22 @@ class Machine(models.Model):
             return None
         return self.domain_set.all()  # type: ignore
 
+    def _get_prefetched(self, related_name: str) -> Optional[List[Any]]:
+        """Return the prefetched objects of `related_name` or `None` if not prefetched."""
+        cache: Dict[str, Any] = getattr(self, "_prefetched_objects_cache", {})
+        if related_name not in cache:
+            return None
+        return list(cache[related_name])
+
     def get_active_distribution(self) -> Optional["Installation"]:
+        installations = self._get_prefetched("installations")
+        if installations is not None:
+            for installation in installations:
+                if installation.active:
+                    return installation
+            raise self.installations.model.DoesNotExist(  # type: ignore
+                "Machine has no active installation"
+            )
         return self.installations.get(active=True)  # type: ignore
 
     def delete_secondary_interfaces(self) -> None:
@@ -1260,6 +1353,12 @@ class Machine(models.Model):
                 network.delete()
 
     def get_primary_networkinterface(self) -> Optional[NetworkInterface]:
+        interfaces = self._get_prefetched("networkinterfaces")
+        if interfaces is not None:
+            for interface in interfaces:
+                if interface.primary:
+                    return interface
+            return None
         try:
             interface = self.networkinterfaces.get(primary=True)  # type: ignore
         except NetworkInterface.DoesNotExist:
@@ -1427,6 +1526,7 @@ class Machine(models.Model):
     @check_permission
     def powercycle(self, action: Optional[str], user: Any = None) -> bool:
         """Act as proxy for all power cycle actions."""
+        from .machineevent import MachineEvent
         from .remotepower import RemotePower
 
         if (action is None) or (action not in RemotePower.Action.as_list):
@@ -1437,32 +1537,36 @@ class Machine(models.Model):
         if not self.has_remotepower():
             raise Exception("No remotepower available!")
 
+        result: Union[str, bool] = False
         if action == RemotePower.Action.STATUS:
-            return self.get_power_status()  # type: ignore
+            result = self.get_power_status()  # type: ignore
 
         elif action == RemotePower.Action.ON:
-            return self.power_on()
+            result = self.power_on()
 
         elif action == RemotePower.Action.OFF:
-            return self.power_off()
+            result = self.power_off()
 
         elif action == RemotePower.Action.REBOOT:
-            return self.reboot()
+            result = self.reboot()
 
         elif action == RemotePower.Action.OFF_SSH:
-            return self.power_off_ssh()
+            result = self.power_off_ssh()
 
         elif action == RemotePower.Action.OFF_REMOTEPOWER:
-            return self.power_off_remotepower()
+            result = self.power_off_remotepower()
 
         elif action == RemotePower.Action.REBOOT_SSH:
-            return self.reboot_ssh()
+            result = self.reboot_ssh()
 
         elif action == RemotePower.Action.REBOOT_REMOTEPOWER:
             if self.has_remotepower():
-                return self.reboot_remotepower()
+                result = self.reboot_remotepower()
 
-        return False
+        MachineEvent.publish(
+            self.pk, MachineEvent.Kind.POWER, {"action": action, "result": result}
+        )
+        return result  # type: ignore
 
     @check_permission
     def deactivate_sol(self, user: Any = None) -> bool:
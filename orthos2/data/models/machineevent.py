@@ -0,0 +1,164 @@
+import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Max
+from django.utils import timezone
+
+from .machine import Machine
+
+if TYPE_CHECKING:
+    from orthos2.types import (
+        MandatoryCharField,
+        MandatoryDateTimeField,
+        MandatoryMachineForeignKey,
+    )
+
+
+class MachineEvent(models.Model):
+    """
+    Small state change of one machine, shown on open pages.
+
+    Events get written by the web application and the taskmanager; open pages poll them by
+    primary key through `orthos2.frontend.views.ajax.machine_events`. Old events get removed by
+    `DailyMachineEventsCleanup`.
+    """
+
+    class Kind:
+        STATUS = "status"
+        RESERVATION = "reservation"
+        POWER = "power"
+        TASK = "task"
+
+        CHOICES = (
+            (STATUS, "Status"),
+            (RESERVATION, "Reservation"),
+            (POWER, "Power"),
+            (TASK, "Task"),
+        )
+
+    # machine fields sent with a status or reservation event
+    STATUS_FIELDS = [
+        "status_ipv4",
+        "status_ipv6",
+        "status_ssh",
+        "status_login",
+        "check_connectivity",
+    ]
+
+    RESERVATION_FIELDS = [
+        "reserved_by_id",
+        "reserved_until",
+        "reserved_permanently",
+    ]
+
+    # events older than this get removed
+    RETENTION = datetime.timedelta(days=1)
+
+    class Meta:  # type: ignore
+        ordering = ["pk"]
+
+    machine: "MandatoryMachineForeignKey" = models.ForeignKey(
+        Machine,
+        related_name="events",
+        on_delete=models.CASCADE,
+    )
+
+    kind: "MandatoryCharField" = models.CharField(
+        max_length=20,
+        choices=Kind.CHOICES,
+    )
+
+    data = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+    )
+
+    created: "MandatoryDateTimeField" = models.DateTimeField(
+        "Created at",
+        auto_now_add=True,
+        db_index=True,
+    )
+
+    def __str__(self) -> str:
+        return "{} event of {}".format(self.kind, self.machine_id)  # type: ignore
+
+    @classmethod
+    def publish(
+        cls, machine_id: int, kind: str, data: Optional[Dict[str, Any]] = None
+    ) -> "MachineEvent":
+        """Store a new event for the machine."""
+        return cls.objects.create(machine_id=machine_id, kind=kind, data=data or {})
+
+    @staticmethod
+    def get_state(machine: Machine, fields: List[str]) -> Dict[str, Any]:
+        return {field: getattr(machine, field) for field in fields}
+
+    @classmethod
+    def publish_changes(cls, machine: Machine) -> List["MachineEvent"]:
+        """
+        Store events for changed status and reservation fields of a saved machine.
+
+        The fields are compared to the values of the last published events of this instance,
+        or to the values the machine got loaded with.
+        """
+        status = cls.get_state(machine, cls.STATUS_FIELDS)
+        reservation = cls.get_state(machine, cls.RESERVATION_FIELDS)
+
+        previous: Optional[Dict[str, Any]] = machine.__dict__.get("_event_state")
+        machine._event_state = dict(status, **reservation)  # type: ignore
+        if previous is None:
+            if machine._original is None:  # type: ignore
+                # new machines aren't shown on any open page yet
+                return []
+            previous = cls.get_state(
+                machine._original, cls.STATUS_FIELDS + cls.RESERVATION_FIELDS  # type: ignore
+            )
+
+        events: List[MachineEvent] = []
+        if any(previous.get(field) != value for field, value in status.items()):
+            data = dict(status, last_check=machine.last_check)
+            events.append(cls.publish(machine.pk, cls.Kind.STATUS, data))
+
+        if any(previous.get(field) != value for field, value in reservation.items()):
+            data = dict(
+                reservation,
+                reserved_by=machine.reserved_by.username if machine.reserved_by else "",
+            )
+            events.append(cls.publish(machine.pk, cls.Kind.RESERVATION, data))
+
+        return events
+
+    @classmethod
+    def publish_task(cls, fqdns: Iterable[str], task: str) -> None:
+        """Store a task event for each of the given machines."""
+        cls.objects.bulk_create(
+            [
+                cls(machine_id=pk, kind=cls.Kind.TASK, data={"task": task})
+                for pk in Machine.objects.filter(fqdn__in=fqdns).values_list(
+                    "pk", flat=True
+                )
+            ]
+        )
+
+    @classmethod
+    def get_last_id(cls) -> int:
+        return cls.objects.aggregate(last_id=Max("pk"))["last_id"] or 0
+
+    @classmethod
+    def since(cls, last_id: int, machine_ids: Iterable[int]) -> List["MachineEvent"]:
+        """Return the events after `last_id` of the given machines."""
+        return list(
+            cls.objects.filter(pk__gt=last_id, machine_id__in=machine_ids).order_by(
+                "pk"
+            )
+        )
+
+    @classmethod
+    def prune(cls) -> int:
+        """Remove the events older than `RETENTION` and return their number."""
+        deleted, _ = cls.objects.filter(
+            created__lt=timezone.now() - cls.RETENTION
+        ).delete()
+        return deleted
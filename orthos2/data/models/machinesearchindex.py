@@ -0,0 +1,180 @@
+import datetime
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+from django.db import connection, models
+from django.db.models import FloatField, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from .annotation import Annotation
+from .installation import Installation
+from .machine import Machine
+from .networkinterface import NetworkInterface
+
+if TYPE_CHECKING:
+    from orthos2.types import MandatoryMachineOneToOneField
+
+# SQLite FTS5 table over `MachineSearchIndex.document`, created by migration 0068
+FTS_TABLE = "data_machinesearchindex_fts"
+
+# the trigram tokenizer can't match terms shorter than this
+FTS_MIN_TERM_LENGTH = 3
+
+
+def fts_available() -> bool:
+    """Return whether the SQLite full-text table exists for the current database."""
+    return (
+        connection.vendor == "sqlite"
+        and FTS_TABLE in connection.introspection.table_names()
+    )
+
+
+class MachineSearchIndex(models.Model):
+    """
+    Searchable text of one machine.
+
+    Joins the FQDN, comment, serial number, product code, CPU model, active distribution, MAC
+    addresses and annotations of a machine into one lowercase document. On PostgreSQL the
+    document has a trigram index (`pg_trgm`), on SQLite an FTS5 table with trigram tokenizer is
+    kept in sync by triggers; both answer substring searches without scanning all machines.
+
+    The index is updated by the model signals in `orthos2.data.signals`.
+    """
+
+    # No database constraint: children of a machine get deleted (and reindex it) before the
+    # machine itself, the row gets removed after the machine by `machine_post_delete_index`.
+    machine: "MandatoryMachineOneToOneField" = models.OneToOneField(
+        Machine,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name="searchindex",
+    )
+
+    document: "models.TextField[str, str]" = models.TextField(blank=True)
+
+    updated: "models.DateTimeField[datetime.datetime, datetime.datetime]" = (
+        models.DateTimeField(
+            "Updated at",
+            auto_now=True,
+        )
+    )
+
+    def __str__(self) -> str:
+        return "Search index of {}".format(self.machine_id)  # type: ignore
+
+    @classmethod
+    def build_documents(cls, machine_ids: Iterable[int]) -> Dict[int, str]:
+        """Return the search documents of the given machines, one query per related model."""
+        parts: Dict[int, List[str]] = defaultdict(list)
+        machines = Machine.objects.filter(pk__in=machine_ids).values_list(
+            "pk", "fqdn", "comment", "serial_number", "product_code", "cpu_model"
+        )
+        for pk, *values in machines:
+            parts[pk].extend(values)
+
+        related: List[Tuple[QuerySet[models.Model], str]] = [
+            (Installation.objects.filter(active=True), "distribution"),
+            (NetworkInterface.objects.all(), "mac_address"),
+            (Annotation.objects.all(), "text"),
+        ]
+        for queryset, field in related:
+            for machine_id, value in queryset.filter(
+                machine_id__in=list(parts)
+            ).values_list("machine_id", field):
+                parts[machine_id].append(value)
+
+        return {
+            pk: " ".join(value for value in values if value).lower()
+            for pk, values in parts.items()
+        }
+
+    @classmethod
+    def update(cls, machine_ids: Iterable[int]) -> None:
+        """Rebuild the documents of the given machines with one bulk upsert."""
+        machine_ids = set(machine_ids)
+        if not machine_ids:
+            return
+
+        documents = cls.build_documents(machine_ids)
+        cls.objects.bulk_create(
+            [
+                cls(machine_id=pk, document=document)  # type: ignore
+                for pk, document in documents.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["machine"],
+            update_fields=["document", "updated"],
+        )
+        cls.objects.filter(machine_id__in=machine_ids - set(documents)).delete()
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 1000) -> None:
+        """Rebuild the documents of all machines."""
+        machine_ids = list(Machine.objects.values_list("pk", flat=True))
+        for start in range(0, len(machine_ids), batch_size):
+            end = start + batch_size
+            cls.update(machine_ids[start:end])
+        cls.objects.exclude(machine_id__in=Machine.objects.values("pk")).delete()
+
+    @staticmethod
+    def get_terms(text: str) -> List[str]:
+        return [term for term in text.lower().split() if term]
+
+    @classmethod
+    def search(
+        cls, queryset: QuerySet[Machine], text: str, rank: bool = True
+    ) -> QuerySet[Machine]:
+        """
+        Filter `queryset` by machines whose document contains all terms of `text`.
+
+        With `rank`, the machines get annotated with `search_rank`; the higher, the better the
+        match.
+        """
+        no_rank = Value(0.0, output_field=FloatField())
+        terms = cls.get_terms(text)
+        if not terms:
+            return queryset.annotate(search_rank=no_rank) if rank else queryset
+
+        if connection.vendor == "postgresql":
+            from django.contrib.postgres.search import TrigramSimilarity
+
+            for term in terms:
+                queryset = queryset.filter(searchindex__document__contains=term)
+            if not rank:
+                return queryset
+            return queryset.annotate(
+                search_rank=TrigramSimilarity("searchindex__document", " ".join(terms))
+            )
+
+        long_terms = [term for term in terms if len(term) >= FTS_MIN_TERM_LENGTH]
+        short_terms = [term for term in terms if len(term) < FTS_MIN_TERM_LENGTH]
+        if not long_terms or not fts_available():
+            for term in terms:
+                queryset = queryset.filter(searchindex__document__contains=term)
+            return queryset.annotate(search_rank=no_rank) if rank else queryset
+
+        for term in short_terms:
+            queryset = queryset.filter(searchindex__document__contains=term)
+
+        # phrase queries match the term as substring; quotes get escaped by doubling them
+        match = " AND ".join(
+            '"{}"'.format(term.replace('"', '""')) for term in long_terms
+        )
+        matches = RawSQL(
+            "SELECT rowid FROM {0} WHERE {0} MATCH %s".format(FTS_TABLE), (match,)
+        )
+        queryset = queryset.filter(pk__in=matches)
+        if not rank:
+            return queryset
+        # `bm25()` is negative, the better the match the lower
+        search_rank = RawSQL(
+            "SELECT -bm25({0}) FROM {0} WHERE {0} MATCH %s AND rowid = {1}.{2}".format(
+                FTS_TABLE,
+                connection.ops.quote_name(Machine._meta.db_table),
+                connection.ops.quote_name("id"),
+            ),
+            (match,),
+            output_field=FloatField(),
+        )
+        return queryset.annotate(search_rank=search_rank)
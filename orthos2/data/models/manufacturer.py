@@ -8,10 +8,12 @@ from django.utils import timezone
 from requests import HTTPError
 
 from orthos2.data.models.netboxorthoscomparision import (
+    NetboxOrthosComparisionBatch,
     NetboxOrthosComparisionResult,
     NetboxOrthosComparisionRun,
+    save_comparision,
 )
-from orthos2.utils.netbox import Netbox
+from orthos2.utils.netbox import Netbox, NetboxLookup, memoize
 
 if TYPE_CHECKING:
     from orthos2.data.models.devicetype import DeviceType
@@ -59,6 +61,14 @@ class Manufacturer(models.Model):
 
     objects = ManufacturerManager()
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Remember the NetBox ID for comparison before `save()`."""
+        super().__init__(*args, **kwargs)
+        # not `self.netbox_id`, which would load a deferred field
+        self._original_netbox_id: Optional[int] = (
+            self.__dict__.get("netbox_id") if self.pk is not None else None
+        )
+
     def natural_key(self) -> Tuple[str]:
         return (self.name,)
 
@@ -91,7 +101,16 @@ class Manufacturer(models.Model):
         """
         if not netbox_manufacturer_id:
             return None
+        return memoize(
+            "manufacturer",
+            netbox_manufacturer_id,
+            lambda: cls._get_or_create_from_netbox(netbox_manufacturer_id),
+        )
 
+    @classmethod
+    def _get_or_create_from_netbox(
+        cls, netbox_manufacturer_id: int
+    ) -> Optional["Manufacturer"]:
         try:
             return cls.objects.get(netbox_id=netbox_manufacturer_id)
         except cls.DoesNotExist:
@@ -126,25 +145,30 @@ class Manufacturer(models.Model):
             manufacturer.save()
         return manufacturer
 
-    def fetch_netbox_record(self) -> Optional[Dict[str, Any]]:
+    def fetch_netbox_record(
+        self, lookup: Optional[NetboxLookup] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Fetch the record of this Manufacturer object from NetBox.
 
+        :param lookup: Where to look the record up, by default it is requested from NetBox.
         :returns: None in case the record cannot be retrieved. The Dict with the NetBox data otherwhise.
         :raises HTTPError: In case any HTTP code except 200 and 404 is returned.
         """
-        netbox_api = Netbox.get_instance()
-        try:
-            return netbox_api.fetch_manufacturer(self.netbox_id)
-        except HTTPError as e:
-            if e.response.status_code == 404:
-                logger.info("Fetching Manufacturer from NetBox failed with status 404.")
-                return None
-            raise e
-
-    def compare_netbox(self) -> None:
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        return lookup.get_manufacturer(self.netbox_id)
+
+    def compare_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxOrthosComparisionBatch] = None,
+    ) -> None:
         """
         Compare the current data in the database of Orthos 2 with the data from NetBox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
+        :param batch: Collects the run and its results instead of saving them, see `NetboxCompareFleet`.
         """
         if self.netbox_id == 0:
             logger.debug("Skipping comparision because NetBox ID is 0.")
@@ -157,26 +181,32 @@ class Manufacturer(models.Model):
             object_type=NetboxOrthosComparisionRun.NetboxOrthosComparisionItemTypes.MANUFACTURER,
             object_manufacturer=self,
         )
-        run_obj.save()
+        save_comparision(run_obj, batch)
 
-        netbox_manufacturer = self.fetch_netbox_record()
+        netbox_manufacturer = self.fetch_netbox_record(lookup)
         if netbox_manufacturer is None:
             return
 
         # Name
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="name",
-            orthos_result=self.name or "<not set>",
-            netbox_result=netbox_manufacturer.get("name", "<not set>"),
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="name",
+                orthos_result=self.name or "<not set>",
+                netbox_result=netbox_manufacturer.get("name", "<not set>"),
+            ),
+            batch,
+        )
         # Description
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="description",
-            orthos_result=self.description or "<not set>",
-            netbox_result=netbox_manufacturer.get("description", "<not set>"),
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="description",
+                orthos_result=self.description or "<not set>",
+                netbox_result=netbox_manufacturer.get("description", "<not set>"),
+            ),
+            batch,
+        )
 
     def fetch_netbox(self) -> None:
         """
@@ -5,9 +5,11 @@ This module defines models to store the runs of comparison tasks and the individ
 NetBox and Orthos for various data objects (e.g., BMC, Enclosure, Machine, etc.).
 """
 
-from typing import TYPE_CHECKING
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 if TYPE_CHECKING:
@@ -25,6 +27,37 @@ if TYPE_CHECKING:
         OptionalRemotePowerDeviceForeignKey,
     )
 
+logger = logging.getLogger("models")
+
+# objects per INSERT of `NetboxOrthosComparisionBatch.write()`
+BULK_CREATE_SIZE = 1000
+
+
+class NetboxOrthosComparisionFleetRun(models.Model):
+    """
+    Represents a run of the fleet-wide NetBox and Orthos comparison.
+
+    The runs of the compared objects link to it. `summary` holds the number of drifted properties, i.e. the ones
+    whose Orthos and NetBox values differ, by object type and property name.
+    """
+
+    run_id = models.UUIDField(primary_key=True, editable=False)
+    compare_timestamp = models.DateTimeField(blank=False)
+    object_count = models.PositiveIntegerField(
+        default=0, help_text="Number of objects compared"
+    )
+    drift_count = models.PositiveIntegerField(
+        default=0, help_text="Number of properties which differ"
+    )
+    summary = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Number of properties which differ by object type and property name",
+    )
+
+    class Meta:
+        ordering = ["-compare_timestamp"]
+
 
 class NetboxOrthosComparisionRun(models.Model):
     """
@@ -100,6 +133,13 @@ class NetboxOrthosComparisionRun(models.Model):
             related_name="netboxorthoscomparisionruns",
         )
     )
+    fleet_run = models.ForeignKey(
+        NetboxOrthosComparisionFleetRun,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="runs",
+    )
 
     def clean(self) -> None:
         super().clean()
@@ -162,3 +202,65 @@ class NetboxOrthosComparisionResult(models.Model):
     property_name: "MandatoryCharField" = models.CharField(max_length=255, blank=False)
     orthos_result: "MandatoryCharField" = models.CharField(max_length=255, blank=False)
     netbox_result: "MandatoryCharField" = models.CharField(max_length=255, blank=False)
+
+
+class NetboxOrthosComparisionBatch:
+    """
+    Comparison runs and results of many objects, stored together.
+
+    The `compare_netbox()` methods of the models hand their run and results to `save()` instead of saving them one
+    by one. `write()` stores them with `bulk_create()`.
+    """
+
+    def __init__(
+        self, fleet_run: Optional[NetboxOrthosComparisionFleetRun] = None
+    ) -> None:
+        self.fleet_run = fleet_run
+        self.runs: List[NetboxOrthosComparisionRun] = []
+        self.results: List[NetboxOrthosComparisionResult] = []
+
+    def save(
+        self, obj: Union[NetboxOrthosComparisionRun, NetboxOrthosComparisionResult]
+    ) -> None:
+        """Store the run or result with the next `write()`."""
+        if isinstance(obj, NetboxOrthosComparisionRun):
+            obj.fleet_run = self.fleet_run
+            self.runs.append(obj)
+        else:
+            self.results.append(obj)
+
+    def get_summary(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of properties which differ by object type and property name."""
+        summary: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for result in self.results:
+            counts = summary[result.run_id.object_type]
+            counts.setdefault(result.property_name, 0)
+            if str(result.orthos_result) != str(result.netbox_result):
+                counts[result.property_name] += 1
+        return dict(summary)
+
+    def write(self) -> None:
+        """Store the runs and results."""
+        with transaction.atomic():
+            NetboxOrthosComparisionRun.objects.bulk_create(
+                self.runs, batch_size=BULK_CREATE_SIZE
+            )
+            NetboxOrthosComparisionResult.objects.bulk_create(
+                self.results, batch_size=BULK_CREATE_SIZE
+            )
+        logger.info(
+            "Stored %d NetBox comparison runs with %d results.",
+            len(self.runs),
+            len(self.results),
+        )
+
+
+def save_comparision(
+    obj: Union[NetboxOrthosComparisionRun, NetboxOrthosComparisionResult],
+    batch: Optional[NetboxOrthosComparisionBatch] = None,
+) -> None:
+    """Save the comparison run or result, or hand it to `batch` to be stored with the others."""
+    if batch is None:
+        obj.save()
+    else:
+        batch.save(obj)
@@ -0,0 +1,375 @@
+import datetime
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, cast
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from orthos2.utils import cache
+from orthos2.utils.netbox import Netbox
+
+if TYPE_CHECKING:
+    from orthos2.types import OptionalDateTimeField
+
+logger = logging.getLogger("models")
+
+
+class NetboxSyncState(models.Model):
+    """
+    Progress of the NetBox fetch of one object type, for incremental syncs.
+
+    `watermark` is the latest NetBox `last_updated` timestamp of the listings of the type when
+    its last sync started. The next sync only fetches the objects changed since then; every
+    `NETBOX_FULL_SYNC_INTERVAL` days all objects are fetched again, which also catches changes
+    NetBox doesn't show in `last_updated` (e.g. deleted IP addresses).
+    """
+
+    class ObjectType:
+        ENCLOSURE = "enclosure"
+        MANUFACTURER = "manufacturer"
+        DEVICE_TYPE = "devicetype"
+        MACHINE = "machine"
+        NETWORK_INTERFACE = "networkinterface"
+        BMC = "bmc"
+        REMOTE_POWER_DEVICE = "remotepowerdevice"
+
+        CHOICES = (
+            (ENCLOSURE, "Enclosure"),
+            (MANUFACTURER, "Manufacturer"),
+            (DEVICE_TYPE, "Device Type"),
+            (MACHINE, "Machine"),
+            (NETWORK_INTERFACE, "Network Interface"),
+            (BMC, "BMC"),
+            (REMOTE_POWER_DEVICE, "Remote Power Device"),
+        )
+
+    # NetBox listings whose changes require fetching the objects of a type again
+    LISTINGS: Dict[str, List[str]] = {
+        ObjectType.ENCLOSURE: [
+            "/dcim/devices/",
+            "/virtualization/virtual-machines/",
+        ],
+        ObjectType.MANUFACTURER: ["/dcim/manufacturers/"],
+        ObjectType.DEVICE_TYPE: ["/dcim/device-types/"],
+        ObjectType.MACHINE: [
+            "/dcim/devices/",
+            "/virtualization/virtual-machines/",
+            "/dcim/interfaces/",
+            "/virtualization/interfaces/",
+            "/ipam/ip-addresses/",
+        ],
+        ObjectType.NETWORK_INTERFACE: [
+            "/dcim/devices/",
+            "/virtualization/virtual-machines/",
+            "/dcim/interfaces/",
+            "/virtualization/interfaces/",
+            "/ipam/ip-addresses/",
+        ],
+        ObjectType.BMC: [
+            "/dcim/devices/",
+            "/dcim/interfaces/",
+            "/ipam/ip-addresses/",
+        ],
+        ObjectType.REMOTE_POWER_DEVICE: [
+            "/dcim/devices/",
+            "/dcim/interfaces/",
+            "/ipam/ip-addresses/",
+        ],
+    }
+
+    class Meta:  # type: ignore
+        ordering = ["object_type"]
+        verbose_name = "NetBox Sync State"
+
+    object_type: "models.CharField[str, str]" = models.CharField(
+        max_length=50,
+        unique=True,
+        choices=ObjectType.CHOICES,
+    )
+
+    watermark: "OptionalDateTimeField" = models.DateTimeField(
+        "Changes fetched until",
+        null=True,
+        blank=True,
+    )
+
+    last_full_sync: "OptionalDateTimeField" = models.DateTimeField(
+        "Last full sync at",
+        null=True,
+        blank=True,
+    )
+
+    updated: "models.DateTimeField[datetime.datetime, datetime.datetime]" = (
+        models.DateTimeField("Updated at", auto_now=True)
+    )
+
+    # set by `begin()` for `finish()`, not stored
+    next_watermark: Optional[datetime.datetime]
+    full: bool
+
+    def __str__(self) -> str:
+        return self.object_type
+
+    def is_full_sync_due(self) -> bool:
+        if self.watermark is None or self.last_full_sync is None:
+            return True
+        interval = datetime.timedelta(days=settings.NETBOX_FULL_SYNC_INTERVAL)
+        return timezone.now() - self.last_full_sync >= interval
+
+    @classmethod
+    def begin(
+        cls, object_type: str, full: bool = False
+    ) -> "Tuple[NetboxSyncState, Optional[Dict[str, Set[int]]]]":
+        """
+        Start syncing the objects of a type.
+
+        Returns the state, to be passed to `finish()` after a successful sync, and the IDs of
+        the NetBox objects changed since the last sync (see `Netbox.fetch_changed()`), or None
+        if all objects have to be fetched.
+        """
+        state, _created = cls.objects.get_or_create(object_type=object_type)
+        netbox_api = Netbox.get_instance()
+        paths = cls.LISTINGS[object_type]
+
+        # taken before looking for changes: later changes are at least as new
+        timestamps = [netbox_api.fetch_last_updated(path) for path in paths]
+        state.next_watermark = max(
+            (timestamp for timestamp in timestamps if timestamp is not None),
+            default=state.watermark,
+        )
+        state.full = full or state.is_full_sync_due()
+        if state.full:
+            logger.info("Fetching all %s objects from NetBox.", object_type)
+            return state, None
+
+        changed = netbox_api.fetch_changed(paths, state.watermark)  # type: ignore
+        logger.info(
+            "Fetching %s objects changed in NetBox since %s: %s",
+            object_type,
+            state.watermark,
+            {kind: len(ids) for kind, ids in changed.items()} or "none",
+        )
+        return state, changed
+
+    def finish(self) -> None:
+        """Store the watermark of a successful sync started with `begin()`."""
+        self.watermark = self.next_watermark
+        if self.full:
+            self.last_full_sync = timezone.now()
+        self.save()
+
+
+class NetboxSyncBatch:
+    """
+    Objects changed while syncing a batch of machines from NetBox, written together.
+
+    `Machine.fetch_netbox()` hands its machine, network interfaces and BMCs to `save()` instead
+    of saving them. `write()` stores the changed fields with `bulk_create()`/`bulk_update()` in
+    one transaction, without the `save()` methods and signals of the objects, and then does what
+    those would have done once for the batch: update the search documents, invalidate the
+    cached machine lists and regenerate Cobbler (and the serial consoles for changed BMCs) once
+    per domain whose DHCP-relevant data changed. If the bulk write fails, e.g. because of a MAC
+    address used twice, the objects are saved one by one.
+    """
+
+    # fields written by `Machine.fetch_netbox()`
+    FIELDS: Dict[str, List[str]] = {
+        "machine": [
+            "netbox_last_fetch_attempt",
+            "comment",
+            "serial_number",
+            "product_code",
+            "device_type",
+            "updated",
+        ],
+        "networkinterface": [
+            "machine",
+            "mac_address",
+            "ethernet_type",
+            "name",
+            "ip_address_v4",
+            "ip_address_v6",
+        ],
+        "bmc": [
+            "machine",
+            "fqdn",
+            "fence_agent",
+            "mac",
+            "ip_address_v4",
+            "ip_address_v6",
+        ],
+    }
+
+    # fields changed by every sync
+    TIMESTAMP_FIELDS = {"netbox_last_fetch_attempt", "updated"}
+
+    # fields which end up in the Cobbler systems and DHCP configuration of the domain
+    COBBLER_FIELDS: Dict[str, List[str]] = {
+        "machine": [],
+        "networkinterface": [
+            "machine",
+            "mac_address",
+            "ip_address_v4",
+            "ip_address_v6",
+        ],
+        "bmc": ["machine", "fqdn", "mac", "ip_address_v4", "ip_address_v6"],
+    }
+
+    def __init__(self) -> None:
+        self.objects: Dict[int, models.Model] = {}
+
+    def save(self, obj: models.Model) -> None:
+        """Write the object with the next `write()`."""
+        self.objects[id(obj)] = obj
+
+    def write(self) -> None:
+        objects = list(self.objects.values())
+        self.objects = {}
+        if not objects:
+            return
+        try:
+            with transaction.atomic():
+                (
+                    changed_machine_ids,
+                    cobbler_machine_ids,
+                    bmc_machine_ids,
+                ) = self.write_bulk(objects)
+        except (IntegrityError, ValidationError):
+            logger.warning(
+                "Writing %s objects synced from NetBox in bulk failed, saving them one by one.",
+                len(objects),
+                exc_info=True,
+            )
+            for obj in objects:
+                try:
+                    obj.save()
+                except Exception:
+                    logger.exception("Saving %s synced from NetBox failed", obj)
+            return
+
+        if changed_machine_ids:
+            cache.invalidate("machines")
+        logger.info(
+            "Wrote %s objects synced from NetBox, %s machines changed.",
+            len(objects),
+            len(changed_machine_ids),
+        )
+        self.regenerate(cobbler_machine_ids, bmc_machine_ids)
+
+    def write_bulk(
+        self, objects: List[models.Model]
+    ) -> Tuple[Set[int], Set[int], Set[int]]:
+        """
+        Create and update the objects.
+
+        Returns the IDs of the machines with changes besides the fetch timestamps, of the ones
+        with Cobbler-relevant changes and of the ones with changed BMCs.
+        """
+        from orthos2.data.models.machinesearchindex import MachineSearchIndex
+        from orthos2.data.models.remotepower import RemotePower
+
+        by_model: Dict[str, List[models.Model]] = defaultdict(list)
+        for obj in objects:
+            by_model[obj._meta.model_name].append(obj)  # type: ignore
+
+        now = timezone.now()
+        changed_machine_ids: Set[int] = set()
+        cobbler_machine_ids: Set[int] = set()
+        bmc_machine_ids: Set[int] = set()
+        for name, model_objects in by_model.items():
+            model = type(model_objects[0])
+            fields = [
+                cast(models.Field, model._meta.get_field(field))
+                for field in self.FIELDS[name]
+            ]
+            for obj in model_objects:
+                # as the `save()` methods do
+                if name == "machine":
+                    obj.updated = now  # type: ignore
+                if name == "networkinterface":
+                    obj.mac_address = obj.mac_address.upper()  # type: ignore
+
+            new = [obj for obj in model_objects if obj.pk is None]
+            originals = model.objects.in_bulk(  # type: ignore
+                [obj.pk for obj in model_objects if obj.pk is not None]
+            )
+            changed: List[models.Model] = []
+            relevant: List[models.Model] = list(new)
+            for obj in model_objects:
+                original = originals.get(obj.pk)
+                if original is None:
+                    continue
+                changed_fields = {
+                    field.name
+                    for field in fields
+                    if getattr(obj, field.attname) != getattr(original, field.attname)
+                }
+                if changed_fields:
+                    changed.append(obj)
+                if changed_fields - self.TIMESTAMP_FIELDS:
+                    changed_machine_ids.add(self.get_machine_id(obj))
+                if changed_fields & set(self.COBBLER_FIELDS[name]):
+                    relevant.append(obj)
+            for obj in new:
+                changed_machine_ids.add(self.get_machine_id(obj))
+            for obj in relevant:
+                cobbler_machine_ids.add(self.get_machine_id(obj))
+                if name == "bmc":
+                    bmc_machine_ids.add(self.get_machine_id(obj))
+                if name == "networkinterface":
+                    # as `NetworkInterface.save()` does, only for changed addresses
+                    obj.clean()  # type: ignore
+
+            model.objects.bulk_create(new)  # type: ignore
+            model.objects.bulk_update(  # type: ignore
+                changed, [field.name for field in fields]
+            )
+            if name == "bmc":
+                # as `BMC.save()` does
+                for bmc in new + changed:
+                    machine = bmc.machine  # type: ignore
+                    if machine.bmc_allowed() and not machine.has_remotepower():
+                        RemotePower(machine=machine).save()
+
+        MachineSearchIndex.update(changed_machine_ids)
+        return changed_machine_ids, cobbler_machine_ids, bmc_machine_ids
+
+    @staticmethod
+    def get_machine_id(obj: models.Model) -> int:
+        if obj._meta.model_name == "machine":
+            return obj.pk  # type: ignore
+        return obj.machine_id  # type: ignore
+
+    @staticmethod
+    def regenerate(machine_ids: Set[int], bmc_machine_ids: Set[int]) -> None:
+        """Regenerate Cobbler once per domain of the machines, the serial consoles for BMCs."""
+        from orthos2.data.models.machine import Machine
+        from orthos2.data.signals import (
+            signal_cobbler_regenerate,
+            signal_serialconsole_regenerate,
+        )
+
+        domains = Machine.objects.filter(pk__in=machine_ids).values_list(
+            "fqdn_domain_id", flat=True
+        )
+        for domain_id in sorted(set(domains)):
+            logger.info(
+                "Regenerating Cobbler of domain %s after NetBox sync", domain_id
+            )
+            signal_cobbler_regenerate.send(  # type: ignore
+                sender=NetboxSyncBatch, domain_id=domain_id
+            )
+        cscreen_servers = (
+            Machine.objects.filter(
+                pk__in=bmc_machine_ids, fqdn_domain__cscreen_server__isnull=False
+            )
+            .values_list("fqdn_domain__cscreen_server__fqdn", flat=True)
+            .distinct()
+        )
+        for cscreen_server_fqdn in sorted(cscreen_servers):
+            signal_serialconsole_regenerate.send(  # type: ignore
+                sender=NetboxSyncBatch, cscreen_server_fqdn=cscreen_server_fqdn
+            )
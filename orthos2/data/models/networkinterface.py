@@ -10,12 +10,14 @@ from django.utils import timezone
 
 from orthos2.data.models.bmc import BMC
 from orthos2.data.models.netboxorthoscomparision import (
+    NetboxOrthosComparisionBatch,
     NetboxOrthosComparisionResult,
     NetboxOrthosComparisionRun,
+    save_comparision,
 )
 from orthos2.data.validators import validate_mac_address
 from orthos2.utils import misc
-from orthos2.utils.netbox import Netbox
+from orthos2.utils.netbox import Netbox, NetboxLookup
 
 if TYPE_CHECKING:
     from orthos2.types import MandatoryMachineForeignKey, OptionalDateTimeField
@@ -205,23 +207,22 @@ class NetworkInterface(models.Model):
             ):
                 raise ValidationError("IPv6 address is not in the chosen network!")
 
-    def fetch_netbox_record(self) -> Dict[str, Any]:
+    def fetch_netbox_record(
+        self, lookup: Optional[NetboxLookup] = None
+    ) -> Dict[str, Any]:
         """
         Fetch the NetBox record of this NetworkInterface objects. This will attempt to search either the Virtual Machine
         or DCIM endpoint, depending on the System type of the machine.
 
+        :param lookup: Where to look the interfaces up, by default they are requested from NetBox.
         :returns: An empty dict in case no network interface could be found in NetBox that matches the MAC of this
                   interface.
         """
-        netbox_api = Netbox.get_instance()
-        if self.machine.system.virtual:
-            netbox_interfaces = netbox_api.check_vm_interface_by_id(
-                self.machine.netbox_id
-            )
-        else:
-            netbox_interfaces = netbox_api.check_interface_no_mgmt_by_id(
-                self.machine.netbox_id
-            )
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        netbox_interfaces = lookup.get_interfaces(
+            self.machine.system.virtual, self.machine.netbox_id
+        )
         netbox_interface = {}
         for interface in netbox_interfaces:
             if interface.get("primary_mac_address") is None:
@@ -234,19 +235,26 @@ class NetworkInterface(models.Model):
                 break
         return netbox_interface
 
-    def fetch_netbox_ips(self, interface_id: int) -> List[Dict[str, Any]]:
+    def fetch_netbox_ips(
+        self, interface_id: int, lookup: Optional[NetboxLookup] = None
+    ) -> List[Dict[str, Any]]:
         """
         Fetch the IPs that are assigned to a given network interface in NetBox.
         """
-        netbox_api = Netbox.get_instance()
-        if self.machine.system.virtual:
-            return netbox_api.check_ip_by_vm_interface(interface_id)
-        else:
-            return netbox_api.check_ip_by_interface(interface_id)
-
-    def compare_netbox(self) -> None:
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        return lookup.get_ips(self.machine.system.virtual, interface_id)
+
+    def compare_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxOrthosComparisionBatch] = None,
+    ) -> None:
         """
         Compare the current data in the database of Orthos 2 with the data from NetBox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
+        :param batch: Collects the run and its results instead of saving them, see `NetboxCompareFleet`.
         """
         if self.machine.netbox_id == 0:
             logger.debug("Skipping comparision because NetBox ID is 0.")
@@ -259,26 +267,29 @@ class NetworkInterface(models.Model):
             object_type=NetboxOrthosComparisionRun.NetboxOrthosComparisionItemTypes.NETWORK_INTERFACE,
             object_network_interface=self,
         )
-        run_obj.save()
+        save_comparision(run_obj, batch)
 
-        netbox_machine = self.machine.fetch_netbox_record()
+        netbox_machine = self.machine.fetch_netbox_record(lookup)
         if netbox_machine is None:
             return
-        netbox_interface = self.fetch_netbox_record()
+        netbox_interface = self.fetch_netbox_record(lookup)
 
         # Name
-        NetboxOrthosComparisionResult(
-            run_id=run_obj,
-            property_name="name",
-            orthos_result=self.name or "<not set>",
-            netbox_result=netbox_interface.get("display", "<not set>"),
-        ).save()
+        save_comparision(
+            NetboxOrthosComparisionResult(
+                run_id=run_obj,
+                property_name="name",
+                orthos_result=self.name or "<not set>",
+                netbox_result=netbox_interface.get("display", "<not set>"),
+            ),
+            batch,
+        )
 
         if len(netbox_interface.keys()) == 0:
             logger.info("%s: Interface not found in NetBox.", self.machine.fqdn)
             return
 
-        ips = self.fetch_netbox_ips(netbox_interface.get("id"))  # type: ignore
+        ips = self.fetch_netbox_ips(netbox_interface.get("id"), lookup)  # type: ignore
         if len(ips) == 0:
             logger.debug("No IPs assigned to this interface in NetBox.")
             return
@@ -291,28 +302,37 @@ class NetworkInterface(models.Model):
         for ip in ips:
             ip_obj = ipaddress.ip_network(misc.ip_strip_subnet_size(ip.get("display")))  # type: ignore
             # DNS Name
-            NetboxOrthosComparisionResult(
-                run_id=run_obj,
-                property_name="fqdn (IPv%s)" % ip_obj.version,
-                orthos_result=self.machine.fqdn,
-                netbox_result=ip.get("dns_name", "<not set>"),
-            ).save()
-            # IPv4 Address
-            if ip_obj.version == 4:
+            save_comparision(
                 NetboxOrthosComparisionResult(
                     run_id=run_obj,
-                    property_name="ip_address_v4",
-                    orthos_result=self.ip_address_v4 or "<not set>",
-                    netbox_result=str(ip_obj).split("/", 1)[0],
-                ).save()
+                    property_name="fqdn (IPv%s)" % ip_obj.version,
+                    orthos_result=self.machine.fqdn,
+                    netbox_result=ip.get("dns_name", "<not set>"),
+                ),
+                batch,
+            )
+            # IPv4 Address
+            if ip_obj.version == 4:
+                save_comparision(
+                    NetboxOrthosComparisionResult(
+                        run_id=run_obj,
+                        property_name="ip_address_v4",
+                        orthos_result=self.ip_address_v4 or "<not set>",
+                        netbox_result=str(ip_obj).split("/", 1)[0],
+                    ),
+                    batch,
+                )
             # IPv6 Address
             if ip_obj.version == 6:
-                NetboxOrthosComparisionResult(
-                    run_id=run_obj,
-                    property_name="ip_address_v6",
-                    orthos_result=self.ip_address_v6 or "<not set>",
-                    netbox_result=str(ip_obj).split("/", 1)[0],
-                ).save()
+                save_comparision(
+                    NetboxOrthosComparisionResult(
+                        run_id=run_obj,
+                        property_name="ip_address_v6",
+                        orthos_result=self.ip_address_v6 or "<not set>",
+                        netbox_result=str(ip_obj).split("/", 1)[0],
+                    ),
+                    batch,
+                )
             if machine_primary_ipv4 is not None and machine_primary_ipv4.get(
                 "id", 0
             ) == ip.get("id", -1):
@@ -327,9 +347,11 @@ class NetworkInterface(models.Model):
         # MAC Address
         # Ethernet Type
 
-    def fetch_netbox(self) -> None:
+    def fetch_netbox(self, lookup: Optional[NetboxLookup] = None) -> None:
         """
         Fetch information from Netbox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
         """
         if self.machine.netbox_id == 0:
             logger.debug("Skipping fetching from NetBox because NetBox ID is 0.")
@@ -339,16 +361,12 @@ class NetworkInterface(models.Model):
             tz=timezone.get_current_timezone()
         )
         self.save()
-        netbox_api = Netbox.get_instance()
-        netbox_machine = self.machine.fetch_netbox_record()
+        netbox_machine = self.machine.fetch_netbox_record(lookup)
         if netbox_machine is None:
             return
-        netbox_interface = self.fetch_netbox_record()
+        netbox_interface = self.fetch_netbox_record(lookup)
 
-        if self.machine.system.virtual:
-            ips = netbox_api.check_ip_by_vm_interface(netbox_interface.get("id"))  # type: ignore
-        else:
-            ips = netbox_api.check_ip_by_interface(netbox_interface.get("id"))  # type: ignore
+        ips = self.fetch_netbox_ips(netbox_interface.get("id"), lookup)  # type: ignore
         if len(ips) == 0:
             logger.debug("No IPs assigned to this interface in NetBox.")
             return
@@ -141,7 +141,20 @@ class RemotePower(models.Model):
 
     def save(self, *args: Any, **kwargs: Any) -> None:
         """Check values before saving the remote power object. Do only save if type is set."""
+        self.normalize()
 
+        # check for `None` explicitly because type 0 results in false
+        if self.fence_agent is not None:  # type: ignore
+            super(RemotePower, self).save(*args, **kwargs)
+        else:
+            raise ValidationError("No remote power type set!")
+
+    def normalize(self) -> None:
+        """
+        Derive fence agent, port and remote power device from the fence in effect.
+
+        Raises a `ValidationError` if the values don't fit the fence.
+        """
         errors: List[ValidationError] = []
         fence = self.get_remotepower_fence()
         if fence.device == "rpowerdevice":
@@ -181,12 +194,6 @@ class RemotePower(models.Model):
         if errors:
             raise ValidationError(errors)
 
-        # check for `None` explicitly because type 0 results in false
-        if self.fence_agent is not None:  # type: ignore
-            super(RemotePower, self).save(*args, **kwargs)
-        else:
-            raise ValidationError("No remote power type set!")
-
     def get_remotepower_fence(self) -> "RemotePowerType":
         """
         Get the fence agent for the remote power object. This is giving you either the directly set fence agent, the
@@ -8,16 +8,17 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.forms import ValidationError
 from django.utils import timezone
-from requests import HTTPError
 
 from orthos2.data.models import Architecture, Domain
 from orthos2.data.models.netboxorthoscomparision import (
+    NetboxOrthosComparisionBatch,
     NetboxOrthosComparisionResult,
     NetboxOrthosComparisionRun,
+    save_comparision,
 )
 from orthos2.data.models.serverconfig import ServerConfig
 from orthos2.data.validators import validate_mac_address
-from orthos2.utils.netbox import Netbox
+from orthos2.utils.netbox import Netbox, NetboxLookup
 
 if TYPE_CHECKING:
     from orthos2.types import (
@@ -133,6 +134,10 @@ class RemotePowerDevice(models.Model):
             '<a href="' + power_doc + '" target="_blank"></a><br>'
         )
         super().__init__(*args, **kwargs)
+        # remembered for comparison before `save()`, see `Enclosure.__init__()`
+        self._original_netbox_id: Optional[int] = (
+            self.__dict__.get("netbox_id") if self.pk is not None else None
+        )
 
     @staticmethod
     def get_by_str(fqdn_dev: str) -> Optional["RemotePowerDevice"]:
@@ -170,19 +175,17 @@ class RemotePowerDevice(models.Model):
                 "Please select a valid fence agent."
             )
 
-    def fetch_netbox_record(self) -> Optional[Dict[str, Any]]:
+    def fetch_netbox_record(
+        self, lookup: Optional[NetboxLookup] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Fetch the record of this RemotePowerDevice object.
+
+        :param lookup: Where to look the record up, by default it is requested from NetBox.
         """
-        netbox_api = Netbox.get_instance()
-        try:
-            netbox_device = netbox_api.fetch_device(self.netbox_id)
-        except HTTPError as e:
-            if e.response.status_code == 404:
-                logger.info("Fetching Device from NetBox failed with status 404.")
-                return None
-            raise e
-        return netbox_device
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        return lookup.get_record(False, self.netbox_id)
 
     def fetch_netbox(self) -> None:
         """
@@ -225,9 +228,16 @@ class RemotePowerDevice(models.Model):
 
         self.save()
 
-    def compare_netbox(self) -> None:
+    def compare_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxOrthosComparisionBatch] = None,
+    ) -> None:
         """
         Compare the current data in the database of Orthos 2 with the data from NetBox.
+
+        :param lookup: Where to look the NetBox data up, by default it is requested from NetBox.
+        :param batch: Collects the run and its results instead of saving them, see `NetboxCompareFleet`.
         """
         if self.netbox_id == 0:
             logger.debug("Skipping comparision because NetBox ID is 0.")
@@ -240,46 +250,56 @@ class RemotePowerDevice(models.Model):
             object_type=NetboxOrthosComparisionRun.NetboxOrthosComparisionItemTypes.REMOTE_POWER_DEVICE,
             object_remote_power_device=self,
         )
-        run_obj.save()
+        save_comparision(run_obj, batch)
 
-        netbox_device = self.fetch_netbox_record()
+        netbox_device = self.fetch_netbox_record(lookup)
         if netbox_device is None:
             return
 
-        netbox_api = Netbox.get_instance()
-        mgmt_interfaces = netbox_api.check_interface_mgmt_by_id(self.netbox_id)
+        if lookup is None:
+            lookup = NetboxLookup(Netbox.get_instance())
+        mgmt_interfaces = lookup.get_mgmt_interfaces(self.netbox_id)
         if not mgmt_interfaces:
-            mgmt_interfaces = netbox_api.check_interface_no_mgmt_by_id(self.netbox_id)
+            mgmt_interfaces = lookup.get_interfaces(False, self.netbox_id)
 
         if mgmt_interfaces:
             interface = mgmt_interfaces[0]
             primary_mac = interface.get("primary_mac_address")
             if primary_mac:
-                NetboxOrthosComparisionResult(
-                    run_id=run_obj,
-                    property_name="mac",
-                    orthos_result=self.mac,
-                    netbox_result=primary_mac.get("mac_address", "<not set>"),
-                ).save()
+                save_comparision(
+                    NetboxOrthosComparisionResult(
+                        run_id=run_obj,
+                        property_name="mac",
+                        orthos_result=self.mac,
+                        netbox_result=primary_mac.get("mac_address", "<not set>"),
+                    ),
+                    batch,
+                )
 
-            ipv4_addresses = netbox_api.check_ip_by_interface_family(interface.get("id"), 4)  # type: ignore
+            ipv4_addresses = lookup.get_ips(False, interface.get("id"), 4)  # type: ignore
             if ipv4_addresses:
-                NetboxOrthosComparisionResult(
-                    run_id=run_obj,
-                    property_name="ip_address_v4",
-                    orthos_result=self.ip_address_v4 or "<not set>",
-                    netbox_result=str(
-                        ipaddress.ip_network(ipv4_addresses[0].get("address")).network_address  # type: ignore
+                save_comparision(
+                    NetboxOrthosComparisionResult(
+                        run_id=run_obj,
+                        property_name="ip_address_v4",
+                        orthos_result=self.ip_address_v4 or "<not set>",
+                        netbox_result=str(
+                            ipaddress.ip_network(ipv4_addresses[0].get("address")).network_address  # type: ignore
+                        ),
                     ),
-                ).save()
+                    batch,
+                )
 
-            ipv6_addresses = netbox_api.check_ip_by_interface_family(interface.get("id"), 6)  # type: ignore
+            ipv6_addresses = lookup.get_ips(False, interface.get("id"), 6)  # type: ignore
             if ipv6_addresses:
-                NetboxOrthosComparisionResult(
-                    run_id=run_obj,
-                    property_name="ip_address_v6",
-                    orthos_result=self.ip_address_v6 or "<not set>",
-                    netbox_result=str(
-                        ipaddress.ip_network(ipv6_addresses[0].get("address")).network_address  # type: ignore
+                save_comparision(
+                    NetboxOrthosComparisionResult(
+                        run_id=run_obj,
+                        property_name="ip_address_v6",
+                        orthos_result=self.ip_address_v6 or "<not set>",
+                        netbox_result=str(
+                            ipaddress.ip_network(ipv6_addresses[0].get("address")).network_address  # type: ignore
+                        ),
                     ),
-                ).save()
+                    batch,
+                )
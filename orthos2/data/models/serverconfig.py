@@ -4,6 +4,7 @@ from typing import List, Optional, cast
 
 from django.db import models
 
+from orthos2.utils.cache import get_or_set_shared
 from orthos2.utils.misc import str_time_to_datetime
 
 logger = logging.getLogger("models")
@@ -24,6 +25,20 @@ class ServerConfigManager(models.Manager["ServerConfig"]):
             logger.exception("Key '%s': %s", key, e)
         return fallback
 
+    def cached_by_key(self, key: str, fallback: Optional[str] = None) -> Optional[str]:
+        """
+        Return the value by key from the cache.
+
+        For values which are read on every request (e.g. links shown on every page); the cache
+        gets invalidated when a server config gets saved. Only cached in a shared cache, see
+        `get_or_set_shared()`.
+        """
+        return get_or_set_shared(
+            ["serverconfig"],
+            "serverconfig-{}".format(key),
+            lambda: self.by_key(key, fallback),
+        )
+
     def bool_by_key(self, key: str, fallback: bool = False) -> bool:
         """
         Return a boolean value by key.
@@ -42,6 +57,17 @@ class ServerConfigManager(models.Manager["ServerConfig"]):
             logger.warning('Key "%s" did not exist, returning fallback value', key)
             return fallback
 
+    def int_by_key(self, key: str, fallback: int = 0) -> int:
+        """Return an integer value by key, `fallback` if the key doesn't exist or its value is no integer."""
+        try:
+            obj = ServerConfig.objects.get(key=key)
+            return int(obj.value)
+        except ServerConfig.DoesNotExist:
+            return fallback
+        except ValueError:
+            logger.exception("Key '%s': value is no integer", key)
+            return fallback
+
     def list_by_key(self, key: str, delimiter: str = ",") -> Optional[List[str]]:
         """Return a list of strings seperated by `delimiter`."""
         try:
@@ -109,6 +135,19 @@ class ServerConfigManager(models.Manager["ServerConfig"]):
             )
         return datetime.datetime.strptime("00:00", "%H:%M").time()
 
+    def get_netbox_rate_limit(self) -> float:
+        """Return the maximum number of NetBox requests per second, 0 for no limit."""
+        try:
+            obj = ServerConfig.objects.get(key="netbox.ratelimit.requestspersecond")
+
+            if obj.value:
+                return max(float(obj.value), 0.0)
+        except ServerConfig.DoesNotExist:
+            logger.info("No NetBox rate limit entry found, requests are not limited")
+        except ValueError:
+            logger.exception("NetBox rate limit value is no number")
+        return 0.0
+
 
 class ServerConfigSSHManager(ServerConfigManager):
     def get_keys(self) -> Optional[List[str]]:
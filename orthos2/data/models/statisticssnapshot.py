@@ -0,0 +1,131 @@
+import datetime
+
+from django.db import models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .architecture import Architecture
+from .domain import Domain
+from .machine import Machine
+
+
+class StatisticsSnapshot(models.Model):
+    """
+    Machine numbers of one day.
+
+    A snapshot is taken once a day (see `DailyStatisticsSnapshot`), the statistics page reads
+    the latest snapshot instead of counting all machines on every request. Older snapshots
+    provide the history for trends.
+    """
+
+    class Meta:  # type: ignore
+        ordering = ["-date"]
+
+    date: "models.DateField[datetime.date, datetime.date]" = models.DateField(
+        unique=True,
+        default=timezone.localdate,
+    )
+
+    total: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    free: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    reserved: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    reserved_permanently: "models.IntegerField[int, int]" = models.IntegerField(
+        default=0
+    )
+
+    status_ping: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    status_ssh: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    status_login: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    check_ping: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    check_ssh: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    check_login: "models.IntegerField[int, int]" = models.IntegerField(default=0)
+
+    # [{"name": <architecture>, "total": ..., "free": ..., "login": ..., "infinite": ...}, ...]
+    architectures = models.JSONField(default=list)
+
+    # [{"name": <domain>, "total": ...}, ...]
+    domains = models.JSONField(default=list)
+
+    updated: "models.DateTimeField[datetime.datetime, datetime.datetime]" = (
+        models.DateTimeField(
+            "Updated at",
+            auto_now=True,
+        )
+    )
+
+    def __str__(self) -> str:
+        return "Statistics of {}".format(self.date)
+
+    @classmethod
+    def collect(cls) -> "StatisticsSnapshot":
+        """
+        Count all machines and return an unsaved snapshot.
+
+        Takes three queries: one for the machine numbers and one `GROUP BY` each for the
+        architectures and the domains.
+        """
+        reachable = [Machine.StatusIP.REACHABLE, Machine.StatusIP.CONFIRMED]
+        numbers = Machine.objects.aggregate(
+            total=Count("pk"),
+            free=Count("pk", filter=Q(reserved_by=None)),
+            reserved=Count("pk", filter=Q(reserved_by__isnull=False)),
+            reserved_permanently=Count("pk", filter=Q(reserved_permanently=True)),
+            status_ping=Count(
+                "pk",
+                filter=Q(status_ipv4__in=reachable) | Q(status_ipv6__in=reachable),
+            ),
+            status_ssh=Count("pk", filter=Q(status_ssh=True)),
+            status_login=Count("pk", filter=Q(status_login=True)),
+            check_ping=Count(
+                "pk", filter=Q(check_connectivity__gte=Machine.Connectivity.PING)
+            ),
+            check_ssh=Count(
+                "pk", filter=Q(check_connectivity__gte=Machine.Connectivity.SSH)
+            ),
+            check_login=Count(
+                "pk", filter=Q(check_connectivity__gte=Machine.Connectivity.ALL)
+            ),
+        )
+
+        architectures = Architecture.objects.annotate(
+            total=Count("machine"),
+            free=Count("machine", filter=Q(machine__reserved_by=None)),
+            login=Count("machine", filter=Q(machine__status_login=True)),
+            infinite=Count("machine", filter=Q(machine__reserved_permanently=True)),
+        )
+        domains = Domain.objects.annotate(total=Count("machine"))
+
+        return cls(
+            architectures=list(
+                architectures.values("name", "total", "free", "login", "infinite")
+            ),
+            domains=list(domains.values("name", "total")),
+            **numbers,
+        )
+
+    @classmethod
+    def take(cls) -> "StatisticsSnapshot":
+        """
+        Count all machines and store the numbers as snapshot of today.
+
+        Page views and the daily task may take the first snapshot of a day at the same time;
+        `update_or_create()` retries as update when the other one inserted it first.
+        """
+        collected = cls.collect()
+        snapshot, _created = cls.objects.update_or_create(
+            date=timezone.localdate(),
+            defaults={
+                field.name: getattr(collected, field.name)
+                for field in cls._meta.fields
+                if field.name not in ("id", "date", "updated")
+            },
+        )
+        return snapshot
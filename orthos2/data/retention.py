@@ -0,0 +1,243 @@
+"""
+Retention policies of the history tables.
+
+A policy decides which rows of a table are kept, per group of rows (usually per machine):
+
+- the newest `keep_last` rows of a group are always kept,
+- other rows older than `daily_after_days` are thinned to the newest row of the group per day,
+- other rows older than `weekly_after_days` are thinned to the newest row of the group per week,
+- other rows older than `max_age_days` are deleted.
+
+Zero disables a rule. The defaults can be overridden per policy in the server config with the keys
+"retention.<policy>.keeplast", "retention.<policy>.dailyafterdays", "retention.<policy>.weeklyafterdays" and
+"retention.<policy>.maxagedays".
+
+Rows are collected and deleted in batches of `BATCH_SIZE`, each in its own transaction, with plain DELETE
+statements: the rows aren't loaded and no delete signals are sent. Rows referencing the deleted ones are deleted
+before them, as listed in `children`.
+"""
+
+import datetime
+import logging
+from contextlib import closing
+from itertools import islice
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple, Type
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from orthos2.data.models import (
+    AnsibleScanResult,
+    NetboxOrthosComparisionFleetRun,
+    NetboxOrthosComparisionResult,
+    NetboxOrthosComparisionRun,
+    ReservationHistory,
+    ServerConfig,
+)
+
+logger = logging.getLogger("models")
+
+# rows deleted per statement and transaction
+BATCH_SIZE = 1000
+
+
+class RetentionPolicy:
+    """Which rows of `model` are kept, by the timestamps in `date_field` per value of `group_field`."""
+
+    # server config keys of the rules, by attribute
+    SETTINGS = {
+        "keep_last": "keeplast",
+        "daily_after_days": "dailyafterdays",
+        "weekly_after_days": "weeklyafterdays",
+        "max_age_days": "maxagedays",
+    }
+
+    def __init__(
+        self,
+        name: str,
+        model: Type[models.Model],
+        date_field: str,
+        group_field: Optional[str] = None,
+        children: Iterable[Tuple[Type[models.Model], str]] = (),
+        keep_last: int = 0,
+        daily_after_days: int = 0,
+        weekly_after_days: int = 0,
+        max_age_days: int = 0,
+    ) -> None:
+        """
+        :param children: Models whose rows reference the deleted rows, with the lookup of the referenced primary key
+                         (e.g. `(NetboxOrthosComparisionResult, "run_id__in")`), in the order they get deleted.
+        """
+        self.name = name
+        self.model = model
+        self.date_field = date_field
+        self.group_field = group_field
+        self.children = list(children)
+        self.keep_last = keep_last
+        self.daily_after_days = daily_after_days
+        self.weekly_after_days = weekly_after_days
+        self.max_age_days = max_age_days
+
+    def __str__(self) -> str:
+        return self.name
+
+    def get_rules(self) -> Dict[str, int]:
+        """Return the rules of the policy, with the values from the server config where set."""
+        return {
+            attribute: ServerConfig.objects.int_by_key(
+                "retention.{}.{}".format(self.name, key), getattr(self, attribute)
+            )
+            for attribute, key in self.SETTINGS.items()
+        }
+
+    def get_expired(
+        self, now: datetime.datetime, first_group: Any = None
+    ) -> Generator[Any, None, None]:
+        """
+        Yield the primary keys of the rows which the policy doesn't keep.
+
+        :param first_group: Skip the groups before this value of `group_field`.
+        """
+        rules = self.get_rules()
+        thresholds = {
+            attribute: now - datetime.timedelta(days=rules[attribute])
+            for attribute in ("daily_after_days", "weekly_after_days", "max_age_days")
+            if rules[attribute] > 0
+        }
+        if not thresholds:
+            return
+        rows: "models.QuerySet[Any]" = self.model._default_manager.all()
+        if not rules["keep_last"]:
+            # rows younger than all thresholds are kept anyway
+            rows = rows.filter(**{self.date_field + "__lt": max(thresholds.values())})
+        group_fields = [self.group_field] if self.group_field else []
+        if first_group is not None:
+            rows = rows.filter(**{self.group_field + "__gte": first_group})  # type: ignore
+        rows = rows.order_by(*group_fields, "-" + self.date_field, "-pk").values_list(
+            "pk", self.date_field, *group_fields
+        )
+
+        group: Any = object()
+        rank = 0
+        last_day: Optional[datetime.date] = None
+        last_week: Optional[Tuple[int, int]] = None
+        for pk, date, *row_group in rows.iterator(chunk_size=BATCH_SIZE):
+            if row_group != group:
+                group = row_group
+                rank = 0
+                last_day = last_week = None
+            rank += 1
+            day = timezone.localtime(date).date()
+            week = day.isocalendar()[:2]
+            newest_of_day = day != last_day
+            newest_of_week = week != last_week
+            last_day = day
+            last_week = week
+            if rank <= rules["keep_last"]:
+                continue
+            if "max_age_days" in thresholds and date < thresholds["max_age_days"]:
+                yield pk
+            elif (
+                "weekly_after_days" in thresholds
+                and date < thresholds["weekly_after_days"]
+            ):
+                if not newest_of_week:
+                    yield pk
+            elif (
+                "daily_after_days" in thresholds
+                and date < thresholds["daily_after_days"]
+            ):
+                if not newest_of_day:
+                    yield pk
+
+    def delete(self, pks: List[Any]) -> None:
+        """Delete rows and the rows of the children referencing them in one transaction."""
+        with transaction.atomic():
+            for child, lookup in self.children:
+                queryset = child._default_manager.filter(**{lookup: pks})
+                queryset._raw_delete(queryset.db)  # type: ignore
+            queryset = self.model._default_manager.filter(pk__in=pks)
+            queryset._raw_delete(queryset.db)  # type: ignore
+
+    def apply(self, now: Optional[datetime.datetime] = None) -> int:
+        """Delete the rows the policy doesn't keep and return their number."""
+        if now is None:
+            now = timezone.now()
+        deleted = 0
+        first_group = None
+        while True:
+            # collected per batch and scanned again after deleting it, SQLite doesn't allow deleting rows of a
+            # table while reading it
+            with closing(self.get_expired(now, first_group)) as expired_rows:
+                expired = list(islice(expired_rows, BATCH_SIZE))
+            if not expired:
+                break
+            if self.group_field:
+                # the groups before the one of the last row are done
+                first_group = (
+                    self.model._default_manager.filter(pk=expired[-1])
+                    .values_list(self.group_field, flat=True)
+                    .get()
+                )
+            self.delete(expired)
+            deleted += len(expired)
+        if deleted:
+            logger.info("Retention policy %s deleted %d rows.", self, deleted)
+        return deleted
+
+
+POLICIES: List[RetentionPolicy] = [
+    RetentionPolicy(
+        "ansiblescanresult",
+        AnsibleScanResult,
+        "run_date",
+        "machine",
+        keep_last=5,
+        daily_after_days=7,
+        weekly_after_days=30,
+        max_age_days=365,
+    ),
+    RetentionPolicy(
+        "reservationhistory",
+        ReservationHistory,
+        "created",
+        "machine",
+        keep_last=20,
+        max_age_days=730,
+    ),
+    RetentionPolicy(
+        "netboxcomparisonrun",
+        NetboxOrthosComparisionRun,
+        "compare_timestamp",
+        children=[(NetboxOrthosComparisionResult, "run_id__in")],
+        max_age_days=14,
+    ),
+    RetentionPolicy(
+        "netboxcomparisonfleetrun",
+        NetboxOrthosComparisionFleetRun,
+        "compare_timestamp",
+        children=[
+            (NetboxOrthosComparisionResult, "run_id__fleet_run__in"),
+            (NetboxOrthosComparisionRun, "fleet_run__in"),
+        ],
+        max_age_days=14,
+    ),
+]
+
+
+def get_policy(name: str) -> RetentionPolicy:
+    """
+    Return the policy with the name `name`.
+
+    :raises KeyError: In case there is no such policy.
+    """
+    for policy in POLICIES:
+        if policy.name == name:
+            return policy
+    raise KeyError(name)
+
+
+def apply_policies(names: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """Apply the policies with the given names (by default all) and return the deleted rows by policy."""
+    policies = POLICIES if names is None else [get_policy(name) for name in names]
+    return {policy.name: policy.apply() for policy in policies}
@@ -1,21 +1,38 @@
 import logging
 import os
+import threading
 import time
-from typing import Any, Optional
+import weakref
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Union
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models.signals import post_delete, post_save, pre_delete
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import Signal, receiver
+from django.utils import timezone
 
 from orthos2.data.models import (
+    Annotation,
+    Architecture,
+    DeviceType,
+    Distribution,
+    Domain,
+    Enclosure,
+    Installation,
     Machine,
+    MachineEvent,
+    MachineSearchIndex,
+    Manufacturer,
     NetworkInterface,
     RemotePowerDevice,
     SerialConsole,
+    SerialConsoleType,
     ServerConfig,
+    System,
 )
 from orthos2.taskmanager import tasks
 from orthos2.taskmanager.models import TaskManager
+from orthos2.utils import cache
 from orthos2.utils.cobbler import CobblerServer
 from orthos2.utils.misc import Serializer
 
@@ -30,6 +47,91 @@ signal_serialconsole_regenerate = Signal()
 signal_serialconsole_sol_deactivate = Signal()
 signal_motd_regenerate = Signal()
 
+# cache namespaces (see `orthos2.utils.cache`) and the models whose changes invalidate them
+cache.register(
+    "machines", Machine, NetworkInterface, Installation, Domain, Architecture
+)
+cache.register("architectures", Architecture)
+cache.register("domains", Domain)
+cache.register("serverconfig", ServerConfig)
+cache.register("systems", System)
+cache.register("serialconsoletypes", SerialConsoleType)
+cache.register("manufacturers", Manufacturer)
+cache.register("devicetypes", DeviceType, Manufacturer)
+cache.register("distributions", Distribution)
+
+# machine IDs collected per action for the `on_commit()` callback of the current transaction
+_pending = threading.local()
+
+
+def on_commit_per_machine(action: Callable[[Set[int]], None], machine_id: int) -> None:
+    """
+    Run `action` once after the current transaction commits, with the IDs of all machines passed
+    for it during the transaction; outside of a transaction `action` runs at once.
+
+    This way saving e.g. all network interfaces of a machine rebuilds its search document once.
+    The callback removes its batch when it runs. The batch only keeps a weak reference to the
+    callback, so it is dropped as well when the transaction (or savepoint) is rolled back and
+    the callback is discarded.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        action({machine_id})
+        return
+
+    batches: Dict[Callable[[Set[int]], None], Tuple[Set[int], weakref.ref]]
+    batches = _pending.__dict__.setdefault("batches", {})
+    batch = batches.get(action)
+    if batch is None or batch[1]() is None:
+        machine_ids: Set[int] = set()
+
+        def run() -> None:
+            if batches.get(action, (None,))[0] is machine_ids:
+                del batches[action]
+            action(machine_ids)
+
+        batch = batches[action] = (machine_ids, weakref.ref(run))
+        transaction.on_commit(run)
+    batch[0].add(machine_id)
+
+
+def touch_machines(machine_ids: Set[int]) -> None:
+    """Bump `updated` of the machines, their inventory version changes (see `Machine.get_inventory_version()`)."""
+    Machine.objects.filter(pk__in=machine_ids).update(updated=timezone.now())
+
+
+@receiver(pre_save, sender=Machine)
+@receiver(pre_save, sender=Enclosure)
+@receiver(pre_save, sender=DeviceType)
+@receiver(pre_save, sender=Manufacturer)
+@receiver(pre_save, sender=RemotePowerDevice)
+def netbox_link_pre_save(sender: Any, instance: Any, *args: Any, **kwargs: Any) -> None:
+    """
+    Reset the last NetBox fetch of objects linked to another NetBox object.
+
+    The incremental NetBox sync only fetches objects whose NetBox object changed, or which were
+    never fetched (see `orthos2.taskmanager.tasks.netbox.fetch_changed()`).
+    """
+    update_fields = kwargs.get("update_fields")
+    if kwargs.get("raw") or (
+        update_fields is not None and "netbox_id" not in update_fields
+    ):
+        return
+    # machines remember all fields in `_original`, the other models only the NetBox ID
+    original = instance._original if isinstance(instance, Machine) else None
+    if original is not None:
+        original_netbox_id = original.__dict__.get("netbox_id")
+    else:
+        original_netbox_id = getattr(instance, "_original_netbox_id", None)
+    if original_netbox_id is None or original_netbox_id == instance.netbox_id:
+        return
+
+    instance.netbox_last_fetch_attempt = None
+    # later saves of this instance compare with the NetBox ID saved now
+    if original is not None:
+        original.netbox_id = instance.netbox_id
+    else:
+        instance._original_netbox_id = instance.netbox_id
+
 
 @receiver(post_save, sender=Machine)
 def machine_post_save(
@@ -197,6 +299,88 @@ def serialconsole_post_delete(
     )
 
 
+@receiver(post_save, sender=Installation)
+def installation_post_save(
+    sender: Any, instance: Installation, *args: Any, **kwargs: Any
+) -> None:
+    """Keep the list of distributions up to date."""
+    Distribution.add(instance.distribution)
+    if instance._original_distribution != instance.distribution:  # type: ignore
+        Distribution.prune([instance._original_distribution or ""])  # type: ignore
+    instance._original_distribution = instance.distribution  # type: ignore
+
+
+@receiver(post_delete, sender=Installation)
+def installation_post_delete(
+    sender: Any, instance: Installation, *args: Any, **kwargs: Any
+) -> None:
+    """Remove the distribution of a deleted installation if it's not installed anymore."""
+    Distribution.prune([instance.distribution])
+
+
+@receiver(post_save, sender=Machine)
+def machine_post_save_index(
+    sender: Any, instance: Machine, *args: Any, **kwargs: Any
+) -> None:
+    """Update the search document of a saved machine (once per transaction)."""
+    if kwargs.get("raw"):
+        return
+    on_commit_per_machine(MachineSearchIndex.update, instance.pk)
+
+
+@receiver(post_delete, sender=Machine)
+def machine_post_delete_index(
+    sender: Any, instance: Machine, *args: Any, **kwargs: Any
+) -> None:
+    """Remove the search document of a deleted machine."""
+    MachineSearchIndex.objects.filter(machine_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Machine)
+def machine_post_save_events(
+    sender: Any, instance: Machine, *args: Any, **kwargs: Any
+) -> None:
+    """Publish changed status and reservation of a saved machine to the open pages."""
+    MachineEvent.publish_changes(instance)
+
+
+@receiver(post_save, sender=Annotation)
+@receiver(post_delete, sender=Annotation)
+@receiver(post_save, sender=Installation)
+@receiver(post_delete, sender=Installation)
+@receiver(post_save, sender=NetworkInterface)
+@receiver(post_delete, sender=NetworkInterface)
+def machine_related_changed_index(
+    sender: Any,
+    instance: Union[Annotation, Installation, NetworkInterface],
+    *args: Any,
+    **kwargs: Any
+) -> None:
+    """
+    Update the search document of the machine whose annotation, installation or NIC changed (once
+    per transaction).
+    """
+    if kwargs.get("raw"):
+        return
+    on_commit_per_machine(MachineSearchIndex.update, instance.machine_id)  # type: ignore
+
+
+@receiver(post_save, sender=Installation)
+@receiver(post_delete, sender=Installation)
+@receiver(post_save, sender=NetworkInterface)
+@receiver(post_delete, sender=NetworkInterface)
+def machine_inventory_changed(
+    sender: Any,
+    instance: Union[Installation, NetworkInterface],
+    *args: Any,
+    **kwargs: Any
+) -> None:
+    """Touch the machine (once per transaction), see `touch_machines()`."""
+    if kwargs.get("raw"):
+        return
+    on_commit_per_machine(touch_machines, instance.machine_id)  # type: ignore
+
+
 @receiver(signal_serialconsole_regenerate)
 def regenerate_serialconsole(
     sender: Any, cscreen_server_fqdn: str, *args: Any, **kwargs: Any
@@ -69,6 +69,36 @@ class AnsibleScanResultModelTest(TestCase):
         # Assert
         assert not AnsibleScanResult.objects.filter(pk=result_pk).exists()
 
+    def test_ansible_scan_result_summary(self) -> None:
+        """Should extract the summary fields from facts_raw when saved."""
+        # Arrange
+        machine = Machine.objects.first()
+        assert machine is not None
+        facts = {
+            "ansible_distribution": "SLES",
+            "ansible_distribution_version": "15.6",
+            "ansible_kernel": "6.4.0-150600.23.25-default",
+            "ansible_architecture": "x86_64",
+            "ansible_memtotal_mb": 31822,
+            "ansible_local": {"dmesg": {"-xl": {"stdout": "x" * 4096}}},
+        }
+
+        # Act
+        result = AnsibleScanResult.objects.create(
+            machine=machine, facts_raw=facts, ansible_version="2.16.3"
+        )
+
+        # Assert
+        result = AnsibleScanResult.objects.only(*AnsibleScanResult.SUMMARY_FIELDS).get(
+            pk=result.pk
+        )
+        assert result.distribution == "SLES 15.6"
+        assert result.kernel == "6.4.0-150600.23.25-default"
+        assert result.architecture == "x86_64"
+        assert result.memtotal_mb == 31822
+        assert result.facts_size > 4096
+        assert result.get_deferred_fields() == {"facts_raw"}
+
     def test_ansible_scan_result_ordering(self) -> None:
         """Should order AnsibleScanResults by -run_date (newest first)."""
         # Arrange
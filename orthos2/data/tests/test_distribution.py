@@ -0,0 +1,58 @@
+from typing import List
+
+from django.test import TestCase
+
+# pylint: disable-next=unused-import
+from orthos2.data import signals  # noqa: F401 (connects the receivers)
+from orthos2.data.models import Distribution, Installation, Machine
+
+
+class DistributionTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        self.machine = Machine.objects.get(fqdn="test.testing.suse.de")
+        Installation.objects.all().delete()
+
+    def get_names(self) -> List[str]:
+        return list(Distribution.objects.values_list("name", flat=True))
+
+    def test_installation_signals(self) -> None:
+        """Distributions are added and removed together with the installations."""
+        installation = Installation.objects.create(
+            machine=self.machine, distribution="SLES 15 SP6"
+        )
+        other = Installation.objects.create(
+            machine=self.machine, distribution="SLES 15 SP6"
+        )
+        Installation.objects.create(machine=self.machine, distribution="")
+        self.assertEqual(self.get_names(), ["SLES 15 SP6"])
+
+        installation.distribution = "openSUSE Tumbleweed"
+        installation.save()
+        self.assertEqual(self.get_names(), ["SLES 15 SP6", "openSUSE Tumbleweed"])
+
+        other.delete()
+        self.assertEqual(self.get_names(), ["openSUSE Tumbleweed"])
+
+        installation = Installation.objects.get(pk=installation.pk)
+        installation.distribution = "SLES 16"
+        installation.save()
+        self.assertEqual(self.get_names(), ["SLES 16"])
+
+    def test_rebuild(self) -> None:
+        """`rebuild()` synchronizes the distributions with the installations."""
+        Installation.objects.bulk_create(
+            [
+                Installation(machine=self.machine, distribution="SLES 15 SP5"),
+                Installation(machine=self.machine, distribution="SLES 15 SP5"),
+            ]
+        )
+        Distribution.objects.create(name="SLES 11 SP4")
+
+        Distribution.rebuild()
+
+        self.assertEqual(self.get_names(), ["SLES 15 SP5"])
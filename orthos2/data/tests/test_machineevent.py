@@ -0,0 +1,86 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from orthos2.api.tests.fleet import build_fleet
+
+# pylint: disable-next=unused-import
+from orthos2.data import signals  # noqa: F401 (connects the receivers)
+from orthos2.data.models import Machine, MachineEvent, ServerConfig
+
+
+class MachineEventTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        ServerConfig.objects.create(
+            key="domain.validendings", value="example.our-org.tld"
+        )
+        self.user = User.objects.create_user(username="fleet", email="fleet@test.de")
+        self.machines = build_fleet(3, user=self.user)
+
+    def test_status_changes(self) -> None:
+        """A status event gets published once per change of the connectivity status."""
+        machine = Machine.objects.get(pk=self.machines[1].pk)
+        machine.status_ssh = not machine.status_ssh
+        machine.save()
+        machine.save()
+
+        events = list(MachineEvent.objects.filter(machine=machine))
+        self.assertEqual([event.kind for event in events], [MachineEvent.Kind.STATUS])
+        self.assertEqual(events[0].data["status_ssh"], machine.status_ssh)
+        self.assertIn("check_connectivity", events[0].data)
+
+        machine.comment = "unrelated"
+        machine.save()
+        self.assertEqual(MachineEvent.objects.filter(machine=machine).count(), 1)
+
+    def test_reservation_changes(self) -> None:
+        """Reserving and releasing a machine publish reservation events."""
+        machine = Machine.objects.get(pk=self.machines[1].pk)
+        machine.autoreinstall = False
+        machine.reserve("testing", datetime.date.today(), user=self.user)
+        machine.release(user=self.user)
+
+        events = MachineEvent.objects.filter(
+            machine=machine, kind=MachineEvent.Kind.RESERVATION
+        )
+        self.assertEqual(
+            [event.data["reserved_by"] for event in events], [self.user.username, ""]
+        )
+
+    def test_publish_task(self) -> None:
+        """Task events are published for existing machines only."""
+        fqdns = [self.machines[0].fqdn, self.machines[2].fqdn, "unknown.example.com"]
+        MachineEvent.publish_task(fqdns, "MachineCheck")
+
+        events = MachineEvent.objects.filter(kind=MachineEvent.Kind.TASK)
+        self.assertEqual(
+            sorted(events.values_list("machine_id", flat=True)),
+            [self.machines[0].pk, self.machines[2].pk],
+        )
+        self.assertEqual(events[0].data, {"task": "MachineCheck"})
+
+    def test_since_and_prune(self) -> None:
+        """Events are read after the last received one and removed when they are old."""
+        first = MachineEvent.publish(self.machines[0].pk, MachineEvent.Kind.TASK)
+        second = MachineEvent.publish(self.machines[1].pk, MachineEvent.Kind.TASK)
+        third = MachineEvent.publish(self.machines[0].pk, MachineEvent.Kind.TASK)
+
+        self.assertEqual(
+            MachineEvent.since(first.pk, [self.machines[0].pk, self.machines[1].pk]),
+            [second, third],
+        )
+        self.assertEqual(MachineEvent.since(0, [self.machines[1].pk]), [second])
+        self.assertEqual(MachineEvent.get_last_id(), third.pk)
+
+        MachineEvent.objects.filter(pk=first.pk).update(
+            created=timezone.now() - MachineEvent.RETENTION - datetime.timedelta(1)
+        )
+        self.assertEqual(MachineEvent.prune(), 1)
+        self.assertEqual(list(MachineEvent.objects.all()), [second, third])
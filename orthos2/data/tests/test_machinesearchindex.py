@@ -0,0 +1,175 @@
+from typing import List
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from orthos2.api.tests.fleet import build_fleet, get_mac
+
+# pylint: disable-next=unused-import
+from orthos2.data import signals  # noqa: F401 (connects the receivers)
+from orthos2.data.models import (
+    Annotation,
+    Machine,
+    MachineSearchIndex,
+    NetworkInterface,
+    ServerConfig,
+)
+
+
+class MachineSearchIndexTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        ServerConfig.objects.create(
+            key="domain.validendings", value="example.our-org.tld"
+        )
+        self.user = User.objects.create_user(username="fleet", email="fleet@test.de")
+        self.machines = build_fleet(12, user=self.user)
+
+    def search(self, text: str) -> List[str]:
+        return list(
+            MachineSearchIndex.search(Machine.objects.all(), text)
+            .order_by("-search_rank", "fqdn")
+            .values_list("fqdn", flat=True)
+        )
+
+    def test_document(self) -> None:
+        """The document contains the searchable fields of the machine in lowercase."""
+        document = MachineSearchIndex.objects.get(machine=self.machines[1]).document
+
+        self.assertIn("fleet1.example.our-org.tld", document)
+        self.assertIn("amd epyc 7763", document)
+        self.assertIn("opensuse tumbleweed", document)
+        self.assertIn(get_mac(1, 1).lower(), document)
+        self.assertIn("fleet machine 1", document)
+        self.assertNotIn("sles 15 sp6", document)
+
+    def test_search_terms(self) -> None:
+        """All terms must match, case-insensitive and anywhere in the document."""
+        self.assertEqual(
+            self.search("EPYC fleet1"),
+            ["fleet1.example.our-org.tld", "fleet10.example.our-org.tld"],
+        )
+        self.assertEqual(self.search(get_mac(7, 0)), ["fleet7.example.our-org.tld"])
+        self.assertEqual(self.search("epyc xeon"), [])
+
+    def test_search_short_terms(self) -> None:
+        """Terms shorter than three characters match as well."""
+        self.assertEqual(
+            self.search("11 sp5"),
+            ["fleet11.example.our-org.tld"],
+        )
+
+    def test_form(self) -> None:
+        """Advanced search lists each machine once, even if several interfaces match."""
+        machines = Machine.search.form(
+            {
+                "fqdn": "FLEET1",
+                "fqdn__operator": "__icontains",
+                "networkinterfaces__mac_address": "02:0",
+                "networkinterfaces__mac_address__operator": "__icontains",
+            }
+        )
+
+        self.assertEqual(
+            list(machines.order_by("fqdn").values_list("fqdn", flat=True)),
+            [
+                "fleet1.example.our-org.tld",
+                "fleet10.example.our-org.tld",
+                "fleet11.example.our-org.tld",
+            ],
+        )
+
+    def test_signals(self) -> None:
+        """Saving and deleting a machine or its related objects updates the document."""
+        machine = self.machines[1]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            annotation = Annotation.objects.create(
+                machine=machine, text="Broken fan", reporter=self.user
+            )
+        self.assertEqual(self.search("broken fan"), [machine.fqdn])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            annotation.delete()
+        self.assertEqual(self.search("broken fan"), [])
+
+        machine = Machine.objects.get(pk=machine.pk)
+        machine.comment = "Needs firmware update"
+        with self.captureOnCommitCallbacks(execute=True):
+            machine.save()
+        self.assertEqual(self.search("firmware"), [machine.fqdn])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Machine.objects.filter(pk=machine.pk).delete()
+        self.assertFalse(
+            MachineSearchIndex.objects.filter(machine_id=machine.pk).exists()
+        )
+        self.assertEqual(self.search("firmware"), [])
+
+    def test_signals_once_per_transaction(self) -> None:
+        """Changes within one transaction update the document once, on commit."""
+        machine = self.machines[1]
+
+        with mock.patch.object(
+            MachineSearchIndex, "update", wraps=MachineSearchIndex.update
+        ) as update, self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for i in range(2, 5):
+                    NetworkInterface.objects.create(
+                        machine=machine,
+                        mac_address=get_mac(1, i),
+                        name="eth{}".format(i),
+                    )
+            self.assertEqual(update.call_count, 0)
+
+        update.assert_called_once_with({machine.pk})
+        self.assertEqual(self.search(get_mac(1, 4)), [machine.fqdn])
+
+    def test_signals_rollback(self) -> None:
+        """Machines of a rolled back savepoint are dropped, later changes are batched anew."""
+        rolled_back, machine = self.machines[0], self.machines[1]
+
+        with mock.patch.object(
+            MachineSearchIndex, "update", wraps=MachineSearchIndex.update
+        ) as update, self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Annotation.objects.create(
+                        machine=rolled_back, text="Broken fan", reporter=self.user
+                    )
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            Annotation.objects.create(
+                machine=machine, text="Broken fan", reporter=self.user
+            )
+
+        self.assertEqual(len(callbacks), 1)
+        update.assert_called_once_with({machine.pk})
+
+    def test_signals_raw(self) -> None:
+        """Objects saved by loading fixtures don't update the document."""
+        annotation = Annotation(
+            machine=self.machines[1], text="Broken fan", reporter=self.user
+        )
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            post_save.send(Annotation, instance=annotation, created=True, raw=True)
+
+        self.assertEqual(callbacks, [])
+
+    def test_rebuild(self) -> None:
+        """`rebuild()` indexes machines which were added without signals."""
+        MachineSearchIndex.objects.all().delete()
+
+        MachineSearchIndex.rebuild()
+
+        self.assertEqual(MachineSearchIndex.objects.count(), Machine.objects.count())
+        self.assertEqual(self.search("fleet3."), ["fleet3.example.our-org.tld"])
@@ -0,0 +1,176 @@
+import datetime
+import uuid
+from typing import List
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orthos2.api.tests.fleet import build_fleet
+from orthos2.data import retention
+from orthos2.data.models import (
+    AnsibleScanResult,
+    NetboxOrthosComparisionFleetRun,
+    NetboxOrthosComparisionResult,
+    NetboxOrthosComparisionRun,
+    ReservationHistory,
+    ServerConfig,
+)
+from orthos2.taskmanager.tasks.netbox import NetboxCleanupComparisionResults
+
+
+class RetentionTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        self.machines = build_fleet(2)
+        self.now = timezone.now()
+
+    def add_scans(self, machine_index: int, hours: range) -> None:
+        AnsibleScanResult.objects.bulk_create(
+            [
+                AnsibleScanResult(
+                    machine=self.machines[machine_index],
+                    run_date=self.now - datetime.timedelta(hours=hour),
+                    facts_raw={},
+                )
+                for hour in hours
+            ]
+        )
+
+    def get_ages(self, machine_index: int) -> List[datetime.timedelta]:
+        return [
+            self.now - run_date
+            for run_date in AnsibleScanResult.objects.filter(
+                machine=self.machines[machine_index]
+            ).values_list("run_date", flat=True)
+        ]
+
+    def test_rollups(self) -> None:
+        """Old scans are thinned to one per day, then one per week, and dropped after a year."""
+        # a scan every 8 hours for 400 days
+        self.add_scans(0, range(0, 400 * 24, 8))
+        # few old scans, all among the newest scans of the machine
+        self.add_scans(1, range(500 * 24, 503 * 24, 24))
+
+        deleted = retention.get_policy("ansiblescanresult").apply(self.now)
+
+        self.assertEqual(AnsibleScanResult.objects.count() + deleted, 1200 + 3)
+        ages = self.get_ages(0)
+        self.assertEqual(
+            len([age for age in ages if age < datetime.timedelta(days=7)]), 7 * 3
+        )
+        days = [
+            timezone.localtime(self.now - age).date()
+            for age in ages
+            if datetime.timedelta(days=7) < age < datetime.timedelta(days=30)
+        ]
+        self.assertEqual(len(days), len(set(days)))
+        self.assertGreaterEqual(len(days), 22)
+        weeks = [
+            timezone.localtime(self.now - age).date().isocalendar()[:2]
+            for age in ages
+            if datetime.timedelta(days=30) < age
+        ]
+        self.assertEqual(len(weeks), len(set(weeks)))
+        self.assertGreaterEqual(len(weeks), 47)
+        self.assertLessEqual(max(ages), datetime.timedelta(days=365))
+        self.assertEqual(len(self.get_ages(1)), 3)
+
+    def test_server_config(self) -> None:
+        """The rules of a policy can be changed in the server config."""
+        machine = self.machines[0]
+        ReservationHistory.objects.filter(machine=machine).update(
+            created=self.now - datetime.timedelta(days=800)
+        )
+        ServerConfig.objects.create(
+            key="retention.reservationhistory.keeplast", value="1"
+        )
+
+        retention.apply_policies(["reservationhistory"])
+
+        # every machine of the fleet has two reservation history entries
+        self.assertEqual(ReservationHistory.objects.filter(machine=machine).count(), 1)
+        self.assertEqual(
+            ReservationHistory.objects.filter(machine=self.machines[1]).count(), 2
+        )
+
+    def test_batches(self) -> None:
+        """Rows are deleted in batches with plain DELETE statements, without loading them."""
+        self.add_scans(0, range(400 * 24, 400 * 24 + 10))
+
+        with mock.patch.object(retention, "BATCH_SIZE", 2), mock.patch.object(
+            retention.get_policy("ansiblescanresult"), "keep_last", 0
+        ), CaptureQueriesContext(connection) as queries:
+            deleted = retention.get_policy("ansiblescanresult").apply(self.now)
+
+        self.assertEqual(deleted, 10)
+        statements = [query["sql"].split()[0] for query in queries.captured_queries]
+        self.assertEqual(statements.count("DELETE"), 5)
+        self.assertFalse(
+            any(
+                "facts_raw" in query["sql"]
+                for query in queries.captured_queries
+                if query["sql"].startswith("SELECT")
+            )
+        )
+
+    def test_batches_rescan(self) -> None:
+        """Scanning again after each batch keeps the same rows as a single pass."""
+        self.add_scans(0, range(0, 60 * 24, 8))
+        self.add_scans(1, range(0, 60 * 24, 8))
+
+        with mock.patch.object(retention, "BATCH_SIZE", 7):
+            deleted = retention.get_policy("ansiblescanresult").apply(self.now)
+
+        self.assertEqual(sorted(self.get_ages(0)), sorted(self.get_ages(1)))
+        self.assertEqual(AnsibleScanResult.objects.count() + deleted, 2 * 180)
+        self.assertEqual(retention.get_policy("ansiblescanresult").apply(self.now), 0)
+
+    def test_netbox_comparison_results(self) -> None:
+        """Comparison runs and fleet runs older than two weeks get deleted with their results."""
+        old = self.now - datetime.timedelta(days=15)
+        fleet_runs = [
+            NetboxOrthosComparisionFleetRun.objects.create(
+                run_id=uuid.uuid4(), compare_timestamp=timestamp
+            )
+            for timestamp in (old, self.now)
+        ]
+        for fleet_run in fleet_runs:
+            run = NetboxOrthosComparisionRun.objects.create(
+                run_id=uuid.uuid4(),
+                compare_timestamp=fleet_run.compare_timestamp,
+                object_type="machine",
+                object_machine=self.machines[0],
+                fleet_run=fleet_run,
+            )
+            NetboxOrthosComparisionResult.objects.create(
+                run_id=run,
+                property_name="comment",
+                orthos_result="a",
+                netbox_result="b",
+            )
+        NetboxOrthosComparisionRun.objects.create(
+            run_id=uuid.uuid4(),
+            compare_timestamp=old,
+            object_type="machine",
+            object_machine=self.machines[1],
+        )
+
+        NetboxCleanupComparisionResults().execute()
+
+        self.assertEqual(
+            list(NetboxOrthosComparisionFleetRun.objects.all()), [fleet_runs[1]]
+        )
+        self.assertEqual(
+            list(
+                NetboxOrthosComparisionRun.objects.values_list("fleet_run", flat=True)
+            ),
+            [fleet_runs[1].pk],
+        )
+        self.assertEqual(NetboxOrthosComparisionResult.objects.count(), 1)
@@ -6,9 +6,12 @@ from typing import Dict, List, Tuple, Union
 
 from django import forms
 
-from orthos2.data.models import DeviceType, Installation, Machine, Manufacturer
+from orthos2.data.models import DeviceType, Distribution, Machine, Manufacturer
+from orthos2.utils.cache import cached_choices
+from orthos2.utils.choices import get_architectures, get_systems, with_blank
 
 
+@cached_choices("manufacturers")
 def get_manufacturers() -> List[Tuple[str, str]]:
     manufacturers: List[Tuple[str, str]] = [("", "--all--")]
     for manufacturer in Manufacturer.objects.all().values("id", "name"):
@@ -16,12 +19,13 @@ def get_manufacturers() -> List[Tuple[str, str]]:
     return manufacturers
 
 
+@cached_choices("devicetypes")
 def get_device_types() -> List[Tuple[str, Union[str, Tuple[Tuple[int, str], ...]]]]:
     device_types: List[Tuple[str, Union[str, Tuple[Tuple[int, str], ...]]]] = [
         ("", "--all--")
     ]
     groups: Dict[str, Tuple[Tuple[int, str], ...]] = {}
-    for device_type in DeviceType.objects.all():
+    for device_type in DeviceType.objects.select_related("manufacturer"):
         device_type_id = device_type.id
         name = device_type.name
         device_type_manufacturer = device_type.manufacturer
@@ -39,6 +43,7 @@ def get_device_types() -> List[Tuple[str, Union[str, Tuple[Tuple[int, str], ...]
     return device_types
 
 
+@cached_choices("devicetypes")
 def get_cartridge_device_types() -> (
     List[Tuple[str, Union[str, Tuple[Tuple[int, str], ...]]]]
 ):
@@ -46,7 +51,7 @@ def get_cartridge_device_types() -> (
         ("", "--all--")
     ]
     groups: Dict[str, Tuple[Tuple[int, str], ...]] = {}
-    for device_type in DeviceType.objects.all():
+    for device_type in DeviceType.objects.select_related("manufacturer"):
         id = device_type.id
         name = device_type.name
         device_type_manufacturer = device_type.manufacturer
@@ -64,25 +69,12 @@ def get_cartridge_device_types() -> (
     return device_types
 
 
+@cached_choices("distributions")
 def get_distributions() -> List[Tuple[str, str]]:
-    installations = [("", "--all--")]
-    for installation in Installation.objects.all().values("distribution").distinct():
-        installations.append(
-            (installation["distribution"], installation["distribution"])
-        )
-    return installations
-
-
-def get_systems() -> List[Tuple[str, str]]:
-    """Return system choices."""
-    return Machine._meta.get_field("system").get_choices(blank_choice=[("", "--all--")])  # type: ignore
-
-
-def get_architectures() -> List[Tuple[str, str]]:
-    """Return architecture choices."""
-    return Machine._meta.get_field("architecture").get_choices(  # type: ignore
-        blank_choice=[("", "--all--")]
-    )
+    distributions = [("", "--all--")]
+    for name in Distribution.objects.values_list("name", flat=True):
+        distributions.append((name, name))
+    return distributions
 
 
 class SearchForm(forms.Form):
@@ -122,6 +114,10 @@ class SearchForm(forms.Form):
             except ValueError:
                 self.add_error("cpu_cores", "Value must be a number.")
 
+    text = forms.CharField(
+        required=False, widget=forms.TextInput(attrs={"class": "form-control"})
+    )
+
     enclosure__device_type__manufacturer = forms.ChoiceField(
         required=False,
         choices=get_manufacturers,
@@ -142,13 +138,13 @@ class SearchForm(forms.Form):
 
     system = forms.ChoiceField(
         required=False,
-        choices=get_systems,
+        choices=with_blank(get_systems),
         widget=forms.Select(attrs={"class": "form-select"}),
     )
 
     architecture = forms.ChoiceField(
         required=False,
-        choices=get_architectures,
+        choices=with_blank(get_architectures),
         widget=forms.Select(attrs={"class": "form-select"}),
     )
 
@@ -226,7 +222,7 @@ class SearchForm(forms.Form):
 
     installations__distribution = forms.ChoiceField(
         required=False,
-        choices=(get_distributions),
+        choices=get_distributions,
         widget=forms.Select(attrs={"class": "form-select"}),
     )
 
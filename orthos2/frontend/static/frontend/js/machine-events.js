@@ -0,0 +1,125 @@
+(function () {
+  "use strict";
+
+  // Follows the machines shown on a page (elements with `data-machine-id` inside an element
+  // with `data-machine-events`) and updates them in place when their status, reservation or
+  // power state changes or when a task has finished. The events are polled with short requests,
+  // which the server answers at once.
+
+  function showMessage(cls, message) {
+    if (document.getElementById("machine-statusbar") && typeof showMachineStatusBarMessage === "function") {
+      document.getElementById("machine-statusbar").style.display = "";
+      showMachineStatusBarMessage({ cls: cls, message: message });
+    }
+  }
+
+  function machineElements(container, machineId) {
+    return container.querySelectorAll('[data-machine-id="' + machineId + '"]');
+  }
+
+  function setField(element, field, text) {
+    element.querySelectorAll('[data-field="' + field + '"]').forEach(function (cell) {
+      cell.textContent = text;
+    });
+  }
+
+  var handlers = {
+    status: function (element, data) {
+      Object.keys(data.cells).forEach(function (name) {
+        var cell = element.querySelector('[data-status="' + name + '"]');
+        if (cell) {
+          cell.outerHTML = data.cells[name];
+        }
+      });
+      if (data.last_check) {
+        setField(element, "last_check", new Date(data.last_check).toLocaleString());
+      }
+    },
+    reservation: function (element, data) {
+      setField(element, "reserved_by", data.reserved_by);
+      showMessage("info", data.reserved_by ? "Machine reserved by " + data.reserved_by : "Machine released");
+    },
+    power: function (element, data) {
+      if (data.action === "status") {
+        showMessage("info", "Power status: " + data.result);
+      } else {
+        showMessage(data.result ? "success" : "danger", "Power action '" + data.action + "' " + (data.result ? "done" : "failed"));
+      }
+    },
+    task: function (element, data) {
+      showMessage("success", "Task " + data.task + " finished");
+    },
+  };
+
+  // seconds between two polls until the server tells its interval
+  var DEFAULT_INTERVAL = 5;
+
+  function follow(container, machineIds) {
+    var params = new URLSearchParams();
+    machineIds.forEach(function (machineId) {
+      params.append("machine", machineId);
+    });
+    var url = container.dataset.machineEvents + "?" + params.toString();
+    var lastId = null;
+    var interval = DEFAULT_INTERVAL;
+
+    function dispatch(event) {
+      var handler = handlers[event.kind];
+      if (!handler) {
+        return;
+      }
+      var elements = Array.prototype.slice.call(machineElements(container, event.data.machine));
+      if (container.dataset.machineId === String(event.data.machine)) {
+        elements.push(container);
+      }
+      elements.forEach(function (element) {
+        handler(element, event.data);
+      });
+    }
+
+    function poll() {
+      // hidden pages don't poll, the next poll after showing them gets the missed events
+      if (document.hidden) {
+        window.setTimeout(poll, interval * 1000);
+        return;
+      }
+      fetch(url + (lastId === null ? "" : "&since=" + lastId), { credentials: "same-origin" })
+        .then(function (response) {
+          if (!response.ok) {
+            throw new Error(response.statusText);
+          }
+          return response.json();
+        })
+        .then(function (result) {
+          lastId = result.last_id;
+          interval = result.interval || DEFAULT_INTERVAL;
+          result.events.forEach(dispatch);
+        })
+        .catch(function () {})
+        .then(function () {
+          window.setTimeout(poll, interval * 1000);
+        });
+    }
+
+    poll();
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    if (typeof fetch === "undefined") {
+      return;
+    }
+
+    document.querySelectorAll("[data-machine-events]").forEach(function (container) {
+      var machineIds = [];
+      if (container.dataset.machineId) {
+        machineIds.push(container.dataset.machineId);
+      }
+      container.querySelectorAll("[data-machine-id]").forEach(function (element) {
+        machineIds.push(element.dataset.machineId);
+      });
+      if (machineIds.length) {
+        follow(container, machineIds);
+      }
+    });
+  });
+})();
@@ -26,6 +26,9 @@ def url_replace(
     if field != "page":
         if "page" in params:
             params["page"] = "1"
+        # keyset cursors are only valid for the current filters
+        params.pop("after", None)
+        params.pop("before", None)
 
     if remove and (field in params):
         del params[field]
@@ -62,7 +65,7 @@ def disabled(request: HttpRequest, name: str) -> Optional[str]:
 @register.simple_tag
 def get_bugreport_url() -> str:
     """Return bugreport URL for templates."""
-    url = ServerConfig.get_server_config_manager().by_key("orthos.bugreport.url")
+    url = ServerConfig.get_server_config_manager().cached_by_key("orthos.bugreport.url")
     if not url:
         url = "#"
     return url
@@ -71,7 +74,9 @@ def get_bugreport_url() -> str:
 @register.simple_tag
 def get_documentation_url() -> str:
     """Return documentation URL for templates."""
-    url = ServerConfig.get_server_config_manager().by_key("orthos.documentation.url")
+    url = ServerConfig.get_server_config_manager().cached_by_key(
+        "orthos.documentation.url"
+    )
     if not url:
         url = "#"
     return url
@@ -80,7 +85,9 @@ def get_documentation_url() -> str:
 @register.simple_tag
 def get_enhancement_url() -> str:
     """Return enhancement URL for emplates."""
-    url = ServerConfig.get_server_config_manager().by_key("orthos.enhancement.url")
+    url = ServerConfig.get_server_config_manager().cached_by_key(
+        "orthos.enhancement.url"
+    )
     if not url:
         url = "#"
     return url
@@ -124,11 +131,17 @@ def get_current_device_type_filter(request: HttpRequest) -> str:
     return device_type
 
 
+def status_cell(name: str, cell: str) -> SafeString:
+    """Mark a status table cell, so machine events can replace it."""
+    return mark_safe(cell.replace("<td ", '<td data-status="{}" '.format(name), 1))
+
+
 @register.simple_tag
 def status_ipv4(machine: Machine) -> SafeString:
     if machine.check_connectivity < Machine.Connectivity.PING:
-        return mark_safe(
-            '<td class="blue text-center"><span class="text-small">Disabled</span></td>'
+        return status_cell(
+            "ipv4",
+            '<td class="blue text-center"><span class="text-small">Disabled</span></td>',
         )
 
     text = dict(Machine.StatusIP.CHOICE).get(machine.status_ipv4)
@@ -144,14 +157,15 @@ def status_ipv4(machine: Machine) -> SafeString:
     else:
         result = '<td class="bg-warning text-center" title="{}"><i class="fa-solid fa-triangle-exclamation"></i></td>'
 
-    return mark_safe(result.format(text))
+    return status_cell("ipv4", result.format(text))
 
 
 @register.simple_tag
 def status_ipv6(machine: Machine) -> SafeString:
     if machine.check_connectivity < Machine.Connectivity.PING:
-        return mark_safe(
-            '<td class="blue text-center"><span class="text-small">Disabled</span></td>'
+        return status_cell(
+            "ipv6",
+            '<td class="blue text-center"><span class="text-small">Disabled</span></td>',
         )
 
     text = dict(Machine.StatusIP.CHOICE).get(machine.status_ipv6)
@@ -167,14 +181,15 @@ def status_ipv6(machine: Machine) -> SafeString:
     else:
         result = '<td class="bg-warning text-center" title="{}"><i class="fa-solid fa-triangle-exclamation"></i></td>'
 
-    return mark_safe(result.format(text))
+    return status_cell("ipv6", result.format(text))
 
 
 @register.simple_tag
 def status_ssh(machine: Machine) -> SafeString:
     if machine.check_connectivity < Machine.Connectivity.SSH:
-        return mark_safe(
-            '<td class="blue text-center"><span class="text-small">Disabled</span></td>'
+        return status_cell(
+            "ssh",
+            '<td class="blue text-center"><span class="text-small">Disabled</span></td>',
         )
 
     if machine.status_ssh:
@@ -182,14 +197,15 @@ def status_ssh(machine: Machine) -> SafeString:
     else:
         result = '<td class="red text-center" title="SSH port not open"><i class="fa-solid fa-xmark"></i></td>'
 
-    return mark_safe(result)
+    return status_cell("ssh", result)
 
 
 @register.simple_tag
 def status_login(machine: Machine) -> SafeString:
     if machine.check_connectivity < Machine.Connectivity.ALL:
-        return mark_safe(
-            '<td class="blue text-center"><span class="text-small">Disabled</span></td>'
+        return status_cell(
+            "login",
+            '<td class="blue text-center"><span class="text-small">Disabled</span></td>',
         )
 
     if machine.status_login:
@@ -197,7 +213,24 @@ def status_login(machine: Machine) -> SafeString:
     else:
         result = '<td class="red text-center" title="Login was not successful"><i class="fa-solid fa-xmark"></i></td>'
 
-    return mark_safe(result)
+    return status_cell("login", result)
+
+
+@register.simple_tag
+def url_cursor(request: HttpRequest, field: str = "", value: Any = None) -> str:
+    """
+    Return GET parameters for a keyset page (`after` or `before` a machine).
+
+    Page numbers and other cursors get removed; without ``field`` the first page is addressed.
+    """
+    params = request.GET.copy()
+    for name in ("page", "after", "before"):
+        params.pop(name, None)
+
+    if field:
+        params[field] = value
+
+    return params.urlencode()
 
 
 @register.simple_tag
@@ -207,6 +240,9 @@ def order_list(request: HttpRequest, field: str) -> SafeString:
     down = '<i class="fa-solid fa-caret-up"></i>'
 
     params = request.GET.copy()
+    params.pop("after", None)
+    params.pop("before", None)
+    params.pop("page", None)
     params["order_by"] = field
     params["order_direction"] = "desc"
     url_asc = "{}?{}".format(request.path, params.urlencode())
@@ -153,6 +153,29 @@ class AnsibleResultListViewTest(WebTest):
         results = response.context["results"]
         assert len(results) == 50  # paginate_by=50
 
+    def test_list_view_without_facts(self) -> None:
+        """Should list the summary without loading facts_raw or the machine."""
+        # Arrange
+        machine = Machine.objects.first()
+        assert machine is not None
+        AnsibleScanResult.objects.create(
+            machine=machine,
+            facts_raw={"ansible_distribution": "SLES", "ansible_kernel": "6.4.0"},
+            ansible_version="2.16.3",
+        )
+
+        # Act
+        response = self.app.get(
+            reverse("frontend:ansible_results_list"), user="superuser"
+        )
+
+        # Assert
+        result = response.context["results"][0]
+        assert result.get_deferred_fields() == {"facts_raw"}
+        assert "machine" not in result._state.fields_cache
+        assert machine.fqdn in response.text
+        assert "6.4.0" in response.text
+
 
 class AnsibleResultDetailViewTest(WebTest):
     """Tests for ansible_result_detail view."""
@@ -0,0 +1,102 @@
+"""Tests for the machine event polls."""
+
+from typing import Any, Dict, List, Tuple
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from orthos2.data.models import Machine, MachineEvent
+
+
+@override_settings(EVENT_POLL_INTERVAL=5)
+class MachineEventsTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_superuser(
+            username="superuser", email="superuser@test.de", password="12345"
+        )
+        self.client.force_login(self.user)
+        self.machine, self.other = Machine.objects.all()[:2]
+
+    def poll(self, **params: Any) -> Dict[str, Any]:
+        response = self.client.get(
+            reverse("frontend:ajax_machine_events"),
+            dict(params, machine=[self.machine.pk, "x"]),
+        )
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json()["interval"], 5)
+        return response.json()
+
+    def get_events(self, since: int) -> List[Tuple[int, str, Dict[str, Any]]]:
+        return [
+            (event["id"], event["kind"], event["data"])
+            for event in self.poll(since=since)["events"]
+        ]
+
+    def test_events_since(self) -> None:
+        """Only events of the followed machines after the last received one are returned."""
+        first = MachineEvent.publish(self.machine.pk, MachineEvent.Kind.TASK)
+        MachineEvent.publish(self.other.pk, MachineEvent.Kind.TASK)
+        power = MachineEvent.publish(
+            self.machine.pk,
+            MachineEvent.Kind.POWER,
+            {"action": "reboot", "result": True},
+        )
+
+        events = self.get_events(first.pk)
+
+        self.assertEqual(
+            events,
+            [
+                (
+                    power.pk,
+                    "power",
+                    {"action": "reboot", "result": True, "machine": self.machine.pk},
+                )
+            ],
+        )
+
+    def test_first_poll(self) -> None:
+        """The first poll returns no events, the next one starts after the existing events."""
+        event = MachineEvent.publish(self.machine.pk, MachineEvent.Kind.TASK)
+
+        self.assertEqual(
+            self.poll(), {"last_id": event.pk, "interval": 5, "events": []}
+        )
+
+    def test_last_id(self) -> None:
+        """The next poll continues after the last returned event, or where this one started."""
+        event = MachineEvent.publish(self.machine.pk, MachineEvent.Kind.TASK)
+        MachineEvent.publish(self.other.pk, MachineEvent.Kind.TASK)
+
+        self.assertEqual(self.poll(since=0)["last_id"], event.pk)
+        self.assertEqual(self.poll(since=event.pk)["last_id"], event.pk)
+
+    def test_status_cells(self) -> None:
+        """Status events carry the rendered status cells."""
+        self.machine.status_ssh = True
+        self.machine.check_connectivity = Machine.Connectivity.ALL
+        MachineEvent.publish(
+            self.machine.pk,
+            MachineEvent.Kind.STATUS,
+            MachineEvent.get_state(self.machine, MachineEvent.STATUS_FIELDS),
+        )
+
+        [(_id, kind, data)] = self.get_events(0)
+
+        self.assertEqual(kind, "status")
+        self.assertEqual(set(data["cells"]), {"ipv4", "ipv6", "ssh", "login"})
+        self.assertIn('data-status="ssh"', data["cells"]["ssh"])
+        self.assertIn("SSH port open", data["cells"]["ssh"])
+
+    def test_login_required(self) -> None:
+        self.client.logout()
+
+        response = self.client.get(reverse("frontend:ajax_machine_events"))
+
+        self.assertEqual(response.status_code, 302)
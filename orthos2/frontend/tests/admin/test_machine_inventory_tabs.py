@@ -0,0 +1,61 @@
+"""Tests for the cached inventory tabs of the machine detail page."""
+
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# pylint: disable-next=unused-import
+from orthos2.data import signals  # noqa: F401 (connects the receivers)
+from orthos2.data.models import Installation, Machine
+
+
+class MachineInventoryTabsTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        caches["fragments"].clear()
+        self.user = User.objects.create_superuser(
+            username="superuser", email="superuser@test.de", password="12345"
+        )
+        self.client.force_login(self.user)
+        self.machine = Machine.objects.get(fqdn="test.testing.suse.de")
+        Machine.objects.filter(pk=self.machine.pk).update(lspci="Intel Host bridge")
+
+    def test_cached_until_inventory_changes(self) -> None:
+        """A tab is rendered from the cache until the machine gets scanned again."""
+        url = reverse("frontend:pci", args=[self.machine.pk])
+        self.assertContains(self.client.get(url), "Intel Host bridge")
+
+        # the dump is neither loaded nor rendered for a cached tab
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "Intel Host bridge")
+        self.assertFalse(any("lspci" in query["sql"] for query in queries))
+
+        # the cached tab is served until the machine gets saved by the next scan
+        Machine.objects.filter(pk=self.machine.pk).update(lspci="AMD PCI bridge")
+        self.assertContains(self.client.get(url), "Intel Host bridge")
+
+        Machine.objects.filter(pk=self.machine.pk).update(
+            updated=timezone.now() + datetime.timedelta(seconds=1)
+        )
+        self.assertContains(self.client.get(url), "AMD PCI bridge")
+
+    def test_installations_change(self) -> None:
+        """Changed installations update the installations tab."""
+        url = reverse("frontend:installations", args=[self.machine.pk])
+        self.assertNotContains(self.client.get(url), "SLES 16")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Installation.objects.create(machine=self.machine, distribution="SLES 16")
+
+        self.assertContains(self.client.get(url), "SLES 16")
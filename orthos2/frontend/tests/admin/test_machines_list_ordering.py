@@ -0,0 +1,86 @@
+"""Tests for ordering and keyset pagination of the Machine list."""
+
+from typing import Any, Dict, List
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from orthos2.api.tests.fleet import build_fleet
+from orthos2.data.models import Machine
+from orthos2.frontend.views.machines import MachineListView
+
+
+class MachineListOrderingTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="superuser", email="superuser@test.de", password="12345"
+        )
+        build_fleet(120, user=self.user)
+        self.client.force_login(self.user)
+        self.url = reverse("frontend:machines")
+
+    def get_fqdns(self, params: Dict[str, Any]) -> List[str]:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [machine.fqdn for machine in response.context["machines"]]
+
+    def test_order_by(self) -> None:
+        """Whitelisted sort keys are applied in SQL."""
+        fqdns = self.get_fqdns({"order_by": "ram_amount", "order_direction": "desc"})
+
+        expected = Machine.objects.order_by("-ram_amount", "-pk").values_list(
+            "fqdn", flat=True
+        )[:50]
+        self.assertEqual(fqdns, list(expected))
+
+    def test_order_by_distribution(self) -> None:
+        """Ordering by distribution uses the active installation only."""
+        fqdns = self.get_fqdns(
+            {"order_by": "installations__distribution", "order_direction": "asc"}
+        )
+
+        self.assertEqual(len(fqdns), 50)
+        self.assertEqual(len(set(fqdns)), 50)
+
+    def test_order_by_unknown_field(self) -> None:
+        """Sort keys which are not whitelisted fall back to the default order."""
+        fqdns = self.get_fqdns(
+            {"order_by": "reserved_by__password", "order_direction": "asc"}
+        )
+
+        self.assertEqual(fqdns, self.get_fqdns({}))
+
+    def test_keyset_pages(self) -> None:
+        """Keyset pages match the numbered pages."""
+        params = {"order_by": "cpu_cores", "order_direction": "desc"}
+        pages = [self.get_fqdns(dict(params, page=page)) for page in (1, 2, 3)]
+        first = Machine.objects.get(fqdn=pages[1][0])
+        last = Machine.objects.get(fqdn=pages[1][-1])
+
+        with mock.patch.object(MachineListView, "KEYSET_THRESHOLD", 100):
+            response = self.client.get(self.url, dict(params, after=last.pk))
+            before = self.get_fqdns(dict(params, before=first.pk))
+
+        self.assertTrue(response.context["keyset"])
+        self.assertContains(
+            response, "before={}".format(Machine.objects.get(fqdn=pages[2][0]).pk)
+        )
+        self.assertEqual(
+            [machine.fqdn for machine in response.context["machines"]], pages[2]
+        )
+        self.assertEqual(before, pages[0])
+
+    def test_keyset_invalid_cursor(self) -> None:
+        """Invalid cursors show the first page."""
+        fqdns = self.get_fqdns({"after": "foo"})
+
+        self.assertEqual(fqdns, self.get_fqdns({}))
@@ -0,0 +1,126 @@
+"""Tests for the number of queries needed to render a page of the Machine lists."""
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from orthos2.api.tests.fleet import build_fleet
+from orthos2.data.models import (
+    Machine,
+    RemotePower,
+    RemotePowerType,
+    SerialConsole,
+    System,
+)
+from orthos2.data.models.serialconsoletype import SerialConsoleType
+from orthos2.frontend.templatetags.tags import get_bugreport_url, get_documentation_url
+from orthos2.utils import cache as namespaces
+from orthos2.utils.choices import get_architectures, get_domains
+
+
+class MachineListQueriesTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/serialconsoletypes.json",
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    # session, user, count, machines
+    QUERIES_PER_PAGE = 4
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="superuser", email="superuser@test.de", password="12345"
+        )
+        self.machines = machines = build_fleet(180, user=self.user)
+        stype = SerialConsoleType.objects.get(name="IPMI")
+        SerialConsole.objects.bulk_create(
+            [
+                SerialConsole(machine=machine, stype=stype, baud_rate=57600)
+                for machine in machines
+            ]
+        )
+        fence_agent = RemotePowerType.objects.get(name="fleet-ipmi")
+        RemotePower.objects.bulk_create(
+            [
+                RemotePower(machine=machine, fence_agent=fence_agent)
+                for machine in machines
+            ]
+        )
+        self.client.force_login(self.user)
+
+        # the server config values and (in a shared cache) the filter choices are cached for
+        # all lists
+        patcher = mock.patch.object(namespaces, "is_shared", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get_bugreport_url()
+        get_documentation_url()
+        get_architectures()
+        get_domains()
+
+    def test_queries_per_page(self) -> None:
+        """A full page takes the same fixed number of queries for every list."""
+        for name in ("machines", "free_machines", "my_machines"):
+            with self.subTest(view=name):
+                with self.assertNumQueries(self.QUERIES_PER_PAGE):
+                    response = self.client.get(reverse("frontend:" + name))
+
+                self.assertEqual(len(response.context["machines"]), 50)
+                self.assertContains(response, "Machine has serial console (IPMI)")
+                self.assertContains(response, "Machine has remote power (bmc)")
+                self.assertContains(response, "SLES 15 SP")
+
+    def test_queries_last_page(self) -> None:
+        """Later pages don't take more queries than the first one."""
+        self.client.get(reverse("frontend:machines"))
+
+        # the count is cached after the first page
+        with self.assertNumQueries(self.QUERIES_PER_PAGE - 1):
+            response = self.client.get(reverse("frontend:machines"), {"page": 4})
+
+        self.assertEqual(len(response.context["machines"]), 32)
+
+    def test_queries_virtual_machines(self) -> None:
+        """The guests of all VM hosts on a page are loaded with one query."""
+        hosts = self.machines[:60]
+        Machine.objects.filter(pk__in=[host.pk for host in hosts]).update(
+            vm_dedicated_host=True
+        )
+        system = System.objects.get(name="VM KVM")
+        Machine.objects.bulk_create(
+            [
+                Machine(
+                    fqdn="{}-vm{}.{}".format(
+                        host.fqdn_hostname, i, host.fqdn_domain.name
+                    ),
+                    fqdn_hostname="{}-vm{}".format(host.fqdn_hostname, i),
+                    fqdn_domain=host.fqdn_domain,
+                    architecture=host.architecture,
+                    system=system,
+                    hypervisor=host,
+                    enclosure=host.enclosure,
+                    cpu_cores=2,
+                    ram_amount=4096,
+                )
+                for host in hosts
+                for i in range(3)
+            ]
+        )
+
+        with self.assertNumQueries(self.QUERIES_PER_PAGE + 1):
+            response = self.client.get(reverse("frontend:virtual_machines"))
+
+        machines = response.context["machines"]
+        self.assertEqual(len(machines), 200)
+        self.assertEqual(machines[0].guest_count, 3)
+        self.assertEqual(machines[0].guest_cpu_cores, 6)
+        self.assertEqual(machines[0].guest_ram_amount, 12288)
+        self.assertEqual(
+            [machine.hypervisor_id for machine in machines[1:4]], [machines[0].pk] * 3
+        )
+        self.assertContains(response, "3 VMs, 6 vCPUs, 12.0 GB")
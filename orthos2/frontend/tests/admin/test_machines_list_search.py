@@ -0,0 +1,80 @@
+"""Tests for the full text search of the Machine list and the advanced search."""
+
+from typing import Any, Dict, List
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from orthos2.api.tests.fleet import build_fleet, get_mac
+from orthos2.frontend.forms.search import SearchForm
+
+
+class MachineListSearchTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="superuser", email="superuser@test.de", password="12345"
+        )
+        build_fleet(30, user=self.user)
+        self.client.force_login(self.user)
+
+    def get_fqdns(self, params: Dict[str, Any]) -> List[str]:
+        response = self.client.get(reverse("frontend:machines"), params)
+        self.assertEqual(response.status_code, 200)
+        return [machine.fqdn for machine in response.context["machines"]]
+
+    def test_quick_search_fields(self) -> None:
+        """The quick search matches more than the FQDN."""
+        self.assertEqual(
+            self.get_fqdns({"query": get_mac(4, 1)}), ["fleet4.example.our-org.tld"]
+        )
+        self.assertEqual(
+            self.get_fqdns({"query": "fleet machine 27"}),
+            ["fleet27.example.our-org.tld"],
+        )
+        self.assertEqual(len(self.get_fqdns({"query": "ampere"})), 10)
+
+    def test_quick_search_ranked(self) -> None:
+        """Without explicit order, the best matches come first."""
+        fqdns = self.get_fqdns({"query": "fleet2"})
+
+        self.assertEqual(len(fqdns), 11)
+        self.assertEqual(fqdns[0], "fleet2.example.our-org.tld")
+
+    def test_quick_search_order_by(self) -> None:
+        """An explicit order overrides the ranking."""
+        fqdns = self.get_fqdns(
+            {"query": "fleet2", "order_by": "fqdn", "order_direction": "desc"}
+        )
+
+        self.assertEqual(fqdns, sorted(fqdns, reverse=True))
+
+    def test_advanced_search_text(self) -> None:
+        """The free text field of the advanced search is combined with the other fields."""
+        data = {
+            name: field.initial
+            for name, field in SearchForm.base_fields.items()
+            if name.endswith("__operator")
+        }
+        data.update({"text": "epyc", "fqdn": "fleet1"})
+
+        response = self.client.post(reverse("frontend:advanced_search"), data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(
+            [machine.fqdn for machine in response.context["machines"]],
+            [
+                "fleet1.example.our-org.tld",
+                "fleet10.example.our-org.tld",
+                "fleet13.example.our-org.tld",
+                "fleet16.example.our-org.tld",
+                "fleet19.example.our-org.tld",
+            ],
+        )
@@ -351,7 +351,9 @@ class RemotePowerDeviceFetchNetboxViewTest(RemotePowerDeviceViewTestCase):
         )
         response = self.client.get(url)
         assert response.status_code == 302
-        assert SingleTask.objects.filter(name="NetboxFetchRemotePowerDevice").exists()
+        assert SingleTask.objects.filter(
+            name="NetboxFetchFullRemotePowerDevice"
+        ).exists()
 
     def test_superuser_get_when_not_synced_does_not_queue_task(self) -> None:
         assert self.remotepowerdevice.netbox_id == 0
@@ -363,7 +365,7 @@ class RemotePowerDeviceFetchNetboxViewTest(RemotePowerDeviceViewTestCase):
         response = self.client.get(url)
         assert response.status_code == 302
         assert not SingleTask.objects.filter(
-            name="NetboxFetchRemotePowerDevice"
+            name="NetboxFetchFullRemotePowerDevice"
         ).exists()
 
 
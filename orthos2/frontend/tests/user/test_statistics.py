@@ -1,7 +1,10 @@
+import datetime
+
 from django.urls import reverse  # type: ignore
+from django.utils import timezone
 from django_webtest import WebTest  # type: ignore
 
-from orthos2.data.models import Domain
+from orthos2.data.models import Domain, StatisticsSnapshot
 from orthos2.data.models.serverconfig import ServerConfig
 from orthos2.frontend.views.statistics import _domain_color
 
@@ -40,6 +43,27 @@ class Statistics(WebTest):
 
         self.assertEqual(first["domains"]["colors"], second["domains"]["colors"])
 
+    def test_statistics_read_snapshot(self) -> None:
+        """The page shows the snapshot of today and the trend of the previous days."""
+        today = timezone.localdate()
+        StatisticsSnapshot.objects.create(
+            date=today - datetime.timedelta(days=1), free=3, reserved=4
+        )
+        StatisticsSnapshot.objects.create(
+            date=today,
+            total=42,
+            architectures=[
+                {"name": "x86_64", "total": 40, "free": 30, "login": 20, "infinite": 1}
+            ],
+        )
+
+        data = self.app.get(reverse("frontend:statistics"), user="user").context["data"]  # type: ignore
+
+        self.assertEqual(data["total"], 42)
+        self.assertEqual(data["matrix"][0], [40, 40])
+        self.assertEqual(data["trend"]["free"], [3, 0])
+        self.assertEqual(data["trend"]["reserved"], [4, 0])
+
 
 class DomainColorTests(WebTest):
 
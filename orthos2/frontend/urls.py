@@ -334,6 +334,11 @@ urlpatterns = [
         name="delete_token",
     ),
     re_path(r"^statistics$", views.statistics, name="statistics"),
+    re_path(
+        r"^ajax/machines/events$",
+        views.ajax.machine_events,
+        name="ajax_machine_events",
+    ),
     re_path(
         r"^ajax/machine/(?P<machine_id>[0-9]+)/annotation/add",
         views.ajax.annotation,
@@ -2,7 +2,13 @@
 This module contains all Django frontend views. For convenience, they are all reexported.
 """
 
-from .ajax import annotation, powercycle, virtualization_delete, virtualization_list
+from .ajax import (
+    annotation,
+    machine_events,
+    powercycle,
+    virtualization_delete,
+    virtualization_list,
+)
 from .ansible_results import (
     AnsibleResultListView,
     ansible_result_apply,
@@ -201,6 +207,7 @@ from .users import (
 
 __all__ = [
     "annotation",
+    "machine_events",
     "powercycle",
     "virtualization_list",
     "virtualization_delete",
@@ -1,14 +1,22 @@
 import logging
 from typing import TYPE_CHECKING, Any, Dict, List
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
 from django.http import HttpRequest, JsonResponse
 from django.template.defaultfilters import urlize
 from django.views.decorators.http import require_POST
 
-from orthos2.data.models import Annotation, Machine, RemotePower
+from orthos2.data.models import Annotation, Machine, MachineEvent, RemotePower
 from orthos2.frontend.decorators import check_permissions
-from orthos2.frontend.templatetags.tags import vm_record
+from orthos2.frontend.templatetags.tags import (
+    status_ipv4,
+    status_ipv6,
+    status_login,
+    status_ssh,
+    vm_record,
+)
 
 if TYPE_CHECKING:
     from orthos2.types import AuthenticatedHttpRequest
@@ -161,3 +169,66 @@ def virtualization_delete(request: HttpRequest, host_id: int) -> JsonResponse:
     except Exception as e:
         logger.exception(e)
         return JsonResponse({"type": "status", "cls": "danger", "message": str(e)})
+
+
+# maximum number of machines one poll can follow (a full machine list page)
+EVENT_POLL_MAX_MACHINES = 500
+
+STATUS_CELLS = {
+    "ipv4": status_ipv4,
+    "ipv6": status_ipv6,
+    "ssh": status_ssh,
+    "login": status_login,
+}
+
+
+def format_event(event: MachineEvent) -> Dict[str, Any]:
+    """Return the event as dictionary; status events carry the rendered status cells."""
+    data: Dict[str, Any] = dict(event.data, machine=event.machine_id)  # type: ignore
+    if event.kind == MachineEvent.Kind.STATUS:
+        machine = Machine(
+            **{field: event.data[field] for field in MachineEvent.STATUS_FIELDS}
+        )
+        data["cells"] = {name: cell(machine) for name, cell in STATUS_CELLS.items()}
+
+    return {"id": event.pk, "kind": event.kind, "data": data}
+
+
+@login_required
+def machine_events(request: HttpRequest) -> JsonResponse:
+    """
+    Return the status, reservation, power and task events of the given machines.
+
+    Open pages poll the events of their machines (`?machine=<id>&machine=<id>...&since=<id>`)
+    every `EVENT_POLL_INTERVAL` seconds and update in place instead of getting reloaded. The
+    request is answered at once with the events after `since`, which is a single primary key
+    range scan; without `since` it only returns the ID to start the next poll from.
+    """
+    machine_ids = [
+        int(machine_id)
+        for machine_id in request.GET.getlist("machine")
+        if machine_id.isdigit()
+    ][:EVENT_POLL_MAX_MACHINES]
+
+    since = request.GET.get("since", "")
+    if since.isdigit():
+        last_id = int(since)
+        events = [
+            format_event(event) for event in MachineEvent.since(last_id, machine_ids)
+        ]
+        if events:
+            last_id = events[-1]["id"]
+    else:
+        last_id = MachineEvent.get_last_id()
+        events = []
+
+    response = JsonResponse(
+        {
+            "last_id": last_id,
+            "interval": settings.EVENT_POLL_INTERVAL,
+            "events": events,
+        },
+        encoder=DjangoJSONEncoder,
+    )
+    response["Cache-Control"] = "no-cache"
+    return response
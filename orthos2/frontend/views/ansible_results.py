@@ -10,7 +10,7 @@ from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import AnonymousUser
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import QuerySet
+from django.db.models import F, QuerySet
 from django.http import (
     Http404,
     HttpRequest,
@@ -51,8 +51,15 @@ class AnsibleResultListView(ListView):  # type: ignore
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self) -> QuerySet[AnsibleScanResult]:
-        """Return filtered queryset based on query parameters."""
-        queryset = AnsibleScanResult.objects.select_related("machine").all()
+        """
+        Return filtered queryset based on query parameters.
+
+        Only the summary of each scan is loaded; `facts_raw` and the machine are not needed
+        for the list.
+        """
+        queryset = AnsibleScanResult.objects.only(
+            *AnsibleScanResult.SUMMARY_FIELDS
+        ).annotate(machine_fqdn=F("machine__fqdn"))
 
         # Filter by machine if specified
         machine_id = self.request.GET.get("machine_id")
@@ -111,7 +118,7 @@ def ansible_result_detail(request: HttpRequest, pk: int) -> HttpResponse:
 @require_POST
 def ansible_result_delete(request: HttpRequest, pk: int) -> HttpResponseRedirect:
     """Delete a single Ansible scan result."""
-    result = get_object_or_404(AnsibleScanResult, pk=pk)
+    result = get_object_or_404(AnsibleScanResult.objects.defer("facts_raw"), pk=pk)
     machine_fqdn = result.machine.fqdn if result.machine else "unknown"
 
     result.delete()
@@ -184,7 +191,9 @@ def machine_ansible_results(request: HttpRequest, id: int) -> HttpResponse:
         raise Http404("Machine does not exist")
 
     # Get all scan results for this machine
-    results = machine.ansible_scan_results.all().order_by("-run_date")
+    results = machine.ansible_scan_results.only(  # type: ignore
+        *AnsibleScanResult.SUMMARY_FIELDS
+    ).order_by("-run_date")
 
     # Paginate results
     paginator = Paginator(results, 20)
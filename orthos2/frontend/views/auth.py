@@ -155,7 +155,7 @@ def login(
     }
     context.update(extra_context)
 
-    welcome_message = ServerConfig.get_server_config_manager().by_key(
+    welcome_message = ServerConfig.get_server_config_manager().cached_by_key(
         "orthos.web.welcomemessage", "Come in, reserve and play..."
     )
 
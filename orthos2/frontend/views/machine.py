@@ -5,6 +5,7 @@ All views that are related to "/machine".
 import logging
 from typing import TYPE_CHECKING, Any, Dict, Set, Union
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied, ValidationError
@@ -75,14 +76,34 @@ def _collect_cobbler_diff(host: Machine) -> dict[str, Set[str]]:
     return result
 
 
+def get_inventory_machine(id: int) -> Machine:
+    """
+    Return the machine without its inventory dumps.
+
+    The inventory tabs are cached (see `get_inventory_context()`), the dumps get loaded on
+    demand if the cached tab is outdated.
+    """
+    return Machine.objects.defer(*Machine.INVENTORY_FIELDS).get(pk=id)
+
+
+def get_inventory_context(machine: Machine, title: str) -> Dict[str, Any]:
+    """Return the context of an inventory tab including the key of its cached fragment."""
+    return {
+        "machine": machine,
+        "title": title,
+        "inventory_version": machine.get_inventory_version(),
+        "fragment_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
+    }
+
+
 @login_required
 def pci(request: HttpRequest, id: int) -> HttpResponse:
     try:
-        machine = Machine.objects.get(pk=id)
+        machine = get_inventory_machine(id)
         return render(
             request,
             "frontend/machines/detail/pci.html",
-            {"machine": machine, "title": "lspci"},
+            get_inventory_context(machine, "lspci"),
         )
     except Machine.DoesNotExist:
         raise Http404("Machine does not exist")
@@ -91,11 +112,11 @@ def pci(request: HttpRequest, id: int) -> HttpResponse:
 @login_required
 def cpu(request: HttpRequest, id: int) -> HttpResponse:
     try:
-        machine = Machine.objects.get(pk=id)
+        machine = get_inventory_machine(id)
         return render(
             request,
             "frontend/machines/detail/cpu.html",
-            {"machine": machine, "title": "CPU"},
+            get_inventory_context(machine, "CPU"),
         )
     except Machine.DoesNotExist:
         raise Http404("Machine does not exist")
@@ -104,11 +125,11 @@ def cpu(request: HttpRequest, id: int) -> HttpResponse:
 @login_required
 def networkinterfaces(request: HttpRequest, id: int) -> HttpResponse:
     try:
-        machine = Machine.objects.get(pk=id)
+        machine = get_inventory_machine(id)
         return render(
             request,
             "frontend/machines/detail/networkinterfaces.html",
-            {"machine": machine, "title": "Network Interfaces"},
+            get_inventory_context(machine, "Network Interfaces"),
         )
     except Machine.DoesNotExist:
         raise Http404("Machine does not exist")
@@ -143,11 +164,11 @@ def remotepower(request: HttpRequest, id: int) -> HttpResponse:
 @login_required
 def installations(request: HttpRequest, id: int) -> HttpResponse:
     try:
-        machine = Machine.objects.get(pk=id)
+        machine = get_inventory_machine(id)
         return render(
             request,
             "frontend/machines/detail/installations.html",
-            {"machine": machine, "title": "Installations"},
+            get_inventory_context(machine, "Installations"),
         )
     except Machine.DoesNotExist:
         raise Http404("Machine does not exist")
@@ -156,11 +177,11 @@ def installations(request: HttpRequest, id: int) -> HttpResponse:
 @login_required
 def usb(request: HttpRequest, id: int) -> HttpResponse:
     try:
-        machine = Machine.objects.get(pk=id)
+        machine = get_inventory_machine(id)
         return render(
             request,
             "frontend/machines/detail/usb.html",
-            {"machine": machine, "title": "USB"},
+            get_inventory_context(machine, "USB"),
         )
     except Machine.DoesNotExist:
         raise Http404("Machine does not exist")
@@ -169,11 +190,11 @@ def usb(request: HttpRequest, id: int) -> HttpResponse:
 @login_required
 def scsi(request: HttpRequest, id: int) -> HttpResponse:
     try:
-        machine = Machine.objects.get(pk=id)
+        machine = get_inventory_machine(id)
         return render(
             request,
             "frontend/machines/detail/scsi.html",
-            {"machine": machine, "title": "SCSI"},
+            get_inventory_context(machine, "SCSI"),
         )
     except Machine.DoesNotExist:
         raise Http404("Machine does not exist")
@@ -248,11 +269,11 @@ def virtualization_add(
 @login_required
 def misc(request: HttpRequest, id: int) -> HttpResponse:
     try:
-        machine = Machine.objects.get(pk=id)
+        machine = get_inventory_machine(id)
         return render(
             request,
             "frontend/machines/detail/miscellaneous.html",
-            {"machine": machine, "title": "Miscellaneous"},
+            get_inventory_context(machine, "Miscellaneous"),
         )
     except Machine.DoesNotExist:
         raise Http404("Machine does not exist")
@@ -2,20 +2,91 @@
 All views that are under "/machines".
 """
 
-from typing import Any, Dict, List
+import hashlib
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import AnonymousUser
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Q, QuerySet
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Aggregate, Count, OuterRef, Q, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.http import HttpRequest, HttpResponse, HttpResponseBase
 from django.shortcuts import redirect, render  # type: ignore
 from django.utils.decorators import method_decorator  # type: ignore
+from django.utils.functional import cached_property
 from django.views.generic import ListView
 
-from orthos2.data.models import Architecture, Domain, Machine
+from orthos2.data.models import Installation, Machine, MachineSearchIndex
 from orthos2.frontend.forms.search import SearchForm
+from orthos2.utils.cache import get_or_set
+from orthos2.utils.choices import get_architectures, get_domains
+
+if TYPE_CHECKING:
+    from django.core.paginator import _SupportsPagination
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator which caches the number of objects for a short time.
+
+    Counting the machines of a filtered list runs the filter joins over the whole table, but
+    the count rarely changes while somebody browses through the pages. The cached counts get
+    dropped when machines change (cache namespace "machines").
+    """
+
+    COUNT_TIMEOUT = 60
+
+    @cached_property
+    def count(self) -> int:
+        try:
+            query = str(self.object_list.query)  # type: ignore
+        except (AttributeError, EmptyResultSet):
+            return super(CachedCountPaginator, self).count
+
+        return get_or_set(
+            ["machines"],
+            "paginator-count-{}".format(
+                hashlib.sha256(query.encode("utf-8")).hexdigest()
+            ),
+            lambda: super(CachedCountPaginator, self).count,
+            self.COUNT_TIMEOUT,
+        )
+
+    def page(self, number: Any) -> Page:
+        """
+        Return the page `number`.
+
+        Unlike `Paginator.page()`, the page is not cut off at the (possibly outdated) count, so
+        recently added machines don't go missing on the last page.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        return Page(self.object_list[bottom:top], number, self)
+
+
+class KeysetPage(Page):
+    """A page which is addressed by the machines before or after it instead of a number."""
+
+    def __init__(
+        self,
+        object_list: List[Machine],
+        paginator: Paginator,
+        has_previous: bool,
+        has_next: bool,
+    ) -> None:
+        super(KeysetPage, self).__init__(object_list, 0, paginator)
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def has_next(self) -> bool:
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self) -> bool:
+        return self._has_previous and bool(self.object_list)
 
 
 class MachineListView(ListView):  # type: ignore
@@ -23,6 +94,42 @@ class MachineListView(ListView):  # type: ignore
     template_name = "frontend/machines/list.html"
     paginate_by = 50
 
+    # `Machine` columns shown in "frontend/machines/list.html"
+    LIST_FIELDS = [
+        "fqdn",
+        "administrative",
+        "vm_dedicated_host",
+        "cpu_cores",
+        "cpu_model",
+        "ram_amount",
+        "check_connectivity",
+        "status_ipv4",
+        "status_ipv6",
+        "status_ssh",
+        "status_login",
+        # needed by `Machine.__init__()`
+        "virt_api_int",
+        # groups the guests under their VM host in the "Virtual Machines" list
+        "hypervisor",
+    ]
+
+    # sort keys which can be requested via `?order_by=<key>` and the fields they sort by
+    ORDERINGS = {
+        "fqdn": "fqdn",
+        "installations__distribution": "active_distribution",
+        "reserved_by__username": "reserved_by__username",
+        "cpu_cores": "cpu_cores",
+        "ram_amount": "ram_amount",
+    }
+
+    # non-nullable sort fields which support keyset pagination
+    KEYSET_ORDERINGS = {"fqdn", "cpu_cores", "ram_amount"}
+
+    # result sets with more machines than this get navigated by keyset instead of page numbers
+    KEYSET_THRESHOLD = 1000
+
+    paginator_class = CachedCountPaginator
+
     # login is required for all machine lists
     @method_decorator(login_required)
     def dispatch(
@@ -38,9 +145,6 @@ class MachineListView(ListView):  # type: ignore
         """
         filters: List[Q] = []
 
-        if self.request.GET.get("query"):
-            filters.append(Q(fqdn__contains=self.request.GET.get("query")))
-
         if self.request.GET.get("arch"):
             filters.append(Q(architecture__name=self.request.GET.get("arch")))
 
@@ -68,27 +172,122 @@ class MachineListView(ListView):  # type: ignore
             *filters
         )
 
-        return machines
+        if self.request.GET.get("query"):
+            machines = MachineSearchIndex.search(
+                machines, self.request.GET.get("query", "")
+            )
+
+        return self.prefetch(machines).order_by(*self.get_ordering())
 
-    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
-        context = super(MachineListView, self).get_context_data(**kwargs)  # type: ignore
-        context["machine_list"] = self.object_list  # type: ignore
-
-        order_by = self.request.GET.get("order_by", None)
-        order_direction = self.request.GET.get("order_direction", None)
-        if order_by and order_direction in {"asc", "desc"}:
-            context["machine_list"] = self.object_list.order_by(  # type: ignore
-                "{}".format(order_by)
-                if order_direction == "asc"
-                else "-{}".format(order_by)
+    @classmethod
+    def prefetch(cls, queryset: QuerySet[Machine]) -> QuerySet[Machine]:
+        """
+        Return `queryset` restricted to the listed columns with all displayed relations loaded
+        in advance, so that rendering a page takes a fixed number of queries.
+        """
+        active_distribution = Installation.objects.filter(
+            machine=OuterRef("pk"), active=True
+        ).values("distribution")[:1]
+
+        return (
+            queryset.select_related(
+                "system",
+                "reserved_by",
+                "bmc",
+                "serialconsole__stype",
+                "remotepower__fence_agent",
+            )
+            .only(
+                *cls.LIST_FIELDS,
+                "system__administrative",
+                "system__virtual",
+                "reserved_by__username",
+                "bmc__fqdn",
+                "serialconsole__stype__name",
+                "remotepower__fence_agent__device",
             )
-            # hit the DB to check order_by fields and restore the queryset if something fails
-            try:
-                context["machine_list"] = list(context["machine_list"])  # type: ignore
-            except KeyError:
-                context["machine_list"] = self.object_list  # type: ignore
+            .annotate(active_distribution=Subquery(active_distribution))
+        )
+
+    def get_order_field(self) -> Tuple[str, bool]:
+        """
+        Return the validated sort key and whether the order is descending.
+
+        Unknown sort keys fall back to the best search matches first for searches and to the
+        order by FQDN otherwise.
+        """
+        order_by = self.request.GET.get("order_by", "")
+        order_direction = self.request.GET.get("order_direction", "")
+        if order_by in self.ORDERINGS and order_direction in {"asc", "desc"}:
+            return self.ORDERINGS[order_by], order_direction == "desc"
+        if self.request.GET.get("query"):
+            return "search_rank", True
+        return "fqdn", False
+
+    def get_ordering(self) -> List[str]:
+        """Return the `order_by()` arguments; the primary key makes the order total."""
+        field, descending = self.get_order_field()
+        prefix = "-" if descending else ""
+        return [prefix + field, prefix + "pk"]
+
+    def get_keyset_page(
+        self, paginator: Paginator, page_size: int
+    ) -> Optional["KeysetPage"]:
+        """
+        Return the page right after (`?after=<pk>`) or right before (`?before=<pk>`) the given
+        machine in the current order.
+
+        Keyset pages filter on the sort key instead of using an offset, so any page of a large
+        result set takes the same time to load. Returns `None` if no (valid) cursor is given or
+        the current order doesn't support it.
+        """
+        field, descending = self.get_order_field()
+        after = self.request.GET.get("after", "")
+        before = self.request.GET.get("before", "")
+        cursor = after or before
+
+        if field not in self.KEYSET_ORDERINGS or not cursor.isdigit():
+            return None
+
+        value = Machine.objects.filter(pk=cursor).values_list(field, flat=True).first()
+        if value is None:
+            return None
+
+        forward = bool(after)
+        lookup = "gt" if forward != descending else "lt"
+        machines = paginator.object_list.filter(  # type: ignore
+            Q(**{"{}__{}".format(field, lookup): value})
+            | Q(**{field: value, "pk__{}".format(lookup): cursor})
+        )
+        if not forward:
+            machines = machines.reverse()
+
+        object_list = list(machines[: page_size + 1])
+        has_more = len(object_list) > page_size
+        object_list = object_list[:page_size]
+        if not forward:
+            object_list.reverse()
+
+        return KeysetPage(
+            object_list,
+            paginator,
+            has_previous=has_more if not forward else True,
+            has_next=has_more if forward else True,
+        )
+
+    def paginate_queryset(
+        self, queryset: "_SupportsPagination[Machine]", page_size: int
+    ) -> Tuple[Paginator, Page, List[Machine], bool]:
+        """
+        Paginate the machines by keyset if a cursor is given, by page number otherwise.
+
+        Invalid page numbers show the first or the last page instead of raising a 404.
+        """
+        paginator = self.get_paginator(queryset, page_size)
 
-        paginator = Paginator(context["machine_list"], self.paginate_by)  # type: ignore
+        machines = self.get_keyset_page(paginator, page_size)
+        if machines is not None:
+            return paginator, machines, machines.object_list, True  # type: ignore
 
         page = self.request.GET.get("page", 1)
 
@@ -99,10 +298,20 @@ class MachineListView(ListView):  # type: ignore
         except EmptyPage:
             machines = paginator.page(paginator.num_pages)  # type: ignore
 
-        context["architectures"] = Architecture.objects.all()
-        context["domains"] = Domain.objects.all()
-        context["machines"] = machines
-        context["paginator"] = paginator
+        return paginator, machines, machines.object_list, machines.has_other_pages()  # type: ignore
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super(MachineListView, self).get_context_data(**kwargs)  # type: ignore
+        field, _descending = self.get_order_field()
+
+        context["search_hint"] = "Full Text"
+        context["architectures"] = get_architectures()
+        context["domains"] = get_domains()
+        context["machines"] = context["page_obj"]
+        context["keyset"] = (
+            field in self.KEYSET_ORDERINGS
+            and context["paginator"].count > self.KEYSET_THRESHOLD
+        )
         return context
 
 
@@ -189,9 +398,43 @@ class VirtualMachineListView(MachineListView):
     """`Virtual Machines` list view."""
 
     def get_queryset(self) -> QuerySet["Machine"]:
-        """Filter machines which are capable to run VMs and which are dedicated VM hosts."""
+        """
+        Filter machines which are capable to run VMs and which are dedicated VM hosts.
+
+        The hosts get annotated with the number of their guests and the RAM and CPU cores
+        allocated to them.
+        """
         machines = super(VirtualMachineListView, self).get_queryset()
-        return machines.filter(vm_dedicated_host=True)
+        return machines.filter(vm_dedicated_host=True).annotate(
+            guest_count=self.guest_aggregate(Count("pk")),
+            guest_ram_amount=self.guest_aggregate(Sum("ram_amount")),
+            guest_cpu_cores=self.guest_aggregate(Sum("cpu_cores")),
+        )
+
+    @staticmethod
+    def guest_aggregate(aggregate: Aggregate) -> Coalesce:
+        """Return `aggregate` over the guests of the machine as subquery."""
+        guests = (
+            Machine.objects.filter(hypervisor=OuterRef("pk"))
+            .order_by()
+            .values("hypervisor")
+            .annotate(value=aggregate)
+            .values("value")
+        )
+        return Coalesce(Subquery(guests), 0)
+
+    def get_guests(self, vm_hosts: List[Machine]) -> Dict[int, List[Machine]]:
+        """Return the guests of all `vm_hosts` (with one query) by VM host ID."""
+        host_ids = [vm_host.pk for vm_host in vm_hosts if not vm_host.system.virtual]
+        guests: Dict[int, List[Machine]] = defaultdict(list)
+        if not host_ids:
+            return guests
+
+        for guest in self.prefetch(
+            Machine.objects.filter(hypervisor_id__in=host_ids)
+        ).order_by("hypervisor_id", "fqdn"):
+            guests[guest.hypervisor_id].append(guest)  # type: ignore
+        return guests
 
     def render_to_response(
         self, context: Dict[str, Any], **response_kwargs: Dict[str, Any]
@@ -200,15 +443,14 @@ class VirtualMachineListView(MachineListView):
         context["title"] = "Virtual Machines"
         context["view"] = "virtual"
 
-        vm_hosts = context["machines"]
+        vm_hosts = list(context["machines"])
+        guests = self.get_guests(vm_hosts)
         machines: List[Machine] = []
 
-        # collect VMs of respective VM host
+        # list the VMs right after their respective VM host
         for vm_host in vm_hosts:
             machines.append(vm_host)
-            vm_machines = list(vm_host.get_virtual_machines())
-            if vm_machines:
-                machines.extend(vm_machines)
+            machines.extend(guests.get(vm_host.pk, []))
 
         context["machines"] = machines
 
@@ -229,7 +471,9 @@ def machine_search(request: HttpRequest) -> HttpResponse:
             if isinstance(request.user, AnonymousUser):
                 messages.error(request, "You are not allowed to perform this action.")
                 return redirect("frontend:login")
-            machines = Machine.search.form(form.cleaned_data, request.user)  # type: ignore
+            machines = MachineListView.prefetch(
+                Machine.search.form(form.cleaned_data, request.user)  # type: ignore
+            )
             return render(
                 request,
                 "frontend/machines/list.html",
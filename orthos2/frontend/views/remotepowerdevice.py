@@ -311,7 +311,7 @@ def remotepowerdevice_fetch_netbox(
 
     try:
         TaskManager.add(
-            tasks.NetboxFetchRemotePowerDevice(requested_remotepowerdevice.pk)
+            tasks.NetboxFetchFullRemotePowerDevice(requested_remotepowerdevice.pk)
         )
         messages.info(
             request,
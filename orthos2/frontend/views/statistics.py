@@ -7,18 +7,20 @@ import hashlib
 from typing import List
 
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 from django.utils import timezone
 
-from orthos2.data.models import Architecture, Domain, Machine, ReservationHistory
+from orthos2.data.models import Machine, ReservationHistory, StatisticsSnapshot
 
 # Restricting to these hex digits keeps colors mid-brightness (matches the
 # previous getRandomColor()'s '789ABCD' palette) instead of ranging into
 # near-black/near-white, which would be hard to tell apart on the chart.
 _COLOR_DIGITS = "789ABCD"
 
+# Number of days shown in the trend chart.
+TREND_DAYS = 30
+
 
 def _domain_color(name: str) -> str:
     """Deterministic per-domain chart color, stable across requests/reloads."""
@@ -28,28 +30,16 @@ def _domain_color(name: str) -> str:
 
 @login_required
 def statistics(request: HttpRequest) -> HttpResponse:
-    total = Machine.objects.all().count()
-
-    status_ping = Machine.objects.filter(
-        Q(status_ipv4=Machine.StatusIP.REACHABLE)
-        | Q(status_ipv4=Machine.StatusIP.CONFIRMED)
-        | Q(status_ipv6=Machine.StatusIP.REACHABLE)
-        | Q(status_ipv6=Machine.StatusIP.CONFIRMED)
-    ).count()
-    status_ssh = Machine.objects.filter(status_ssh=True).count()
-    status_login = Machine.objects.filter(status_login=True).count()
-
-    check_ping = Machine.objects.filter(
-        check_connectivity__gte=Machine.Connectivity.PING
-    ).count()
+    today = timezone.localdate()
 
-    check_ssh = Machine.objects.filter(
-        check_connectivity__gte=Machine.Connectivity.SSH
-    ).count()
+    # the numbers get counted once a day by `DailyStatisticsSnapshot`
+    snapshot = StatisticsSnapshot.objects.filter(date=today).first()
+    if snapshot is None:
+        snapshot = StatisticsSnapshot.take()
 
-    check_login = Machine.objects.filter(
-        check_connectivity__gte=Machine.Connectivity.ALL
-    ).count()
+    history = StatisticsSnapshot.objects.filter(
+        date__gt=today - datetime.timedelta(days=TREND_DAYS)
+    ).order_by("date")
 
     released_reservations = ReservationHistory.objects.filter(  # type: ignore
         reserved_until__gt=timezone.make_aware(
@@ -59,7 +49,7 @@ def statistics(request: HttpRequest) -> HttpResponse:
         reserved_until__lte=timezone.make_aware(
             datetime.datetime.today(), timezone.get_default_timezone()
         ),
-    )
+    ).select_related("machine")
 
     reserved_machines = Machine.objects.filter(
         reserved_at__gt=timezone.make_aware(
@@ -69,40 +59,45 @@ def statistics(request: HttpRequest) -> HttpResponse:
         reserved_at__lte=timezone.make_aware(
             datetime.datetime.today(), timezone.get_default_timezone()
         ),
-    )
-
-    matrix: List[List[int]] = [[], [], [], []]
+    ).select_related("reserved_by")
 
-    for architecture in Architecture.objects.all():
-        matrix[0].append(architecture.machine_set.count())
-        matrix[1].append(architecture.machine_set.filter(reserved_by=None).count())
-        matrix[2].append(architecture.machine_set.filter(status_login=True).count())
-        matrix[3].append(
-            architecture.machine_set.filter(reserved_permanently=True).count()
-        )
+    matrix: List[List[int]] = [
+        [architecture[key] for architecture in snapshot.architectures]
+        for key in ("total", "free", "login", "infinite")
+    ]
 
     matrix[0].append(sum(matrix[0]))
     matrix[1].append(sum(matrix[1]))
     matrix[2].append(sum(matrix[2]))
     matrix[3].append(sum(matrix[3]))
 
+    total = snapshot.total
+
     data = {
         "total": total,
         "matrix": matrix,
         "status": {
             "labels": ["Ping", "SSH", "Login"],
-            "values1": [check_ping, check_ssh, check_login],
-            "values2": [status_ping, status_ssh, status_login],
+            "values1": [snapshot.check_ping, snapshot.check_ssh, snapshot.check_login],
+            "values2": [
+                snapshot.status_ping,
+                snapshot.status_ssh,
+                snapshot.status_login,
+            ],
             "max": total if total % 100 == 0 else total - (total % 100) + 100,
         },
         "domains": {
-            "labels": list(Domain.objects.all().values_list("name", flat=True)),
-            "values": [domain.machine_set.count() for domain in Domain.objects.all()],
-            "colors": [
-                _domain_color(name)
-                for name in Domain.objects.all().values_list("name", flat=True)
-            ],
+            "labels": [domain["name"] for domain in snapshot.domains],
+            "values": [domain["total"] for domain in snapshot.domains],
+            "colors": [_domain_color(domain["name"]) for domain in snapshot.domains],
         },
+        "trend": {
+            "labels": [day.date.isoformat() for day in history],
+            "free": [day.free for day in history],
+            "reserved": [day.reserved for day in history],
+            "reachable": [day.status_ping for day in history],
+        },
+        "updated": snapshot.updated,
         "released_reservations": released_reservations,
         "reserved_machines": reserved_machines,
     }
@@ -111,7 +106,9 @@ def statistics(request: HttpRequest) -> HttpResponse:
         request,
         "frontend/machines/statistics.html",
         {
-            "architectures": Architecture.objects.all(),
+            "architectures": [
+                architecture["name"] for architecture in snapshot.architectures
+            ],
             "data": data,
             "title": "Statistics",
         },
@@ -17,6 +17,7 @@ import sys
 from typing import Any, Callable, Optional
 
 from django.contrib.messages import constants as messages
+from django.core.exceptions import ImproperlyConfigured
 
 
 # START: Taken from NetBox Docker Repository
@@ -299,6 +300,79 @@ DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 NETBOX_URL = os.environ.get("ORTHOS2_NETBOX_URL", "")
 NETBOX_TOKEN = os.environ.get("ORTHOS2_NETBOX_TOKEN", "")
 NETBOX_AUTH_SCHEME = os.environ.get("ORTHOS2_NETBOX_AUTH_SCHEME", "Bearer")
+# Seconds until a NetBox request times out, retries of requests NetBox was too busy for (waiting
+# NETBOX_BACKOFF seconds, doubled for each retry) and threads fetching objects at once. The
+# requests per second of all threads are limited by the server config
+# "netbox.ratelimit.requestspersecond".
+NETBOX_TIMEOUT = float(os.environ.get("ORTHOS2_NETBOX_TIMEOUT", 30))
+NETBOX_RETRIES = int(os.environ.get("ORTHOS2_NETBOX_RETRIES", 3))
+NETBOX_BACKOFF = float(os.environ.get("ORTHOS2_NETBOX_BACKOFF", 0.5))
+NETBOX_WORKERS = int(os.environ.get("ORTHOS2_NETBOX_WORKERS", 4))
+# The daily NetBox fetch only fetches objects changed in NetBox since the last fetch; all objects
+# are fetched again every NETBOX_FULL_SYNC_INTERVAL days.
+NETBOX_FULL_SYNC_INTERVAL = int(os.environ.get("ORTHOS2_NETBOX_FULL_SYNC_INTERVAL", 7))
+# Secret of the NetBox webhooks sent to /api/netbox/webhook, which queue fetching the objects
+# changed in NetBox. Webhooks are refused while it is empty.
+NETBOX_WEBHOOK_SECRET = os.environ.get("ORTHOS2_NETBOX_WEBHOOK_SECRET", "")
+
+# Cache for the rendered inventory tabs of the machine detail page: "locmem" (per process) or
+# "file" (shared by all processes of the host, stored in ORTHOS2_FRAGMENT_CACHE_DIR).
+FRAGMENT_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "orthos2-fragments",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "ORTHOS2_FRAGMENT_CACHE_DIR", "/var/cache/orthos2/fragments"
+        ),
+    },
+}
+FRAGMENT_CACHE_TIMEOUT = _environ_get_and_map(
+    "ORTHOS2_FRAGMENT_CACHE_TIMEOUT", "86400", _AS_INT
+)
+
+# Shared cache: ORTHOS2_CACHE_BACKEND is "locmem" (per process), "file" (ORTHOS2_CACHE_LOCATION
+# is a directory), "redis" (ORTHOS2_CACHE_LOCATION is a URL like redis://cache.orthos2.test:6379/0,
+# needs the "redis" package) or "memcached" (host:port, needs the "pymemcache" package).
+# Cached values get invalidated by namespace when models change (see `orthos2.utils.cache`);
+# with "locmem", other processes only notice changes after ORTHOS2_CACHE_TIMEOUT seconds.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+    "dummy": "django.core.cache.backends.dummy.DummyCache",
+}
+CACHE_BACKEND = os.environ.get("ORTHOS2_CACHE_BACKEND", "locmem")
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        "ORTHOS2_CACHE_BACKEND must be one of {}, not '{}'".format(
+            ", ".join(CACHE_BACKENDS), CACHE_BACKEND
+        )
+    )
+CACHE_LOCATION = os.environ.get(
+    "ORTHOS2_CACHE_LOCATION",
+    "/var/cache/orthos2/default" if CACHE_BACKEND == "file" else "",
+)
+CACHE_TIMEOUT = _environ_get_and_map("ORTHOS2_CACHE_TIMEOUT", "300", _AS_INT)
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": CACHE_LOCATION,
+        "TIMEOUT": CACHE_TIMEOUT,
+        "KEY_PREFIX": "orthos2",
+    },
+    "fragments": FRAGMENT_CACHE_BACKENDS[
+        os.environ.get("ORTHOS2_FRAGMENT_CACHE", "locmem")
+    ],
+}
+
+# Machine events: open machine pages poll the events of their machines every
+# EVENT_POLL_INTERVAL seconds with short requests, which are answered at once.
+EVENT_POLL_INTERVAL = _environ_get_and_map("ORTHOS2_EVENT_POLL_INTERVAL", "5", _AS_INT)
 
 # Check for alternative settings file. If this file exists, we use it and evaluate the code.
 # This is intended to be used for production mode.
@@ -11,7 +11,7 @@ from django import db
 from django.db.utils import InterfaceError
 from django.utils import timezone
 
-from orthos2.data.models import ServerConfig
+from orthos2.data.models import MachineEvent, ServerConfig
 from orthos2.taskmanager import Priority
 from orthos2.taskmanager.models import BaseTask, DailyTask, SingleTask
 
@@ -114,6 +114,18 @@ class TaskExecuter(Thread):
         except SingleTask.DoesNotExist:
             logger.exception("Single task not found")
 
+    def publish_task_event(self, task: "Task") -> None:
+        """Tell the open pages of the task's machines that the task has finished."""
+        fqdns = getattr(task, "machines", None) or [getattr(task, "fqdn", None)]
+        fqdns = [fqdn for fqdn in fqdns if isinstance(fqdn, str)]
+        if not fqdns:
+            return
+
+        try:
+            MachineEvent.publish_task(fqdns, task.__class__.__name__)
+        except Exception:
+            logger.exception("Could not publish task event")
+
     def _check_threads(self, running_threads: Dict[str, Tuple[Thread, "Task"]]) -> None:
         for hash, values in list(running_threads.items()):
             thread = values[0]
@@ -122,6 +134,7 @@ class TaskExecuter(Thread):
             if not thread.is_alive():
                 if task.basetask_type == BaseTask.Type.SINGLE:  # type: ignore
                     self.remove_single_task(hash)
+                    self.publish_task_event(task)
                 else:
                     self.reset_daily_task(hash)
                 del running_threads[hash]
@@ -9,14 +9,18 @@ from .daily import (
     DailyCheckForPrimaryNetwork,
     DailyCheckReservationExpirations,
     DailyMachineChecks,
+    DailyMachineEventsCleanup,
     DailyManufacturerDeviceTypeCleanup,
     DailyNetboxFetch,
+    DailyRetentionCleanup,
+    DailyStatisticsSnapshot,
 )
 from .machinetasks import MachineCheck, RegenerateMOTD
 from .netbox import (
     NetboxCleanupComparisionResults,
     NetboxCompareDeviceType,
     NetboxCompareEnclosure,
+    NetboxCompareFleet,
     NetboxCompareFullMachine,
     NetboxCompareManufacturer,
     NetboxCompareRemotePowerDevice,
@@ -27,6 +31,7 @@ from .netbox import (
     NetboxFetchFullEnclosure,
     NetboxFetchFullMachine,
     NetboxFetchFullManufacturer,
+    NetboxFetchFullRemotePowerDevice,
     NetboxFetchMachine,
     NetboxFetchManufacturer,
     NetboxFetchNetworkInterface,
@@ -53,11 +58,15 @@ __all__ = [
     "DailyMachineChecks",
     "DailyManufacturerDeviceTypeCleanup",
     "DailyNetboxFetch",
+    "DailyStatisticsSnapshot",
+    "DailyMachineEventsCleanup",
+    "DailyRetentionCleanup",
     "DeactivateSerialOverLan",
     "MachineCheck",
     "NetboxCleanupComparisionResults",
     "NetboxCompareDeviceType",
     "NetboxCompareEnclosure",
+    "NetboxCompareFleet",
     "NetboxCompareFullMachine",
     "NetboxCompareManufacturer",
     "NetboxCompareRemotePowerDevice",
@@ -68,6 +77,7 @@ __all__ = [
     "NetboxFetchFullDeviceType",
     "NetboxFetchFullEnclosure",
     "NetboxFetchFullManufacturer",
+    "NetboxFetchFullRemotePowerDevice",
     "NetboxFetchRemotePowerDevice",
     "NetboxFetchFullMachine",
     "NetboxFetchMachine",
@@ -108,3 +108,39 @@ class DailyManufacturerDeviceTypeCleanup(Task):
         # Manufacturer only becomes orphaned once all its DeviceTypes are gone.
         DeviceType.objects.filter(machine__isnull=True, enclosure__isnull=True).delete()
         Manufacturer.objects.filter(devicetype__isnull=True).delete()
+
+
+class DailyStatisticsSnapshot(Task):
+    """Store today's machine numbers for the statistics page and its trends."""
+
+    def execute(self) -> None:
+        """
+        Execute the task.
+        """
+        from orthos2.data.models import StatisticsSnapshot
+
+        StatisticsSnapshot.take()
+
+
+class DailyMachineEventsCleanup(Task):
+    """Remove the machine events which were pushed to open pages."""
+
+    def execute(self) -> None:
+        """
+        Execute the task.
+        """
+        from orthos2.data.models import MachineEvent
+
+        MachineEvent.prune()
+
+
+class DailyRetentionCleanup(Task):
+    """Delete the rows of the history tables which their retention policies don't keep."""
+
+    def execute(self) -> None:
+        """
+        Execute the task.
+        """
+        from orthos2.data.retention import apply_policies
+
+        apply_policies()
@@ -4,8 +4,14 @@ This module contains all tasks that need to be performed together with NetBox.
 
 import datetime
 import logging
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Set
 
+import requests
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
 
 from orthos2.data.models import (
     BMC,
@@ -13,45 +19,252 @@ from orthos2.data.models import (
     Enclosure,
     Machine,
     Manufacturer,
+    NetboxOrthosComparisionBatch,
+    NetboxOrthosComparisionFleetRun,
+    NetboxSyncBatch,
+    NetboxSyncState,
     NetworkInterface,
     RemotePowerDevice,
 )
-from orthos2.data.models.netboxorthoscomparision import NetboxOrthosComparisionRun
-from orthos2.taskmanager.models import Task
+from orthos2.data.retention import apply_policies
+from orthos2.taskmanager.models import Task, TaskManager
+from orthos2.utils.netbox import (
+    Netbox,
+    NetboxIndex,
+    NetboxLookup,
+    run_concurrently,
+    sync_session,
+)
 
 logger = logging.getLogger("tasks")
 
 
+class NetboxComparable(Protocol):
+    """Objects compared with NetBox by `NetboxCompareFleet`."""
+
+    def compare_netbox(
+        self,
+        lookup: Optional[NetboxLookup] = None,
+        batch: Optional[NetboxOrthosComparisionBatch] = None,
+    ) -> None:
+        ...
+
+
+def fetch_concurrently(kind: str, objects: Iterable[Any]) -> int:
+    """
+    Call `fetch_netbox()` of the objects in the worker threads of the NetBox client.
+
+    Returns the number of objects which couldn't be fetched.
+    """
+
+    def fetch(obj: Any) -> None:
+        logger.debug('Fetching %s "%s" - Start', kind, obj)
+        obj.fetch_netbox()
+        logger.debug('Fetching %s "%s" - End', kind, obj)
+
+    failures = run_concurrently(fetch, objects)
+    if failures:
+        logger.warning("Fetching %d %s objects from NetBox failed.", failures, kind)
+    return failures
+
+
+def changed_machines(changed: Dict[str, Set[int]], prefix: str = "") -> Q:
+    """Return a filter for the machines whose device or virtual machine changed in NetBox."""
+    return Q(
+        **{
+            prefix + "netbox_id__in": changed.get("device", set()),
+            prefix + "system__virtual": False,
+        }
+    ) | Q(
+        **{
+            prefix + "netbox_id__in": changed.get("virtual_machine", set()),
+            prefix + "system__virtual": True,
+        }
+    )
+
+
+def fetch_changed(
+    object_type: str,
+    objects: "QuerySet[Any]",
+    get_filter: Callable[[Dict[str, Set[int]]], Q],
+    full: bool = False,
+) -> None:
+    """
+    Fetch the objects linked to NetBox objects which changed since the last sync.
+
+    Objects which were never fetched, e.g. newly linked ones, are fetched as well. All objects
+    are fetched if a full sync is due (see `NetboxSyncState`). The watermark of the object type
+    only moves on if all objects could be fetched.
+    """
+    if not objects.exists():
+        logger.info("No %s objects are linked to NetBox.", object_type)
+        return
+    stats = Netbox.get_instance().stats
+    requests_before = stats.snapshot()
+    state, changed = NetboxSyncState.begin(object_type, full)
+    if changed is not None:
+        objects = objects.filter(
+            get_filter(changed) | Q(netbox_last_fetch_attempt__isnull=True)
+        )
+    with sync_session(logger):
+        failures = fetch_concurrently(object_type, objects)
+    stats.log(requests_before)
+    if not failures:
+        state.finish()
+
+
+def enqueue_changed(changed: Dict[str, Set[int]]) -> int:
+    """
+    Add tasks fetching the objects linked to the NetBox objects which changed (see `get_changed_object()`).
+
+    Machines are fetched with their enclosure, BMC and network interfaces, so enclosures are only fetched on their
+    own if none of their machines is. Tasks which are already waiting aren't added again.
+
+    Returns the number of tasks added.
+    """
+    devices = changed.get("device", set())
+    vms = changed.get("virtual_machine", set())
+    machine_ids = list(
+        Machine.objects.filter(changed_machines(changed)).values_list("pk", flat=True)
+    )
+    tasks: List[Task] = [NetboxFetchFullMachine(pk) for pk in machine_ids]
+    tasks.extend(
+        NetboxFetchFullEnclosure(pk)
+        for pk in Enclosure.objects.filter(
+            Q(netbox_id__in=devices, is_virtual=False)
+            | Q(netbox_id__in=vms, is_virtual=True)
+        )
+        .exclude(machine__pk__in=machine_ids)
+        .distinct()
+        .values_list("pk", flat=True)
+    )
+    tasks.extend(
+        NetboxFetchFullRemotePowerDevice(pk)
+        for pk in RemotePowerDevice.objects.filter(netbox_id__in=devices).values_list(
+            "pk", flat=True
+        )
+    )
+    tasks.extend(
+        NetboxFetchFullDeviceType(pk)
+        for pk in DeviceType.objects.filter(
+            netbox_id__in=changed.get("device_type", set())
+        ).values_list("pk", flat=True)
+    )
+    tasks.extend(
+        NetboxFetchFullManufacturer(pk)
+        for pk in Manufacturer.objects.filter(
+            netbox_id__in=changed.get("manufacturer", set())
+        ).values_list("pk", flat=True)
+    )
+    for task in tasks:
+        TaskManager.add(task)
+    return len(tasks)
+
+
 class NetboxFetchEnclosure(Task):
     """
     Fetch information from Netbox API for an enclosure.
     """
 
+    def __init__(self, full: bool = False) -> None:
+        """
+        Constructor to initialize the task.
+        """
+        self.full = full
+
     def execute(self) -> None:
         """
         Executes the task.
         """
         logger.info("Fetching information from Netbox API for all enclosures.")
-        for enclosure in Enclosure.objects.all():
-            logger.debug('Fetching enclosure "%s" - Start', enclosure.name)
-            enclosure.fetch_netbox()
-            logger.debug('Fetching enclosure "%s" - End', enclosure.name)
+        fetch_changed(
+            NetboxSyncState.ObjectType.ENCLOSURE,
+            Enclosure.objects.exclude(netbox_id=0),
+            lambda changed: Q(
+                netbox_id__in=changed.get("device", set())
+                | changed.get("virtual_machine", set())
+            ),
+            self.full,
+        )
 
 
 class NetboxFetchMachine(Task):
     """
     Iterate over all machines and fetch information from Netbox.
+
+    In bulk mode, the devices, virtual machines, interfaces and IP addresses of `BATCH_SIZE`
+    machines are fetched with a few large listings and the machines are synced from those.
+    Only machines changed in NetBox since the last sync or never fetched are fetched, unless a
+    full sync is due or requested. With `batch_writes`, the changes of a batch are written together without the
+    per-object signals, and Cobbler is regenerated once per affected domain (see
+    `NetboxSyncBatch`).
     """
 
+    # machines synced from one `NetboxIndex`
+    BATCH_SIZE = 1000
+
+    def __init__(
+        self, bulk: bool = True, full: bool = False, batch_writes: bool = True
+    ) -> None:
+        """
+        Constructor to initialize the task.
+        """
+        self.bulk = bulk
+        self.full = full
+        self.batch_writes = batch_writes
+
     def execute(self) -> None:
         """
         Executes the task.
         """
         logger.info("Fetching information from Netbox API for all machines.")
-        for machine in Machine.objects.all():
-            logger.debug('Fetching machine "%s" - Start', machine.fqdn)
-            machine.fetch_netbox()
-            logger.debug('Fetching machine "%s" - End', machine.fqdn)
+        machines = Machine.objects.exclude(netbox_id=0).select_related("system")
+        if not self.bulk:
+            fetch_changed(
+                NetboxSyncState.ObjectType.MACHINE,
+                machines,
+                changed_machines,
+                self.full,
+            )
+            return
+
+        if not machines.exists():
+            logger.info("No machines are linked to NetBox.")
+            return
+        netbox_api = Netbox.get_instance()
+        requests_before = netbox_api.stats.snapshot()
+        state, changed = NetboxSyncState.begin(
+            NetboxSyncState.ObjectType.MACHINE, self.full
+        )
+        if changed is not None:
+            machines = machines.filter(
+                changed_machines(changed) | Q(netbox_last_fetch_attempt__isnull=True)
+            )
+
+        machine_list = list(machines.order_by("pk"))
+        failures = 0
+        with sync_session(logger):
+            for start in range(0, len(machine_list), self.BATCH_SIZE):
+                batch = machine_list[start : start + self.BATCH_SIZE]  # noqa: E203
+                index = NetboxIndex.fetch(
+                    netbox_api,
+                    [m.netbox_id for m in batch if not m.system.virtual],
+                    [m.netbox_id for m in batch if m.system.virtual],
+                )
+                writes = NetboxSyncBatch() if self.batch_writes else None
+                for machine in batch:
+                    logger.debug('Syncing machine "%s" - Start', machine.fqdn)
+                    try:
+                        machine.fetch_netbox(index, writes)
+                    except Exception:
+                        logger.exception('Syncing machine "%s" failed', machine.fqdn)
+                        failures += 1
+                    logger.debug('Syncing machine "%s" - End', machine.fqdn)
+                if writes is not None:
+                    writes.write()
+        netbox_api.stats.log(requests_before)
+        if not failures:
+            state.finish()
 
 
 class NetboxFetchBMC(Task):
@@ -59,15 +272,24 @@ class NetboxFetchBMC(Task):
     Iterate over all BMCs and try to match them to NetBox objects.
     """
 
+    def __init__(self, full: bool = False) -> None:
+        """
+        Constructor to initialize the task.
+        """
+        self.full = full
+
     def execute(self) -> None:
         """
         Executes the task.
         """
         logger.info("Fetching information from Netbox API for all machines.")
-        for bmc in BMC.objects.all():
-            logger.debug('Fetching bmc "%s" - Start', bmc.mac)
-            bmc.fetch_netbox()
-            logger.debug('Fetching bmc "%s" - End', bmc.mac)
+        fetch_changed(
+            NetboxSyncState.ObjectType.BMC,
+            BMC.objects.exclude(machine__netbox_id=0).select_related("machine__system"),
+            lambda changed: changed_machines(changed, "machine__")
+            | Q(machine__netbox_last_fetch_attempt__isnull=True),
+            self.full,
+        )
 
 
 class NetboxFetchNetworkInterface(Task):
@@ -75,19 +297,26 @@ class NetboxFetchNetworkInterface(Task):
     Iterate over all network interfaces and try to match them to NetBox objects.
     """
 
+    def __init__(self, full: bool = False) -> None:
+        """
+        Constructor to initialize the task.
+        """
+        self.full = full
+
     def execute(self) -> None:
         """
         Executes the task.
         """
         logger.info("Fetching information from Netbox API for all machines.")
-        for network_interface in NetworkInterface.objects.all():
-            logger.debug(
-                'Fetching network interface "%s" - Start', network_interface.name
-            )
-            network_interface.fetch_netbox()
-            logger.debug(
-                'Fetching network interface "%s" - End', network_interface.name
-            )
+        fetch_changed(
+            NetboxSyncState.ObjectType.NETWORK_INTERFACE,
+            NetworkInterface.objects.exclude(machine__netbox_id=0).select_related(
+                "machine__system"
+            ),
+            lambda changed: changed_machines(changed, "machine__")
+            | Q(machine__netbox_last_fetch_attempt__isnull=True),
+            self.full,
+        )
 
 
 class NetboxFetchManufacturer(Task):
@@ -95,15 +324,23 @@ class NetboxFetchManufacturer(Task):
     Iterate over all manufacturers and fetch information from Netbox.
     """
 
+    def __init__(self, full: bool = False) -> None:
+        """
+        Constructor to initialize the task.
+        """
+        self.full = full
+
     def execute(self) -> None:
         """
         Executes the task.
         """
         logger.info("Fetching information from Netbox API for all manufacturers.")
-        for manufacturer in Manufacturer.objects.all():
-            logger.debug('Fetching manufacturer "%s" - Start', manufacturer.name)
-            manufacturer.fetch_netbox()
-            logger.debug('Fetching manufacturer "%s" - End', manufacturer.name)
+        fetch_changed(
+            NetboxSyncState.ObjectType.MANUFACTURER,
+            Manufacturer.objects.exclude(netbox_id=0),
+            lambda changed: Q(netbox_id__in=changed.get("manufacturer", set())),
+            self.full,
+        )
 
 
 class NetboxFetchDeviceType(Task):
@@ -111,15 +348,23 @@ class NetboxFetchDeviceType(Task):
     Iterate over all device types and fetch information from Netbox.
     """
 
+    def __init__(self, full: bool = False) -> None:
+        """
+        Constructor to initialize the task.
+        """
+        self.full = full
+
     def execute(self) -> None:
         """
         Executes the task.
         """
         logger.info("Fetching information from Netbox API for all device types.")
-        for devicetype in DeviceType.objects.all():
-            logger.debug('Fetching device type "%s" - Start', devicetype.name)
-            devicetype.fetch_netbox()
-            logger.debug('Fetching device type "%s" - End', devicetype.name)
+        fetch_changed(
+            NetboxSyncState.ObjectType.DEVICE_TYPE,
+            DeviceType.objects.exclude(netbox_id=0),
+            lambda changed: Q(netbox_id__in=changed.get("device_type", set())),
+            self.full,
+        )
 
 
 class NetboxFetchRemotePowerDevice(Task):
@@ -127,6 +372,12 @@ class NetboxFetchRemotePowerDevice(Task):
     Fetch a single Remote Power Device from NetBox.
     """
 
+    def __init__(self, full: bool = False) -> None:
+        """
+        Constructor to initialize the task.
+        """
+        self.full = full
+
     def execute(self) -> None:
         """
         Executes the task.
@@ -134,26 +385,52 @@ class NetboxFetchRemotePowerDevice(Task):
         logger.info(
             "Fetching information from Netbox API for all remote power devices."
         )
-        for remote_power_device in RemotePowerDevice.objects.all():
-            logger.debug(
-                'Fetching remote power device "%s" - Start', remote_power_device.fqdn
-            )
-            remote_power_device.fetch_netbox()
-            logger.debug(
-                'Fetching remote power device "%s" - End', remote_power_device.fqdn
-            )
+        fetch_changed(
+            NetboxSyncState.ObjectType.REMOTE_POWER_DEVICE,
+            RemotePowerDevice.objects.exclude(netbox_id=0),
+            lambda changed: Q(netbox_id__in=changed.get("device", set())),
+            self.full,
+        )
 
 
 class NetboxFetchFullMachine(Task):
     """
     Fetch a single full machine with its subobjects.
+
+    With `graphql`, the device or virtual machine of the machine and of its enclosure are fetched
+    with their interfaces and IP addresses in a single GraphQL query, and all objects are synced
+    from that. If the query fails (e.g. GraphQL is disabled in NetBox), every object is fetched
+    from the REST API.
     """
 
-    def __init__(self, machine_id: int) -> None:
+    def __init__(self, machine_id: int, graphql: bool = True) -> None:
         """
         Constructor to initialize the task.
         """
         self.machine_pk = machine_id
+        self.graphql = graphql
+
+    def get_lookup(self, machine: Machine) -> Optional[NetboxLookup]:
+        """Return the NetBox data of the machine fetched with GraphQL, None to use REST."""
+        if not self.graphql:
+            return None
+        records = [
+            (virtual, netbox_id)
+            for virtual, netbox_id in (
+                (machine.enclosure.is_virtual, machine.enclosure.netbox_id),
+                (machine.system.virtual, machine.netbox_id),
+            )
+            if netbox_id
+        ]
+        try:
+            return NetboxIndex.fetch_graphql(Netbox.get_instance(), records)
+        except (requests.HTTPError, ValueError):
+            logger.warning(
+                "Fetching machine with pk %s from NetBox GraphQL API failed, using REST.",
+                self.machine_pk,
+                exc_info=True,
+            )
+            return None
 
     def execute(self) -> None:
         """
@@ -167,12 +444,14 @@ class NetboxFetchFullMachine(Task):
             machine = Machine.objects.get(pk=self.machine_pk)
         except ObjectDoesNotExist as err:
             raise ValueError("Requested machine doesn't exist!") from err
-        machine.enclosure.fetch_netbox()
-        machine.fetch_netbox()
-        if machine.has_bmc():
-            machine.bmc.fetch_netbox()
-        for intf in machine.networkinterfaces.all():
-            intf.fetch_netbox()
+        lookup = self.get_lookup(machine)
+        with sync_session(logger):
+            machine.enclosure.fetch_netbox(lookup)
+            machine.fetch_netbox(lookup)
+            if machine.has_bmc():
+                machine.bmc.fetch_netbox(lookup)
+            for intf in machine.networkinterfaces.all():
+                intf.fetch_netbox(lookup)
 
 
 class NetboxFetchFullEnclosure(Task):
@@ -253,6 +532,34 @@ class NetboxFetchFullDeviceType(Task):
         devicetype.fetch_netbox()
 
 
+class NetboxFetchFullRemotePowerDevice(Task):
+    """
+    Fetch a single remote power device.
+    """
+
+    def __init__(self, remote_power_device_id: int) -> None:
+        """
+        Constructor to initialize the task.
+        """
+        self.remote_power_device_pk = remote_power_device_id
+
+    def execute(self) -> None:
+        """
+        Executes the task.
+        """
+        logger.info(
+            "Fetching information from Netbox API for remote power device with pk %s.",
+            self.remote_power_device_pk,
+        )
+        try:
+            remote_power_device = RemotePowerDevice.objects.get(
+                pk=self.remote_power_device_pk
+            )
+        except ObjectDoesNotExist as err:
+            raise ValueError("Requested remote power device doesn't exist!") from err
+        remote_power_device.fetch_netbox()
+
+
 class NetboxCompareFullMachine(Task):
     """
     Compare a single full machine with its subobjects.
@@ -389,9 +696,114 @@ class NetboxCompareRemotePowerDevice(Task):
         remote_power_device.compare_netbox()
 
 
+class NetboxCompareFleet(Task):
+    """
+    Compare all objects linked to NetBox with a single snapshot of NetBox.
+
+    The devices and virtual machines of all machines, enclosures and remote power devices with their interfaces and
+    IP addresses, and all device types and manufacturers are fetched with a few bulk listings (see `NetboxIndex`).
+    The objects are compared in memory and their runs and results are stored with `bulk_create()`, linked to a
+    `NetboxOrthosComparisionFleetRun` which holds the number of drifted properties.
+    """
+
+    def get_index(
+        self,
+        machines: List[Machine],
+        enclosures: List[Enclosure],
+        remote_power_devices: List[RemotePowerDevice],
+        device_types: List[DeviceType],
+        manufacturers: List[Manufacturer],
+    ) -> NetboxIndex:
+        """Fetch the NetBox data of all objects."""
+        device_ids = {m.netbox_id for m in machines if not m.system.virtual}
+        vm_ids = {m.netbox_id for m in machines if m.system.virtual}
+        for enclosure in enclosures:
+            (vm_ids if enclosure.is_virtual else device_ids).add(enclosure.netbox_id)
+        device_ids.update(device.netbox_id for device in remote_power_devices)
+
+        netbox_api = Netbox.get_instance()
+        index = NetboxIndex.fetch(netbox_api, device_ids, vm_ids)
+        if device_types:
+            index.add_device_types(
+                netbox_api.fetch_device_types(dt.netbox_id for dt in device_types)
+            )
+        if manufacturers:
+            index.add_manufacturers(
+                netbox_api.fetch_manufacturers(m.netbox_id for m in manufacturers)
+            )
+        return index
+
+    def execute(self) -> None:
+        """
+        Executes the task.
+        """
+        logger.info("Comparing information from Netbox API for all objects.")
+        stats = Netbox.get_instance().stats
+        requests_before = stats.snapshot()
+        machines = list(
+            Machine.objects.exclude(netbox_id=0).select_related(
+                "system", "architecture"
+            )
+        )
+        enclosures = list(Enclosure.objects.exclude(netbox_id=0))
+        remote_power_devices = list(RemotePowerDevice.objects.exclude(netbox_id=0))
+        device_types = list(DeviceType.objects.exclude(netbox_id=0))
+        manufacturers = list(Manufacturer.objects.exclude(netbox_id=0))
+        bmcs = list(
+            BMC.objects.exclude(machine__netbox_id=0).select_related("machine__system")
+        )
+        interfaces = list(
+            NetworkInterface.objects.exclude(machine__netbox_id=0).select_related(
+                "machine__system"
+            )
+        )
+        index = self.get_index(
+            machines, enclosures, remote_power_devices, device_types, manufacturers
+        )
+
+        fleet_run = NetboxOrthosComparisionFleetRun(
+            run_id=uuid.uuid4(),
+            compare_timestamp=datetime.datetime.now(tz=timezone.get_current_timezone()),
+        )
+        batch = NetboxOrthosComparisionBatch(fleet_run)
+        failures = 0
+        objects: List[NetboxComparable] = [
+            *enclosures,
+            *machines,
+            *bmcs,
+            *interfaces,
+            *remote_power_devices,
+            *device_types,
+            *manufacturers,
+        ]
+        for obj in objects:
+            try:
+                obj.compare_netbox(index, batch)
+            except Exception:
+                logger.exception('Comparing "%s" with NetBox failed', obj)
+                failures += 1
+
+        fleet_run.summary = batch.get_summary()
+        fleet_run.object_count = len(batch.runs)
+        fleet_run.drift_count = sum(
+            sum(counts.values()) for counts in fleet_run.summary.values()
+        )
+        with transaction.atomic():
+            fleet_run.save()
+            batch.write()
+        if failures:
+            logger.warning("Comparing %d objects with NetBox failed.", failures)
+        logger.info(
+            "Compared %d objects with NetBox, %d properties differ.",
+            fleet_run.object_count,
+            fleet_run.drift_count,
+        )
+        stats.log(requests_before)
+
+
 class NetboxCleanupComparisionResults(Task):
     """
-    Cleanup old NetBox comparison results.
+    Cleanup old NetBox comparison results, see the retention policies in `orthos2.data.retention`.
     """
 
     def execute(self) -> None:
@@ -400,7 +812,5 @@ class NetboxCleanupComparisionResults(Task):
         """
         logger.info("Cleaning up old NetBox comparison results.")
 
-        # Delete all results older than 14 days
-        NetboxOrthosComparisionRun.objects.filter(
-            compare_timestamp__lt=datetime.datetime.now() - datetime.timedelta(days=14)
-        ).delete()
+        # the fleet runs first, with their runs
+        apply_policies(["netboxcomparisonfleetrun", "netboxcomparisonrun"])
@@ -25,14 +25,18 @@ from orthos2.taskmanager.tasks.daily import (
     DailyCheckForPrimaryNetwork,
     DailyCheckReservationExpirations,
     DailyMachineChecks,
+    DailyMachineEventsCleanup,
     DailyManufacturerDeviceTypeCleanup,
     DailyNetboxFetch,
+    DailyRetentionCleanup,
+    DailyStatisticsSnapshot,
 )
 from orthos2.taskmanager.tasks.machinetasks import MachineCheck, RegenerateMOTD
 from orthos2.taskmanager.tasks.netbox import (
     NetboxCleanupComparisionResults,
     NetboxCompareDeviceType,
     NetboxCompareEnclosure,
+    NetboxCompareFleet,
     NetboxCompareFullMachine,
     NetboxCompareManufacturer,
     NetboxCompareRemotePowerDevice,
@@ -43,6 +47,7 @@ from orthos2.taskmanager.tasks.netbox import (
     NetboxFetchFullEnclosure,
     NetboxFetchFullMachine,
     NetboxFetchFullManufacturer,
+    NetboxFetchFullRemotePowerDevice,
     NetboxFetchMachine,
     NetboxFetchManufacturer,
     NetboxFetchNetworkInterface,
@@ -65,6 +70,9 @@ DAILY_TASK_CLASSES: List[Type[Task]] = [
     DailyCheckForPrimaryNetwork,
     DailyNetboxFetch,
     DailyManufacturerDeviceTypeCleanup,
+    DailyStatisticsSnapshot,
+    DailyMachineEventsCleanup,
+    DailyRetentionCleanup,
 ]
 """
 Tasks intended to run on a recurring daily schedule (see `orthos2.taskmanager.tasks.daily`) -
@@ -91,11 +99,13 @@ SINGLE_TASK_CLASSES: List[Type[Task]] = [
     NetboxFetchFullEnclosure,
     NetboxFetchFullManufacturer,
     NetboxFetchFullDeviceType,
+    NetboxFetchFullRemotePowerDevice,
     NetboxCompareFullMachine,
     NetboxCompareEnclosure,
     NetboxCompareManufacturer,
     NetboxCompareDeviceType,
     NetboxCompareRemotePowerDevice,
+    NetboxCompareFleet,
     NetboxCleanupComparisionResults,
     SendRestoredPassword,
     SendReservationInformation,
@@ -0,0 +1,66 @@
+"""Tests for DailyStatisticsSnapshot."""
+
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from orthos2.api.tests.fleet import build_fleet
+from orthos2.data.models import Machine, StatisticsSnapshot
+from orthos2.taskmanager.tasks.daily import DailyStatisticsSnapshot
+
+
+class DailyStatisticsSnapshotTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="fleet", email="f@test.de")
+        build_fleet(30, user=self.user)
+        Machine.objects.filter(fqdn__startswith="fleet1").update(
+            status_login=True, reserved_permanently=True
+        )
+
+    def test_collect_counts_all_machines(self) -> None:
+        with self.assertNumQueries(3):
+            snapshot = StatisticsSnapshot.collect()
+
+        assert snapshot.total == Machine.objects.count()
+        assert snapshot.reserved == Machine.objects.exclude(reserved_by=None).count()
+        assert snapshot.free == snapshot.total - snapshot.reserved
+        assert (
+            snapshot.status_login == Machine.objects.filter(status_login=True).count()
+        )
+        x86_64 = next(a for a in snapshot.architectures if a["name"] == "x86_64")
+        assert (
+            x86_64["total"]
+            == Machine.objects.filter(architecture__name="x86_64").count()
+        )
+        assert x86_64["login"] == snapshot.status_login
+        assert x86_64["infinite"] == 11
+        domains = {domain["name"]: domain["total"] for domain in snapshot.domains}
+        assert domains["example.our-org.tld"] == 32
+
+    def test_one_snapshot_per_day(self) -> None:
+        DailyStatisticsSnapshot().execute()
+        Machine.objects.filter(fqdn__startswith="fleet2").delete()
+        DailyStatisticsSnapshot().execute()
+
+        snapshot = StatisticsSnapshot.objects.get()
+        assert snapshot.date == timezone.localdate()
+        assert snapshot.total == Machine.objects.count()
+
+    def test_keeps_history(self) -> None:
+        StatisticsSnapshot.objects.create(
+            date=timezone.localdate() - datetime.timedelta(days=1), total=1
+        )
+
+        DailyStatisticsSnapshot().execute()
+
+        assert list(StatisticsSnapshot.objects.values_list("total", flat=True)) == [
+            Machine.objects.count(),
+            1,
+        ]
@@ -1,9 +1,13 @@
-"""Tests for TaskExecuter.reset_stale_running_tasks()."""
+"""Tests for TaskExecuter.reset_stale_running_tasks() and publish_task_event()."""
 
 from django.test import TestCase
 
+from orthos2.data.models import Machine, MachineEvent
 from orthos2.taskmanager.executer import TaskExecuter
 from orthos2.taskmanager.models import DailyTask, SingleTask
+from orthos2.taskmanager.tasks.ansible import Ansible
+from orthos2.taskmanager.tasks.daily import DailyMachineChecks
+from orthos2.taskmanager.tasks.machinetasks import RegenerateMOTD
 
 
 class ResetStaleRunningTasksTest(TestCase):
@@ -54,3 +58,32 @@ class ResetStaleRunningTasksTest(TestCase):
 
         task.refresh_from_db()
         assert not task.running
+
+
+class PublishTaskEventTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def test_publishes_event_for_task_machines(self) -> None:
+        machines = list(Machine.objects.all()[:2])
+
+        TaskExecuter().publish_task_event(RegenerateMOTD(machines[0].fqdn))
+        TaskExecuter().publish_task_event(
+            Ansible([machine.fqdn for machine in machines])
+        )
+
+        self.assertEqual(
+            list(MachineEvent.objects.values_list("machine_id", "data")),
+            [
+                (machines[0].pk, {"task": "RegenerateMOTD"}),
+                (machines[0].pk, {"task": "Ansible"}),
+                (machines[1].pk, {"task": "Ansible"}),
+            ],
+        )
+
+    def test_ignores_tasks_without_machine(self) -> None:
+        TaskExecuter().publish_task_event(DailyMachineChecks())
+
+        assert not MachineEvent.objects.exists()
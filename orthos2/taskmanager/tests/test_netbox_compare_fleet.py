@@ -0,0 +1,88 @@
+"""Tests for comparing all objects with NetBox with the NetboxCompareFleet task."""
+
+from typing import Any, Dict
+from unittest import mock
+
+from django.test import TestCase
+
+from orthos2.api.tests.fleet import build_fleet
+from orthos2.data.models import (
+    DeviceType,
+    Enclosure,
+    Machine,
+    Manufacturer,
+    NetboxOrthosComparisionFleetRun,
+    NetboxOrthosComparisionResult,
+    NetboxOrthosComparisionRun,
+)
+from orthos2.taskmanager.tasks.netbox import NetboxCompareFleet
+from orthos2.taskmanager.tests.test_netbox_fetch_machine import FakeNetbox
+from orthos2.utils.netbox import Netbox
+
+
+def device_type(id: int, model: str, description: str = "") -> Dict[str, Any]:
+    return {"id": id, "model": model, "description": description}
+
+
+class NetboxCompareFleetTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        machines = build_fleet(2)
+        Machine.objects.filter(pk=machines[0].pk).update(
+            netbox_id=101, comment="fleet machine 0"
+        )
+        Machine.objects.filter(pk=machines[1].pk).update(
+            netbox_id=102, comment="outdated"
+        )
+        Enclosure.objects.filter(pk=machines[0].enclosure_id).update(netbox_id=101)
+        manufacturer = Manufacturer.objects.create(name="Acme", netbox_id=5)
+        DeviceType.objects.create(
+            name="Acme 1000", manufacturer=manufacturer, netbox_id=7
+        )
+
+        self.netbox = FakeNetbox()
+        self.netbox.tables["/api/dcim/device-types/"] = [device_type(7, "Acme 2000")]
+        self.netbox.tables["/api/dcim/manufacturers/"] = [
+            {"id": 5, "name": "Acme", "description": ""}
+        ]
+        api = Netbox("http://netbox.example.our-org.tld", "token")
+        patcher = mock.patch.object(api, "fetcher", side_effect=self.netbox.fetcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(Netbox, "get_instance", return_value=api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests(self) -> None:
+        """NetBox is fetched with bulk listings only, not object by object."""
+        NetboxCompareFleet().execute()
+
+        # devices, interfaces, IP addresses, device types, manufacturers
+        self.assertEqual(len(self.netbox.urls), 5)
+        self.assertTrue(all("limit=" in url for url in self.netbox.urls))
+
+    def test_results(self) -> None:
+        """All objects are compared in one run, with the drift counts per property."""
+        NetboxCompareFleet().execute()
+
+        fleet_run = NetboxOrthosComparisionFleetRun.objects.get()
+        runs = NetboxOrthosComparisionRun.objects.filter(fleet_run=fleet_run)
+        # enclosure, 2 machines, BMC, 4 interfaces, device type, manufacturer
+        self.assertEqual(runs.count(), 10)
+        self.assertEqual(fleet_run.object_count, 10)
+        self.assertEqual(fleet_run.summary["machine"]["description"], 1)
+        self.assertEqual(fleet_run.summary["device_type"]["name"], 1)
+        self.assertEqual(fleet_run.summary["manufacturer"]["name"], 0)
+        self.assertEqual(
+            fleet_run.drift_count,
+            sum(sum(counts.values()) for counts in fleet_run.summary.values()),
+        )
+        result = NetboxOrthosComparisionResult.objects.get(
+            run_id__object_machine__netbox_id=102, property_name="description"
+        )
+        self.assertEqual(result.orthos_result, "outdated")
+        self.assertEqual(result.netbox_result, "fleet machine 1")
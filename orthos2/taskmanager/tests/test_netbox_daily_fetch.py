@@ -0,0 +1,231 @@
+"""
+Tests for the tasks of DailyNetboxFetch against the fake NetBox from "orthos2/utils/tests/fakenetbox.py".
+
+The benchmark runs the tasks for larger fleets and prints the HTTP requests, database queries and wall time per
+task. It is skipped unless the fleet sizes are given, optionally with the latency of every NetBox request:
+
+    ORTHOS2_NETBOX_BENCHMARK=1000,5000 ORTHOS2_NETBOX_LATENCY=0.005 pytest -s \\
+        orthos2/taskmanager/tests/test_netbox_daily_fetch.py
+"""
+
+import os
+import time
+import unittest
+from typing import Any, Callable, Dict, List, NamedTuple
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from orthos2 import settings
+from orthos2.api.tests.fleet import build_fleet
+from orthos2.data.models import (
+    BMC,
+    DeviceType,
+    Domain,
+    Enclosure,
+    Machine,
+    Manufacturer,
+    NetboxSyncState,
+    NetworkInterface,
+    RemotePowerDevice,
+    ServerConfig,
+    System,
+)
+from orthos2.taskmanager.models import Task, TaskManager
+from orthos2.taskmanager.tasks.daily import DailyNetboxFetch
+from orthos2.utils.netbox import Netbox
+from orthos2.utils.tests.fakenetbox import FakeNetbox, seed_fleet
+
+BENCHMARK_SIZES = [
+    int(size)
+    for size in os.environ.get("ORTHOS2_NETBOX_BENCHMARK", "").split(",")
+    if size.strip()
+]
+BENCHMARK_LATENCY = float(os.environ.get("ORTHOS2_NETBOX_LATENCY", "0"))
+
+
+class Measurement(NamedTuple):
+    requests: int
+    queries: int
+    seconds: float
+
+
+def build_netbox_fleet(size: int, latency: float = 0.0) -> FakeNetbox:
+    """Build a fleet whose every fourth machine is a virtual machine and add it to a fake NetBox."""
+    ServerConfig.objects.update_or_create(
+        key="domain.validendings", defaults={"value": "example.our-org.tld"}
+    )
+    System.objects.filter(name="BareMetal").update(allowBMC=True)
+    Domain.objects.filter(name="example.our-org.tld").update(
+        ip_v4="10.0.0.0", subnet_mask_v4=16, ip_v6="2001:db8::", subnet_mask_v6=64
+    )
+    pks = [machine.pk for machine in build_fleet(size)]
+    Machine.objects.filter(pk__in=pks[3::4]).update(
+        system=System.objects.get(name="VM KVM")
+    )
+    netbox = FakeNetbox(latency)
+    seed_fleet(
+        netbox,
+        list(
+            Machine.objects.filter(pk__in=pks).select_related("system").order_by("pk")
+        ),
+    )
+    return netbox
+
+
+class QueryCounter:
+    """Counts the database queries, unlike `CaptureQueriesContext` without a limit."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Any,
+    ) -> Any:
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_daily_fetch(netbox: FakeNetbox) -> Dict[str, Measurement]:
+    """Run DailyNetboxFetch and the tasks it adds against `netbox`, returning their measurements by task."""
+    tasks: List[Task] = []
+    with mock.patch.object(TaskManager, "add", side_effect=tasks.append):
+        DailyNetboxFetch().execute()
+    measurements: Dict[str, Measurement] = {}
+    for task in tasks:
+        requests = netbox.count()
+        started = time.monotonic()
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            task.execute()
+        measurements[type(task).__name__] = Measurement(
+            netbox.count() - requests,
+            queries.count,
+            time.monotonic() - started,
+        )
+    return measurements
+
+
+class NetboxTestMixin:
+    def use_netbox(self, netbox: FakeNetbox) -> None:
+        """Let the tasks use `netbox`, in the test thread since SQLite test databases aren't shared."""
+        patchers: List[Any] = [
+            mock.patch.object(Netbox, "get_instance", return_value=netbox.client()),
+            mock.patch.object(settings, "NETBOX_WORKERS", 1),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)  # type: ignore
+
+
+class DailyNetboxFetchTest(NetboxTestMixin, TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        self.netbox = build_netbox_fleet(8)
+        self.use_netbox(self.netbox)
+
+    def test_sync(self) -> None:
+        """All linked objects are synced from NetBox."""
+        measurements = run_daily_fetch(self.netbox)
+
+        self.assertEqual(
+            list(measurements),
+            [
+                "NetboxFetchEnclosure",
+                "NetboxFetchManufacturer",
+                "NetboxFetchDeviceType",
+                "NetboxFetchMachine",
+                "NetboxFetchNetworkInterface",
+                "NetboxFetchBMC",
+                "NetboxFetchRemotePowerDevice",
+            ],
+        )
+        machine = Machine.objects.get(fqdn="fleet2.example.our-org.tld")
+        self.assertEqual(machine.comment, "Fleet machine 2")
+        self.assertEqual(machine.serial_number, "SN-2")
+        self.assertEqual(machine.device_type.name, "Fleet 3000")  # type: ignore
+        self.assertEqual(Manufacturer.objects.get(name="Fleet Inc.").netbox_id, 1)
+        self.assertEqual(
+            DeviceType.objects.filter(manufacturer__name="Fleet Inc.").count(), 3
+        )
+        interface = NetworkInterface.objects.get(machine=machine, name="eth0")
+        self.assertEqual(interface.ip_address_v4, "10.0.0.3")
+        self.assertEqual(interface.ip_address_v6, "2001:db8::3")
+        self.assertEqual(
+            BMC.objects.get(machine=machine).ip_address_v4, "10.0.100.3/32"
+        )
+        vm = Machine.objects.get(fqdn="fleet3.example.our-org.tld")
+        self.assertEqual(vm.comment, "Fleet machine 3")
+        self.assertEqual(
+            NetworkInterface.objects.get(machine=vm, name="eth0").ip_address_v4,
+            "10.0.0.4",
+        )
+        self.assertEqual(Enclosure.objects.get(name="fleet0").location_rack, "Rack 1")
+        self.assertEqual(RemotePowerDevice.objects.get().ip_address_v4, "10.0.250.1")
+        self.assertEqual(NetboxSyncState.objects.filter(watermark=None).count(), 0)
+
+    def test_requests(self) -> None:
+        """Machines are fetched with bulk listings, unchanged objects aren't fetched again."""
+        measurements = run_daily_fetch(self.netbox)
+
+        # last updates of 5 listings, devices, interfaces and IPs of devices and VMs, device types, manufacturer
+        self.assertEqual(measurements["NetboxFetchMachine"].requests, 5 + 6 + 4)
+        self.assertEqual(self.netbox.count("/graphql/"), 0)
+
+        self.netbox.update("/dcim/devices/", 1, rack={"id": 9, "display": "Rack 9"})
+        measurements = run_daily_fetch(self.netbox)
+
+        self.assertEqual(Enclosure.objects.get(name="fleet0").location_rack, "Rack 9")
+        # last updates of 5 listings and their changes, no machine changed
+        self.assertEqual(measurements["NetboxFetchMachine"].requests, 5 + 5)
+
+    def test_unknown_filter(self) -> None:
+        """Filters which the fake doesn't know fail instead of returning all objects."""
+        with self.assertRaises(Exception):
+            self.netbox.client().check_device_by_tag("fleet")
+
+
+@unittest.skipUnless(
+    BENCHMARK_SIZES, "set ORTHOS2_NETBOX_BENCHMARK to run the benchmark"
+)
+class DailyNetboxFetchBenchmark(NetboxTestMixin, TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def test_benchmark(self) -> None:
+        for size in BENCHMARK_SIZES:
+            with self.subTest(size=size):
+                sid = connection.savepoint()
+                assert sid is not None
+                netbox = build_netbox_fleet(size, BENCHMARK_LATENCY)
+                self.use_netbox(netbox)
+                measurements = run_daily_fetch(netbox)
+                total = Measurement(
+                    *(sum(column) for column in zip(*measurements.values()))
+                )
+                print(
+                    "\n{} machines, {:.3f}s NetBox latency".format(
+                        size, BENCHMARK_LATENCY
+                    )
+                )
+                for name, measurement in list(measurements.items()) + [
+                    ("total", total)
+                ]:
+                    print(
+                        "  {:<30} {:>7} requests {:>8} queries {:>9.2f}s".format(
+                            name, *measurement
+                        )
+                    )
+                connection.savepoint_rollback(sid)
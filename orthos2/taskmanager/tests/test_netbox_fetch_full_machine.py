@@ -0,0 +1,168 @@
+"""Tests for fetching a single machine with the NetboxFetchFullMachine task."""
+
+from typing import Any, Dict
+from unittest import mock
+from urllib.parse import urlparse
+
+from django.test import TestCase
+
+from orthos2.api.tests.fleet import build_fleet, get_mac
+from orthos2.data.models import (
+    BMC,
+    Domain,
+    Enclosure,
+    Machine,
+    NetworkInterface,
+    ServerConfig,
+    System,
+)
+from orthos2.taskmanager.tasks.netbox import NetboxFetchFullMachine
+from orthos2.utils.netbox import Netbox
+
+
+def graphql_interface(
+    id: int, name: str, mac: str, *ips: Dict[str, Any], mgmt: bool = False
+) -> Dict[str, Any]:
+    return {
+        "id": str(id),
+        "name": name,
+        "mgmt_only": mgmt,
+        "type": "TYPE_1GE_FIXED",
+        "custom_fields": {"fence_agent": "fleet-ipmi"} if mgmt else {},
+        "primary_mac_address": {"id": str(id), "mac_address": mac},
+        "ip_addresses": list(ips),
+    }
+
+
+def graphql_ip(
+    id: int, address: str, family: int, dns_name: str = ""
+) -> Dict[str, Any]:
+    return {
+        "id": str(id),
+        "address": address,
+        "dns_name": dns_name,
+        "family": {"value": family},
+    }
+
+
+DEVICE = {
+    "id": "101",
+    "name": "fleet0",
+    "description": "fleet machine 0",
+    "serial": "SN-0",
+    "position": 12.0,
+    "custom_fields": {},
+    "site": {"id": "1", "name": "Nuremberg"},
+    "location": {"id": "2", "name": "Server Room 1"},
+    "rack": {"id": "3", "name": "Rack 7"},
+    "device_type": None,
+    "primary_ip4": {"id": "1"},
+    "primary_ip6": None,
+    "oob_ip": {"id": "3"},
+    "interfaces": [
+        graphql_interface(
+            1,
+            "eth0",
+            get_mac(0, 0),
+            graphql_ip(1, "10.0.0.1/24", 4),
+            graphql_ip(2, "2001:db8::1/64", 6),
+        ),
+        graphql_interface(
+            2,
+            "ipmi",
+            get_mac(0, 0xFF),
+            graphql_ip(3, "10.0.1.1/32", 4, "fleet0-sp.example.our-org.tld"),
+            mgmt=True,
+        ),
+    ],
+}
+
+
+class NetboxFetchFullMachineTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        ServerConfig.objects.update_or_create(
+            key="domain.validendings", defaults={"value": "example.our-org.tld"}
+        )
+        System.objects.filter(name="BareMetal").update(allowBMC=True)
+        Domain.objects.filter(name="example.our-org.tld").update(
+            ip_v4="10.0.0.0", subnet_mask_v4=16, ip_v6="2001:db8::", subnet_mask_v6=64
+        )
+        (machine,) = build_fleet(1)
+        Machine.objects.filter(pk=machine.pk).update(netbox_id=101)
+        Enclosure.objects.filter(pk=machine.enclosure_id).update(netbox_id=101)
+        self.machine = Machine.objects.get(pk=machine.pk)
+
+        self.api = Netbox("http://netbox.example.our-org.tld", "token")
+        patcher = mock.patch.object(Netbox, "get_instance", return_value=self.api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(self.api, "fetcher", side_effect=AssertionError)
+        self.fetcher = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_graphql(self) -> None:
+        """The machine, its enclosure, interfaces and BMC are synced from a single query."""
+        with mock.patch.object(
+            self.api, "querier", return_value={"data": {"device101": DEVICE}}
+        ) as querier:
+            NetboxFetchFullMachine(self.machine.pk).execute()
+
+        querier.assert_called_once()
+        query = querier.call_args.args[0]["query"]
+        self.assertEqual(query.count("device(id: 101)"), 1)
+        self.fetcher.assert_not_called()
+
+        machine = Machine.objects.get(pk=self.machine.pk)
+        self.assertEqual(machine.comment, "fleet machine 0")
+        self.assertEqual(machine.serial_number, "SN-0")
+        self.assertEqual(machine.enclosure.location_site, "Nuremberg")
+        self.assertEqual(machine.enclosure.location_room, "Server Room 1")
+        self.assertEqual(machine.enclosure.location_rack, "Rack 7")
+        primary = machine.networkinterfaces.get(mac_address=get_mac(0, 0))
+        self.assertEqual(primary.ip_address_v4, "10.0.0.1")
+        self.assertEqual(primary.ip_address_v6, "2001:db8::1")
+        self.assertTrue(primary.primary)
+        self.assertFalse(
+            NetworkInterface.objects.filter(mac_address=get_mac(0, 0xFF)).exists()
+        )
+        bmc = BMC.objects.get(machine=machine)
+        self.assertEqual(bmc.fqdn, "fleet0-sp.example.our-org.tld")
+        self.assertEqual(bmc.ip_address_v4, "10.0.1.1/32")
+        self.assertIsNotNone(bmc.netbox_last_fetch_attempt)
+
+    def test_graphql_errors(self) -> None:
+        """If the query fails, every object is fetched from the REST API instead."""
+        rest = {
+            "/api/dcim/devices/101/": dict(
+                DEVICE, id=101, site={"id": 1, "display": "Nuremberg"}
+            ),
+        }
+        self.fetcher.side_effect = lambda url: rest.get(
+            urlparse(url).path, {"results": [], "next": None}
+        )
+        with mock.patch.object(
+            self.api,
+            "querier",
+            return_value={"data": None, "errors": [{"message": "Not found"}]},
+        ):
+            NetboxFetchFullMachine(self.machine.pk).execute()
+
+        self.assertTrue(self.fetcher.called)
+        machine = Machine.objects.get(pk=self.machine.pk)
+        self.assertEqual(machine.comment, "fleet machine 0")
+        self.assertEqual(machine.enclosure.location_site, "Nuremberg")
+
+    def test_graphql_disabled(self) -> None:
+        """With `graphql=False` no GraphQL query is sent."""
+        self.fetcher.side_effect = lambda url: {"results": [], "next": None}
+        with mock.patch.object(self.api, "querier") as querier, mock.patch.object(
+            self.api, "fetch_device", return_value=dict(DEVICE, id=101)
+        ):
+            NetboxFetchFullMachine(self.machine.pk, graphql=False).execute()
+
+        querier.assert_not_called()
@@ -0,0 +1,479 @@
+"""Tests for the bulk, incremental and batched write modes of the NetboxFetchMachine task."""
+
+import datetime
+from typing import Any, Dict, List
+from unittest import mock
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orthos2 import settings
+from orthos2.api.tests.fleet import build_fleet, get_mac
+from orthos2.data.models import (
+    BMC,
+    Domain,
+    Enclosure,
+    Machine,
+    MachineSearchIndex,
+    NetboxSyncState,
+    NetworkInterface,
+    RemotePower,
+    ServerConfig,
+    System,
+)
+from orthos2.taskmanager.models import SingleTask
+from orthos2.taskmanager.tasks.netbox import NetboxFetchMachine
+from orthos2.utils import cache
+from orthos2.utils.netbox import Netbox
+
+
+def device(id: int, description: str, serial: str = "") -> Dict[str, Any]:
+    return {
+        "id": id,
+        "description": description,
+        "serial": serial,
+        "custom_fields": {},
+        "last_updated": "2026-01-01T10:00:00+00:00",
+    }
+
+
+def interface(
+    id: int, parent: str, parent_id: int, name: str, mac: str, mgmt: bool = False
+) -> Dict[str, Any]:
+    return {
+        "id": id,
+        parent: {"id": parent_id},
+        "name": name,
+        "mgmt_only": mgmt,
+        "type": {"label": "1000BASE-T (1GE)"},
+        "primary_mac_address": {"mac_address": mac},
+        "custom_fields": {"fence_agent": "fleet-ipmi"} if mgmt else {},
+        "last_updated": "2026-01-01T10:00:00+00:00",
+    }
+
+
+def ip(
+    id: int,
+    parent: str,
+    parent_id: int,
+    interface_id: int,
+    address: str,
+    family: int,
+    dns_name: str = "",
+) -> Dict[str, Any]:
+    return {
+        "id": id,
+        "address": address,
+        "display": address,
+        "dns_name": dns_name,
+        "family": {"value": family},
+        "assigned_object_type": (
+            "dcim.interface" if parent == "device" else "virtualization.vminterface"
+        ),
+        "assigned_object_id": interface_id,
+        "assigned_object": {"id": interface_id, parent: {"id": parent_id}},
+        "last_updated": "2026-01-01T10:00:00+00:00",
+    }
+
+
+class FakeNetbox:
+    """Serves the listings of `Netbox.fetch_all()` from tables, paginated like NetBox."""
+
+    def __init__(self) -> None:
+        self.tables: Dict[str, List[Dict[str, Any]]] = {
+            "/api/dcim/devices/": [
+                device(101, "fleet machine 0", "SN-0"),
+                device(102, "fleet machine 1", "SN-1"),
+            ],
+            "/api/virtualization/virtual-machines/": [device(201, "fleet vm")],
+            "/api/dcim/interfaces/": [
+                interface(1, "device", 101, "eth0", get_mac(0, 0)),
+                interface(2, "device", 101, "ipmi", get_mac(0, 0xFF), mgmt=True),
+                interface(3, "device", 102, "eth0", get_mac(1, 0)),
+                interface(4, "device", 102, "eth1", "02:AA:00:00:00:01"),
+            ],
+            "/api/virtualization/interfaces/": [
+                interface(5, "virtual_machine", 201, "eth0", "02:BB:00:00:00:01")
+            ],
+            "/api/ipam/ip-addresses/": [
+                ip(1, "device", 101, 1, "10.0.0.1/24", 4),
+                ip(2, "device", 101, 1, "2001:db8::1/64", 6),
+                ip(
+                    3,
+                    "device",
+                    101,
+                    2,
+                    "10.0.1.1/32",
+                    4,
+                    "fleet0-sp.example.our-org.tld",
+                ),
+                ip(4, "device", 102, 4, "10.0.0.2/24", 4),
+                ip(5, "virtual_machine", 201, 5, "10.0.2.1/24", 4),
+            ],
+        }
+        self.urls: List[str] = []
+
+    @property
+    def listings(self) -> List[str]:
+        """The requests of the bulk listings, without the ones looking for changes."""
+        return [
+            url
+            for url in self.urls
+            if "ordering=" not in url and "last_updated__gte" not in url
+        ]
+
+    def get_id(self, path: str, name: str, obj: Dict[str, Any]) -> int:
+        if name == "id":
+            return obj["id"]
+        if path == "/api/ipam/ip-addresses/":
+            parent = name[: -len("_id")]
+            return (obj["assigned_object"].get(parent) or {}).get("id", 0)
+        return obj[name[: -len("_id")]]["id"]
+
+    def fetcher(self, url: str) -> Dict[str, Any]:
+        self.urls.append(url)
+        parts = urlsplit(url)
+        params = parse_qsl(parts.query)
+        limit = int(dict(params)["limit"])
+        offset = int(dict(params).get("offset", 0))
+        objects = self.tables[parts.path]
+
+        filters = [
+            (key, value)
+            for key, value in params
+            if key not in ("limit", "offset", "fields", "ordering")
+        ]
+        for key, value in filters:
+            if key == "last_updated__gte":
+                objects = [o for o in objects if o["last_updated"] >= value]
+            else:
+                ids = {int(v) for k, v in filters if k == key}
+                objects = [o for o in objects if self.get_id(parts.path, key, o) in ids]
+        if dict(params).get("ordering") == "-last_updated":
+            objects = sorted(objects, key=lambda o: o["last_updated"], reverse=True)
+
+        next_url = None
+        if offset + limit < len(objects):
+            next_params = [p for p in params if p[0] != "offset"] + [
+                ("offset", offset + limit)
+            ]
+            next_url = "{}://{}{}?{}".format(
+                parts.scheme, parts.netloc, parts.path, urlencode(next_params)
+            )
+        return {
+            "count": len(objects),
+            "next": next_url,
+            "results": objects[offset : offset + limit],  # noqa: E203
+        }
+
+
+class NetboxFetchMachineBulkTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        ServerConfig.objects.update_or_create(
+            key="domain.validendings", defaults={"value": "example.our-org.tld"}
+        )
+        System.objects.filter(name="BareMetal").update(allowBMC=True)
+        Domain.objects.filter(name="example.our-org.tld").update(
+            ip_v4="10.0.0.0", subnet_mask_v4=16, ip_v6="2001:db8::", subnet_mask_v6=64
+        )
+        machines = build_fleet(4)
+        Machine.objects.filter(pk=machines[0].pk).update(netbox_id=101)
+        Machine.objects.filter(pk=machines[1].pk).update(netbox_id=102)
+        # no longer in NetBox
+        Machine.objects.filter(pk=machines[2].pk).update(netbox_id=103)
+        Machine.objects.filter(pk=machines[3].pk).update(
+            netbox_id=201, system=System.objects.get(name="VM KVM")
+        )
+        self.machines = Machine.objects.filter(
+            pk__in=[m.pk for m in machines]
+        ).order_by("pk")
+
+        self.netbox = FakeNetbox()
+        api = Netbox("http://netbox.example.our-org.tld", "token")
+        patcher = mock.patch.object(api, "fetcher", side_effect=self.netbox.fetcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(Netbox, "get_instance", return_value=api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests(self) -> None:
+        """Devices, VMs, interfaces and IP addresses of all machines are fetched with six listings."""
+        NetboxFetchMachine().execute()
+
+        self.assertEqual(len(self.netbox.listings), 6)
+        self.assertIn("id=101&id=102&id=103&limit=1000", self.netbox.listings[0])
+
+    def test_requests_paginated(self) -> None:
+        """Listings with more objects than fit on a page are fetched page by page."""
+        with mock.patch("orthos2.utils.netbox.BULK_PAGE_SIZE", 2):
+            NetboxFetchMachine().execute()
+
+        # devices: 1 page, interfaces: 2, ips: 2, vms: 1, vm interfaces: 1, vm ips: 1
+        self.assertEqual(len(self.netbox.listings), 8)
+        self.assertEqual(
+            NetworkInterface.objects.filter(mac_address="02:AA:00:00:00:01").count(), 1
+        )
+
+    def test_sync(self) -> None:
+        """Machines, network interfaces and BMCs are reconciled from the fetched objects."""
+        NetboxFetchMachine().execute()
+        machine0, machine1, machine2, vm = self.machines.all()
+
+        self.assertEqual(machine0.comment, "fleet machine 0")
+        self.assertEqual(machine0.serial_number, "SN-0")
+        primary = machine0.networkinterfaces.get(mac_address=get_mac(0, 0))
+        self.assertEqual(primary.ip_address_v4, "10.0.0.1")
+        self.assertEqual(primary.ip_address_v6, "2001:db8::1")
+        # the management interface is the BMC, not a network interface
+        self.assertFalse(
+            NetworkInterface.objects.filter(mac_address=get_mac(0, 0xFF)).exists()
+        )
+        bmc = BMC.objects.get(machine=machine0)
+        self.assertEqual(bmc.ip_address_v4, "10.0.1.1")
+        self.assertEqual(bmc.fqdn, "fleet0-sp.example.our-org.tld")
+
+        self.assertEqual(machine1.comment, "fleet machine 1")
+        secondary = machine1.networkinterfaces.get(mac_address="02:AA:00:00:00:01")
+        self.assertEqual(secondary.name, "eth1")
+        self.assertEqual(secondary.ip_address_v4, "10.0.0.2")
+
+        self.assertEqual(machine2.comment, "")
+        self.assertIsNotNone(machine2.netbox_last_fetch_attempt)
+
+        self.assertEqual(vm.comment, "fleet vm")
+        self.assertEqual(
+            vm.networkinterfaces.get(mac_address="02:BB:00:00:00:01").ip_address_v4,
+            "10.0.2.1",
+        )
+
+    def test_incremental(self) -> None:
+        """After a full sync, only machines changed in NetBox get fetched and saved."""
+        tables = self.netbox.tables
+        tables["/api/virtualization/virtual-machines/"][0][
+            "last_updated"
+        ] = "2026-01-02T10:00:00+00:00"
+        NetboxFetchMachine().execute()
+
+        state = NetboxSyncState.objects.get(object_type="machine")
+        assert state.watermark is not None
+        self.assertEqual(state.watermark.isoformat(), "2026-01-02T10:00:00+00:00")
+        self.assertIsNotNone(state.last_full_sync)
+        fetched = {m.pk: m.netbox_last_fetch_attempt for m in self.machines.all()}
+
+        # the IP address of machine 1 changed, the VM is at the watermark
+        tables["/api/ipam/ip-addresses/"][3]["address"] = "10.0.0.3/24"
+        tables["/api/ipam/ip-addresses/"][3]["display"] = "10.0.0.3/24"
+        tables["/api/ipam/ip-addresses/"][3][
+            "last_updated"
+        ] = "2026-01-03T10:00:00+00:00"
+        self.netbox.urls.clear()
+        NetboxFetchMachine().execute()
+
+        changes = [url for url in self.netbox.urls if "last_updated__gte" in url]
+        self.assertEqual(len(changes), 5)
+        self.assertIn("?id=102&limit=1000", self.netbox.listings[0])
+        machine0, machine1, machine2, _vm = self.machines.all()
+        self.assertEqual(machine0.netbox_last_fetch_attempt, fetched[machine0.pk])
+        self.assertEqual(machine2.netbox_last_fetch_attempt, fetched[machine2.pk])
+        self.assertNotEqual(machine1.netbox_last_fetch_attempt, fetched[machine1.pk])
+        self.assertEqual(
+            machine1.networkinterfaces.get(
+                mac_address="02:AA:00:00:00:01"
+            ).ip_address_v4,
+            "10.0.0.3",
+        )
+        state.refresh_from_db()
+        assert state.watermark is not None
+        self.assertEqual(state.watermark.isoformat(), "2026-01-03T10:00:00+00:00")
+
+    def test_incremental_unchanged(self) -> None:
+        """Without changes in NetBox, no machine is fetched."""
+        NetboxSyncState.objects.create(
+            object_type="machine",
+            watermark=datetime.datetime(2026, 1, 2, tzinfo=datetime.timezone.utc),
+            last_full_sync=timezone.now(),
+        )
+        fetched = datetime.datetime(2026, 1, 2, tzinfo=datetime.timezone.utc)
+        self.machines.update(netbox_last_fetch_attempt=fetched)
+
+        NetboxFetchMachine().execute()
+
+        self.assertEqual(self.netbox.listings, [])
+        self.assertFalse(
+            self.machines.exclude(netbox_last_fetch_attempt=fetched).exists()
+        )
+
+    def test_incremental_linked(self) -> None:
+        """Machines never fetched or linked to another NetBox object get fetched."""
+        tables = self.netbox.tables
+        tables["/api/dcim/devices/"].append(device(104, "fleet machine 4", "SN-4"))
+        tables["/api/virtualization/virtual-machines/"][0][
+            "last_updated"
+        ] = "2026-01-02T10:00:00+00:00"
+        Machine.objects.filter(pk=self.machines[1].pk).update(netbox_id=0)
+        NetboxFetchMachine().execute()
+        self.assertIsNone(self.machines[1].netbox_last_fetch_attempt)
+
+        # newly linked, and linked to an unchanged device
+        Machine.objects.filter(pk=self.machines[1].pk).update(netbox_id=102)
+        machine2 = self.machines[2]
+        machine2.netbox_id = 104
+        machine2.save()
+        self.assertIsNone(machine2.netbox_last_fetch_attempt)
+        self.netbox.urls.clear()
+        NetboxFetchMachine().execute()
+
+        self.assertIn("?id=102&id=104&limit=1000", self.netbox.listings[0])
+        machine1, machine2 = self.machines[1], self.machines[2]
+        self.assertIsNotNone(machine1.netbox_last_fetch_attempt)
+        self.assertEqual(machine1.comment, "fleet machine 1")
+        self.assertEqual(machine2.comment, "fleet machine 4")
+
+    def test_link_changed(self) -> None:
+        """Saving compares the NetBox ID in memory and resets the last fetch only if it changed."""
+        fetched = timezone.now()
+        Enclosure.objects.filter(pk=self.machines[0].enclosure_id).update(
+            netbox_id=101, netbox_last_fetch_attempt=fetched
+        )
+        enclosure = Enclosure.objects.get(pk=self.machines[0].enclosure_id)
+
+        with CaptureQueriesContext(connection) as queries:
+            enclosure.description = "rack 1"
+            enclosure.save()
+        self.assertFalse(
+            [q for q in queries.captured_queries if q["sql"].startswith("SELECT")]
+        )
+        self.assertEqual(enclosure.netbox_last_fetch_attempt, fetched)
+
+        enclosure.netbox_id = 102
+        enclosure.save()
+        enclosure.refresh_from_db()
+        self.assertIsNone(enclosure.netbox_last_fetch_attempt)
+
+        # later saves compare with the saved NetBox ID
+        enclosure.netbox_last_fetch_attempt = fetched
+        enclosure.save()
+        self.assertEqual(enclosure.netbox_last_fetch_attempt, fetched)
+
+    def test_full_sync_due(self) -> None:
+        """All machines get fetched again after `NETBOX_FULL_SYNC_INTERVAL` days."""
+        NetboxSyncState.objects.create(
+            object_type="machine",
+            watermark=datetime.datetime(2026, 1, 2, tzinfo=datetime.timezone.utc),
+            last_full_sync=timezone.now() - datetime.timedelta(days=8),
+        )
+
+        NetboxFetchMachine().execute()
+
+        self.assertEqual(
+            self.machines.filter(netbox_last_fetch_attempt__isnull=False).count(), 4
+        )
+        state = NetboxSyncState.objects.get(object_type="machine")
+        assert state.last_full_sync is not None
+        self.assertGreater(
+            state.last_full_sync, timezone.now() - datetime.timedelta(minutes=1)
+        )
+
+    def test_batch_writes(self) -> None:
+        """Synced objects are written without signals, Cobbler is regenerated once per domain."""
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=Machine)
+        self.addCleanup(post_save.disconnect, receiver, sender=Machine)
+
+        NetboxFetchMachine().execute()
+
+        receiver.assert_not_called()
+        regenerations = SingleTask.objects.filter(name="RegenerateCobbler")
+        self.assertEqual(regenerations.count(), 1)
+        machine0 = self.machines[0]
+        self.assertIn(str(machine0.fqdn_domain_id), regenerations[0].arguments)
+        self.assertTrue(RemotePower.objects.filter(machine=machine0).exists())
+        self.assertIn(
+            "02:aa:00:00:00:01",
+            MachineSearchIndex.objects.get(machine=self.machines[1]).document,
+        )
+
+        # nothing changed in NetBox
+        SingleTask.objects.all().delete()
+        with mock.patch.object(cache, "invalidate") as invalidate:
+            NetboxFetchMachine(full=True).execute()
+
+        self.assertFalse(SingleTask.objects.filter(name="RegenerateCobbler").exists())
+        invalidate.assert_not_called()
+
+    def test_batch_writes_conflict(self) -> None:
+        """If the batch can't be written in bulk, its objects are saved one by one."""
+        self.netbox.tables["/api/dcim/interfaces/"].append(
+            interface(6, "device", 101, "eth2", "02:AA:00:00:00:01")
+        )
+
+        with self.assertLogs("models", "WARNING") as logs:
+            NetboxFetchMachine().execute()
+
+        self.assertIn("saving them one by one", "\n".join(logs.output))
+        self.assertEqual(
+            NetworkInterface.objects.filter(mac_address="02:AA:00:00:00:01").count(), 1
+        )
+        self.assertEqual(self.machines[0].comment, "fleet machine 0")
+
+    def test_reference_lookups(self) -> None:
+        """Device types and fence agents are looked up once per run."""
+        for record in self.netbox.tables["/api/dcim/devices/"]:
+            record["device_type"] = {"id": 7}
+        with mock.patch.object(
+            Netbox,
+            "fetch_device_type",
+            return_value={"id": 7, "model": "Fleet 1000", "manufacturer": {"id": 8}},
+        ) as fetch_device_type, mock.patch.object(
+            Netbox, "fetch_manufacturer", return_value={"id": 8, "name": "Fleet Inc."}
+        ), self.assertLogs(
+            "tasks", "INFO"
+        ) as logs:
+            NetboxFetchMachine().execute()
+
+        fetch_device_type.assert_called_once_with(7)
+        machine0, machine1, _machine2, _vm = self.machines.all()
+        assert machine0.device_type is not None
+        self.assertEqual(machine0.device_type.name, "Fleet 1000")
+        self.assertEqual(machine1.device_type, machine0.device_type)
+        self.assertIn(
+            "NetBox reference lookups: device_type 1 hits/1 misses, "
+            "manufacturer 0 hits/1 misses, remote_power_type 0 hits/1 misses",
+            "\n".join(logs.output),
+        )
+
+    def test_per_machine(self) -> None:
+        """Without bulk mode, the same data is requested machine by machine."""
+        devices = self.netbox.tables["/api/dcim/devices/"]
+        vm = self.netbox.tables["/api/virtualization/virtual-machines/"][0]
+        with mock.patch.object(
+            Netbox,
+            "fetch_device",
+            side_effect=lambda id: next(d for d in devices if d["id"] == id),
+        ), mock.patch.object(
+            Netbox, "check_interface_no_mgmt_by_id", return_value=[]
+        ), mock.patch.object(
+            Netbox, "check_interface_mgmt_by_id", return_value=[]
+        ), mock.patch.object(
+            Netbox, "fetch_vm", return_value=vm
+        ), mock.patch.object(
+            Netbox, "check_vm_interface_by_id", return_value=[]
+        ), mock.patch.object(
+            settings, "NETBOX_WORKERS", 1
+        ):
+            Machine.objects.filter(pk=self.machines[2].pk).update(netbox_id=0)
+            NetboxFetchMachine(bulk=False).execute()
+
+        self.assertEqual(self.netbox.listings, [])
+        self.assertEqual(self.machines[0].comment, "fleet machine 0")
+        self.assertEqual(self.machines[3].comment, "fleet vm")
@@ -0,0 +1,226 @@
+"""
+Cache namespaces.
+
+Cached values belong to namespaces like "machines" or "serverconfig". Every namespace has a
+version which is part of the cache keys of its values. When an object of a model registered for
+a namespace gets saved or deleted, the version gets increased: all values of the namespace can't
+be found anymore and expire. This works for every cache backend, also across processes if the
+backend is shared (see `CACHES` in the settings).
+
+`cache_response()` caches whole responses of views by namespace, request path and user class.
+`get_or_set_shared()` and `cached_choices()` (for the choice lists of forms) only cache in a shared
+cache (see `is_shared()`).
+"""
+
+import functools
+import hashlib
+import time
+from typing import Any, Callable, Iterable, List, Type, TypeVar, Union
+
+from django.contrib.auth.models import AbstractBaseUser, AnonymousUser
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpRequest, HttpResponseBase
+
+T = TypeVar("T")
+
+# marks a missing value, `None` is a valid cached value
+_MISSING = object()
+
+
+def get_version_key(namespace: str) -> str:
+    return "namespace-{}".format(namespace)
+
+
+def new_version() -> int:
+    """Return a version which wasn't used before, also if the previous one got evicted."""
+    return time.time_ns()
+
+
+def get_versions(namespaces: Iterable[str]) -> str:
+    """Return the current versions of the namespaces, added to the keys of their values."""
+    keys = [get_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def invalidate(*namespaces: str) -> None:
+    """Drop all cached values of the namespaces."""
+    for namespace in namespaces:
+        key = get_version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_version(), None)
+
+
+def make_key(namespaces: Iterable[str], name: str) -> str:
+    namespaces = list(namespaces)
+    return "{}-{}-{}".format(
+        "-".join(namespaces) or "none", get_versions(namespaces), name
+    )
+
+
+def get_or_set(
+    namespaces: Iterable[str],
+    name: str,
+    function: Callable[[], T],
+    timeout: Any = DEFAULT_TIMEOUT,
+) -> T:
+    """Return the cached value `name` of the namespaces; call `function` if there is none."""
+    key = make_key(namespaces, name)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = function()
+        cache.set(key, value, timeout)
+    return value  # type: ignore
+
+
+def is_shared() -> bool:
+    """
+    Return whether the cache is shared by all processes (web workers and taskmanager).
+
+    Only then a namespace invalidated by one process is invalidated for all of them.
+    """
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def get_or_set_shared(
+    namespaces: Iterable[str],
+    name: str,
+    function: Callable[[], T],
+    timeout: Any = DEFAULT_TIMEOUT,
+) -> T:
+    """
+    Like `get_or_set()`, but only cache the value if the cache is shared.
+
+    For values of objects which other processes may change: a per-process cache doesn't notice
+    that and would return outdated values until they expire.
+    """
+    if not is_shared():
+        return function()
+    return get_or_set(namespaces, name, function, timeout)
+
+
+def cached_choices(
+    *namespaces: str,
+) -> Callable[[Callable[[], List[T]]], Callable[[], List[T]]]:
+    """
+    Cache the choices returned by the decorated function until one of the namespaces changes.
+
+    Forms validate their input against the choices, outdated choices would reject valid values.
+    So the choices are only cached if the cache is shared; a per-process cache doesn't notice
+    objects added by other processes.
+    """
+
+    def decorator(function: Callable[[], List[T]]) -> Callable[[], List[T]]:
+        name = "choices-{}.{}".format(function.__module__, function.__qualname__)
+
+        @functools.wraps(function)
+        def wrapper() -> List[T]:
+            return get_or_set_shared(namespaces, name, function)
+
+        return wrapper
+
+    return decorator
+
+
+def register(namespace: str, *senders: Type[models.Model]) -> None:
+    """Invalidate the namespace whenever an object of one of `senders` gets saved or deleted."""
+
+    def receiver(*args: Any, **kwargs: Any) -> None:
+        invalidate(namespace)
+
+    for sender in senders:
+        for signal in (post_save, post_delete):
+            signal.connect(
+                receiver,
+                sender=sender,
+                weak=False,
+                dispatch_uid="cache-namespace-{}-{}".format(
+                    namespace, sender._meta.label
+                ),
+            )
+
+
+def get_user_class(user: Union[AbstractBaseUser, AnonymousUser]) -> str:
+    if not user.is_authenticated:
+        return "anonymous"
+    if user.is_superuser:  # type: ignore
+        return "superuser"
+    return "user"
+
+
+def is_cacheable(request: HttpRequest, response: HttpResponseBase) -> bool:
+    """
+    Return whether the response can be shared by all users of a user class.
+
+    Responses which set cookies or contain a CSRF token are bound to a session.
+    """
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+
+
+def cache_response(
+    *namespaces: str, timeout: Any = DEFAULT_TIMEOUT
+) -> Callable[[Callable[..., HttpResponseBase]], Callable[..., HttpResponseBase]]:
+    """
+    Cache the GET responses of the decorated view until one of the namespaces changes.
+
+    Responses are cached per request path and user class (anonymous, user, superuser), so the
+    view must not show anything else specific to the user.
+    """
+
+    def decorator(
+        view: Callable[..., HttpResponseBase]
+    ) -> Callable[..., HttpResponseBase]:
+        @functools.wraps(view)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+            # token authenticated API requests have no user before the view runs
+            if (
+                request.method not in ("GET", "HEAD")
+                or "HTTP_AUTHORIZATION" in request.META
+                or len(get_messages(request))
+            ):
+                return view(request, *args, **kwargs)
+
+            name = "response-{}-{}".format(
+                get_user_class(request.user),
+                hashlib.sha256(request.get_full_path().encode("utf-8")).hexdigest(),
+            )
+            key = make_key(namespaces, name)
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+
+            def store(response: HttpResponseBase) -> None:
+                if is_cacheable(request, response):
+                    cache.set(key, response, timeout)
+
+            # template responses (also the ones of DRF) can only be stored when rendered
+            if getattr(response, "is_rendered", True):
+                store(response)
+            else:
+                response.add_post_render_callback(store)  # type: ignore
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,37 @@
+"""
+Choice lists shared by forms and views.
+
+The lists are cached by namespace (see `orthos2.utils.cache.cached_choices()`).
+"""
+
+from typing import Any, Callable, List, Tuple
+
+from orthos2.data.models import Architecture, Domain, System
+from orthos2.utils.cache import cached_choices
+
+BLANK_CHOICE = ("", "--all--")
+
+
+@cached_choices("architectures")
+def get_architectures() -> List[Tuple[int, str]]:
+    """Return the architectures as (ID, name) choices, ordered by name."""
+    return list(Architecture.objects.order_by("name").values_list("id", "name"))
+
+
+@cached_choices("systems")
+def get_systems() -> List[Tuple[int, str]]:
+    """Return the systems as (ID, name) choices, ordered by name."""
+    return list(System.objects.order_by("name").values_list("id", "name"))
+
+
+@cached_choices("domains")
+def get_domains() -> List[Tuple[int, str]]:
+    """Return the domains as (ID, name) choices, ordered by name."""
+    return list(Domain.objects.order_by("name").values_list("id", "name"))
+
+
+def with_blank(
+    function: Callable[[], List[Tuple[Any, Any]]]
+) -> Callable[[], List[Tuple[Any, Any]]]:
+    """Return a callable returning the choices of `function` with a leading "--all--" choice."""
+    return lambda: [BLANK_CHOICE] + function()
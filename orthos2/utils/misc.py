@@ -9,7 +9,7 @@ from datetime import date, datetime, timedelta
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formatdate
-from typing import TYPE_CHECKING, Iterable, List, Literal, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Iterable, List, Literal, Optional, Set, Tuple, Union
 
 from django import forms
 from django.conf import settings
@@ -284,7 +284,7 @@ def normalize_ascii(string: str) -> str:
     return result
 
 
-def format_cli_form_errors(form: forms.Form) -> str:
+def format_cli_form_errors(form: forms.BaseForm) -> str:
     """Format form errors for CLI."""
     output = ""
     for field_name, errors in form.errors.items():
@@ -300,9 +300,32 @@ def format_cli_form_errors(form: forms.Form) -> str:
     return output.rstrip("\n")
 
 
-def suggest_host_ip(protocol: Literal[4, 6], domain: "Domain") -> str:
+def get_used_host_ips(protocol: Literal[4, 6]) -> Set[IPAddress]:
+    """
+    Return all IP addresses of the given protocol assigned to network interfaces or BMCs.
+    """
+    field = "ip_address_v4" if protocol == 4 else "ip_address_v6"
+    used_ips: Set[IPAddress] = set()
+    for model in (NetworkInterface, BMC):
+        ips = model._default_manager.exclude(**{field: None}).values_list(
+            field, flat=True
+        )
+        for ip in ips:
+            if ip:
+                used_ips.add(IPAddress(ip, protocol))
+    return used_ips
+
+
+def suggest_host_ip(
+    protocol: Literal[4, 6],
+    domain: "Domain",
+    used_ips: Optional[Set[IPAddress]] = None,
+) -> str:
     """
     Suggest a free IP address for a new network interface.
+
+    `used_ips` may be passed (see `get_used_host_ips()`) to suggest several addresses in a
+    row without querying the database each time; the suggested address gets added to it.
     """
     domain_ip = domain.ip_v4 if protocol == 4 else domain.ip_v6
     subnet = domain.subnet_mask_v4 if protocol == 4 else domain.subnet_mask_v6
@@ -311,9 +334,6 @@ def suggest_host_ip(protocol: Literal[4, 6], domain: "Domain") -> str:
     host_size = int((32 if net.version == 4 else 128) - subnet)
     # The full network address as bits
     network_ip = int(net.ip)
-    # The network part as bits
-    network_ip_bits = network_ip >> host_size
-    used_ips: set[IPAddress] = set()
     dyn_range_start = int(
         IPAddress(
             domain.dynamic_range_v4_start
@@ -329,38 +349,8 @@ def suggest_host_ip(protocol: Literal[4, 6], domain: "Domain") -> str:
         )
     )
 
-    # Get all interfaces that match the network address
-    intf_ip = IPAddress(0)
-    for intf in NetworkInterface.objects.all():
-        if protocol == 4:
-            if not intf.ip_address_v4:
-                continue
-            intf_ip = IPAddress(intf.ip_address_v4, 4)
-        if protocol == 6:
-            if not intf.ip_address_v6:
-                continue
-            intf_ip = IPAddress(intf.ip_address_v6, 6)
-
-        # Check if the bit representation of this interface's network address is the same.
-        intf_ip_bits = int(intf_ip) >> host_size
-        if intf_ip_bits == network_ip_bits:
-            used_ips.add(intf_ip)
-
-    bmc_ip = IPAddress(0)
-    for bmc in BMC.objects.all():
-        if protocol == 4:
-            if not bmc.ip_address_v4:
-                continue
-            bmc_ip = IPAddress(bmc.ip_address_v4, 4)
-        if protocol == 6:
-            if not bmc.ip_address_v6:
-                continue
-            bmc_ip = IPAddress(bmc.ip_address_v6, 6)
-
-        # Check if the bit representation of this interface's network address is the same.
-        bmc_ip_bits = int(bmc_ip) >> host_size
-        if bmc_ip_bits == network_ip_bits:
-            used_ips.add(bmc_ip)
+    if used_ips is None:
+        used_ips = get_used_host_ips(protocol)
 
     idx = 0
     while idx < 2**host_size:
@@ -383,6 +373,7 @@ def suggest_host_ip(protocol: Literal[4, 6], domain: "Domain") -> str:
             # IP must not be the broadcast address.
             and next_ip != net.broadcast
         ):
+            used_ips.add(next_ip)
             return str(next_ip)
         idx += 1
 
@@ -2,13 +2,38 @@
 Utility module that wraps the functionality that is related to Netbox. This is assuming Netbox version 4.
 """
 
+import contextlib
+import datetime
+import hashlib
+import hmac
 import json
 import logging
+import queue
+import re
+import threading
+import time
 import urllib
-from typing import Any, Dict, List, Literal, Optional
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 import requests
 import urllib3
+from django.db import connections
+from django.utils.dateparse import parse_datetime
+from requests.adapters import HTTPAdapter
 
 from orthos2 import settings
 
@@ -16,10 +41,500 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger("utils")
 
+# page size of the bulk listings (NetBox caps it with its MAX_PAGE_SIZE, 1000 by default)
+BULK_PAGE_SIZE = 1000
+
+# IDs per multi-value filter, keeps the URLs of bulk listings short
+BULK_FILTER_SIZE = 250
+
+# longest wait between two attempts of a request, also if NetBox asks for more
+MAX_BACKOFF = 60
+
+# seconds until the rate limit gets read from the server config again
+RATE_LIMIT_REFRESH = 60
+
+T = TypeVar("T")
+
+# NetBox listings whose changes are looked for by the incremental sync, with the fields needed
+# to tell which device, virtual machine, manufacturer or device type got changed
+CHANGE_LISTINGS: Dict[str, Tuple[str, ...]] = {
+    "/dcim/devices/": ("id",),
+    "/virtualization/virtual-machines/": ("id",),
+    "/dcim/interfaces/": ("id", "device"),
+    "/virtualization/interfaces/": ("id", "virtual_machine"),
+    "/ipam/ip-addresses/": ("id", "assigned_object_type", "assigned_object"),
+    "/dcim/manufacturers/": ("id",),
+    "/dcim/device-types/": ("id",),
+}
+
+
+def get_changed_object(path: str, obj: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+    """
+    Return the type and ID of the object whose NetBox data changed with `obj` of the listing.
+
+    Types are "device", "virtual_machine", "manufacturer" and "device_type"; changed interfaces
+    and IP addresses change the device or virtual machine they belong to.
+    """
+    if path == "/dcim/devices/":
+        return ("device", obj["id"])
+    if path == "/virtualization/virtual-machines/":
+        return ("virtual_machine", obj["id"])
+    if path == "/dcim/manufacturers/":
+        return ("manufacturer", obj["id"])
+    if path == "/dcim/device-types/":
+        return ("device_type", obj["id"])
+    if path == "/dcim/interfaces/":
+        return ("device", obj["device"]["id"])
+    if path == "/virtualization/interfaces/":
+        return ("virtual_machine", obj["virtual_machine"]["id"])
+    if path == "/ipam/ip-addresses/":
+        assigned_object = obj.get("assigned_object") or {}
+        for parent in ("device", "virtual_machine"):
+            if assigned_object.get(parent):
+                return (parent, assigned_object[parent]["id"])
+        return None
+    raise ValueError("Unknown listing {}".format(path))
+
+
+# listings of the objects in the webhooks sent by NetBox, by the `model` of the webhook
+WEBHOOK_LISTINGS: Dict[str, str] = {
+    "device": "/dcim/devices/",
+    "virtualmachine": "/virtualization/virtual-machines/",
+    "interface": "/dcim/interfaces/",
+    "vminterface": "/virtualization/interfaces/",
+    "ipaddress": "/ipam/ip-addresses/",
+    "manufacturer": "/dcim/manufacturers/",
+    "devicetype": "/dcim/device-types/",
+}
+
+
+def check_webhook_signature(body: bytes, signature: str, secret: str) -> bool:
+    """Return whether `signature` is the HMAC-SHA512 of the webhook body NetBox signs with `secret`."""
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def get_webhook_change(payload: Any) -> Optional[Tuple[str, int]]:
+    """
+    Return the type and ID of the object whose NetBox data changed with a webhook (see `get_changed_object()`).
+
+    Webhooks of other models are ignored, None is returned for them.
+
+    :raises ValueError: In case the payload is no NetBox webhook.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("data"), dict):
+        raise ValueError("Not a NetBox webhook")
+    path = WEBHOOK_LISTINGS.get(payload.get("model", ""))
+    if path is None:
+        return None
+    try:
+        return get_changed_object(path, payload["data"])
+    except (KeyError, TypeError) as err:
+        raise ValueError("Invalid NetBox webhook for {}".format(path)) from err
+
+
+# fields of the devices and virtual machines requested by `NetboxIndex.fetch_graphql()`, with
+# the interfaces and IP addresses used by `Machine.fetch_netbox()` and the objects it syncs
+GRAPHQL_INTERFACE_FIELDS = """
+    id
+    name
+    custom_fields
+    primary_mac_address { id mac_address }
+    ip_addresses { id address dns_name family { value } }
+"""
+
+GRAPHQL_FIELDS = {
+    False: """
+        id
+        name
+        description
+        serial
+        position
+        custom_fields
+        site { id name }
+        location { id name }
+        rack { id name }
+        device_type { id model manufacturer { id name } }
+        primary_ip4 { id }
+        primary_ip6 { id }
+        oob_ip { id }
+        interfaces { %s mgmt_only type }
+    """
+    % GRAPHQL_INTERFACE_FIELDS,
+    True: """
+        id
+        name
+        description
+        serial
+        custom_fields
+        site { id name }
+        primary_ip4 { id }
+        primary_ip6 { id }
+        interfaces { %s }
+    """
+    % GRAPHQL_INTERFACE_FIELDS,
+}
+
+
+def from_graphql(
+    virtual: bool, record: Dict[str, Any]
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Convert a device or virtual machine of a GraphQL query to the REST API representation.
+
+    Returns the record, its interfaces and their IP addresses with the fields read by the
+    models (IDs as integers, "display" names, parent references of interfaces and IPs).
+    GraphQL doesn't return the labels of interface types, only their values.
+    """
+
+    def convert(
+        obj: Optional[Dict[str, Any]], display: str
+    ) -> Optional[Dict[str, Any]]:
+        if obj is None:
+            return None
+        obj = dict(obj, id=int(obj["id"]))
+        if display in obj:
+            obj["display"] = obj[display]
+        return obj
+
+    parent = "virtual_machine" if virtual else "device"
+    record = dict(record, id=int(record["id"]))
+    interfaces = record.pop("interfaces", None) or []
+    for name in ("site", "location", "rack"):
+        if name in record:
+            record[name] = convert(record[name], "name")
+    for name in ("primary_ip4", "primary_ip6", "oob_ip"):
+        if name in record:
+            record[name] = convert(record[name], "address")
+    if record.get("device_type") is not None:
+        record["device_type"] = convert(record["device_type"], "model")
+        record["device_type"]["manufacturer"] = convert(
+            record["device_type"].get("manufacturer"), "name"
+        )
+
+    converted_interfaces: List[Dict[str, Any]] = []
+    ips: List[Dict[str, Any]] = []
+    for interface in interfaces:
+        interface = convert(interface, "name")  # type: ignore
+        interface[parent] = {"id": record["id"]}
+        interface["primary_mac_address"] = convert(
+            interface.get("primary_mac_address"), "mac_address"
+        )
+        if "type" in interface:
+            interface["type"] = {"value": interface["type"], "label": None}
+        for ip in interface.pop("ip_addresses", None) or []:
+            ip = convert(ip, "address")
+            ip["assigned_object_type"] = (
+                "virtualization.vminterface" if virtual else "dcim.interface"
+            )
+            ip["assigned_object_id"] = interface["id"]
+            ip["assigned_object"] = {
+                "id": interface["id"],
+                parent: {"id": record["id"]},
+            }
+            ips.append(ip)  # type: ignore
+        converted_interfaces.append(interface)
+    return record, converted_interfaces, ips
+
+
+def get_rate_limit() -> float:
+    from orthos2.data.models import ServerConfig
+
+    return ServerConfig.get_server_config_manager().get_netbox_rate_limit()
+
+
+class RateLimiter:
+    """
+    Spread the requests of all threads evenly, at most `rate` requests per second.
+
+    The rate comes from `get_rate` (0 means no limit) and is refreshed every
+    `RATE_LIMIT_REFRESH` seconds, so changes of the server config apply to running task managers.
+    """
+
+    def __init__(self, get_rate: Callable[[], float]):
+        self.get_rate = get_rate
+        self.lock = threading.Lock()
+        self.rate = 0.0
+        self.rate_read_at: Optional[float] = None
+        self.next_slot = 0.0
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            if (
+                self.rate_read_at is None
+                or now - self.rate_read_at >= RATE_LIMIT_REFRESH
+            ):
+                self.rate = self.get_rate()
+                self.rate_read_at = now
+            if self.rate <= 0:
+                return
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + 1 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class RequestStats:
+    """Number, errors, retries and latency histogram of the requests per endpoint."""
+
+    # upper bounds of the latency buckets in seconds
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def get_endpoint(method: str, url: str) -> str:
+        """Return the method and API path of the URL, with object IDs replaced by "{id}"."""
+        path = urllib.parse.urlsplit(url).path  # type: ignore
+        path = path.split("/api", 1)[-1]
+        return "{} {}".format(method, re.sub(r"/\d+(?=/|$)", "/{id}", path))
+
+    def get_entry(self, endpoint: str) -> Dict[str, Any]:
+        return self.endpoints.setdefault(
+            endpoint,
+            {
+                "count": 0,
+                "errors": 0,
+                "retries": 0,
+                "seconds": 0.0,
+                "buckets": [0] * len(self.BUCKETS),
+            },
+        )
+
+    def observe(self, endpoint: str, seconds: float, status: Optional[int]) -> None:
+        """Count a request; `status` is None if no response was received."""
+        with self.lock:
+            entry = self.get_entry(endpoint)
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            if status is None or status >= 400:
+                entry["errors"] += 1
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][i] += 1
+                    break
+
+    def retried(self, endpoint: str) -> None:
+        with self.lock:
+            self.get_entry(endpoint)["retries"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the statistics per endpoint.
+
+        The histogram is cumulative like the ones of Prometheus: "le" maps the upper bound of
+        each bucket to the number of requests which took at most that long.
+        """
+        with self.lock:
+            result = {}
+            for endpoint, entry in sorted(self.endpoints.items()):
+                counts = []
+                total = 0
+                for count in entry["buckets"]:
+                    total += count
+                    counts.append(total)
+                result[endpoint] = {
+                    "count": entry["count"],
+                    "errors": entry["errors"],
+                    "retries": entry["retries"],
+                    "seconds": entry["seconds"],
+                    "le": {
+                        "+Inf" if bound == float("inf") else str(bound): count
+                        for bound, count in zip(self.BUCKETS, counts)
+                    },
+                }
+            return result
+
+    def log(self, since: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """
+        Log the statistics per endpoint.
+
+        With the `snapshot()` taken at the start of a task, only the requests sent since then
+        are logged (including the ones of tasks running at the same time).
+        """
+        since = since or {}
+        for endpoint, entry in self.snapshot().items():
+            previous = since.get(endpoint)
+            if previous is not None:
+                entry = {
+                    key: entry[key] - previous[key]
+                    for key in ("count", "errors", "retries", "seconds")
+                }
+                if not entry["count"]:
+                    continue
+            logger.info(
+                "NetBox %s: %d requests, %d errors, %d retries, %.3fs average",
+                endpoint,
+                entry["count"],
+                entry["errors"],
+                entry["retries"],
+                entry["seconds"] / entry["count"] if entry["count"] else 0,
+            )
+
+    def reset(self) -> None:
+        with self.lock:
+            self.endpoints.clear()
+
+
+class SyncSession:
+    """
+    NetBox reference objects and their Orthos rows looked up during one sync run.
+
+    Lookups are memoized by namespace and key for the whole run, including the ones which
+    found nothing, and counted as hits and misses per namespace. Sessions belong to the thread
+    which started them and are shared with the worker threads of `run_concurrently()`; misses
+    of the same key wait for the first lookup instead of looking it up again.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.values: Dict[Tuple[str, Any], Any] = {}
+        self.key_locks: Dict[Tuple[str, Any], threading.Lock] = {}
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+
+    def get(self, namespace: str, key: Any, lookup: Callable[[], T]) -> T:
+        with self.lock:
+            if (namespace, key) in self.values:
+                self.hits[namespace] += 1
+                return self.values[(namespace, key)]  # type: ignore
+            key_lock = self.key_locks.setdefault((namespace, key), threading.Lock())
+        # other keys are looked up meanwhile, e.g. while this one creates an object
+        with key_lock:
+            with self.lock:
+                if (namespace, key) in self.values:
+                    self.hits[namespace] += 1
+                    return self.values[(namespace, key)]  # type: ignore
+            value = lookup()
+            with self.lock:
+                self.misses[namespace] += 1
+                self.values[(namespace, key)] = value
+                return value
+
+    def __str__(self) -> str:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return ", ".join(
+            "{} {} hits/{} misses".format(
+                namespace, self.hits[namespace], self.misses[namespace]
+            )
+            for namespace in namespaces
+        )
+
+
+# the session of the current thread, tasks of the taskmanager run in their own threads
+_local = threading.local()
+
+
+def get_sync_session() -> Optional[SyncSession]:
+    """Return the `sync_session()` of the current thread, if there is one."""
+    return getattr(_local, "sync_session", None)
+
+
+@contextlib.contextmanager
+def sync_session(
+    log: logging.Logger = logger, session: Optional[SyncSession] = None
+) -> Iterator[SyncSession]:
+    """
+    Memoize the lookups of `memoize()` in this thread until the block is left, then log the hits
+    and misses.
+
+    Nested blocks use the session of the outermost one. Passing `session` joins the session of
+    another thread, which logs it.
+    """
+    current = get_sync_session()
+    if current is not None:
+        yield current
+        return
+    own = session is None
+    _local.sync_session = session = session or SyncSession()
+    try:
+        yield session
+    finally:
+        _local.sync_session = None
+        if own and (session.hits or session.misses):
+            log.info("NetBox reference lookups: %s", session)
+
+
+def memoize(namespace: str, key: Any, lookup: Callable[[], T]) -> T:
+    """Return `lookup()`, remembered for the current `sync_session()` if there is one."""
+    session = get_sync_session()
+    if session is None:
+        return lookup()
+    return session.get(namespace, key, lookup)
+
+
+def run_concurrently(
+    function: Callable[[T], Any], items: Iterable[T], workers: Optional[int] = None
+) -> int:
+    """
+    Call `function` for every item in `workers` threads (`NETBOX_WORKERS` by default).
+
+    Used to fetch many objects from NetBox at once; the requests of all threads share the rate
+    limit of the client and the `sync_session()` of the calling thread. Exceptions are logged
+    and counted, so one failing object doesn't stop the others. Returns the number of failed items.
+    """
+    items = list(items)
+    if workers is None:
+        workers = settings.NETBOX_WORKERS
+    workers = min(workers, len(items))
+    failures = 0
+    lock = threading.Lock()
+
+    def call(item: T) -> None:
+        nonlocal failures
+        try:
+            function(item)
+        except Exception:
+            logger.exception("Fetching %s from NetBox failed", item)
+            with lock:
+                failures += 1
+
+    if workers <= 1:
+        for item in items:
+            call(item)
+        return failures
+
+    pending: "queue.Queue[T]" = queue.Queue()
+    for item in items:
+        pending.put(item)
+    session = get_sync_session()
+
+    def worker() -> None:
+        try:
+            with contextlib.ExitStack() as stack:
+                if session is not None:
+                    stack.enter_context(sync_session(session=session))
+                while True:
+                    try:
+                        item = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    call(item)
+        finally:
+            # every thread got its own database connections
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=worker, name="netbox-{}".format(i))
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return failures
+
 
 class REST:
+    # methods which are retried on server errors, see `send()`
+    IDEMPOTENT_METHODS = ("GET", "PATCH", "DELETE")
+
     def __init__(self, host: str, token: str):
         self.base_url = "{}/api".format(host)
+        self.graphql_url = "{}/graphql/".format(host)
 
         # Create HTTP connection pool
         self.s = requests.Session()
@@ -56,14 +571,85 @@ class REST:
 
         self.s.headers.update(headers)
 
+        # one connection per worker thread of `run_concurrently()`, retries are done by `send()`
+        adapter = HTTPAdapter(
+            pool_maxsize=max(settings.NETBOX_WORKERS, 1), max_retries=0
+        )
+        self.s.mount("http://", adapter)
+        self.s.mount("https://", adapter)
+
+        self.rate_limiter = RateLimiter(get_rate_limit)
+        self.stats = RequestStats()
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None,
+    ) -> requests.Response:
+        """
+        Send a request, retrying it with exponential backoff when NetBox is overloaded.
+
+        Requests are rate limited (see `RateLimiter`) and time out after `NETBOX_TIMEOUT` seconds.
+        Responses with status 429 are retried for all methods, server errors and connection
+        problems only for the idempotent ones; `idempotent` overrides what the method implies.
+        """
+        if idempotent is None:
+            idempotent = method in self.IDEMPOTENT_METHODS
+        endpoint = RequestStats.get_endpoint(method, url)
+        body = None if data is None else json.dumps(data)
+        attempt = 0
+        while True:
+            self.rate_limiter.wait()
+            request = requests.Request(method, url, data=body)
+            prepared_request = self.s.prepare_request(request)
+            started = time.monotonic()
+            try:
+                r = self.s.send(prepared_request, timeout=settings.NETBOX_TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout):
+                self.stats.observe(endpoint, time.monotonic() - started, None)
+                if not idempotent or attempt >= settings.NETBOX_RETRIES:
+                    raise
+                delay = self.get_backoff(attempt)
+                logger.warning(
+                    "HTTP Request failed: %s - %s, retrying in %.1fs",
+                    method,
+                    url,
+                    delay,
+                    exc_info=True,
+                )
+            else:
+                self.stats.observe(endpoint, time.monotonic() - started, r.status_code)
+                retry = r.status_code == 429 or (r.status_code >= 500 and idempotent)
+                if not retry or attempt >= settings.NETBOX_RETRIES:
+                    return r
+                delay = self.get_backoff(attempt, r.headers.get("Retry-After"))
+                logger.warning(
+                    "HTTP Response: %s - %s - %s, retrying in %.1fs",
+                    r.status_code,
+                    r.reason,
+                    url,
+                    delay,
+                )
+            self.stats.retried(endpoint)
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def get_backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+        """Return the seconds to wait before the next attempt, at most `MAX_BACKOFF`."""
+        delay = settings.NETBOX_BACKOFF * 2**attempt
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        return float(min(delay, MAX_BACKOFF))
+
     def uploader(self, data: Dict[str, Any], url: str) -> Dict[str, Any]:
         method = "POST"
 
         logger.debug("HTTP Request: %s - %s - %s", method, url, data)
 
-        request = requests.Request(method, url, data=json.dumps(data))
-        prepared_request = self.s.prepare_request(request)
-        r = self.s.send(prepared_request)
+        r = self.send(method, url, data)
         if r.status_code != 201:
             logger.warning(
                 "HTTP Response: %s - %s - %s", r.status_code, r.reason, r.text
@@ -77,9 +663,22 @@ class REST:
 
         logger.debug("HTTP Request: %s - %s - %s", method, url, data)
 
-        request = requests.Request(method, url, data=json.dumps(data))
-        prepared_request = self.s.prepare_request(request)
-        r = self.s.send(prepared_request)
+        r = self.send(method, url, data)
+        if r.status_code != 200:
+            logger.warning(
+                "HTTP Response: %s - %s - %s", r.status_code, r.reason, r.text
+            )
+        r.raise_for_status()
+
+        return r.json()  # type: ignore
+
+    def querier(self, data: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """POST a read-only query, retried like a GET request."""
+        method = "POST"
+
+        logger.debug("HTTP Request: %s - %s - %s", method, url, data)
+
+        r = self.send(method, url, data, idempotent=True)
         if r.status_code != 200:
             logger.warning(
                 "HTTP Response: %s - %s - %s", r.status_code, r.reason, r.text
@@ -93,9 +692,7 @@ class REST:
 
         logger.debug("HTTP Request: %s - %s", method, url)
 
-        request = requests.Request(method, url)
-        prepared_request = self.s.prepare_request(request)
-        r = self.s.send(prepared_request)
+        r = self.send(method, url)
 
         if r.status_code != 200:
             logger.warning(
@@ -110,9 +707,7 @@ class REST:
 
         logger.warning("HTTP Request: %s - %s", method, url)
 
-        request = requests.Request(method, url)
-        prepared_request = self.s.prepare_request(request)
-        r = self.s.send(prepared_request)
+        r = self.send(method, url)
         if r.status_code != 204:
             logger.warning(
                 "HTTP Response: %s - %s - %s", r.status_code, r.reason, r.text
@@ -134,6 +729,88 @@ class Netbox(REST):
             cls.__object = Netbox(settings.NETBOX_URL, settings.NETBOX_TOKEN)
         return cls.__object
 
+    def fetch_all(
+        self, path: str, params: Sequence[Tuple[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Fetch all pages of a listing with `BULK_PAGE_SIZE` objects per request."""
+        query = urllib.parse.urlencode(list(params) + [("limit", BULK_PAGE_SIZE)])  # type: ignore
+        url = f"{self.base_url}{path}?{query}"
+        logger.debug("Fetching all objects from %s", url)
+        data = self.fetcher(url)
+        results = data["results"]
+        url = data["next"]
+        while url:
+            data = self.fetcher(url)
+            results.extend(data["results"])
+            url = data["next"]
+        return results  # type: ignore
+
+    def fetch_bulk(
+        self, path: str, name: str, ids: Iterable[int]
+    ) -> List[Dict[str, Any]]:
+        """Fetch the objects matching any of the IDs with the multi-value filter `name`."""
+        ids = sorted(set(ids))
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(ids), BULK_FILTER_SIZE):
+            chunk = ids[start : start + BULK_FILTER_SIZE]  # noqa: E203
+            results.extend(self.fetch_all(path, [(name, id) for id in chunk]))
+        return results
+
+    def fetch_last_updated(self, path: str) -> Optional[datetime.datetime]:
+        """Return the latest `last_updated` timestamp of the objects of a listing."""
+        url = (
+            f"{self.base_url}{path}?ordering=-last_updated&limit=1&fields=last_updated"
+        )
+        logger.debug("Fetching last update from %s", url)
+        data = self.fetcher(url)
+        if not data["results"]:
+            return None
+        return parse_datetime(data["results"][0]["last_updated"])
+
+    def fetch_changed(
+        self, paths: Iterable[str], since: datetime.datetime
+    ) -> Dict[str, Set[int]]:
+        """
+        Return the IDs of the objects changed since `since` by type (see `get_changed_object()`).
+
+        Only the fields needed to find the changed objects are requested.
+        """
+        changed: Dict[str, Set[int]] = defaultdict(set)
+        for path in paths:
+            params = [
+                ("last_updated__gte", since.isoformat()),
+                ("fields", ",".join(CHANGE_LISTINGS[path])),
+            ]
+            for obj in self.fetch_all(path, params):
+                changed_object = get_changed_object(path, obj)
+                if changed_object is not None:
+                    changed[changed_object[0]].add(changed_object[1])
+        return changed
+
+    def fetch_devices(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return self.fetch_bulk("/dcim/devices/", "id", ids)
+
+    def fetch_vms(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return self.fetch_bulk("/virtualization/virtual-machines/", "id", ids)
+
+    def fetch_interfaces_by_devices(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return self.fetch_bulk("/dcim/interfaces/", "device_id", ids)
+
+    def fetch_vm_interfaces_by_vms(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return self.fetch_bulk("/virtualization/interfaces/", "virtual_machine_id", ids)
+
+    def fetch_ips_by_devices(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return self.fetch_bulk("/ipam/ip-addresses/", "device_id", ids)
+
+    def fetch_ips_by_vms(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return self.fetch_bulk("/ipam/ip-addresses/", "virtual_machine_id", ids)
+
+    def fetch_device_types(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return self.fetch_bulk("/dcim/device-types/", "id", ids)
+
+    def fetch_manufacturers(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return self.fetch_bulk("/dcim/manufacturers/", "id", ids)
+
     def fetch_device_roles(self) -> List[Dict[str, Any]]:
         url = f"{self.base_url}/dcim/device-roles/"
         logger.debug(f"Fetching device roles from {url}")
@@ -217,6 +894,26 @@ class Netbox(REST):
         data = self.fetcher(url)
         return data
 
+    def fetch_graphql(
+        self, query: str, variables: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a GraphQL query and return its data.
+
+        :raises ValueError: In case NetBox reports errors for the query.
+        """
+        logger.debug("Querying %s", self.graphql_url)
+        data = self.querier(
+            {"query": query, "variables": variables or {}}, self.graphql_url
+        )
+        if data.get("errors"):
+            raise ValueError(
+                "NetBox GraphQL query failed: {}".format(
+                    "; ".join(error.get("message", "") for error in data["errors"])
+                )
+            )
+        return data["data"]  # type: ignore
+
     def fetch_manufacturer(self, id: int) -> Dict[str, Any]:
         url = f"{self.base_url}/dcim/manufacturers/{id}/"
         logger.debug("Fetch manufacturer data from %s", url)
@@ -665,3 +1362,213 @@ class Netbox(REST):
         logger.debug(f"Fetching cable from {url}")
         data = self.fetcher(url)
         return data["results"]
+
+
+class NetboxLookup:
+    """
+    NetBox data of a machine as used by `Machine.fetch_netbox()`, requested object by object.
+    """
+
+    def __init__(self, api: Netbox):
+        self.api = api
+
+    @staticmethod
+    def get_object(
+        kind: str, fetch: Callable[[int], Dict[str, Any]], id: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the object fetched with `fetch`, None if it doesn't exist.
+
+        :raises HTTPError: In case any HTTP code except 200 and 404 is returned.
+        """
+        try:
+            return fetch(id)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                logger.info("Fetching %s from NetBox failed with status 404.", kind)
+                return None
+            raise e
+
+    def get_record(self, virtual: bool, id: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the device or virtual machine, None if it doesn't exist.
+
+        :raises HTTPError: In case any HTTP code except 200 and 404 is returned.
+        """
+        if virtual:
+            return self.get_object("VM", self.api.fetch_vm, id)
+        return self.get_object("Device", self.api.fetch_device, id)
+
+    def get_device_type(self, id: int) -> Optional[Dict[str, Any]]:
+        return self.get_object("DeviceType", self.api.fetch_device_type, id)
+
+    def get_manufacturer(self, id: int) -> Optional[Dict[str, Any]]:
+        return self.get_object("Manufacturer", self.api.fetch_manufacturer, id)
+
+    def get_interfaces(self, virtual: bool, id: int) -> List[Dict[str, Any]]:
+        """Return the interfaces of a virtual machine or the non-management interfaces of a device."""
+        if virtual:
+            return self.api.check_vm_interface_by_id(id)
+        return self.api.check_interface_no_mgmt_by_id(id)
+
+    def get_mgmt_interfaces(self, id: int) -> List[Dict[str, Any]]:
+        return self.api.check_interface_mgmt_by_id(id)
+
+    def get_ips(
+        self,
+        virtual: bool,
+        interface_id: int,
+        family: Optional[Literal[4, 6]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return the IP addresses of an interface, only the ones of `family` if it is given."""
+        if family is None:
+            if virtual:
+                return self.api.check_ip_by_vm_interface(interface_id)
+            return self.api.check_ip_by_interface(interface_id)
+        if virtual:
+            return self.api.check_ip_by_vm_interface_family(interface_id, family)
+        return self.api.check_ip_by_interface_family(interface_id, family)
+
+
+class NetboxIndex(NetboxLookup):
+    """
+    NetBox data of many machines, fetched with a few bulk listings and indexed by ID.
+
+    Devices, virtual machines, their interfaces and IP addresses are fetched with multi-value
+    filters (see `Netbox.fetch_bulk()`), so syncing a batch of machines takes six listings
+    instead of 10-20 requests per machine.
+    """
+
+    def __init__(self, api: Netbox):
+        super().__init__(api)
+        self.records: Dict[Tuple[bool, int], Dict[str, Any]] = {}
+        self.interfaces: Dict[Tuple[bool, int], List[Dict[str, Any]]] = defaultdict(
+            list
+        )
+        self.ips: Dict[Tuple[bool, int], List[Dict[str, Any]]] = defaultdict(list)
+        self.device_types: Dict[int, Dict[str, Any]] = {}
+        self.manufacturers: Dict[int, Dict[str, Any]] = {}
+
+    @classmethod
+    def fetch(
+        cls, api: Netbox, device_ids: Iterable[int], vm_ids: Iterable[int]
+    ) -> "NetboxIndex":
+        device_ids = list(device_ids)
+        vm_ids = list(vm_ids)
+        index = cls(api)
+        if device_ids:
+            index.add_records(False, api.fetch_devices(device_ids))
+            index.add_interfaces(False, api.fetch_interfaces_by_devices(device_ids))
+            index.add_ips(api.fetch_ips_by_devices(device_ids))
+        if vm_ids:
+            index.add_records(True, api.fetch_vms(vm_ids))
+            index.add_interfaces(True, api.fetch_vm_interfaces_by_vms(vm_ids))
+            index.add_ips(api.fetch_ips_by_vms(vm_ids))
+        return index
+
+    @classmethod
+    def fetch_graphql(
+        cls, api: Netbox, records: Iterable[Tuple[bool, int]]
+    ) -> "NetboxIndex":
+        """
+        Fetch devices and virtual machines by `(virtual, id)` with their interfaces and IP
+        addresses in a single GraphQL query.
+
+        :raises ValueError: In case NetBox reports errors for the query, e.g. a missing object.
+        """
+        fields = []
+        aliases: Dict[str, bool] = {}
+        for virtual, id in dict.fromkeys(records):
+            alias = "{}{}".format("vm" if virtual else "device", id)
+            aliases[alias] = virtual
+            fields.append(
+                "%s: %s(id: %d) { %s }"
+                % (
+                    alias,
+                    "virtual_machine" if virtual else "device",
+                    id,
+                    GRAPHQL_FIELDS[virtual],
+                )
+            )
+        index = cls(api)
+        if not fields:
+            return index
+        data = api.fetch_graphql("query { %s }" % " ".join(fields))
+        for alias, virtual in aliases.items():
+            if data.get(alias) is None:
+                continue
+            record, interfaces, ips = from_graphql(virtual, data[alias])
+            index.add_records(virtual, [record])
+            index.add_interfaces(virtual, interfaces)
+            index.add_ips(ips)
+        return index
+
+    def add_device_types(self, device_types: Iterable[Dict[str, Any]]) -> None:
+        for device_type in device_types:
+            self.device_types[device_type["id"]] = device_type
+
+    def add_manufacturers(self, manufacturers: Iterable[Dict[str, Any]]) -> None:
+        for manufacturer in manufacturers:
+            self.manufacturers[manufacturer["id"]] = manufacturer
+
+    def add_records(self, virtual: bool, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.records[(virtual, record["id"])] = record
+
+    def add_interfaces(
+        self, virtual: bool, interfaces: Iterable[Dict[str, Any]]
+    ) -> None:
+        parent = "virtual_machine" if virtual else "device"
+        for interface in interfaces:
+            self.interfaces[(virtual, interface[parent]["id"])].append(interface)
+
+    def add_ips(self, ips: Iterable[Dict[str, Any]]) -> None:
+        for ip in ips:
+            object_type = ip.get("assigned_object_type")
+            if object_type not in ("dcim.interface", "virtualization.vminterface"):
+                continue
+            virtual = object_type == "virtualization.vminterface"
+            self.ips[(virtual, ip["assigned_object_id"])].append(ip)
+
+    def get_record(self, virtual: bool, id: int) -> Optional[Dict[str, Any]]:
+        record = self.records.get((virtual, id))
+        if record is None:
+            logger.info("%s %s not found in NetBox.", "VM" if virtual else "Device", id)
+        return record
+
+    def get_device_type(self, id: int) -> Optional[Dict[str, Any]]:
+        device_type = self.device_types.get(id)
+        if device_type is None:
+            logger.info("DeviceType %s not found in NetBox.", id)
+        return device_type
+
+    def get_manufacturer(self, id: int) -> Optional[Dict[str, Any]]:
+        manufacturer = self.manufacturers.get(id)
+        if manufacturer is None:
+            logger.info("Manufacturer %s not found in NetBox.", id)
+        return manufacturer
+
+    def get_interfaces(self, virtual: bool, id: int) -> List[Dict[str, Any]]:
+        interfaces = self.interfaces.get((virtual, id), [])
+        if virtual:
+            return list(interfaces)
+        return [interface for interface in interfaces if not interface.get("mgmt_only")]
+
+    def get_mgmt_interfaces(self, id: int) -> List[Dict[str, Any]]:
+        return [
+            interface
+            for interface in self.interfaces.get((False, id), [])
+            if interface.get("mgmt_only")
+        ]
+
+    def get_ips(
+        self,
+        virtual: bool,
+        interface_id: int,
+        family: Optional[Literal[4, 6]] = None,
+    ) -> List[Dict[str, Any]]:
+        return [
+            ip
+            for ip in self.ips.get((virtual, interface_id), [])
+            if family is None or (ip.get("family") or {}).get("value") == family
+        ]
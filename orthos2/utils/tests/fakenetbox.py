@@ -0,0 +1,465 @@
+"""
+In-process stand-in for the NetBox REST API, for tests and benchmarks of the NetBox sync.
+
+`FakeNetbox` keeps NetBox objects in tables and answers the requests of `orthos2.utils.netbox.Netbox` as the
+transport adapter of its session, so the client (retries, rate limiting, request statistics) runs unchanged. It
+supports the detail URLs, filters and pagination the client uses; unknown filters are answered with status 400, so
+a listing isn't silently unfiltered. GraphQL isn't supported, the client falls back to REST.
+
+`seed_fleet()` adds the NetBox objects of a fleet built with `orthos2.api.tests.fleet.build_fleet()`.
+"""
+
+import datetime
+import http
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from django.utils.dateparse import parse_datetime
+from requests.adapters import BaseAdapter
+
+from orthos2.api.tests.fleet import FLEET_PREFIX
+from orthos2.data.models import (
+    BMC,
+    Enclosure,
+    Machine,
+    NetworkInterface,
+    RemotePowerDevice,
+)
+from orthos2.utils.netbox import Netbox
+
+FAKE_NETBOX_URL = "http://netbox.fake"
+
+# page size of listings without "limit" and the largest one, like NetBox's PAGINATE_COUNT and MAX_PAGE_SIZE
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# query parameters which don't filter
+CONTROL_PARAMETERS = ("limit", "offset", "ordering", "fields", "brief")
+
+# filters comparing a field of the objects
+FIELD_FILTERS = ("id", "name", "address", "dns_name", "serial", "model", "slug")
+
+DEVICE_TYPES = 3
+
+DETAIL_PATH = re.compile(r"^(/.+/)(\d+)/$")
+
+
+def get_timestamp(time: Optional[datetime.datetime] = None) -> str:
+    """Return `time` (by default now) like NetBox's `last_updated`."""
+    return (time or datetime.datetime.now(datetime.timezone.utc)).isoformat()
+
+
+class FakeNetbox(BaseAdapter):
+    """
+    NetBox objects by listing path (e.g. "/dcim/devices/") and ID, served to a `Netbox` client.
+
+    Every request sleeps `latency` seconds to simulate the network and NetBox itself; the requests are recorded in
+    `requests` as "METHOD URL".
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__()
+        self.latency = latency
+        self.tables: Dict[str, Dict[int, Dict[str, Any]]] = defaultdict(dict)
+        self.requests: List[str] = []
+        self.next_ids: Dict[str, int] = defaultdict(lambda: 1)
+        self.indexes: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+        self.lock = threading.Lock()
+
+    def client(self) -> Netbox:
+        """Return a NetBox client whose requests are answered by this fake."""
+        api = Netbox(FAKE_NETBOX_URL, "token")
+        api.s.mount(FAKE_NETBOX_URL, self)
+        return api
+
+    def add(self, path: str, obj: Dict[str, Any]) -> Dict[str, Any]:
+        """Add an object to a listing, with the next free ID if it has none."""
+        if "id" not in obj:
+            obj["id"] = self.next_ids[path]
+        self.next_ids[path] = max(self.next_ids[path], obj["id"] + 1)
+        obj.setdefault("display", obj.get("name") or obj.get("model") or str(obj["id"]))
+        obj.setdefault("last_updated", get_timestamp())
+        with self.lock:
+            self.tables[path][obj["id"]] = obj
+            self.indexes.clear()
+        return obj
+
+    def update(self, path: str, id: int, **fields: Any) -> None:
+        """Change fields of an object and its `last_updated`, like an edit in NetBox."""
+        with self.lock:
+            self.tables[path][id].update(fields, last_updated=get_timestamp())
+            self.indexes.clear()
+
+    def count(self, path: Optional[str] = None) -> int:
+        """Return the number of requests, only the ones of a listing and its detail URLs if `path` is given."""
+        if path is None:
+            return len(self.requests)
+        prefix = FAKE_NETBOX_URL + "/api" + path
+        return sum(
+            1
+            for request in self.requests
+            if request.split(" ", 1)[1].startswith(prefix)
+        )
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        if self.latency:
+            time.sleep(self.latency)
+        url = request.url or ""
+        if isinstance(url, bytes):
+            url = url.decode("utf-8")
+        parts = urlsplit(url)
+        with self.lock:
+            self.requests.append("{} {}".format(request.method, url))
+            status, data = self.handle(
+                request.method or "GET", parts.path, parse_qsl(parts.query)
+            )
+            if status == 200 and data.get("next") is not None:
+                data["next"] = "{}://{}{}?{}".format(
+                    parts.scheme, parts.netloc, parts.path, data["next"]
+                )
+        response = requests.Response()
+        response.status_code = status
+        response.reason = http.HTTPStatus(status).phrase
+        response._content = json.dumps(data).encode("utf-8")
+        response.headers["Content-Type"] = "application/json"
+        response.encoding = "utf-8"
+        response.url = request.url  # type: ignore
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+    def handle(
+        self, method: str, path: str, params: Sequence[Tuple[str, str]]
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Return the status and data of a request; listings get the query string of the next page as "next"."""
+        if method != "GET" or not path.startswith("/api/"):
+            # the fake is read-only, GraphQL queries fall back to REST on the 404
+            return 404, {"detail": "Not found."}
+        path = path[len("/api") :]  # noqa: E203
+        match = DETAIL_PATH.match(path)
+        if match:
+            obj = self.tables.get(match.group(1), {}).get(int(match.group(2)))
+            if obj is None:
+                return 404, {"detail": "Not found."}
+            return 200, obj
+        if path not in self.tables:
+            return 404, {"detail": "Not found."}
+
+        filters: Dict[str, List[str]] = defaultdict(list)
+        for key, value in params:
+            if key not in CONTROL_PARAMETERS:
+                filters[key].append(value)
+        try:
+            objects = self.filter(path, filters)
+        except KeyError as e:
+            return 400, {e.args[0]: ["Unknown filter field."]}
+
+        controls = dict(params)
+        ordering = controls.get("ordering", "id")
+        field = ordering.lstrip("-")
+        objects.sort(
+            key=lambda obj: (obj.get(field) is None, obj.get(field) or 0),
+            reverse=ordering.startswith("-"),
+        )
+        limit = min(
+            int(controls.get("limit", DEFAULT_PAGE_SIZE)) or MAX_PAGE_SIZE,
+            MAX_PAGE_SIZE,
+        )
+        offset = int(controls.get("offset", 0))
+        page = objects[offset : offset + limit]  # noqa: E203
+        if "fields" in controls:
+            fields = controls["fields"].split(",")
+            page = [{key: obj[key] for key in fields if key in obj} for obj in page]
+        next_page = None
+        if offset + limit < len(objects):
+            next_params = [(key, value) for key, value in params if key != "offset"]
+            next_page = urlencode(next_params + [("offset", offset + limit)])
+        return 200, {
+            "count": len(objects),
+            "next": next_page,
+            "previous": None,
+            "results": page,
+        }
+
+    def filter(self, path: str, filters: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        """
+        Return the objects of a listing matching all filters, with any of their values.
+
+        :raises KeyError: In case of an unknown filter.
+        """
+        candidates: Optional[List[Dict[str, Any]]] = None
+        since = filters.pop("last_updated__gte", None)
+        for key, values in sorted(filters.items(), key=lambda item: item[0] != "id"):
+            if candidates is None:
+                index = self.get_index(path, key)
+                matches = {
+                    id(obj): obj
+                    for value in values
+                    for obj in index.get(self.normalize(key, value), [])
+                }
+                candidates = sorted(matches.values(), key=lambda obj: obj["id"])
+            else:
+                wanted = {self.normalize(key, value) for value in values}
+                candidates = [
+                    obj
+                    for obj in candidates
+                    if self.get_value(path, key, obj) in wanted
+                ]
+        if candidates is None:
+            candidates = list(self.tables[path].values())
+        if since:
+            start = max(parse_datetime(value) for value in since)  # type: ignore
+            candidates = [obj for obj in candidates if parse_datetime(obj["last_updated"]) >= start]  # type: ignore
+        return candidates
+
+    def get_index(self, path: str, key: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Return the objects of a listing by their value for a filter, built on first use."""
+        index = self.indexes.get((path, key))
+        if index is None:
+            index = defaultdict(list)
+            for obj in self.tables[path].values():
+                index[self.get_value(path, key, obj)].append(obj)  # type: ignore
+            self.indexes[(path, key)] = index
+        return index
+
+    @staticmethod
+    def normalize(key: str, value: str) -> str:
+        return value.upper() if key == "mac_address" else value
+
+    @staticmethod
+    def get_value(path: str, key: str, obj: Dict[str, Any]) -> Optional[str]:
+        """
+        Return the value of an object compared with the values of a filter, as a string like query values.
+
+        :raises KeyError: In case of an unknown filter.
+        """
+        value: Any
+        if key in ("device_id", "virtual_machine_id", "manufacturer_id"):
+            parent = obj
+            if path == "/ipam/ip-addresses/":
+                parent = obj.get("assigned_object") or {}
+            value = (parent.get(key[: -len("_id")]) or {}).get("id")
+        elif key in ("interface_id", "vminterface_id"):
+            object_type = (
+                "dcim.interface"
+                if key == "interface_id"
+                else "virtualization.vminterface"
+            )
+            value = (
+                obj.get("assigned_object_id")
+                if obj.get("assigned_object_type") == object_type
+                else None
+            )
+        elif key == "family":
+            value = (obj.get("family") or {}).get("value")
+        elif key == "mac_address":
+            value = (
+                (obj.get("primary_mac_address") or {}).get("mac_address") or ""
+            ).upper()
+        elif key in ("mgmt_only",) or key in FIELD_FILTERS:
+            value = obj.get(key)
+        else:
+            raise KeyError(key)
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return None if value is None else str(value)
+
+
+def get_reference(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the nested representation NetBox uses for related objects."""
+    return {"id": obj["id"], "display": obj["display"]}
+
+
+def seed_fleet(netbox: FakeNetbox, machines: Sequence[Machine]) -> None:
+    """
+    Add the NetBox objects of fleet machines and link the machines, their enclosures and the remote power devices.
+
+    Machines of virtual systems become virtual machines, the others devices of `DEVICE_TYPES` device types with a
+    management interface for their BMC. Enclosures become chassis devices, the fleet remote power devices devices with
+    a management interface. The network interfaces become interfaces, the first one with an IPv4 and an IPv6 address.
+    All addresses are in 10.0.0.0/16 and 2001:db8::/64, the networks the fleet domain needs for syncing them.
+    """
+    site = {"id": 1, "display": "Fleet DC"}
+    location = {"id": 1, "display": "Room 1"}
+    manufacturer = netbox.add(
+        "/dcim/manufacturers/",
+        {"name": "Fleet Inc.", "slug": "fleet", "description": ""},
+    )
+    device_types = [
+        netbox.add(
+            "/dcim/device-types/",
+            {
+                "model": "Fleet {}000".format(i + 1),
+                "slug": "fleet-{}000".format(i + 1),
+                "manufacturer": get_reference(manufacturer),
+                "description": "",
+            },
+        )
+        for i in range(DEVICE_TYPES)
+    ]
+
+    def add_record(virtual: bool, name: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        path = "/virtualization/virtual-machines/" if virtual else "/dcim/devices/"
+        record = {
+            "name": name,
+            "description": "",
+            "serial": "",
+            "custom_fields": {},
+            "primary_ip4": None,
+        }
+        record.update(
+            primary_ip6=None,
+            oob_ip=None,
+            site=site,
+            location=location,
+            rack=None,
+            position=None,
+        )
+        record.update(fields)
+        return netbox.add(path, record)
+
+    def add_interface(
+        virtual: bool, record: Dict[str, Any], name: str, mac: str, **fields: Any
+    ) -> Dict[str, Any]:
+        path = "/virtualization/interfaces/" if virtual else "/dcim/interfaces/"
+        interface = {
+            "virtual_machine" if virtual else "device": get_reference(record),
+            "name": name,
+            "mgmt_only": False,
+            "type": None
+            if virtual
+            else {"value": "1000base-t", "label": "1000BASE-T (1GE)"},
+            "primary_mac_address": {"mac_address": mac, "display": mac},
+            "custom_fields": {},
+        }
+        interface.update(fields)
+        return netbox.add(path, interface)
+
+    def add_ip(
+        virtual: bool,
+        record: Dict[str, Any],
+        interface: Dict[str, Any],
+        address: str,
+        dns_name: str = "",
+    ) -> Dict[str, Any]:
+        return netbox.add(
+            "/ipam/ip-addresses/",
+            {
+                "address": address,
+                "display": address,
+                "dns_name": dns_name,
+                "family": {"value": 6 if ":" in address else 4},
+                "assigned_object_type": "virtualization.vminterface"
+                if virtual
+                else "dcim.interface",
+                "assigned_object_id": interface["id"],
+                "assigned_object": {
+                    "id": interface["id"],
+                    "virtual_machine" if virtual else "device": get_reference(record),
+                },
+            },
+        )
+
+    racks: Dict[int, Dict[str, Any]] = {}
+    enclosures: List[Enclosure] = []
+    for enclosure in (
+        Enclosure.objects.filter(machine__in=machines).distinct().order_by("pk")
+    ):
+        rack = {"id": len(racks) + 1, "display": "Rack {}".format(len(racks) + 1)}
+        racks[enclosure.pk] = rack
+        chassis = add_record(
+            False,
+            enclosure.name,
+            {"description": "Chassis", "rack": rack, "position": 1.0},
+        )
+        enclosure.netbox_id = chassis["id"]
+        enclosures.append(enclosure)
+    Enclosure.objects.bulk_update(enclosures, ["netbox_id"])
+
+    interfaces_by_machine: Dict[int, List[NetworkInterface]] = defaultdict(list)
+    for network_interface in NetworkInterface.objects.filter(
+        machine__in=machines
+    ).order_by("pk"):
+        interfaces_by_machine[network_interface.machine_id].append(network_interface)
+    bmcs = {bmc.machine_id: bmc for bmc in BMC.objects.filter(machine__in=machines)}
+
+    for i, machine in enumerate(machines):
+        virtual = machine.system.virtual
+        record = add_record(
+            virtual,
+            machine.fqdn,
+            {
+                "description": "Fleet machine {}".format(i),
+                "serial": "SN-{}".format(i),
+                "device_type": None
+                if virtual
+                else get_reference(device_types[i % DEVICE_TYPES]),
+                "custom_fields": {
+                    "arch": "x86_64",
+                    "product_code": "PC-{}".format(i % DEVICE_TYPES),
+                },
+                "rack": None if virtual else racks.get(machine.enclosure_id),
+                "position": None if virtual else float(i % 42 + 1),
+            },
+        )
+        machine.netbox_id = record["id"]
+        primary_ips: Dict[str, Any] = {}
+        for j, network_interface in enumerate(interfaces_by_machine[machine.pk]):
+            interface = add_interface(
+                virtual, record, network_interface.name, network_interface.mac_address
+            )
+            if j == 0:
+                ipv4 = add_ip(
+                    virtual,
+                    record,
+                    interface,
+                    "10.0.{}.{}/16".format(i // 250, i % 250 + 1),
+                )
+                ipv6 = add_ip(
+                    virtual, record, interface, "2001:db8::{:x}/64".format(i + 1)
+                )
+                primary_ips = {
+                    "primary_ip4": get_reference(ipv4),
+                    "primary_ip6": get_reference(ipv6),
+                }
+        bmc = bmcs.get(machine.pk)
+        if bmc is not None and not virtual:
+            interface = add_interface(
+                False,
+                record,
+                "bmc",
+                bmc.mac,
+                mgmt_only=True,
+                custom_fields={"fence_agent": bmc.fence_agent.name},
+            )
+            oob = add_ip(
+                False,
+                record,
+                interface,
+                "10.0.{}.{}/32".format(100 + i // 250, i % 250 + 1),
+                bmc.fqdn,
+            )
+            primary_ips["oob_ip"] = get_reference(oob)
+        record.update(primary_ips)
+    Machine.objects.bulk_update(machines, ["netbox_id"], batch_size=1000)
+
+    devices: List[RemotePowerDevice] = []
+    for remote_power_device in RemotePowerDevice.objects.filter(
+        fqdn__startswith=FLEET_PREFIX
+    ).order_by("pk"):
+        record = add_record(False, remote_power_device.fqdn, {"description": "PDU"})
+        interface = add_interface(
+            False, record, "mgmt", remote_power_device.mac, mgmt_only=True
+        )
+        add_ip(False, record, interface, "10.0.250.{}/32".format(len(devices) + 1))
+        remote_power_device.netbox_id = record["id"]
+        devices.append(remote_power_device)
+    RemotePowerDevice.objects.bulk_update(devices, ["netbox_id"])
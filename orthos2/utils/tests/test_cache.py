@@ -0,0 +1,173 @@
+from typing import Any, List, cast
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from django.middleware.csrf import get_token
+from django.template import engines
+from django.template.response import SimpleTemplateResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse  # type: ignore
+
+# pylint: disable-next=unused-import
+from orthos2.data import signals  # noqa: F401 (connects the receivers)
+from orthos2.data.models import Architecture, Machine, ServerConfig
+from orthos2.utils import cache as namespaces
+from orthos2.utils.cache import cache_response, get_or_set, invalidate
+
+
+class CacheNamespacesTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.calls: List[str] = []
+
+    def build(self) -> str:
+        self.calls.append("build")
+        return "value {}".format(len(self.calls))
+
+    def test_get_or_set(self) -> None:
+        """Values are cached until their namespace gets invalidated."""
+        self.assertEqual(get_or_set(["test"], "name", self.build), "value 1")
+        self.assertEqual(get_or_set(["test"], "name", self.build), "value 1")
+
+        invalidate("other")
+        self.assertEqual(get_or_set(["test"], "name", self.build), "value 1")
+
+        invalidate("test")
+        self.assertEqual(get_or_set(["test"], "name", self.build), "value 2")
+
+    def test_none_is_cached(self) -> None:
+        get_or_set(["test"], "none", lambda: self.calls.append("build"))
+        get_or_set(["test"], "none", lambda: self.calls.append("build"))
+
+        self.assertEqual(self.calls, ["build"])
+
+    def test_model_changes(self) -> None:
+        """Saving or deleting objects of registered models invalidates their namespaces."""
+        get_or_set(["architectures"], "name", self.build)
+
+        architecture = Architecture.objects.create(name="riscv64")
+        self.assertEqual(get_or_set(["architectures"], "name", self.build), "value 2")
+
+        architecture.delete()
+        self.assertEqual(get_or_set(["machines"], "name", self.build), "value 3")
+        self.assertEqual(get_or_set(["architectures"], "name", self.build), "value 4")
+
+    @mock.patch.object(namespaces, "is_shared", return_value=True)
+    def test_serverconfig(self, is_shared: mock.Mock) -> None:
+        """Cached server config values follow changes."""
+        manager = ServerConfig.get_server_config_manager()
+        config = ServerConfig.objects.create(key="test.key", value="value")
+        self.assertEqual(manager.cached_by_key("test.key"), "value")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(manager.cached_by_key("test.key"), "value")
+
+        config.value = "changed"
+        config.save()
+        self.assertEqual(manager.cached_by_key("test.key"), "changed")
+
+    def test_serverconfig_per_process(self) -> None:
+        """Server config values aren't cached in a per-process cache."""
+        manager = ServerConfig.get_server_config_manager()
+        ServerConfig.objects.create(key="test.key", value="value")
+        self.assertEqual(manager.cached_by_key("test.key"), "value")
+
+        ServerConfig.objects.filter(key="test.key").update(value="changed")
+        self.assertEqual(manager.cached_by_key("test.key"), "changed")
+
+
+class ApiRootTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get_fqdns(self) -> List[str]:
+        response = self.client.get(reverse("api:root"))
+        return response.json()["data"]["commands"]["info"]["tabcompletion"]
+
+    def test_commands_follow_machines(self) -> None:
+        """The cached command descriptions list the FQDNs of added and deleted machines."""
+        machine = Machine.objects.first()
+        assert machine is not None
+        self.assertIn(machine.fqdn, self.get_fqdns())
+
+        machine.delete()
+
+        self.assertNotIn(machine.fqdn, self.get_fqdns())
+
+
+class CacheResponseTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = RequestFactory()
+        self.calls = 0
+
+    def get(
+        self, user: "User | AnonymousUser", path: str = "/view", **kwargs: Any
+    ) -> HttpRequest:
+        request = self.factory.get(path, **kwargs)
+        request.user = user
+        return request
+
+    def content(self, response: HttpResponseBase) -> bytes:
+        return cast(HttpResponse, response).content
+
+    def view(self, request: HttpRequest) -> HttpResponse:
+        self.calls += 1
+        return HttpResponse("response {}".format(self.calls))
+
+    def test_per_user_class(self) -> None:
+        """Responses are shared by the users of a user class."""
+        view = cache_response("test")(self.view)
+        user = User.objects.create_user(username="user")
+        other = User.objects.create_user(username="other")
+        superuser = User.objects.create_superuser(username="superuser")
+
+        self.assertEqual(self.content(view(self.get(user))), b"response 1")
+        self.assertEqual(self.content(view(self.get(other))), b"response 1")
+        self.assertEqual(self.content(view(self.get(superuser))), b"response 2")
+        self.assertEqual(self.content(view(self.get(AnonymousUser()))), b"response 3")
+        self.assertEqual(
+            self.content(view(self.get(user, "/view?page=2"))), b"response 4"
+        )
+
+        invalidate("test")
+        self.assertEqual(self.content(view(self.get(user))), b"response 5")
+
+    def test_template_response(self) -> None:
+        """Template responses are cached once they are rendered."""
+
+        def template_view(request: HttpRequest) -> SimpleTemplateResponse:
+            self.calls += 1
+            template = engines["django"].from_string("response {{ calls }}")
+            return SimpleTemplateResponse(template, {"calls": 1})  # type: ignore
+
+        view = cache_response("test")(template_view)
+        cast(SimpleTemplateResponse, view(self.get(AnonymousUser()))).render()
+        response = view(self.get(AnonymousUser()))
+
+        self.assertEqual(self.content(response), b"response 1")
+        self.assertEqual(self.calls, 1)
+
+    def test_not_cacheable(self) -> None:
+        """Responses bound to a session or token authenticated requests aren't cached."""
+
+        def csrf_view(request: HttpRequest) -> HttpResponse:
+            get_token(request)
+            return self.view(request)
+
+        view = cache_response("test")(csrf_view)
+        view(self.get(AnonymousUser()))
+        view(self.get(AnonymousUser()))
+
+        view = cache_response("test")(self.view)
+        view(self.get(AnonymousUser(), "/token", HTTP_AUTHORIZATION="Token 123"))
+        view(self.get(AnonymousUser(), "/token", HTTP_AUTHORIZATION="Token 123"))
+
+        self.assertEqual(self.calls, 4)
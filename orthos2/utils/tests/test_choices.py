@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from orthos2.api.forms import MachineAPIForm
+
+# pylint: disable-next=unused-import
+from orthos2.data import signals  # noqa: F401 (connects the receivers)
+from orthos2.data.models import Architecture, Installation, Machine
+from orthos2.frontend.forms.search import SearchForm, get_distributions
+from orthos2.utils import cache as namespaces
+from orthos2.utils.choices import get_architectures
+
+
+class CachedChoicesTest(TestCase):
+    fixtures = [
+        "orthos2/data/fixtures/systems.json",
+        "orthos2/data/fixtures/tests/test_machines.json",
+    ]
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_not_cached_per_process(self) -> None:
+        """A per-process cache doesn't keep choices, other processes may add objects meanwhile."""
+        get_architectures()
+
+        # added by another process, without signal in this one
+        Architecture.objects.bulk_create([Architecture(name="riscv64")])
+
+        architecture = Architecture.objects.get(name="riscv64")
+        form = MachineAPIForm(data={"architecture_id": architecture.pk})
+        form.is_valid()
+        self.assertNotIn("architecture_id", form.errors)
+
+    @mock.patch.object(namespaces, "is_shared", return_value=True)
+    def test_cached_in_shared_cache(self, is_shared: mock.Mock) -> None:
+        """Choices are built once and shared by all forms."""
+        SearchForm().as_p()
+
+        with self.assertNumQueries(0):
+            SearchForm().as_p()
+
+    @mock.patch.object(namespaces, "is_shared", return_value=True)
+    def test_invalidated_on_save(self, is_shared: mock.Mock) -> None:
+        """Saving or deleting an object of a source model drops the cached choices."""
+        get_architectures()
+
+        architecture = Architecture.objects.create(name="riscv64")
+        self.assertIn((architecture.pk, "riscv64"), get_architectures())
+
+        pk = architecture.pk
+        architecture.delete()
+        self.assertNotIn((pk, "riscv64"), get_architectures())
+
+    @mock.patch.object(namespaces, "is_shared", return_value=True)
+    def test_distributions(self, is_shared: mock.Mock) -> None:
+        """The distribution choices follow the installations."""
+        self.assertNotIn(("SLES 16", "SLES 16"), get_distributions())
+
+        installation = Installation.objects.create(
+            machine=Machine.objects.get(fqdn="test.testing.suse.de"),
+            distribution="SLES 16",
+        )
+        self.assertIn(("SLES 16", "SLES 16"), get_distributions())
+
+        installation.delete()
+        self.assertNotIn(("SLES 16", "SLES 16"), get_distributions())
@@ -0,0 +1,269 @@
+"""Tests for the HTTP client of `orthos2.utils.netbox`."""
+
+import threading
+import time
+from typing import List, Optional
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, TestCase
+
+from orthos2 import settings
+from orthos2.data.models import ServerConfig
+from orthos2.utils.netbox import (
+    Netbox,
+    RateLimiter,
+    RequestStats,
+    get_rate_limit,
+    get_sync_session,
+    memoize,
+    run_concurrently,
+    sync_session,
+)
+
+
+def response(status: int, headers: Optional[dict] = None) -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    r.headers.update(headers or {})
+    r._content = b'{"results": [], "next": null}'
+    return r
+
+
+class NetboxClientTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.api = Netbox("http://netbox.example.org", "token")
+        self.api.rate_limiter = RateLimiter(lambda: 0)
+        patcher = mock.patch("orthos2.utils.netbox.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def send(self, *responses: object) -> mock.MagicMock:
+        patcher = mock.patch.object(self.api.s, "send", side_effect=list(responses))
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_timeout(self) -> None:
+        """Every request gets the configured timeout."""
+        send = self.send(response(200))
+
+        self.api.fetcher("http://netbox.example.org/api/dcim/devices/1/")
+
+        self.assertEqual(send.call_args.kwargs["timeout"], settings.NETBOX_TIMEOUT)
+
+    def test_retry_server_error(self) -> None:
+        """GET requests are retried on server errors with exponential backoff."""
+        send = self.send(response(503), response(502), response(200))
+
+        data = self.api.fetcher("http://netbox.example.org/api/dcim/devices/1/")
+
+        self.assertEqual(data, {"results": [], "next": None})
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(
+            [c.args[0] for c in self.sleep.call_args_list],
+            [settings.NETBOX_BACKOFF, settings.NETBOX_BACKOFF * 2],
+        )
+        stats = self.api.stats.snapshot()["GET /dcim/devices/{id}/"]
+        self.assertEqual((stats["count"], stats["errors"], stats["retries"]), (3, 2, 2))
+
+    def test_retry_too_many_requests(self) -> None:
+        """Status 429 is retried for all methods, following Retry-After."""
+        self.send(response(429, {"Retry-After": "7"}), response(201))
+
+        self.api.uploader({"name": "x"}, "http://netbox.example.org/api/dcim/sites/")
+
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_retry_connection_error(self) -> None:
+        """GET requests are retried when NetBox doesn't answer."""
+        send = self.send(requests.ConnectTimeout(), response(200))
+
+        self.api.fetcher("http://netbox.example.org/api/dcim/devices/")
+
+        self.assertEqual(send.call_count, 2)
+
+    def test_no_retry(self) -> None:
+        """Client errors and server errors of POST requests are not retried."""
+        self.send(response(404))
+        with self.assertRaises(requests.HTTPError):
+            self.api.fetcher("http://netbox.example.org/api/dcim/devices/1/")
+
+        self.send(response(500))
+        with self.assertRaises(requests.HTTPError):
+            self.api.uploader({}, "http://netbox.example.org/api/dcim/sites/")
+
+        self.sleep.assert_not_called()
+
+    def test_retry_graphql(self) -> None:
+        """GraphQL queries are read-only POST requests, retried like GET requests."""
+        send = self.send(response(503), response(200))
+
+        self.api.querier({"query": "{}"}, self.api.graphql_url)
+
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(
+            send.call_args.args[0].url, "http://netbox.example.org/graphql/"
+        )
+
+    def test_retries_exhausted(self) -> None:
+        """The last response is returned after `NETBOX_RETRIES` retries."""
+        send = self.send(*[response(503)] * (settings.NETBOX_RETRIES + 1))
+
+        with self.assertRaises(requests.HTTPError):
+            self.api.fetcher("http://netbox.example.org/api/dcim/devices/1/")
+
+        self.assertEqual(send.call_count, settings.NETBOX_RETRIES + 1)
+
+
+class RequestStatsTest(SimpleTestCase):
+    def test_endpoint(self) -> None:
+        get_endpoint = RequestStats.get_endpoint
+        self.assertEqual(
+            get_endpoint("GET", "https://nb/api/dcim/devices/12/?brief=1"),
+            "GET /dcim/devices/{id}/",
+        )
+        self.assertEqual(
+            get_endpoint("GET", "https://nb/api/ipam/ip-addresses/?device_id=3"),
+            "GET /ipam/ip-addresses/",
+        )
+
+    def test_histogram(self) -> None:
+        stats = RequestStats()
+        for seconds in (0.01, 0.2, 0.3, 20):
+            stats.observe("GET /dcim/devices/", seconds, 200)
+        stats.observe("GET /dcim/devices/", 0.01, None)
+
+        entry = stats.snapshot()["GET /dcim/devices/"]
+
+        self.assertEqual(entry["count"], 5)
+        self.assertEqual(entry["errors"], 1)
+        self.assertEqual(entry["le"]["0.05"], 2)
+        self.assertEqual(entry["le"]["0.25"], 3)
+        self.assertEqual(entry["le"]["10.0"], 4)
+        self.assertEqual(entry["le"]["+Inf"], 5)
+
+    def test_log_since(self) -> None:
+        """Only the requests since the snapshot of a task are logged."""
+        stats = RequestStats()
+        stats.observe("GET /dcim/devices/", 1.0, 200)
+        stats.observe("GET /dcim/interfaces/", 1.0, 200)
+        before = stats.snapshot()
+        stats.observe("GET /dcim/devices/", 0.5, 500)
+        stats.observe("GET /ipam/ip-addresses/", 0.25, 200)
+
+        # not `assertLogs()`, test_misc.py disables logging for the whole test run
+        with mock.patch("orthos2.utils.netbox.logger") as logger:
+            stats.log(before)
+
+        self.assertEqual(
+            [call.args[0] % call.args[1:] for call in logger.info.call_args_list],
+            [
+                "NetBox GET /dcim/devices/: 1 requests, 1 errors, 0 retries, 0.500s average",
+                "NetBox GET /ipam/ip-addresses/: 1 requests, 0 errors, 0 retries, 0.250s average",
+            ],
+        )
+
+
+class RateLimiterTest(TestCase):
+    def test_spacing(self) -> None:
+        """Requests are spread to 1/rate seconds."""
+        limiter = RateLimiter(lambda: 4)
+        with mock.patch(
+            "orthos2.utils.netbox.time.monotonic", return_value=100.0
+        ), mock.patch("orthos2.utils.netbox.time.sleep") as sleep:
+            for _ in range(3):
+                limiter.wait()
+
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.25, 0.5])
+
+    def test_server_config(self) -> None:
+        self.assertEqual(get_rate_limit(), 0)
+
+        ServerConfig.objects.create(
+            key="netbox.ratelimit.requestspersecond", value="12.5"
+        )
+        self.assertEqual(get_rate_limit(), 12.5)
+
+
+class RunConcurrentlyTest(SimpleTestCase):
+    def test_bounded(self) -> None:
+        """At most `workers` items are processed at once; failures don't stop the others."""
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+        done: List[int] = []
+
+        def function(item: int) -> None:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+                done.append(item)
+            if item == 3:
+                raise ValueError(item)
+
+        failures = run_concurrently(function, range(20), workers=4)
+
+        self.assertEqual(failures, 1)
+        self.assertEqual(sorted(done), list(range(20)))
+        self.assertLessEqual(peak, 4)
+        self.assertGreater(peak, 1)
+
+
+class SyncSessionTest(SimpleTestCase):
+    def test_memoize(self) -> None:
+        """Lookups are remembered within a session, also when they find nothing."""
+        lookup = mock.Mock(side_effect=[None, "a", "b"])
+
+        with sync_session() as session:
+            self.assertIsNone(memoize("type", 1, lookup))
+            self.assertIsNone(memoize("type", 1, lookup))
+            with sync_session() as nested:
+                self.assertIs(nested, session)
+                self.assertEqual(memoize("type", 2, lookup), "a")
+        self.assertEqual(memoize("type", 2, lookup), "b")
+
+        self.assertEqual(lookup.call_count, 3)
+        self.assertEqual(str(session), "type 1 hits/2 misses")
+
+    def test_threads(self) -> None:
+        """Sessions belong to their thread and are shared with the workers of `run_concurrently()`."""
+        sessions: List[object] = []
+
+        def task() -> None:
+            with sync_session() as session:
+                sessions.append(session)
+
+        with sync_session() as session:
+            thread = threading.Thread(target=task)
+            thread.start()
+            thread.join()
+            run_concurrently(
+                lambda item: sessions.append(get_sync_session()), range(4), workers=2
+            )
+
+        self.assertIsNot(sessions[0], session)
+        self.assertEqual(sessions[1:], [session] * 4)
+        self.assertIsNone(get_sync_session())
+
+    def test_concurrent_misses(self) -> None:
+        """Concurrent misses of a key look it up once."""
+        calls: List[int] = []
+        lock = threading.Lock()
+
+        def lookup() -> int:
+            with lock:
+                calls.append(1)
+            time.sleep(0.05)
+            return len(calls)
+
+        with sync_session() as session:
+            run_concurrently(
+                lambda item: memoize("type", item % 2, lookup), range(8), workers=4
+            )
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(str(session), "type 6 hits/2 misses")